@@ -0,0 +1,146 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: data_passing
+   :synopsis: A module defining how data values are handed from one state to the next one
+
+The policy is selected by the DATA_PASSING_POLICY value of the core config:
+
+* ``DEEPCOPY``: every value is deep copied (the safe default)
+* ``SHALLOW``: every value is copied with :func:`copy.copy`, nested objects are shared
+* ``FROZEN``: values that cannot be changed in-place are passed by reference (copy-on-write), e.g. numbers, strings,
+  tuples of immutable values or numpy arrays, which are handed over as read-only views. All other values are deep
+  copied.
+
+Independent of the policy, the values of data ports declared as immutable are always passed by reference.
+
+``SHALLOW`` and ``FROZEN`` do not snapshot values. A read-only view aliases the array of the producing state, which can
+still change it in-place afterwards, and the execution history references the values of the scoped data.
+"""
+
+from copy import copy, deepcopy
+from enum import Enum
+
+from rafcon.core.config import global_config
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+try:
+    from numpy import ndarray
+except ImportError:
+    ndarray = None
+
+DataPassingPolicy = Enum('DATA_PASSING_POLICY', 'DEEPCOPY SHALLOW FROZEN')
+
+IMMUTABLE_TYPES = (type(None), bool, int, long, float, complex, str, unicode, type)
+
+DEFAULT_DATA_PASSING_POLICY = DataPassingPolicy.DEEPCOPY
+
+
+def get_data_passing_policy():
+    """Returns the data passing policy configured in the core config
+
+    :return: the configured policy, DEEPCOPY if the config value is invalid
+    :rtype: DataPassingPolicy
+    """
+    policy_name = global_config.get_config_value("DATA_PASSING_POLICY", DEFAULT_DATA_PASSING_POLICY.name)
+    try:
+        return DataPassingPolicy[str(policy_name).upper()]
+    except KeyError:
+        logger.warning("Invalid data passing policy '{0}', falling back to {1}".format(
+            policy_name, DEFAULT_DATA_PASSING_POLICY.name))
+        return DEFAULT_DATA_PASSING_POLICY
+
+
+def is_immutable(value):
+    """Checks whether a value cannot be changed in-place and thus can be shared between states
+
+    :param value: the value to check
+    :return: True if the value is immutable
+    :rtype: bool
+    """
+    if isinstance(value, IMMUTABLE_TYPES):
+        return True
+    if isinstance(value, (tuple, frozenset)):
+        return all(is_immutable(element) for element in value)
+    return False
+
+
+def freeze(value):
+    """Returns a version of the value that can be handed to another state without copying it
+
+    Immutable values are returned directly, numpy arrays as read-only views on the same memory. For all other values
+    a deep copy is returned. The views are no snapshots: in-place changes the producer makes to its (writable) array
+    afterwards are visible through the view.
+
+    :param value: the value to be frozen
+    :return: the frozen value
+    """
+    if is_immutable(value):
+        return value
+    if ndarray is not None and isinstance(value, ndarray):
+        if not value.flags.writeable:
+            return value
+        read_only_view = value.view()
+        read_only_view.flags.writeable = False
+        return read_only_view
+    return deepcopy(value)
+
+
+def pass_value(value, immutable=False, policy=None):
+    """Prepares a value to be handed from one state to another
+
+    :param value: the value to be passed
+    :param bool immutable: True if the data port the value belongs to is declared immutable
+    :param DataPassingPolicy policy: the policy to use, the configured policy is used if None
+    :return: the value to be handed over
+    """
+    if immutable:
+        return value
+    if policy is None:
+        policy = get_data_passing_policy()
+    if policy is DataPassingPolicy.DEEPCOPY:
+        return deepcopy(value)
+    if policy is DataPassingPolicy.SHALLOW:
+        return copy(value)
+    return freeze(value)
+
+
+def copy_scoped_data(scoped_data, policy=None):
+    """Copies the scoped data of a container state, e.g. to keep it in the execution history
+
+    Scoped data entries are replaced and never modified when a state writes new data. Therefore, apart from the
+    DEEPCOPY policy, a flat copy of the dictionary is sufficient. With SHALLOW and FROZEN, the copy thus references the
+    values: if a state changes a mutable value in-place later, the copy (e.g. in the execution history) changes too.
+
+    :param dict scoped_data: the scoped data dictionary of a container state
+    :param DataPassingPolicy policy: the policy to use, the configured policy is used if None
+    :return: the copy of the scoped data
+    :rtype: dict
+    """
+    if policy is None:
+        policy = get_data_passing_policy()
+    if policy is DataPassingPolicy.DEEPCOPY:
+        return deepcopy(scoped_data)
+    return dict(scoped_data)
+
+
+def copy_data_dictionary(data, policy=None):
+    """Copies a dictionary of input or output data, e.g. to keep it in the execution history
+
+    :param dict data: the data dictionary mapping data port names to values
+    :param DataPassingPolicy policy: the policy to use, the configured policy is used if None
+    :return: the copy of the data
+    :rtype: dict
+    """
+    if policy is None:
+        policy = get_data_passing_policy()
+    if policy is DataPassingPolicy.DEEPCOPY or data is None:
+        return deepcopy(data)
+    return {key: pass_value(value, policy=policy) for key, value in data.iteritems()}
@@ -28,22 +28,47 @@ global_lock_counter = 0
 
 
 def lock_state_machine(func):
+    """Decorates methods editing the persistent content of states and state elements
+
+    The state machine is locked during the edit and the edited state is marked as modified afterwards.
+    """
+    return _lock_state_machine(func, mark_modified=True)
+
+
+def lock_state_machine_runtime(func):
+    """Decorates methods changing execution runtime data of states and state elements, e.g. the input data
+
+    The state machine is locked during the change, but the state is not marked as modified, as the runtime data is not
+    stored.
+    """
+    return _lock_state_machine(func, mark_modified=False)
+
+
+def _lock_state_machine(func, mark_modified):
     @wraps_safely(func)
     def func_wrapper(*args, **kwargs):
         """ Decorate method to observable core edit methods. If the core method of rafcon core object is called
         the respective state machine object edition will be locked by the respective thread until the handed function
-        execution is finished.
+        execution is finished. Afterwards, the edited state is marked as modified.
         """
         from rafcon.core.state_elements.state_element import StateElement
+        from rafcon.core.state_elements.scope import ScopedData
         from rafcon.core.states.state import State
         global global_lock_counter
         self_reference = args[0]
         target_state_machine = None
+        modified_state = None
         if isinstance(self_reference, State):
+            modified_state = self_reference
             target_state_machine = self_reference.get_state_machine()
         elif isinstance(self_reference, StateElement):
             if self_reference.parent:
+                # scoped data is runtime data, e.g. its parent is set while the parent is executed
+                if not isinstance(self_reference, ScopedData):
+                    modified_state = self_reference.parent
                 target_state_machine = self_reference.parent.get_state_machine()
+        if not mark_modified:
+            modified_state = None
 
         if target_state_machine:
             target_state_machine.acquire_modification_lock()
@@ -54,6 +79,8 @@ def lock_state_machine(func):
             # logger.debug("Exception occurred during execution of function {0}. ".format(str(func)))
             raise
         finally:
+            if isinstance(modified_state, State):
+                modified_state.mark_modified()
             if target_state_machine:
                 target_state_machine.release_modification_lock()
                 global_lock_counter -= 1
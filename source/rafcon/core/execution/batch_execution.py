@@ -0,0 +1,137 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: batch_execution
+   :synopsis: A module to execute a state machine many times with different input data
+
+The runs are executed on copies (instances) of the state machine, each executed by its own execution engine, see
+:meth:`rafcon.core.execution.execution_engine.ExecutionEngine.get_execution_engine`. The number of instances bounds
+the number of parallel runs, finished instances are reused for the next runs. All runs share the global variable
+manager of the process.
+
+"""
+
+import copy
+import Queue
+from collections import namedtuple
+from functools import partial
+
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+DEFAULT_MAX_PARALLEL_RUNS = 4
+# the maximum time in seconds to wait for aborted runs to be stopped
+STOP_TIMEOUT = 3.
+# the time in seconds between two checks of the abort event, while waiting for finished runs
+ABORT_CHECK_INTERVAL = 0.5
+
+
+class BatchRunResult(namedtuple("BatchRunResult", ["index", "input_data", "final_outcome", "output_data"])):
+    """The result of a single run of a batch execution
+
+    :ivar int index: the position of the input data within the input data sets
+    :ivar dict input_data: the input data of the run
+    :ivar rafcon.core.state_elements.outcome.Outcome final_outcome: the final outcome of the root state
+    :ivar dict output_data: the output data of the root state
+    """
+    __slots__ = ()
+
+
+def execute_batch(state_machine, input_data_sets, max_parallel_runs=DEFAULT_MAX_PARALLEL_RUNS, abort_event=None):
+    """Executes a state machine once for each input data set
+
+    The results are yielded as soon as the runs finished, thus not necessarily in the order of the input data sets.
+    The input data sets are consumed lazily, only when an instance is available for the next run. If the generator is
+    closed before all runs finished or the abort event is set, the remaining runs are stopped.
+
+    :param rafcon.core.state_machine.StateMachine state_machine: the state machine to be executed, it is not modified
+    :param input_data_sets: an iterable of dicts with the values for the input data ports of the root state by port
+        name, missing ports get their default values
+    :param int max_parallel_runs: the maximum number of state machine instances running at the same time
+    :param threading.Event abort_event: optional event to abort the batch execution, e.g. set by a signal handler
+    :return: the results of all runs
+    :rtype: generator of BatchRunResult
+    :raises exceptions.ValueError: if max_parallel_runs is smaller than one or an input data set contains a name,
+        which is no input data port of the root state
+    :raises exceptions.TypeError: if a value of an input data set does not fit the data type of its data port
+    :raises exceptions.RuntimeError: if a run could not be started
+    """
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine
+
+    if max_parallel_runs < 1:
+        raise ValueError("At least one parallel run is required")
+
+    finished_runs = Queue.Queue()
+    instances = []
+    idle_instances = []
+    running_instances = set()
+
+    def run_finished(instance, index, input_data, execution_future):
+        result = BatchRunResult(index, input_data, execution_future.final_outcome,
+                                dict(instance.root_state.output_data))
+        finished_runs.put((result, instance))
+
+    def aborted():
+        return abort_event is not None and abort_event.is_set()
+
+    def get_result():
+        """Waits for the next finished run, returns None if the batch execution was aborted"""
+        # waiting with timeout, as signals are not handled by the main thread during a blocking wait
+        while not aborted():
+            try:
+                result, instance = finished_runs.get(timeout=ABORT_CHECK_INTERVAL)
+            except Queue.Empty:
+                continue
+            running_instances.discard(instance)
+            idle_instances.append(instance)
+            return result
+        return None
+
+    try:
+        for index, input_data in enumerate(input_data_sets):
+            if not idle_instances and len(instances) < max_parallel_runs:
+                instance = copy.copy(state_machine)
+                state_machine_manager.add_state_machine(instance)
+                instances.append(instance)
+                idle_instances.append(instance)
+            while not idle_instances:
+                result = get_result()
+                if result is None:
+                    return
+                yield result
+            if aborted():
+                return
+
+            instance = idle_instances.pop()
+            instance.check_input_data(input_data)
+            # the histories of previous runs are not needed anymore
+            instance.destroy_execution_histories()
+            last_execution_future = instance.execution_future
+            running_instances.add(instance)
+            state_machine_execution_engine.get_execution_engine(instance.state_machine_id).start(input_data=input_data)
+            if instance.execution_future is last_execution_future:
+                running_instances.discard(instance)
+                raise RuntimeError("Run {0} of state machine {1} could not be started".format(index, state_machine))
+            # the callback of the execution engine is registered first, thus the engine is finished and can be reused,
+            # as soon as the run is put to the finished runs
+            instance.execution_future.add_done_callback(partial(run_finished, instance, index, input_data))
+
+        while running_instances:
+            result = get_result()
+            if result is None:
+                return
+            yield result
+    finally:
+        for instance in instances:
+            execution_engine = state_machine_execution_engine.get_execution_engine(instance.state_machine_id)
+            if instance in running_instances:
+                execution_engine.stop()
+                if not execution_engine.join(STOP_TIMEOUT):
+                    logger.warn("Run of {0} could not be stopped".format(instance))
+            state_machine_manager.remove_state_machine(instance.state_machine_id)
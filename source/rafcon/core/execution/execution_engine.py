@@ -18,10 +18,9 @@
    :synopsis: A module that cares for the execution of the state machine
 
 """
-import copy
-import threading
 import time
 import Queue
+import itertools
 from threading import Lock, RLock
 import sys
 
@@ -37,36 +36,118 @@ logger = log.get_logger(__name__)
 class ExecutionEngine(Observable):
     """A class that cares for the execution of the state machine
 
+    The execution engine of the singleton module executes the active state machine of the state machine manager.
+    Further state machines can be executed concurrently by own execution engines, which are bound to these state
+    machines, see :meth:`get_execution_engine`. Each engine has its own execution status, step mode and run to
+    states, while all of them share the loaded libraries and compiled scripts of the process.
+
     :ivar state_machine_manager: holds the state machine manager of all states that can be executed
     :ivar status: holds the current execution status of the state machine
     :ivar execution_history: the history of the execution TODO: should be an list
 
     """
 
-    __wait_for_finishing_thread = None
+    __execution_future = None
     __running_state_machine = None
 
-    def __init__(self, state_machine_manager):
+    def __init__(self, state_machine_manager, state_machine_id=None):
+        """Constructor
+
+        :param state_machine_manager: the state machine manager holding the state machines to be executed
+        :param state_machine_id: the id of the state machine the engine is bound to or None to execute the active
+            state machine of the state machine manager
+        """
         Observable.__init__(self)
         self.state_machine_manager = state_machine_manager
+        self._state_machine_id = state_machine_id
+        self._state_machine_execution_engines = {}
         self._status = ExecutionStatus(StateMachineExecutionStatus.STOPPED)
         logger.debug("State machine execution engine initialized")
         self.start_state_paths = []
 
         self.execution_engine_lock = Lock()
-        self._run_to_states = []
-        self.run_to_states = []
+        # the paths of the states to run to, as set of strings to be checked without copying or recomputing them
+        self._run_to_states = set()
         self.state_machine_running = False
-        self.synchronization_counter = 0
+        # counts the calls of handle_execution_mode, the increment of an itertools.count is atomic, so that no lock is
+        # needed by threads executing in STARTED mode
+        self._synchronization_steps = itertools.count()
+        self._synchronization_reads = 0
+        self._synchronization_offset = 0
+        self._synchronization_read_lock = Lock()
         self.synchronization_lock = Lock()
 
+    @property
+    def state_machine_id(self):
+        """The id of the state machine the engine is bound to or None, if it executes the active state machine"""
+        return self._state_machine_id
+
+    def _get_state_machine(self):
+        """Returns the state machine executed by the engine
+
+        :return: the state machine the engine is bound to or the active state machine
+        :rtype: rafcon.core.state_machine.StateMachine
+        """
+        if self._state_machine_id is None:
+            return self.state_machine_manager.get_active_state_machine()
+        return self.state_machine_manager.state_machines.get(self._state_machine_id)
+
+    def _select_state_machine(self, state_machine_id):
+        """Selects the state machine to be executed next
+
+        :param state_machine_id: the id of the state machine
+        """
+        if self._state_machine_id is None:
+            self.state_machine_manager.active_state_machine_id = state_machine_id
+        elif state_machine_id != self._state_machine_id:
+            logger.warn("The execution engine is bound to state machine {0} and cannot execute state machine {1}"
+                        "".format(self._state_machine_id, state_machine_id))
+
+    def get_execution_engine(self, state_machine_id):
+        """Returns an execution engine bound to a state machine, to execute it concurrently to other state machines
+
+        The engines are created on first request and removed together with their state machine from the state machine
+        manager.
+
+        :param state_machine_id: the id of the state machine
+        :return: the execution engine of the state machine
+        :rtype: ExecutionEngine
+        :raises exceptions.AttributeError: if the state machine does not exist
+        """
+        if self._state_machine_id is not None:
+            return self
+        if state_machine_id not in self.state_machine_manager.state_machines:
+            raise AttributeError("There is no state machine with id {0}".format(state_machine_id))
+        if state_machine_id not in self._state_machine_execution_engines:
+            self._state_machine_execution_engines[state_machine_id] = ExecutionEngine(self.state_machine_manager,
+                                                                                     state_machine_id)
+        return self._state_machine_execution_engines[state_machine_id]
+
+    def get_execution_engines(self):
+        """Returns all execution engines bound to state machines, see :meth:`get_execution_engine`
+
+        :rtype: list of ExecutionEngine
+        """
+        return self._state_machine_execution_engines.values()
+
+    def remove_execution_engine(self, state_machine_id):
+        """Removes the execution engine bound to a state machine, see :meth:`get_execution_engine`
+
+        A still running execution of the state machine is stopped.
+
+        :param state_machine_id: the id of the state machine
+        """
+        execution_engine = self._state_machine_execution_engines.pop(state_machine_id, None)
+        if execution_engine is not None and not execution_engine.finished_or_stopped():
+            execution_engine.stop()
+
     @Observable.observed
     def pause(self):
         """Set the execution mode to paused
         """
 
-        if self.state_machine_manager.get_active_state_machine() is not None:
-            self.state_machine_manager.get_active_state_machine().root_state.recursively_pause_states()
+        if self._get_state_machine() is not None:
+            self._get_state_machine().root_state.recursively_pause_states()
 
         logger.debug("Pause execution ...")
         self.set_execution_mode(StateMachineExecutionStatus.PAUSED)
@@ -83,7 +164,7 @@ class ExecutionEngine(Observable):
                (self._status.execution_mode is StateMachineExecutionStatus.FINISHED)
 
     @Observable.observed
-    def start(self, state_machine_id=None, start_state_path=None):
+    def start(self, state_machine_id=None, start_state_path=None, input_data=None):
         """ Start state machine
 
         If no state machine is running start a specific state machine.
@@ -93,18 +174,20 @@ class ExecutionEngine(Observable):
 
         :param state_machine_id: The id if the state machine to be started
         :param start_state_path: The path of the state in the state machine, from which the execution will start
+        :param dict input_data: The values for the input data ports of the root state by port name, replacing the
+            default values, not considered when resuming
         :return:
         """
 
         if not self.finished_or_stopped():
             logger.debug("Resume execution engine ...")
             self.run_to_states = []
-            if self.state_machine_manager.get_active_state_machine() is not None:
-                self.state_machine_manager.get_active_state_machine().root_state.recursively_resume_states()
+            if self._get_state_machine() is not None:
+                self._get_state_machine().root_state.recursively_resume_states()
                 if isinstance(state_machine_id, int) and \
-                        state_machine_id != self.state_machine_manager.get_active_state_machine().state_machine_id:
+                        state_machine_id != self._get_state_machine().state_machine_id:
                     logger.info("Resumed state machine with id {0} but start of state machine id {1} was requested."
-                                "".format(self.state_machine_manager.get_active_state_machine().state_machine_id,
+                                "".format(self._get_state_machine().state_machine_id,
                                           state_machine_id))
             self.set_execution_mode(StateMachineExecutionStatus.STARTED)
         else:
@@ -116,12 +199,18 @@ class ExecutionEngine(Observable):
 
             logger.debug("Start execution engine ...")
             if state_machine_id is not None:
-                self.state_machine_manager.active_state_machine_id = state_machine_id
+                self._select_state_machine(state_machine_id)
 
-            if not self.state_machine_manager.active_state_machine_id:
+            if self._get_state_machine() is None:
                 logger.error("There exists no active state machine!")
                 return
 
+            try:
+                self._get_state_machine().check_input_data(input_data)
+            except (ValueError, TypeError), e:
+                logger.error("The state machine cannot be started: {0}".format(e))
+                return
+
             self.set_execution_mode(StateMachineExecutionStatus.STARTED)
 
             self.start_state_paths = []
@@ -136,15 +225,15 @@ class ExecutionEngine(Observable):
                         cur_path = cur_path + "/" + path
                     self.start_state_paths.append(cur_path)
 
-            self._run_active_state_machine()
+            self._run_active_state_machine(input_data)
 
     @Observable.observed
     def stop(self):
         """Set the execution mode to stopped
         """
         logger.debug("Stop the state machine execution ...")
-        if self.state_machine_manager.get_active_state_machine() is not None:
-            self.state_machine_manager.get_active_state_machine().root_state.recursively_preempt_states()
+        if self._get_state_machine() is not None:
+            self._get_state_machine().root_state.recursively_preempt_states()
         self.__set_execution_mode_to_stopped()
 
         # Notifies states waiting in step mode or those that are paused about execution stop
@@ -160,9 +249,8 @@ class ExecutionEngine(Observable):
         :return: True if the execution finished, False if no state machine was started or a timeout occurred
         :rtype: bool
         """
-        if self.__wait_for_finishing_thread:
-            self.__wait_for_finishing_thread.join(timeout)
-            return not self.__wait_for_finishing_thread.is_alive()
+        if self.__execution_future:
+            return self.__execution_future.wait(timeout)
         else:
             logger.warn("Cannot join as state machine was not started yet.")
             return False
@@ -184,7 +272,7 @@ class ExecutionEngine(Observable):
         logger.debug("Activate step mode")
 
         if state_machine_id is not None:
-            self.state_machine_manager.active_state_machine_id = state_machine_id
+            self._select_state_machine(state_machine_id)
 
         self.run_to_states = []
         if self.finished_or_stopped():
@@ -193,27 +281,38 @@ class ExecutionEngine(Observable):
         else:
             self.set_execution_mode(StateMachineExecutionStatus.FORWARD_INTO)
 
-    def _run_active_state_machine(self):
+    def _run_active_state_machine(self, input_data=None):
         """Store running state machine and observe its status
+
+        :param dict input_data: optional values for the input data ports of the root state
         """
 
-        # Create new concurrency queue for root state to be able to synchronize with the execution
-        self.__running_state_machine = self.state_machine_manager.get_active_state_machine()
-        self.__running_state_machine.root_state.concurrency_queue = Queue.Queue(maxsize=0)
+        self.__running_state_machine = self._get_state_machine()
 
         if self.__running_state_machine:
-            self.__running_state_machine.start()
-
-            self.__wait_for_finishing_thread = threading.Thread(target=self._wait_for_finishing)
-            self.__wait_for_finishing_thread.start()
+            execution_engine = self.__running_state_machine.execution_engine
+            if execution_engine is not None and execution_engine is not self and \
+                    not execution_engine.finished_or_stopped():
+                logger.error("The state machine is already executed by another execution engine!")
+                self.__running_state_machine = None
+                self.set_execution_mode(StateMachineExecutionStatus.STOPPED)
+                return
+            # the states of the state machine handle their execution mode with this engine
+            self.__running_state_machine.execution_engine = self
+            # Create new concurrency queue for root state to be able to synchronize with the execution
+            self.__running_state_machine.root_state.concurrency_queue = Queue.Queue(maxsize=0)
+            self.state_machine_running = True
+            self.__execution_future = self.__running_state_machine.start(input_data)
+            self.__execution_future.add_done_callback(self._on_execution_finished)
         else:
             logger.warn("Currently no active state machine! Please create a new state machine.")
             self.set_execution_mode(StateMachineExecutionStatus.STOPPED)
 
-    def _wait_for_finishing(self):
-        """Observe running state machine and stop engine if execution has finished"""
-        self.state_machine_running = True
-        self.__running_state_machine.join()
+    def _on_execution_finished(self, execution_future):
+        """Stops the engine, called by the thread of the root state when the execution has finished
+
+        :param rafcon.core.execution.execution_future.ExecutionFuture execution_future: the finished execution run
+        """
         self.__set_execution_mode_to_finished()
         plugins.run_on_state_machine_execution_finished()
         # self.__set_execution_mode_to_stopped()
@@ -263,21 +362,19 @@ class ExecutionEngine(Observable):
         """Execute the state machine until a specific state. This state won't be executed. This is an asynchronous task
         """
 
-        if self.state_machine_manager.get_active_state_machine() is not None:
-            self.state_machine_manager.get_active_state_machine().root_state.recursively_resume_states()
+        if self._get_state_machine() is not None:
+            self._get_state_machine().root_state.recursively_resume_states()
 
         if not self.finished_or_stopped():
             logger.debug("Resume execution engine and run to selected state!")
-            self.run_to_states = []
-            self.run_to_states.append(path)
+            self.run_to_states = [path]
             self.set_execution_mode(StateMachineExecutionStatus.RUN_TO_SELECTED_STATE)
         else:
             logger.debug("Start execution engine and run to selected state!")
             if state_machine_id is not None:
-                self.state_machine_manager.active_state_machine_id = state_machine_id
+                self._select_state_machine(state_machine_id)
             self.set_execution_mode(StateMachineExecutionStatus.RUN_TO_SELECTED_STATE)
-            self.run_to_states = []
-            self.run_to_states.append(path)
+            self.run_to_states = [path]
             self._run_active_state_machine()
 
     # depending on the execution state wait for the execution condition variable to be notified
@@ -292,15 +389,18 @@ class ExecutionEngine(Observable):
         :param state: the state that as for the execution mode is only passed for debugging reasons
         :return: the current state machine execution status
         """
-        self.synchronization_lock.acquire()
-        self.synchronization_counter += 1
-        self.synchronization_lock.release()
-
-        if self._status.execution_mode is StateMachineExecutionStatus.STARTED:
-            # logger.debug("Execution engine started!")
-            pass
-
-        elif self._status.execution_mode is StateMachineExecutionStatus.STOPPED:
+        execution_mode = self._status.execution_mode
+        if execution_mode is StateMachineExecutionStatus.STARTED:
+            # fast path for runs without stepping: no locks and no path computations
+            next(self._synchronization_steps)
+            state.execution_history.new_execution_command_handled = True
+            return execution_mode
+
+        # while stepping, threads reading and resetting the counter under the lock must not miss any step
+        with self.synchronization_lock:
+            next(self._synchronization_steps)
+
+        if self._status.execution_mode is StateMachineExecutionStatus.STOPPED:
             logger.debug("Execution engine stopped. State '{0}' is going to quit in the case of "
                          "no preemption handling has to be done!".format(state.name))
 
@@ -319,35 +419,31 @@ class ExecutionEngine(Observable):
         else:  # all other step modes
             logger.debug("Stepping mode: waiting for next step!")
 
-            wait = True
-            # if there is not state in self.run_to_states then RAFCON waits for the next user input and simply does
-            # one step
-            for state_path in copy.deepcopy(self.run_to_states):
-                next_child_state_path = None
-                # can be None in case of no transition given
-                if next_child_state_to_execute:
-                    next_child_state_path = next_child_state_to_execute.get_path()
-                if state_path == state.get_path():
+            state_path = state.get_path()
+            next_child_state_path = None
+            # can be None in case of no transition given
+            if next_child_state_to_execute:
+                next_child_state_path = next_child_state_to_execute.get_path()
+
+            with self.execution_engine_lock:
+                if state_path in self._run_to_states:
                     # the execution did a whole step_over for the hierarchy state "state"
                     # or a whole step_out for the hierarchy state "state"
                     # thus we delete its state path from self.run_to_states
                     # and wait for another step (of maybe different kind)
                     wait = True
-                    self.run_to_states.remove(state_path)
-                    break
-                elif state_path == next_child_state_path:
+                    self._run_to_states.discard(state_path)
+                elif next_child_state_path in self._run_to_states:
                     # this is the case that execution has reached a specific state explicitly marked via
                     # run_to_selected_state(); if this is the case run_to_selected_state() is finished and the execution
                     # has to wait for new execution commands
                     wait = True
-                    self.run_to_states.remove(state_path)
-                    break
-                # if there is an element in self.run_to_states which is not the same as state.get_path(),
-                # in this case the execution does not have to wait and has to run until the selected state is reached
+                    self._run_to_states.discard(next_child_state_path)
                 else:
-                    wait = False
-                    # do not break here, the state_path may be of another state machine branch
-                    # break
+                    # if there is not state in self.run_to_states then RAFCON waits for the next user input and simply
+                    # does one step; if there are paths of other states (maybe of another state machine branch), the
+                    # execution does not have to wait and has to run until the selected state is reached
+                    wait = not self._run_to_states
 
             if wait:
                 try:
@@ -367,7 +463,7 @@ class ExecutionEngine(Observable):
                 # the state that called this method is a hierarchy state => thus we save this state and wait until this
                 # very state will execute its next state; only then we will wait on the condition variable
                 if not state.execution_history.new_execution_command_handled:
-                    self.run_to_states.append(state.get_path())
+                    self._add_run_to_state(state_path)
                 else:
                     pass
             elif self._status.execution_mode is StateMachineExecutionStatus.FORWARD_OUT:
@@ -379,7 +475,7 @@ class ExecutionEngine(Observable):
                     else:
                         parent_path = state.parent.get_path()
                     if not state.execution_history.new_execution_command_handled:
-                        self.run_to_states.append(parent_path)
+                        self._add_run_to_state(parent_path)
                     else:
                         pass
                 else:
@@ -407,13 +503,12 @@ class ExecutionEngine(Observable):
         """
         if self._status.execution_mode is StateMachineExecutionStatus.FORWARD_OVER or \
             self._status.execution_mode  is StateMachineExecutionStatus.FORWARD_OUT:
-            step_over_to_step_out_transform_found = False
-            for state_path in copy.deepcopy(self.run_to_states):
-                if state_path == state.get_path():
-                    self.run_to_states.remove(state_path)
-                    step_over_to_step_out_transform_found = True
-                    logger.debug("Step_over is transformed to a step out for state %s!", state.name)
+            state_path = state.get_path()
+            with self.execution_engine_lock:
+                step_over_to_step_out_transform_found = state_path in self._run_to_states
+                self._run_to_states.discard(state_path)
             if step_over_to_step_out_transform_found:
+                logger.debug("Step_over is transformed to a step out for state %s!", state.name)
                 from rafcon.core.states.state import State
                 if isinstance(state.parent, State):
                     from rafcon.core.states.library_state import LibraryState
@@ -421,7 +516,7 @@ class ExecutionEngine(Observable):
                         parent_path = state.parent.parent.get_path()
                     else:
                         parent_path = state.parent.get_path()
-                    self.run_to_states.append(parent_path)
+                    self._add_run_to_state(parent_path)
 
     def execute_state_machine_from_path(self, state_machine=None, path=None, start_state_path=None, wait_for_execution_finished=True):
         """ A helper function to start an arbitrary state machine at a given path.
@@ -477,17 +572,39 @@ class ExecutionEngine(Observable):
     def run_to_states(self):
         """Property for the _run_to_states field
 
+        :return: a copy of the paths of the states to run to
+        :rtype: list
         """
-        self.execution_engine_lock.acquire()
-        return_value = self._run_to_states
-        self.execution_engine_lock.release()
-        return return_value
+        with self.execution_engine_lock:
+            return sorted(self._run_to_states)
 
     @run_to_states.setter
     def run_to_states(self, run_to_states):
-        if not isinstance(run_to_states, list):
+        if not isinstance(run_to_states, (list, set)):
             raise TypeError("run_to_states must be of type list")
-        self.execution_engine_lock.acquire()
-        self._run_to_states = run_to_states
-        self.execution_engine_lock.release()
+        with self.execution_engine_lock:
+            self._run_to_states = set(run_to_states)
+
+    def _add_run_to_state(self, state_path):
+        with self.execution_engine_lock:
+            self._run_to_states.add(state_path)
+
+    @property
+    def synchronization_counter(self):
+        """The number of calls of :meth:`handle_execution_mode` since the counter was reset
+
+        Threads resetting the counter after reading it, have to hold the synchronization_lock.
+        """
+        with self._synchronization_read_lock:
+            # reading the value of an itertools.count increments it as well
+            value = next(self._synchronization_steps) - self._synchronization_reads
+            self._synchronization_reads += 1
+        return value - self._synchronization_offset
+
+    @synchronization_counter.setter
+    def synchronization_counter(self, synchronization_counter):
+        with self._synchronization_read_lock:
+            value = next(self._synchronization_steps) - self._synchronization_reads
+            self._synchronization_reads += 1
+            self._synchronization_offset = value - synchronization_counter
 
@@ -0,0 +1,93 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: execution_future
+   :synopsis: A module providing the completion of a single execution run of a state machine
+
+"""
+
+import threading
+
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+
+class ExecutionFuture(object):
+    """The completion of a single execution run of a state machine
+
+    The future is completed by the thread of the root state, right after the run of the root state returned. Thus,
+    waiting for the end of an execution does not need any polling or additional threads.
+
+    :ivar rafcon.core.state_machine.StateMachine state_machine: the executed state machine
+    :ivar rafcon.core.execution.execution_history.ExecutionHistory execution_history: the history of the run
+    :ivar rafcon.core.state_elements.outcome.Outcome final_outcome: the final outcome of the root state, available
+        as soon as the run is done
+    """
+
+    def __init__(self, state_machine, execution_history=None):
+        self.state_machine = state_machine
+        self.execution_history = execution_history
+        self.final_outcome = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._callbacks = []
+        self._callbacks_run = False
+
+    def done(self):
+        """Whether the run finished
+
+        :rtype: bool
+        """
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Blocking wait for the run to finish
+
+        :param float timeout: the maximum time to wait in seconds, None waits infinitely
+        :return: True if the run finished, False if the timeout occurred
+        :rtype: bool
+        """
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback):
+        """Adds a function to be called when the run finished
+
+        The callbacks are called with the future as only argument, by the thread finishing the run, before any waiting
+        thread is woken up. If the run already finished, the callback is called right away.
+
+        :param callback: the function to be called
+        """
+        with self._lock:
+            if not self._callbacks_run:
+                self._callbacks.append(callback)
+                return
+        self._run_callback(callback)
+
+    def set_finished(self, final_outcome=None):
+        """Marks the run as finished
+
+        Called by the state machine once its root state finished.
+
+        :param final_outcome: the final outcome of the root state
+        """
+        with self._lock:
+            if self._callbacks_run:
+                return
+            self.final_outcome = final_outcome
+            self._callbacks_run = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._run_callback(callback)
+        self._done.set()
+
+    def _run_callback(self, callback):
+        try:
+            callback(self)
+        except Exception:
+            logger.exception("Error in callback of execution run of {0}".format(self.state_machine))
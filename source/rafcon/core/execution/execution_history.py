@@ -19,7 +19,8 @@
 """
 import time
 import copy
-from collections import Iterable, Sized
+import sys
+from collections import Iterable, Sized, deque
 import json
 from jsonconversion.decoder import JSONObjectDecoder
 from jsonconversion.encoder import JSONObjectEncoder
@@ -31,6 +32,9 @@ from gtkmvc import Observable
 import traceback
 
 from rafcon.core.id_generator import history_item_id_generator
+from rafcon.core.config import global_config
+from rafcon.core.data_passing import copy_scoped_data, copy_data_dictionary, get_data_passing_policy, \
+    DataPassingPolicy
 from rafcon.utils import log
 logger = log.get_logger(__name__)
 import os
@@ -43,6 +47,7 @@ class ExecutionHistoryStorage(object):
     def __init__(self, filename):
         self.filename = filename
         self.store_lock = Lock()
+        self._state_data_item_ids = {}
         try:
             # 'c' for read/write/create
             # protocol 2 cause of in some cases smaller file size
@@ -53,8 +58,16 @@ class ExecutionHistoryStorage(object):
             logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
 
     def store_item(self, key, value):
+        """Stores a history item in the shelve
+
+        :param str key: the history item id
+        :param value: the history item or its record
+        :type value: HistoryItem | dict
+        """
         self.store_lock.acquire()
         try:
+            if isinstance(value, HistoryItem):
+                value = value.to_dict(self._state_data_item_ids)
             self.store[key] = value
         except Exception as e:
             logger.error('Exception: ' + str(e) + str(traceback.format_exc()))
@@ -99,21 +112,73 @@ class ExecutionHistoryStorage(object):
             self.store_lock.release()
 
 
+class ExecutionHistoryRetentionPolicy(object):
+    """Defines how many history items an execution history keeps in memory
+
+    If one of the limits is exceeded, the oldest items are discarded. If a file log is enabled, all items are still
+    contained in the log file. A value of None disables the respective limit.
+
+    :ivar int max_items: the maximum number of history items
+    :ivar int max_bytes: the maximum (estimated) memory size of the history items in bytes
+    :ivar int max_steps: the maximum number of state executions, i.e. the number of possible backward steps
+    """
+
+    def __init__(self, max_items=None, max_bytes=None, max_steps=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+
+    @classmethod
+    def from_config(cls):
+        """Creates the retention policy defined by the core config
+
+        :return: the configured retention policy
+        :rtype: ExecutionHistoryRetentionPolicy
+        """
+        return cls(global_config.get_config_value("EXECUTION_HISTORY_MAX_ITEMS", None),
+                   global_config.get_config_value("EXECUTION_HISTORY_MAX_BYTES", None),
+                   global_config.get_config_value("EXECUTION_HISTORY_MAX_STEPS", None))
+
+    @property
+    def is_limited(self):
+        return self.max_items is not None or self.max_bytes is not None or self.max_steps is not None
+
+    def is_exceeded(self, number_of_items, number_of_bytes, number_of_steps):
+        """Checks whether the passed history dimensions exceed one of the limits
+
+        :param int number_of_items: the number of history items
+        :param int number_of_bytes: the estimated memory size of the history items
+        :param int number_of_steps: the number of state executions
+        :return: True if items have to be discarded
+        :rtype: bool
+        """
+        return (self.max_items is not None and number_of_items > self.max_items) or \
+               (self.max_bytes is not None and number_of_bytes > self.max_bytes) or \
+               (self.max_steps is not None and number_of_steps > self.max_steps)
+
+
 class ExecutionHistory(Observable, Iterable, Sized):
     """A class for the history of a state machine execution
 
-        It stores all history elements in a stack wise fashion.
+        It stores all history elements in a stack wise fashion. The number of elements kept can be limited by a
+        retention policy, which discards the oldest elements. The first remaining element then has no previous element.
 
         :ivar initial_prev: optional link to a previous element for the first element pushed into this history of
                             type :class:`rafcon.core.execution.execution_history.HistoryItem`
+        :ivar ExecutionHistoryRetentionPolicy retention_policy: the policy limiting the number of kept elements
+        :ivar int number_of_discarded_items: the number of elements discarded because of the retention policy
     """
 
-    def __init__(self, initial_prev=None):
+    def __init__(self, initial_prev=None, retention_policy=None):
         super(ExecutionHistory, self).__init__()
-        self._history_items = []            
+        self._history_items = deque()
         self.initial_prev = initial_prev
         self.execution_history_storage = None
         self.new_execution_command_handled = True
+        self.retention_policy = retention_policy if retention_policy is not None else ExecutionHistoryRetentionPolicy()
+        self.number_of_discarded_items = 0
+        self._number_of_bytes = 0
+        self._number_of_steps = 0
 
     def destroy(self):
         # logger.verbose("Destroy execution history!")
@@ -138,8 +203,15 @@ class ExecutionHistory(Observable, Iterable, Sized):
         return len(self._history_items)
 
     def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._history_items)[index]
         return self._history_items[index]
 
+    @property
+    def truncated(self):
+        """True if older history items were discarded because of the retention policy"""
+        return self.number_of_discarded_items > 0
+
     def get_last_history_item(self):
         """Returns the history item that was added last
 
@@ -154,13 +226,43 @@ class ExecutionHistory(Observable, Iterable, Sized):
     def _push_item(self, last_history_item, current_item):
         if last_history_item is None:
             current_item.prev = self.initial_prev
+            if self.initial_prev is not None:
+                current_item.prev_history_item_id = self.initial_prev.history_item_id
         if last_history_item is not None:
             last_history_item.next = current_item
         if self.execution_history_storage is not None:
-            self.execution_history_storage.store_item(current_item.history_item_id, current_item.to_dict())
-        self._history_items.append(current_item)
+            self.execution_history_storage.store_item(current_item.history_item_id, current_item)
+        self._append_item(current_item)
         return current_item
 
+    def _append_item(self, history_item):
+        self._history_items.append(history_item)
+        if not self.retention_policy.is_limited:
+            return
+        self._update_statistics(history_item, 1)
+        while len(self._history_items) > 1 and self.retention_policy.is_exceeded(
+                len(self._history_items), self._number_of_bytes, self._number_of_steps):
+            self._discard_oldest_item()
+
+    def _update_statistics(self, history_item, sign):
+        if self.retention_policy.max_bytes is not None:
+            self._number_of_bytes += sign * history_item.estimated_size
+        if isinstance(history_item, ReturnItem):
+            self._number_of_steps += sign
+
+    def _discard_oldest_item(self):
+        """Removes the oldest history item from memory
+
+        The item is still contained in the file log, if enabled. The link of the now oldest item to the removed item
+        is cut, so that the removed item (and all items the removed item references) can be freed.
+        """
+        history_item = self._history_items.popleft()
+        self._update_statistics(history_item, -1)
+        self.number_of_discarded_items += 1
+        if self._history_items and self._history_items[0].prev is history_item:
+            self._history_items[0].prev = None
+        history_item.next = None
+
     @Observable.observed
     def push_call_history_item(self, state, call_type, state_for_scoped_data, input_data=None):
         """Adds a new call-history-item to the history item list
@@ -217,15 +319,15 @@ class ExecutionHistory(Observable, Iterable, Sized):
         last_history_item = self.get_last_history_item()
         return_item = ConcurrencyItem(state, self.get_last_history_item(),
                                       number_concurrent_threads, state.run_id,
-                                      self.execution_history_storage)
+                                      self.execution_history_storage, self.retention_policy)
         return self._push_item(last_history_item, return_item)
 
     @Observable.observed
     def push_state_machine_start_history_item(self, state_machine, run_id):
         return_item = StateMachineStartItem(state_machine, run_id)
         if self.execution_history_storage is not None:
-            self.execution_history_storage.store_item(return_item.history_item_id, return_item.to_dict())
-        self._history_items.append(return_item)
+            self.execution_history_storage.store_item(return_item.history_item_id, return_item)
+        self._append_item(return_item)
         return return_item
 
     @Observable.observed
@@ -236,10 +338,13 @@ class ExecutionHistory(Observable, Iterable, Sized):
         :rtype: HistoryItem
         """
         try:
-            return self._history_items.pop()
+            history_item = self._history_items.pop()
         except IndexError:
             logger.error("No item left in the history item list in the execution history.")
             return None
+        if self.retention_policy.is_limited:
+            self._update_statistics(history_item, -1)
+        return history_item
 
 
 class HistoryItem(object):
@@ -248,6 +353,10 @@ class HistoryItem(object):
     An abstract class that serves as a data structure to hold all important information of a certain point in time
     during the execution of a state machine. A history item is an element in a doubly linked history item list.
 
+    Creating a history item only takes a snapshot of the data. The serialization into a record for the execution log
+    (:meth:`to_dict`) is deferred to the storage of the execution history, which might run it in another thread. In
+    this case, the storage calls :meth:`serialize_shared_data` first.
+
     :ivar state_reference: a reference to the state performing a certain action that is going to be saved
     :ivar path: the state path
     :ivar timestamp: the time of the call/return
@@ -257,10 +366,22 @@ class HistoryItem(object):
 
     def __init__(self, state, prev, run_id):
         self._state_reference = state
-        self.path = copy.deepcopy(state.get_path())
+        self.path = state.get_path()
+        # the names are captured now, as the state can be renamed before the item is serialized
+        self.path_by_name = state.get_path(by_name=True)
+        from rafcon.core.states.library_state import LibraryState  # delayed imported on purpose
+        if isinstance(state, LibraryState):
+            # in case of a Library State, all the data of the library itself should be used
+            self.state_name = state.state_copy.name
+            self.library_state_name = state.name
+        else:
+            self.state_name = state.name
+            self.library_state_name = None
         self.timestamp = time.time()
         self.run_id = run_id
         self.prev = prev
+        # the id is kept separately, as the link to the previous item can be cut before the item is serialized
+        self.prev_history_item_id = prev.history_item_id if prev is not None else None
         self.next = None
         self.history_item_id = history_item_id_generator()
         self.state_type = str(type(state).__name__)
@@ -268,6 +389,9 @@ class HistoryItem(object):
     def destroy(self):
         self._state_reference = None
         self.path = None
+        self.path_by_name = None
+        self.state_name = None
+        self.library_state_name = None
         self.timestamp = None
         self.run_id = None
         self.prev = None
@@ -284,20 +408,44 @@ class HistoryItem(object):
     def __str__(self):
         return "HistoryItem with reference state name %s (time: %s)" % (self.state_reference.name, self.timestamp)
 
-    def to_dict(self):
+    @property
+    def estimated_size(self):
+        """An estimation of the memory occupied by the history item in bytes
+
+        Only the item and the values directly referenced by it are considered.
+        """
+        return sys.getsizeof(self) + sys.getsizeof(self.__dict__)
+
+    def serialize_shared_data(self):
+        """Serializes all data of the item that is shared with the executed states
+
+        Must be called by the executing thread before :meth:`to_dict` is deferred to another thread, as the executed
+        states could modify shared data in the meantime.
+        """
+        pass
+
+    def to_dict(self, state_data_item_ids=None):
+        """Serializes the history item into a record for the execution log
+
+        :param dict state_data_item_ids: if passed, the semantic data and the description of a state are only
+            contained in the first record of the state. The dict maps each state to the id of that record and is
+            updated accordingly. All records of a state refer to the record holding the data with the key
+            'state_data_item_id'.
+        :return: the record
+        :rtype: dict
+        """
         record = dict()
 
-        # here always the correct path is desired
-        record['path'] = self.state_reference.get_path()
-        record['path_by_name'] = self.state_reference.get_path(by_name=True)
-        record['state_type'] = str(type(self.state_reference).__name__)
+        record['path'] = self.path
+        record['path_by_name'] = self.path_by_name
+        record['state_type'] = self.state_type
 
         from rafcon.core.states.library_state import LibraryState  # delayed imported on purpose
         if isinstance(self.state_reference, LibraryState):
             # in case of a Library State, all the data of the library itself should be used
             target_state = self.state_reference.state_copy
             record['is_library'] = True
-            record['library_state_name'] = self.state_reference.name
+            record['library_state_name'] = self.library_state_name
             record['library_name'] = self.state_reference.library_name
             record['library_path'] = self.state_reference.library_path
         else:
@@ -309,26 +457,30 @@ class HistoryItem(object):
 
         # there are 3 names of interest:
         # library_name (= library key), library_state_name (name of the user), state_name (name of the developer)
-        record['state_name'] = target_state.name
+        record['state_name'] = self.state_name
         record['timestamp'] = self.timestamp
         record['run_id'] = self.run_id  # library state and state copy have the same run_id
         record['history_item_id'] = self.history_item_id
 
-        # semantic data
-        semantic_data_dict = {}
-        for k, v in target_state.semantic_data.iteritems():
-            try:
-                semantic_data_dict[k] = pickle.dumps(v)
-            except Exception as e:
-                semantic_data_dict['!' + k] = (str(e), str(v))
-        record['semantic_data'] = semantic_data_dict
-
-        record['description'] = target_state.description
-
-        if self.prev is not None:
-            record['prev_history_item_id'] = self.prev.history_item_id
+        state_key = (record['path'], record['state_type'])
+        if state_data_item_ids is not None and state_key in state_data_item_ids:
+            record['state_data_item_id'] = state_data_item_ids[state_key]
         else:
-            record['prev_history_item_id'] = None
+            if state_data_item_ids is not None:
+                state_data_item_ids[state_key] = self.history_item_id
+                record['state_data_item_id'] = self.history_item_id
+            # semantic data
+            semantic_data_dict = {}
+            for k, v in target_state.semantic_data.iteritems():
+                try:
+                    semantic_data_dict[k] = pickle.dumps(v)
+                except Exception as e:
+                    semantic_data_dict['!' + k] = (str(e), str(v))
+            record['semantic_data'] = semantic_data_dict
+
+            record['description'] = target_state.description
+
+        record['prev_history_item_id'] = self.prev_history_item_id
         # store the specialized class name as item_type,
         # e.g. CallItem, ReturnItem, StatemachineStartItem when saved
         record['item_type'] = self.__class__.__name__
@@ -346,7 +498,8 @@ class StateMachineStartItem(HistoryItem):
     def __str__(self):
         return "StateMachineStartItem with name %s (time: %s)" % (self.sm_dict['root_state_storage_id'], self.timestamp)
 
-    def to_dict(self):
+    def to_dict(self, state_data_item_ids=None):
+        # the start item always contains the semantic data and description of the root state
         record = HistoryItem.to_dict(self)
         record.update(self.sm_dict)
         record['call_type'] = 'EXECUTE'
@@ -355,10 +508,7 @@ class StateMachineStartItem(HistoryItem):
         record['path'] = ''
         record['path_by_name'] = ''
         record['os_environment'] = self.os_environment
-        if self.prev is not None:
-            record['prev_history_item_id'] = self.prev.history_item_id
-        else:
-            record['prev_history_item_id'] = None
+        record['prev_history_item_id'] = None
         return record
 
 
@@ -377,11 +527,20 @@ class ScopedDataItem(HistoryItem):
         else:
             raise Exception('unkown calltype, neither CONTAINER nor EXECUTE')
         self.call_type = call_type
-        self.scoped_data = {} if state_for_scoped_data is None else copy.deepcopy(state_for_scoped_data._scoped_data)
-        self.child_state_input_output_data = copy.deepcopy(child_state_input_output_data)
-
-    def to_dict(self):
-        record = HistoryItem.to_dict(self)
+        # the data is copied according to the data passing policy, which defaults to deep copies
+        policy = get_data_passing_policy()
+        self.scoped_data = {} if state_for_scoped_data is None else copy_scoped_data(state_for_scoped_data._scoped_data,
+                                                                                     policy)
+        self.child_state_input_output_data = copy_data_dictionary(child_state_input_output_data, policy)
+        # apart from deep copies, the copied data still shares values with the executed states
+        self._data_shared = policy is not DataPassingPolicy.DEEPCOPY
+        self._serialized_data = None
+
+    def serialize_shared_data(self):
+        if self._data_shared and self._serialized_data is None:
+            self._serialized_data = self._serialize_data()
+
+    def _serialize_data(self):
         scoped_data_dict = {}
         for k, v in self.scoped_data.iteritems():
             try:
@@ -391,7 +550,6 @@ class ScopedDataItem(HistoryItem):
             # logger.debug('TypeError: Could not serialize one of the scoped data port types.')
             # record['scoped_data'] = json.dumps({'error_type': 'TypeError',
             #                                     'error_message': e.message}, cls=JSONObjectEncoder)
-        record['scoped_data'] = scoped_data_dict
 
         child_state_input_output_dict = {}
         for k, v in self.child_state_input_output_data.iteritems():
@@ -399,7 +557,14 @@ class ScopedDataItem(HistoryItem):
                 child_state_input_output_dict[k] = pickle.dumps(v)
             except Exception as e:
                 child_state_input_output_dict['!' + k] = (str(e), str(v))
-        record['input_output_data'] = child_state_input_output_dict
+        return scoped_data_dict, child_state_input_output_dict
+
+    def to_dict(self, state_data_item_ids=None):
+        record = HistoryItem.to_dict(self, state_data_item_ids)
+        if self._serialized_data is not None:
+            record['scoped_data'], record['input_output_data'] = self._serialized_data
+        else:
+            record['scoped_data'], record['input_output_data'] = self._serialize_data()
 
         # from rafcon.core.states.container_state import ContainerState
         # if isinstance(self.state_reference, ContainerState):
@@ -422,6 +587,16 @@ class ScopedDataItem(HistoryItem):
     def __str__(self):
         return "SingleItem %s" % (HistoryItem.__str__(self))
 
+    @property
+    def estimated_size(self):
+        size = HistoryItem.estimated_size.fget(self)
+        for scoped_data in self.scoped_data.itervalues():
+            size += sys.getsizeof(scoped_data.value)
+        if self.child_state_input_output_data:
+            for value in self.child_state_input_output_data.itervalues():
+                size += sys.getsizeof(value)
+        return size
+
 
 class CallItem(ScopedDataItem):
     """A history item to represent a state call
@@ -433,8 +608,8 @@ class CallItem(ScopedDataItem):
     def __str__(self):
         return "CallItem %s" % (ScopedDataItem.__str__(self))
 
-    def to_dict(self):
-        record = ScopedDataItem.to_dict(self)
+    def to_dict(self, state_data_item_ids=None):
+        record = ScopedDataItem.to_dict(self, state_data_item_ids)
         return record
 
 
@@ -448,8 +623,8 @@ class ReturnItem(ScopedDataItem):
     def __str__(self):
         return "ReturnItem %s" % (ScopedDataItem.__str__(self))
 
-    def to_dict(self):
-        record = ScopedDataItem.to_dict(self)
+    def to_dict(self, state_data_item_ids=None):
+        record = ScopedDataItem.to_dict(self, state_data_item_ids)
         if self.outcome is not None:
             record['outcome_name'] = self.outcome.to_dict()['name']
             record['outcome_id'] = self.outcome.to_dict()['outcome_id']
@@ -462,20 +637,21 @@ class ReturnItem(ScopedDataItem):
 class ConcurrencyItem(HistoryItem):
     """A class to hold all the data for an invocation of several concurrent threads.
     """
-    def __init__(self, container_state, prev, number_concurrent_threads, run_id, execution_history_storage):
+    def __init__(self, container_state, prev, number_concurrent_threads, run_id, execution_history_storage,
+                 retention_policy=None):
         HistoryItem.__init__(self, container_state, prev, run_id)
         self.execution_histories = []
 
         for i in range(number_concurrent_threads):
-            execution_history = ExecutionHistory(initial_prev=self)
+            execution_history = ExecutionHistory(initial_prev=self, retention_policy=retention_policy)
             execution_history.set_execution_history_storage(execution_history_storage)
             self.execution_histories.append(execution_history)
 
     def __str__(self):
         return "ConcurrencyItem %s" % (HistoryItem.__str__(self))
 
-    def to_dict(self):
-        record = HistoryItem.to_dict(self)
+    def to_dict(self, state_data_item_ids=None):
+        record = HistoryItem.to_dict(self, state_data_item_ids)
         record['call_type'] = 'CONTAINER'
         return record
 
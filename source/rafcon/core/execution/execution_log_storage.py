@@ -0,0 +1,658 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: execution_log_storage
+   :synopsis: A module for writing the execution history to an append-only log file in a background thread and for
+              reading such log files
+
+The history items of the execution history are handed to a writer thread via a bounded queue. The writer thread
+collects the queued items into batches, serializes them and appends them to the log file. Thus, the executing states
+only pay for putting the history item into the queue.
+
+A log file starts with :data:`LOG_FILE_HEADER`, followed by the records. Each record consists of the length of its
+payload (unsigned 32 bit integer, little endian) and the payload itself, which is the pickled tuple
+``(history_item_id, record_dict)``.
+
+Next to the log file, an index file (same name with the extension ``.idx``) is written. It holds one entry of fixed
+size per record: the 64 bit hashes of the history item id and of the run id and the offset of the record in the log
+file. As the index file is appended in the order of the records, a sorted index (extension ``.sidx``) is created from
+it, when the log file is closed or when a reader finds no up-to-date sorted index. It holds the same entries twice,
+sorted by the hash of the history item id and sorted by the hash of the run id. The sorted index is memory mapped by
+the reader and searched binary, which allows to access single history items or all items of a run without reading the
+whole log file or index.
+
+If the queue is full, the behaviour is defined by the backpressure policy:
+
+* ``BLOCK``: the executing state waits until the writer thread has free space in the queue (no record is lost)
+* ``DROP``: the record is dropped
+* ``SAMPLE``: only every n-th record is kept (waiting for free space), all others are dropped
+"""
+
+import os
+import mmap
+import shelve
+import struct
+import hashlib
+import subprocess
+import threading
+import Queue
+import cPickle as pickle
+from enum import Enum
+
+from rafcon.core.config import global_config
+from rafcon.core.execution.execution_history import HistoryItem
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+LOG_FILE_HEADER = "RAFCON_EXECUTION_LOG\x00\x01\n"
+LOG_FILE_EXTENSION = "log"
+INDEX_FILE_EXTENSION = "idx"
+RECORD_LENGTH = struct.Struct("<I")
+INDEX_ENTRY = struct.Struct("<QQQ")  # hash of the history item id, hash of the run id, offset of the record
+SORTED_INDEX_FILE_EXTENSION = "sidx"
+SORTED_INDEX_MAGIC = "RAFCONSI"
+# magic, number of indexed records, end of the indexed records in the log file
+SORTED_INDEX_HEADER = struct.Struct("<8sQQ")
+_HASH = struct.Struct("<Q")
+
+BackpressurePolicy = Enum('BACKPRESSURE_POLICY', 'BLOCK DROP SAMPLE')
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_SAMPLE_INTERVAL = 10
+
+
+class _FlushRequest(object):
+    """Queue entry requesting the writer thread to flush all records queued before"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_CLOSE_REQUEST = object()
+
+
+def get_index_filename(filename):
+    """Returns the path of the index file belonging to a log file
+
+    :param str filename: the path of the log file
+    :return: the path of the index file
+    :rtype: str
+    """
+    return os.path.splitext(filename)[0] + "." + INDEX_FILE_EXTENSION
+
+
+def get_sorted_index_filename(filename):
+    """Returns the path of the sorted index file belonging to a log file
+
+    :param str filename: the path of the log file
+    :return: the path of the sorted index file
+    :rtype: str
+    """
+    return os.path.splitext(filename)[0] + "." + SORTED_INDEX_FILE_EXTENSION
+
+
+def create_sorted_index(filename):
+    """Creates the sorted index of a log file from its index file
+
+    The sorted index is written to a temporary file first, which replaces the sorted index file afterwards. If it
+    cannot be written (e.g. due to missing permissions), it is only returned.
+
+    :param str filename: the path of the log file
+    :return: the content of the sorted index
+    :rtype: str
+    """
+    index_filename = get_index_filename(filename)
+    entries = []
+    if os.path.isfile(index_filename):
+        with open(index_filename, 'rb') as index_file:
+            index = index_file.read()
+        # an incomplete last entry of an index, which is still written, is skipped
+        entries = [INDEX_ENTRY.unpack_from(index, position)
+                   for position in xrange(0, len(index) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size)]
+
+    end_of_indexed_records = len(LOG_FILE_HEADER)
+    if entries:
+        with open(filename, 'rb') as log_file:
+            offset = entries[-1][2]
+            log_file.seek(offset)
+            packed_length = log_file.read(RECORD_LENGTH.size)
+            if len(packed_length) == RECORD_LENGTH.size:
+                end_of_indexed_records = offset + RECORD_LENGTH.size + RECORD_LENGTH.unpack(packed_length)[0]
+
+    chunks = [SORTED_INDEX_HEADER.pack(SORTED_INDEX_MAGIC, len(entries), end_of_indexed_records)]
+    chunks.extend(INDEX_ENTRY.pack(*entry) for entry in sorted(entries))
+    chunks.extend(INDEX_ENTRY.pack(*entry) for entry in sorted(entries, key=lambda entry: (entry[1], entry[2])))
+    sorted_index = "".join(chunks)
+
+    sorted_index_filename = get_sorted_index_filename(filename)
+    tmp_filename = "{0}.{1}.tmp".format(sorted_index_filename, os.getpid())
+    try:
+        with open(tmp_filename, 'wb') as sorted_index_file:
+            sorted_index_file.write(sorted_index)
+        os.rename(tmp_filename, sorted_index_filename)
+    except (OSError, IOError), e:
+        logger.debug("Sorted index file {0} could not be written: {1}".format(sorted_index_filename, e))
+    return sorted_index
+
+
+def hash_id(identifier):
+    """Returns the 64 bit hash of a history item id or run id as used in the index file
+
+    The hash does not depend on the platform or python process, in contrast to the builtin :func:`hash`.
+
+    :param str identifier: the id to be hashed
+    :return: the hash of the id
+    :rtype: int
+    """
+    return _HASH.unpack(hashlib.md5(str(identifier)).digest()[:_HASH.size])[0]
+
+
+def serialize_record(key, value):
+    """Serializes a history item record including the length prefix
+
+    :param str key: the history item id
+    :param dict value: the record of the history item
+    :return: the serialized record
+    :rtype: str
+    """
+    try:
+        payload = pickle.dumps((key, value), pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        logger.exception("Could not serialize history item {0}".format(key))
+        payload = pickle.dumps((key, {}), pickle.HIGHEST_PROTOCOL)
+    return RECORD_LENGTH.pack(len(payload)) + payload
+
+
+class ExecutionLogWriter(object):
+    """Appends history item records to a log file and the entries for these records to its index file
+
+    The writer is not thread-safe.
+
+    :ivar str filename: the path of the log file
+    :ivar str index_filename: the path of the index file
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.index_filename = get_index_filename(filename)
+        self._file = open(filename, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(LOG_FILE_HEADER)
+        self._offset = self._file.tell()
+        self._index_file = open(self.index_filename, 'ab')
+
+    def write(self, records):
+        """Appends records to the log file
+
+        The index entries are written after the records, so that the index never refers to missing records.
+
+        :param list records: a list of (history_item_id, record_dict) tuples
+        """
+        chunks = []
+        index_entries = []
+        for key, value in records:
+            chunk = serialize_record(key, value)
+            run_id = value.get('run_id') if isinstance(value, dict) else None
+            index_entries.append(INDEX_ENTRY.pack(hash_id(key), hash_id(run_id), self._offset))
+            chunks.append(chunk)
+            self._offset += len(chunk)
+        self._file.write("".join(chunks))
+        self._file.flush()
+        self._index_file.write("".join(index_entries))
+        self._index_file.flush()
+
+    def close(self):
+        self._file.close()
+        self._index_file.close()
+        create_sorted_index(self.filename)
+
+
+class AsyncExecutionHistoryStorage(object):
+    """Writes the records of an execution history to an append-only log file using a background thread
+
+    The interface equals the one of :class:`rafcon.core.execution.execution_history.ExecutionHistoryStorage`.
+
+    :ivar str filename: the path of the log file
+    :ivar int batch_size: the maximum number of records written at once
+    :ivar BackpressurePolicy backpressure_policy: the policy applied if the queue is full
+    :ivar int sample_interval: every how many records one is kept with the SAMPLE policy
+    :ivar int number_of_dropped_records: the number of records dropped due to the backpressure policy
+    :ivar int number_of_written_records: the number of records written to the file
+    """
+
+    def __init__(self, filename, queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 backpressure_policy=BackpressurePolicy.BLOCK, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        self.filename = filename
+        self.batch_size = max(1, batch_size)
+        self.backpressure_policy = backpressure_policy
+        self.sample_interval = max(1, sample_interval)
+        self.number_of_dropped_records = 0
+        self.number_of_written_records = 0
+        self._number_of_sampled_records = 0
+        self._counter_lock = threading.Lock()
+        self._queue = Queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+        self._writer = ExecutionLogWriter(filename)
+        self._state_data_item_ids = {}
+        logger.debug('Opened log file for writing %s' % self.filename)
+
+        self._writer_thread = threading.Thread(target=self._write_records, name="ExecutionLogWriter")
+        self._writer_thread.daemon = True
+        self._writer_thread.start()
+
+    @property
+    def queue_depth(self):
+        """The number of records waiting to be written"""
+        return self._queue.qsize()
+
+    def store_item(self, key, value):
+        """Queues a history item for writing
+
+        Items stored after the storage was closed are counted as dropped.
+
+        :param str key: the history item id
+        :param value: the history item, which is serialized by the writer thread, or its record
+        :type value: rafcon.core.execution.execution_history.HistoryItem | dict
+        """
+        if isinstance(value, HistoryItem):
+            # values shared with the executed states could be modified until the writer thread serializes the item
+            value.serialize_shared_data()
+        # the close request must be the last entry of the queue, otherwise records would be lost silently
+        with self._close_lock:
+            if not self._closed:
+                self._put_record((key, value))
+                return
+        with self._counter_lock:
+            self.number_of_dropped_records += 1
+        logger.error("Cannot store item {0}, the log file {1} is already closed".format(key, self.filename))
+
+    def _put_record(self, record):
+        if self.backpressure_policy is BackpressurePolicy.BLOCK:
+            self._queue.put(record)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except Queue.Full:
+            with self._counter_lock:
+                keep_sample = False
+                if self.backpressure_policy is BackpressurePolicy.SAMPLE:
+                    self._number_of_sampled_records += 1
+                    keep_sample = self._number_of_sampled_records % self.sample_interval == 0
+                if not keep_sample:
+                    self.number_of_dropped_records += 1
+            if keep_sample:
+                self._queue.put(record)
+
+    def flush(self, timeout=None):
+        """Waits until all records queued so far are written to the file
+
+        :param float timeout: the maximum time to wait in seconds, None waits infinitely
+        :return: True if all records were written
+        :rtype: bool
+        """
+        flush_request = _FlushRequest()
+        with self._close_lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put(flush_request)
+        if closed:
+            # all records are written, as soon as the writer thread is stopped
+            self._writer_thread.join(timeout)
+            return not self._writer_thread.is_alive()
+        return flush_request.done.wait(timeout)
+
+    def close(self, make_read_and_writable_for_all=False):
+        """Writes all queued records, stops the writer thread and closes the file
+
+        Calling the method multiple times is possible.
+
+        :param bool make_read_and_writable_for_all: if True, the file permissions are set to a+rw
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_CLOSE_REQUEST)
+        self._writer_thread.join()
+        self._writer.close()
+        logger.debug('Closed log file %s (%d records written, %d dropped)' % (
+            self.filename, self.number_of_written_records, self.number_of_dropped_records))
+        if make_read_and_writable_for_all:
+            ret = subprocess.call(['chmod', 'a+rw', self.filename])
+            if ret:
+                logger.debug('Could not make log file readable for all. chmod a+rw failed on %s.' % self.filename)
+            else:
+                logger.debug('Set log file readable for all via chmod a+rw, file %s' % self.filename)
+
+    def _write_records(self):
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Queue.Empty:
+                    break
+
+            records = []
+            flush_requests = []
+            for entry in batch:
+                if entry is _CLOSE_REQUEST:
+                    stop = True
+                elif isinstance(entry, _FlushRequest):
+                    flush_requests.append(entry)
+                else:
+                    records.append((entry[0], self._to_record(entry)))
+            try:
+                self._writer.write(records)
+            except Exception:
+                logger.exception("Could not write to log file {0}".format(self.filename))
+            self.number_of_written_records += len(records)
+            for flush_request in flush_requests:
+                flush_request.done.set()
+
+    def _to_record(self, entry):
+        key, value = entry
+        if not isinstance(value, HistoryItem):
+            return value
+        try:
+            return value.to_dict(self._state_data_item_ids)
+        except Exception:
+            logger.exception("Could not serialize history item {0}".format(key))
+            return {}
+
+
+def is_execution_log_file(filename):
+    """Checks whether a file is a log file written by the :class:`AsyncExecutionHistoryStorage`
+
+    :param str filename: the path of the file
+    :return: True if the file starts with the log file header
+    :rtype: bool
+    """
+    if not os.path.isfile(filename):
+        return False
+    with open(filename, 'rb') as log_file:
+        return log_file.read(len(LOG_FILE_HEADER)) == LOG_FILE_HEADER
+
+
+def iter_execution_log_records(filename):
+    """Iterates over all records of a log file in the order they were written
+
+    An incomplete last record, e.g. of a log file that is still written, is skipped.
+
+    :param str filename: the path of the log file
+    :return: a generator of (history_item_id, record) tuples
+    """
+    with open(filename, 'rb') as log_file:
+        if log_file.read(len(LOG_FILE_HEADER)) != LOG_FILE_HEADER:
+            raise ValueError("{0} is not an execution log file".format(filename))
+        for _, record in _iter_records(log_file):
+            yield record
+
+
+def _read_record(log_file):
+    """Reads the record at the current position of the file
+
+    :return: the (history_item_id, record_dict) tuple or None, if the record is incomplete
+    """
+    packed_length = log_file.read(RECORD_LENGTH.size)
+    if len(packed_length) < RECORD_LENGTH.size:
+        return None
+    length = RECORD_LENGTH.unpack(packed_length)[0]
+    payload = log_file.read(length)
+    if len(payload) < length:
+        return None
+    return pickle.loads(payload)
+
+
+def _iter_records(log_file):
+    """Iterates over the records starting at the current position of the file
+
+    :return: a generator of (offset, (history_item_id, record_dict)) tuples
+    """
+    while True:
+        offset = log_file.tell()
+        record = _read_record(log_file)
+        if record is None:
+            return
+        yield offset, record
+
+
+class ExecutionLogReader(object):
+    """Provides read-only, dict-like access to the history items of a log file
+
+    The reader can be used wherever an opened shelve log file was used before, e.g. in
+    :func:`rafcon.utils.execution_log.log_to_raw_structure`. Single history items and all items of a run are found by
+    a binary search in the memory mapped sorted index, which is created if it is missing or outdated. Records not
+    contained in the index file (e.g. if the writing process was killed) are indexed in memory when opening the log
+    file. Iterating over the reader reads the log file sequentially.
+
+    :ivar str filename: the path of the log file
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        if self._file.read(len(LOG_FILE_HEADER)) != LOG_FILE_HEADER:
+            self._file.close()
+            raise ValueError("{0} is not an execution log file".format(filename))
+        # the sorted index (memory mapped or in memory) and the number of records it contains
+        self._sorted_index = None
+        self._number_of_indexed_records = 0
+        # records not contained in the index file
+        self._unindexed_offsets_by_key_hash = {}
+        self._unindexed_offsets_by_run_hash = {}
+        self._number_of_unindexed_records = 0
+        self._load_index()
+
+    def _load_sorted_index(self):
+        """Memory maps the sorted index file, if it contains all entries of the index file
+
+        :return: the mapped sorted index or None, if there is no up-to-date sorted index file
+        """
+        index_filename = get_index_filename(self.filename)
+        number_of_indexed_records = os.path.getsize(index_filename) // INDEX_ENTRY.size \
+            if os.path.isfile(index_filename) else 0
+        sorted_index_filename = get_sorted_index_filename(self.filename)
+        if not os.path.isfile(sorted_index_filename) or \
+                os.path.getsize(sorted_index_filename) < SORTED_INDEX_HEADER.size:
+            return None
+        with open(sorted_index_filename, 'rb') as sorted_index_file:
+            sorted_index = mmap.mmap(sorted_index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, number_of_records, _ = SORTED_INDEX_HEADER.unpack_from(sorted_index)
+        if magic != SORTED_INDEX_MAGIC or number_of_records != number_of_indexed_records or \
+                len(sorted_index) != SORTED_INDEX_HEADER.size + 2 * number_of_records * INDEX_ENTRY.size:
+            sorted_index.close()
+            return None
+        return sorted_index
+
+    def _load_index(self):
+        self._sorted_index = self._load_sorted_index()
+        if self._sorted_index is None:
+            self._sorted_index = create_sorted_index(self.filename)
+        _, self._number_of_indexed_records, end_of_indexed_records = SORTED_INDEX_HEADER.unpack_from(
+            self._sorted_index)
+
+        # index records not contained in the index file
+        self._file.seek(end_of_indexed_records)
+        for offset, (key, value) in _iter_records(self._file):
+            run_id = value.get('run_id') if isinstance(value, dict) else None
+            self._unindexed_offsets_by_key_hash.setdefault(hash_id(key), []).append(offset)
+            self._unindexed_offsets_by_run_hash.setdefault(hash_id(run_id), []).append(offset)
+            self._number_of_unindexed_records += 1
+
+    def _find_offsets(self, field, hash_value):
+        """Searches the offsets of all records with the given hash in the sorted index
+
+        :param int field: 0 to search the hash of the history item id, 1 to search the hash of the run id
+        :param int hash_value: the hash to search
+        :return: the offsets of the records in the order they were written
+        :rtype: list[int]
+        """
+        number_of_records = self._number_of_indexed_records
+        # the entries are stored twice, the second time sorted by the hash of the run id
+        start = SORTED_INDEX_HEADER.size + field * number_of_records * INDEX_ENTRY.size
+        low, high = 0, number_of_records
+        while low < high:
+            middle = (low + high) // 2
+            if INDEX_ENTRY.unpack_from(self._sorted_index, start + middle * INDEX_ENTRY.size)[field] < hash_value:
+                low = middle + 1
+            else:
+                high = middle
+        offsets = []
+        for position in xrange(low, number_of_records):
+            entry = INDEX_ENTRY.unpack_from(self._sorted_index, start + position * INDEX_ENTRY.size)
+            if entry[field] != hash_value:
+                break
+            offsets.append(entry[2])
+        unindexed_offsets = self._unindexed_offsets_by_run_hash if field else self._unindexed_offsets_by_key_hash
+        return sorted(offsets) + unindexed_offsets.get(hash_value, [])
+
+    def _read_record_at(self, offset):
+        self._file.seek(offset)
+        return _read_record(self._file)
+
+    def __len__(self):
+        return self._number_of_indexed_records + self._number_of_unindexed_records
+
+    def __contains__(self, key):
+        """Checks whether the log file contains a history item
+
+        The check is solely based on the 64 bit hash of the history item id and does not read the log file.
+        """
+        return len(self._find_offsets(0, hash_id(key))) > 0
+
+    def __getitem__(self, key):
+        for offset in self._find_offsets(0, hash_id(key)):
+            record_key, value = self._read_record_at(offset)
+            if record_key == key:
+                return value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_run_items(self, run_id):
+        """Returns all history items of a run without reading other records of the log file
+
+        :param str run_id: the run id of the state execution
+        :return: the history item records in the order they were written
+        :rtype: list[dict]
+        """
+        run_items = []
+        for offset in self._find_offsets(1, hash_id(run_id)):
+            _, value = self._read_record_at(offset)
+            if isinstance(value, dict) and value.get('run_id') == run_id:
+                run_items.append(value)
+        return run_items
+
+    def iteritems(self):
+        with open(self.filename, 'rb') as log_file:
+            log_file.seek(len(LOG_FILE_HEADER))
+            for _, record in _iter_records(log_file):
+                yield record
+
+    def iterkeys(self):
+        for key, _ in self.iteritems():
+            yield key
+
+    def itervalues(self):
+        for _, value in self.iteritems():
+            yield value
+
+    def items(self):
+        return list(self.iteritems())
+
+    def keys(self):
+        return list(self.iterkeys())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def __iter__(self):
+        return self.iterkeys()
+
+    def close(self):
+        self._file.close()
+        if isinstance(self._sorted_index, mmap.mmap):
+            self._sorted_index.close()
+
+
+def open_execution_log(filename):
+    """Opens an execution log file for reading, independent of its format
+
+    :param str filename: the path of a binary log file or of a shelve log file
+    :return: a dict-like object containing all history items, which has to be closed after usage
+    :rtype: ExecutionLogReader | shelve.Shelf
+    """
+    if is_execution_log_file(filename):
+        return ExecutionLogReader(filename)
+    return shelve.open(filename, 'r')
+
+
+def convert_shelve_to_execution_log(shelve_filename, log_filename=None):
+    """Converts a shelve log file into a binary log file with index
+
+    :param str shelve_filename: the path of the shelve log file
+    :param str log_filename: the path of the new log file, defaults to the path of the shelve log file with the
+        extension ``.log``
+    :return: the path of the new log file
+    :rtype: str
+    """
+    if log_filename is None:
+        log_filename = os.path.splitext(shelve_filename)[0] + "." + LOG_FILE_EXTENSION
+    if os.path.exists(log_filename):
+        raise ValueError("The log file {0} already exists".format(log_filename))
+    shelve_log = shelve.open(shelve_filename, 'r')
+    writer = ExecutionLogWriter(log_filename)
+    try:
+        # the history item ids contain a zero-padded counter, thus the sorted ids reflect the execution order
+        keys = sorted(shelve_log.keys())
+        for start in xrange(0, len(keys), DEFAULT_BATCH_SIZE):
+            writer.write([(key, shelve_log[key]) for key in keys[start:start + DEFAULT_BATCH_SIZE]])
+    finally:
+        writer.close()
+        shelve_log.close()
+    return log_filename
+
+
+def get_backpressure_policy():
+    """Returns the backpressure policy configured in the core config
+
+    :return: the configured policy, BLOCK if the config value is invalid
+    :rtype: BackpressurePolicy
+    """
+    policy_name = global_config.get_config_value("EXECUTION_LOG_BACKPRESSURE", BackpressurePolicy.BLOCK.name)
+    try:
+        return BackpressurePolicy[str(policy_name).upper()]
+    except KeyError:
+        logger.warning("Invalid backpressure policy '{0}', falling back to {1}".format(
+            policy_name, BackpressurePolicy.BLOCK.name))
+        return BackpressurePolicy.BLOCK
+
+
+def create_async_execution_history_storage(filename):
+    """Creates an asynchronous storage configured by the core config
+
+    :param str filename: the path of the log file
+    :return: the storage
+    :rtype: AsyncExecutionHistoryStorage
+    """
+    return AsyncExecutionHistoryStorage(
+        filename,
+        queue_size=global_config.get_config_value("EXECUTION_LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+        batch_size=global_config.get_config_value("EXECUTION_LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+        backpressure_policy=get_backpressure_policy(),
+        sample_interval=global_config.get_config_value("EXECUTION_LOG_SAMPLE_INTERVAL", DEFAULT_SAMPLE_INTERVAL))
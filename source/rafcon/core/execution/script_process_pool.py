@@ -0,0 +1,367 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: script_process_pool
+   :synopsis: A module to execute the scripts of execution states in worker processes
+
+Scripts of execution states with ``execute_in_process`` set are run in a pool of worker processes instead of the
+thread of the state. Thus, CPU bound scripts do not hold the GIL of the RAFCON process and can run in parallel.
+
+The script is compiled in the RAFCON process and executed in a fresh module namespace of a worker for every run. The
+input data, output data and persistent variables of the state are transferred by pickling. Within the script, ``self``
+is a proxy of the state offering ``name``, ``state_id``, ``logger``, ``preempted``, ``preemptive_wait`` and
+``persistent_variables``, and ``gvm`` is a proxy forwarding all method calls to the global variable manager of the
+RAFCON process. A preemption of the state is forwarded to the worker as SIGUSR1 signal.
+"""
+
+import os
+import imp
+import time
+import errno
+import signal
+import pickle
+import logging
+import marshal
+import traceback
+import threading
+import multiprocessing
+from functools import partial
+
+from rafcon.core.config import global_config
+from rafcon.utils import multi_event
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+DEFAULT_POOL_SIZE = 4
+# the maximum time the worker sleeps before checking for a preemption, which is normally signaled right away
+PREEMPTION_CHECK_INTERVAL = 0.1
+
+# the kinds of messages sent by the workers
+_STARTED = 'started'
+_LOG = 'log'
+_GVM_CALL = 'gvm_call'
+_FINISHED = 'finished'
+
+_idle_workers = []
+_workers_lock = threading.Lock()
+
+# the parameter of preemptive_wait shadows the time module
+_time = time.time
+_sleep = time.sleep
+
+
+class _StatePlaceholder(object):
+    """Replaces the state in the arguments of GVM calls, e.g. for preemptive waits"""
+    pass
+
+
+class _ScriptWorker(object):
+    """The handle of a worker process in the RAFCON process"""
+
+    def __init__(self):
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_run_worker, args=(worker_connection, os.getpid()),
+                                               name="ScriptWorker")
+        self.process.daemon = True
+        self.process.start()
+        worker_connection.close()
+        self._task_running = False
+        self._task_lock = threading.Lock()
+
+    def terminate(self):
+        self.connection.close()
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+
+    def execute(self, state, task):
+        """Executes a task in the worker process and handles the requests of the worker until the task is finished
+
+        :param rafcon.core.states.execution_state.ExecutionState state: the state of the task
+        :param dict task: the task
+        :return: the finished message of the worker
+        """
+        preempted_event = state._preempted
+        forward_preemption = partial(self._forward_preemption, state)
+        multi_event.orify(preempted_event, forward_preemption)
+        try:
+            self.connection.send(task)
+            while True:
+                message = self.connection.recv()
+                if message[0] == _STARTED:
+                    # signals sent before the worker started the task would be lost
+                    with self._task_lock:
+                        self._task_running = True
+                    forward_preemption()
+                elif message[0] == _LOG:
+                    state.logger.log(message[1], message[2])
+                elif message[0] == _GVM_CALL:
+                    self.connection.send(_call_global_variable_manager(state, *message[1:]))
+                else:
+                    return message
+        finally:
+            with self._task_lock:
+                self._task_running = False
+            multi_event.remove_callback(preempted_event, forward_preemption)
+
+    def _forward_preemption(self, state):
+        with self._task_lock:
+            if self._task_running and state.preempted:
+                try:
+                    os.kill(self.process.pid, signal.SIGUSR1)
+                except OSError, e:
+                    logger.warn("The preemption of {0} could not be forwarded: {1}".format(state, e))
+
+
+def _call_global_variable_manager(state, method_name, args, kwargs):
+    from rafcon.core.singleton import global_variable_manager
+    args = [state if isinstance(arg, _StatePlaceholder) else arg for arg in args]
+    kwargs = {key: state if isinstance(value, _StatePlaceholder) else value for key, value in kwargs.iteritems()}
+    try:
+        return True, getattr(global_variable_manager, method_name)(*args, **kwargs)
+    except Exception as e:
+        return False, e
+
+
+def _get_worker():
+    with _workers_lock:
+        if _idle_workers:
+            return _idle_workers.pop()
+        return _ScriptWorker()
+
+
+def _release_worker(worker):
+    pool_size = global_config.get_config_value("SCRIPT_PROCESS_POOL_SIZE", DEFAULT_POOL_SIZE)
+    with _workers_lock:
+        if len(_idle_workers) < pool_size:
+            _idle_workers.append(worker)
+            return
+    # the pool is full, the additional worker is not kept
+    worker.terminate()
+
+
+def execute_script(state, inputs, outputs, backward_execution=False):
+    """Executes the script of an execution state in a worker process
+
+    The function has the same semantics as :meth:`rafcon.core.script.Script.execute`: the outputs are updated with
+    the output data set by the script and exceptions of the script are raised again. The traceback of an exception
+    within the worker is stored in its attribute ``script_process_traceback``.
+
+    :param rafcon.core.states.execution_state.ExecutionState state: the state of the script
+    :param dict inputs: the input data of the script
+    :param dict outputs: the output data of the script
+    :param bool backward_execution: Flag whether to run the script in backwards mode
+    :return: Return value of the execute function of the script
+    :rtype: str | int
+    :raises exceptions.RuntimeError: if the worker process died during the execution
+    """
+    script = state.script
+    task = {
+        'code': marshal.dumps(script.get_code()),
+        'module_name': os.path.splitext(script.filename)[0] + state.state_id,
+        'name': state.name,
+        'state_id': state.state_id,
+        'inputs': inputs if inputs else {},
+        'outputs': outputs if outputs is not None else {},
+        'persistent_variables': state.persistent_variables,
+        'backward_execution': backward_execution
+    }
+
+    worker = _get_worker()
+    try:
+        message = worker.execute(state, task)
+    except EOFError:
+        worker.terminate()
+        raise RuntimeError("The script process of {0} died during the execution".format(state))
+    except:
+        worker.terminate()
+        raise
+    _release_worker(worker)
+
+    successful, result = message[1:3]
+    if not successful:
+        result.script_process_traceback = message[3]
+        raise result
+    if outputs is not None:
+        outputs.clear()
+        outputs.update(message[3])
+    state.persistent_variables = message[4]
+    return result
+
+
+def shutdown():
+    """Terminates all idle worker processes"""
+    with _workers_lock:
+        workers = list(_idle_workers)
+        del _idle_workers[:]
+    for worker in workers:
+        worker.terminate()
+
+
+# ---------------------------------------------------------------------------------------------
+# -------------------------------- functions of the worker process ----------------------------
+# ---------------------------------------------------------------------------------------------
+
+
+class _ScriptLogger(object):
+    """The logger of a state within the worker, the messages are logged by the logger of the state"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def log(self, level, msg, *args):
+        self._connection.send((_LOG, level, msg % args if args else msg))
+
+    def debug(self, msg, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def verbose(self, msg, *args):
+        self.log(logging.VERBOSE, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(logging.WARNING, msg, *args)
+
+    warn = warning
+
+    def error(self, msg, *args):
+        self.log(logging.ERROR, msg, *args)
+
+    def exception(self, msg, *args):
+        self.log(logging.ERROR, (msg % args if args else msg) + "\n" + traceback.format_exc())
+
+
+class _StateProxy(object):
+    """The state passed as ``self`` to the script within the worker"""
+
+    def __init__(self, connection, task):
+        self.name = task['name']
+        self.state_id = task['state_id']
+        self.persistent_variables = task['persistent_variables']
+        self.logger = _ScriptLogger(connection)
+        self.preempted = False
+
+    def preemptive_wait(self, time=None):
+        """Waiting method which can be preempted, see :meth:`rafcon.core.states.state.State.preemptive_wait`
+
+        :param time: The time in seconds to wait or None (default) for infinity
+        :return: True, if the wait was preempted, False else
+        """
+        end_time = None if time is None else _time() + time
+        while not self.preempted:
+            # the signal interrupts the sleep
+            if end_time is None:
+                _sleep(PREEMPTION_CHECK_INTERVAL)
+            else:
+                remaining_time = end_time - _time()
+                if remaining_time <= 0:
+                    return False
+                _sleep(min(remaining_time, PREEMPTION_CHECK_INTERVAL))
+        return True
+
+    def __str__(self):
+        return "{0} [{1}]".format(self.name, self.state_id)
+
+
+class _GlobalVariableManagerProxy(object):
+    """The global variable manager passed as ``gvm`` to the script within the worker"""
+
+    def __init__(self, connection, state):
+        self._connection = connection
+        self._state = state
+
+    def __getattr__(self, method_name):
+        if method_name.startswith('_'):
+            raise AttributeError(method_name)
+        return partial(self._call, method_name)
+
+    def _call(self, method_name, *args, **kwargs):
+        args = [_StatePlaceholder() if arg is self._state else arg for arg in args]
+        kwargs = {key: _StatePlaceholder() if value is self._state else value for key, value in kwargs.iteritems()}
+        self._connection.send((_GVM_CALL, method_name, args, kwargs))
+        successful, result = self._connection.recv()
+        if not successful:
+            raise result
+        return result
+
+
+def _execute_task(connection, state, task):
+    module = imp.new_module(task['module_name'])
+    try:
+        exec marshal.loads(task['code']) in module.__dict__
+    except RuntimeError, e:
+        raise IOError("The compilation of the script module failed - error message: %s" % str(e))
+
+    gvm = _GlobalVariableManagerProxy(connection, state)
+    outputs = task['outputs']
+    if task['backward_execution']:
+        if not hasattr(module, "backward_execute"):
+            state.logger.debug("No backward execution method found for state %s" % state.name)
+            return None, outputs
+        return module.backward_execute(state, task['inputs'], outputs, gvm), outputs
+    return module.execute(state, task['inputs'], outputs, gvm), outputs
+
+
+def _transferable_exception(e):
+    try:
+        pickle.loads(pickle.dumps(e, pickle.HIGHEST_PROTOCOL))
+        return e
+    except Exception:
+        return RuntimeError("{0}: {1}".format(type(e).__name__, e))
+
+
+def _run_worker(connection, parent_pid):
+    """The main loop of a worker process
+
+    :param connection: the connection to the RAFCON process
+    :param int parent_pid: the process id of the RAFCON process, the worker exits if the RAFCON process is gone
+    """
+    # keyboard interrupts are handled by the RAFCON process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    current_state = [None]
+
+    def preempt(signum, frame):
+        if current_state[0] is not None:
+            current_state[0].preempted = True
+
+    signal.signal(signal.SIGUSR1, preempt)
+    # blocking reads of the connection are continued after a signal
+    signal.siginterrupt(signal.SIGUSR1, False)
+
+    while True:
+        try:
+            if not connection.poll(1.):
+                if os.getppid() != parent_pid:
+                    return
+                continue
+            task = connection.recv()
+        except (IOError, OSError), e:
+            if e.errno == errno.EINTR:
+                continue
+            return
+        except EOFError:
+            return
+
+        state = _StateProxy(connection, task)
+        current_state[0] = state
+        connection.send((_STARTED, ))
+        try:
+            result, outputs = _execute_task(connection, state, task)
+            message = (_FINISHED, True, result, outputs, state.persistent_variables)
+            try:
+                connection.send(message)
+            except Exception, e:
+                connection.send((_FINISHED, False, RuntimeError("The results of the script could not be transferred: "
+                                                                "{0}".format(e)), traceback.format_exc()))
+        except Exception, e:
+            connection.send((_FINISHED, False, _transferable_exception(e), traceback.format_exc()))
+        finally:
+            current_state[0] = None
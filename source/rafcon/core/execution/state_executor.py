@@ -0,0 +1,223 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: state_executor
+   :synopsis: A module providing the strategies to run the execution of states in threads
+
+The executor is selected by the STATE_EXECUTOR value of the core config:
+
+* ``THREAD``: each state execution is run in a new thread (the default)
+* ``POOL``: sequentially executed states (e.g. the children of a hierarchy state) are run inline in the thread of
+  their parent, all other states (e.g. the children of a concurrency state) are run by reusable worker threads
+
+"""
+
+import threading
+import Queue
+
+from rafcon.core.config import global_config
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+DEFAULT_STATE_EXECUTOR = "THREAD"
+DEFAULT_POOL_SIZE = 16
+
+
+class StateExecution(object):
+    """A handle for a single run of a state, which can be joined like a thread
+
+    :ivar rafcon.core.states.state.State state: the state to be run
+    :ivar finished_callback: an optional function called after the run of the state, before joining threads return
+    """
+
+    def __init__(self, state, finished_callback=None):
+        self.state = state
+        self.finished_callback = finished_callback
+        self._finished = threading.Event()
+
+    def run(self):
+        """Runs the state and marks the execution as finished afterwards"""
+        try:
+            self.run_state()
+        finally:
+            self.finish()
+
+    def run_state(self):
+        try:
+            self.state.run()
+        except Exception:
+            logger.exception("Unhandled exception during the execution of {0}".format(self.state))
+
+    def finish(self):
+        if self.finished_callback is not None:
+            run_finished_callback(self.state, self.finished_callback)
+        self._finished.set()
+
+    def join(self, timeout=None):
+        """Waits until the state execution finished
+
+        :param float timeout: the maximum time to wait in seconds, None waits infinitely
+        """
+        self._finished.wait(timeout)
+
+    def is_alive(self):
+        return not self._finished.is_set()
+
+
+def run_finished_callback(state, finished_callback):
+    try:
+        finished_callback()
+    except Exception:
+        logger.exception("Error after the execution of {0}".format(state))
+
+
+class ThreadStateExecutor(object):
+    """Starts each state execution in a new thread"""
+
+    def start(self, state, sequential=False, finished_callback=None):
+        """Starts the execution of a state
+
+        :param rafcon.core.states.state.State state: the state to be run
+        :param bool sequential: True if the caller joins the state right away, not considered by this executor
+        :param finished_callback: an optional function called by the thread after the run of the state
+        :return: the thread running the state
+        :rtype: threading.Thread
+        """
+        if finished_callback is None:
+            thread = threading.Thread(target=state.run)
+        else:
+            thread = threading.Thread(target=self._run, args=(state, finished_callback))
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _run(state, finished_callback):
+        try:
+            state.run()
+        finally:
+            run_finished_callback(state, finished_callback)
+
+    def shutdown(self):
+        pass
+
+
+class _PoolWorker(threading.Thread):
+    """A worker thread of the :class:`PoolStateExecutor` running one state execution after the other"""
+
+    def __init__(self, executor):
+        super(_PoolWorker, self).__init__(name="StateExecutorWorker")
+        self.daemon = True
+        self._executor = executor
+        self._executions = Queue.Queue(maxsize=1)
+
+    def assign(self, execution):
+        self._executions.put(execution)
+
+    def stop(self):
+        self._executions.put(None)
+
+    def run(self):
+        while True:
+            execution = self._executions.get()
+            if execution is None:
+                return
+            try:
+                execution.run_state()
+            finally:
+                # the worker is released before the execution is marked as finished, so that the joining thread can
+                # reuse it right away
+                self._executor._release_worker(self)
+                execution.finish()
+
+
+class PoolStateExecutor(object):
+    """Runs sequential state executions inline and all others in a bounded pool of reusable worker threads
+
+    Concurrently executed states must not wait for each other, as e.g. a preemptive concurrency state needs all of its
+    children to be running. Therefore, if all worker threads are busy, the execution is started in an additional
+    thread, which is not kept afterwards. Thus, the pool size bounds the number of idle threads kept alive and not the
+    number of concurrent state executions.
+
+    :ivar int pool_size: the maximum number of worker threads kept by the pool
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._idle_workers = []
+        self._number_of_workers = 0
+
+    def start(self, state, sequential=False, finished_callback=None):
+        """Starts the execution of a state
+
+        :param rafcon.core.states.state.State state: the state to be run
+        :param bool sequential: True if the caller joins the state right away, the state is then run inline
+        :param finished_callback: an optional function called after the run of the state, before the execution is
+            marked as finished
+        :return: the handle of the state execution
+        :rtype: StateExecution
+        """
+        execution = StateExecution(state, finished_callback)
+        if sequential:
+            execution.run()
+            return execution
+
+        worker = None
+        with self._lock:
+            if self._idle_workers:
+                worker = self._idle_workers.pop()
+            elif self._number_of_workers < self.pool_size:
+                worker = _PoolWorker(self)
+                self._number_of_workers += 1
+                worker.start()
+
+        if worker is None:
+            thread = threading.Thread(target=execution.run)
+            thread.start()
+        else:
+            worker.assign(execution)
+        return execution
+
+    def _release_worker(self, worker):
+        with self._lock:
+            self._idle_workers.append(worker)
+
+    def shutdown(self):
+        """Stops all idle worker threads"""
+        with self._lock:
+            for worker in self._idle_workers:
+                worker.stop()
+            self._number_of_workers -= len(self._idle_workers)
+            self._idle_workers = []
+
+
+_state_executors = {}
+_state_executors_lock = threading.Lock()
+
+
+def get_state_executor():
+    """Returns the state executor selected in the core config
+
+    :return: the configured executor
+    :rtype: ThreadStateExecutor | PoolStateExecutor
+    """
+    executor_type = global_config.get_config_value("STATE_EXECUTOR", DEFAULT_STATE_EXECUTOR)
+    if executor_type == "POOL":
+        pool_size = global_config.get_config_value("STATE_EXECUTOR_POOL_SIZE", DEFAULT_POOL_SIZE)
+        key = (executor_type, pool_size)
+    else:  # all other values select the default executor
+        key = (DEFAULT_STATE_EXECUTOR, )
+
+    executor = _state_executors.get(key)
+    if executor is None:
+        with _state_executors_lock:
+            if key not in _state_executors:
+                _state_executors[key] = PoolStateExecutor(key[1]) if len(key) == 2 else ThreadStateExecutor()
+            executor = _state_executors[key]
+    return executor
@@ -22,24 +22,62 @@
 
 import time
 import copy
+from functools import wraps
 from gtkmvc import Observable
-from threading import Lock, currentThread, RLock
+from threading import Lock, currentThread, RLock, Condition
 from rafcon.core.id_generator import *
 
 from rafcon.utils.type_helpers import type_inherits_of_type
 from rafcon.utils import log
 from rafcon.utils import type_helpers
+from rafcon.utils import multi_event
 logger = log.get_logger(__name__)
 
+# the number of locks protecting the creation and removal of the variable locks, variables are mapped to them by hash
+LOCK_STRIPES = 16
+# values of these types cannot be modified and are therefore never copied
+IMMUTABLE_TYPES = frozenset([type(None), bool, int, long, float, complex, str, unicode])
+
+
+def copy_value(value):
+    """Copies the value of a global variable, values of immutable types are returned directly
+
+    :param value: the value to copy
+    :return: a deep copy of the value
+    """
+    return value if type(value) in IMMUTABLE_TYPES else copy.deepcopy(value)
+
+
+def observed_if_observers(func):
+    """Like :meth:`gtkmvc.Observable.observed`, but only emits notifications if the object is observed at all
+
+    Without any model or observer registered, e.g. in a headless execution, the method is called directly.
+    """
+    observed_func = Observable.observed(func)
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.has_observers():
+            return observed_func(self, *args, **kwargs)
+        return func(self, *args, **kwargs)
+    return wrapper
+
 
 class GlobalVariableManager(Observable):
     """A class for organizing all global variables of the state machine
 
+    Every access locks the global variable only for the duration of the access, without any notification. Global
+    variables which are explicitly locked (see :meth:`lock_variable`) can only be accessed with the access key.
+
     :ivar __global_variable_dictionary: the dictionary, where all global variables are stored
     :ivar __variable_locks: a dictionary that holds one mutex for each global variable
-    :ivar __global_lock: a mutex to prevent that the dictionary is written by two threads simultaneously
+    :ivar __stripe_locks: mutexes to prevent that the variable locks of a variable are created or removed by two
+        threads simultaneously
     :ivar __access_keys: a dictionary that holds an access key to each locked global variable
+    :ivar __locked_keys: the keys of all global variables, which are explicitly locked
     :ivar __variable_references: a dictionary that stores whether a variable can be returned by reference or not
+    :ivar __versions: a dictionary that holds a counter for each global variable, which is increased on every change
+    :ivar __change_conditions: conditions notified about changes of the variables, variables are mapped to them by hash
     """
 
     def __init__(self):
@@ -47,11 +85,49 @@ class GlobalVariableManager(Observable):
         self.__global_variable_dictionary = {}
         self.__global_variable_type_dictionary = {}
         self.__variable_locks = {}
-        self.__global_lock = RLock()
+        self.__stripe_locks = tuple(RLock() for _ in range(LOCK_STRIPES))
         self.__access_keys = {}
+        self.__locked_keys = set()
         self.__variable_references = {}
+        self.__versions = {}
+        self.__change_conditions = tuple(Condition(Lock()) for _ in range(LOCK_STRIPES))
+
+    def has_observers(self):
+        """Checks whether any model or observer is registered for notifications of the global variable manager
 
-    @Observable.observed
+        :return: True if notifications have to be emitted, False else
+        """
+        return bool(self.__get_models__()) or bool(getattr(self, '_ObsWrapperBase__observers', None))
+
+    def __acquire_variable(self, key, access_key=None, wait=True, create=False):
+        """Locks a global variable for a single access
+
+        :param key: the key of the global variable
+        :param access_key: the access key, if the variable was explicitly locked by the caller
+        :param bool wait: whether to wait for variables explicitly locked without the access key or to raise an error
+        :param bool create: whether to create the lock of the variable, if it does not exist
+        :return: the acquired lock, which must be released after the access, or None, if the variable does not exist
+            or is already locked with the access key
+        :raises exceptions.RuntimeError: if the variable is locked and the access key is wrong
+        """
+        if key in self.__locked_keys and (access_key or not wait):
+            if access_key and self.__access_keys.get(key) == access_key:
+                return None
+            raise RuntimeError("Wrong access key for accessing global variable")
+        while True:
+            lock = self.__variable_locks.get(key)
+            if lock is None:
+                if not create:
+                    return None
+                with self.__stripe_locks[hash(key) % LOCK_STRIPES]:
+                    lock = self.__variable_locks.setdefault(key, Lock())
+            lock.acquire()
+            # the variable could have been deleted while waiting for the lock
+            if self.__variable_locks.get(key) is lock:
+                return lock
+            lock.release()
+
+    @observed_if_observers
     def set_variable(self, key, value, per_reference=False, access_key=None, data_type=None):
         """Sets a global variable
 
@@ -61,43 +137,122 @@ class GlobalVariableManager(Observable):
         :param access_key: if the variable was explicitly locked with the  rafcon.state lock_variable
         :raises exceptions.RuntimeError: if a wrong access key is passed
         """
-        if self.variable_exist(key):
-            if data_type is None:
-                data_type = self.__global_variable_type_dictionary[key]
-        else:
-            if data_type is None:
-                data_type = type(None)
+        self.__set_variable(key, value, per_reference, access_key, data_type)
+
+    @observed_if_observers
+    def set_variables(self, variables, per_reference=False):
+        """Sets several global variables at once
+
+        The global variables are set one after the other, but only a single notification is emitted.
+
+        :param dict variables: the keys of the global variables to be set and their new values
+        :param per_reference: a flag to decide if the variables should be stored per reference or per value
+        :raises exceptions.RuntimeError: if a variable is locked
+        """
+        for key, value in variables.iteritems():
+            self.__set_variable(key, value, per_reference)
+
+    def __set_variable(self, key, value, per_reference=False, access_key=None, data_type=None):
+        if data_type is None:
+            data_type = self.__global_variable_type_dictionary[key] if self.variable_exist(key) else type(None)
         assert isinstance(data_type, type)
         self.check_value_and_type(value, data_type)
 
-        with self.__global_lock:
-            unlock = True
-            if self.variable_exist(key):
-                if self.is_locked(key) and self.__access_keys[key] != access_key:
-                    raise RuntimeError("Wrong access key for accessing global variable")
-                elif self.is_locked(key):
-                    unlock = False
-                else:
-                    access_key = self.lock_variable(key, block=True)
-            else:
-                self.__variable_locks[key] = Lock()
-                access_key = self.lock_variable(key, block=True)
-
-            # --- variable locked
+        stored_value = value if per_reference else copy_value(value)
+        lock = self.__acquire_variable(key, access_key, wait=False, create=True)
+        # --- variable locked
+        try:
+            # the order allows to read the variables without lock, see get_variable_fast
             if per_reference:
-                self.__global_variable_dictionary[key] = value
-                self.__global_variable_type_dictionary[key] = data_type
+                self.__global_variable_dictionary[key] = stored_value
                 self.__variable_references[key] = True
             else:
-                self.__global_variable_dictionary[key] = copy.deepcopy(value)
-                self.__global_variable_type_dictionary[key] = data_type
                 self.__variable_references[key] = False
-            # --- release variable
+                self.__global_variable_dictionary[key] = stored_value
+            self.__global_variable_type_dictionary[key] = data_type
+        finally:
+            if lock is not None:
+                lock.release()
+        # --- release variable
+        self.__notify_change(key)
+
+        logger.debug("Global variable '%s' was set to value '%s' with type '%s'", key, value, data_type.__name__)
+
+    def __notify_change(self, key):
+        condition = self.__change_conditions[hash(key) % LOCK_STRIPES]
+        with condition:
+            self.__versions[key] = self.__versions.get(key, 0) + 1
+            condition.notify_all()
+
+    def __wait_for_version_change(self, key, version, timeout, state):
+        """Waits until the version of a global variable differs from the given one
+
+        :return: True if the version changed, False if the timeout was reached or the state was preempted
+        """
+        condition = self.__change_conditions[hash(key) % LOCK_STRIPES]
+
+        def notify_preemption():
+            with condition:
+                condition.notify_all()
+
+        if state is not None:
+            preempted_event = state._preempted
+            multi_event.orify(preempted_event, notify_preemption)
+        try:
+            end_time = None if timeout is None else time.time() + timeout
+            with condition:
+                while self.__versions.get(key, 0) == version:
+                    if state is not None and state.preempted:
+                        return False
+                    if end_time is None:
+                        condition.wait()
+                    else:
+                        remaining_time = end_time - time.time()
+                        if remaining_time <= 0:
+                            return False
+                        condition.wait(remaining_time)
+                return True
+        finally:
+            if state is not None:
+                multi_event.remove_callback(preempted_event, notify_preemption)
+
+    def wait_for_change(self, key, timeout=None, state=None):
+        """Waits until a global variable is set or deleted
+
+        In contrast to polling the variable, the waiting thread is woken up as soon as the variable changes. If a state
+        is passed, the wait is preempted together with the state, like
+        :meth:`rafcon.core.states.state.State.preemptive_wait`.
+
+        :param key: the key of the global variable
+        :param float timeout: the maximum time to wait in seconds or None to wait infinitely
+        :param state: the state whose preemption ends the wait, usually the calling state
+        :return: True if the variable changed, False if the timeout was reached or the state was preempted
+        :rtype: bool
+        """
+        return self.__wait_for_version_change(key, self.__versions.get(key, 0), timeout, state)
+
+    def wait_until(self, key, predicate, timeout=None, state=None):
+        """Waits until the value of a global variable fulfills a condition
 
-            if unlock:
-                self.unlock_variable(key, access_key)
+        The condition is checked immediately and after every change of the variable. A variable that does not exist
+        has the value None. See :meth:`wait_for_change` for the preemption.
 
-        logger.debug("Global variable '{}' was set to value '{}' with type '{}'".format(key, value, data_type.__name__))
+        :param key: the key of the global variable
+        :param predicate: a function getting the value of the variable and returning whether the condition is fulfilled
+        :param float timeout: the maximum time to wait in seconds or None to wait infinitely
+        :param state: the state whose preemption ends the wait, usually the calling state
+        :return: True if the condition is fulfilled, False if the timeout was reached or the state was preempted
+        :rtype: bool
+        """
+        end_time = None if timeout is None else time.time() + timeout
+        while True:
+            # the version is read first, so that no change between the check and the wait is missed
+            version = self.__versions.get(key, 0)
+            if predicate(self.get_variable(key)):
+                return True
+            remaining_time = None if end_time is None else end_time - time.time()
+            if not self.__wait_for_version_change(key, version, remaining_time, state):
+                return False
 
     def get_variable(self, key, per_reference=None, access_key=None, default=None):
         """Fetches the value of a global variable
@@ -109,39 +264,54 @@ class GlobalVariableManager(Observable):
         :return: The value stored at in the global variable key
         :raises exceptions.RuntimeError: if a wrong access key is passed or the variable cannot be accessed by reference
         """
-        if self.variable_exist(key):
-            unlock = True
-            if self.is_locked(key):
-                if self.__access_keys[key] == access_key:
-                    unlock = False
-                else:
-                    if not access_key:
-                        access_key = self.lock_variable(key, block=True)
-                    else:
-                        raise RuntimeError("Wrong access key for accessing global variable")
-            else:
-                access_key = self.lock_variable(key, block=True)
-
-            # --- variable locked
+        if not self.variable_exist(key):
+            return default
+        lock = self.__acquire_variable(key, access_key, wait=not access_key)
+        # --- variable locked
+        try:
+            if not self.variable_exist(key):
+                return default
             if self.variable_can_be_referenced(key):
                 if per_reference or per_reference is None:
-                    return_value = self.__global_variable_dictionary[key]
-                else:
-                    return_value = copy.deepcopy(self.__global_variable_dictionary[key])
-            else:
-                if per_reference:
-                    self.unlock_variable(key, access_key)
-                    raise RuntimeError("Variable cannot be accessed by reference")
-                else:
-                    return_value = copy.deepcopy(self.__global_variable_dictionary[key])
-            # --- release variable
+                    return self.__global_variable_dictionary[key]
+            elif per_reference:
+                raise RuntimeError("Variable cannot be accessed by reference")
+            return copy_value(self.__global_variable_dictionary[key])
+        finally:
+            if lock is not None:
+                lock.release()
+        # --- release variable
+
+    def get_variables(self, keys, per_reference=None, default=None):
+        """Fetches the values of several global variables at once
+
+        :param keys: the keys of the global variables to be fetched
+        :param bool per_reference: a flag to decide if the variables should be returned per reference or per value
+        :param default: a value to be returned for keys that do not exist
+        :return: the keys of the global variables and their values
+        :rtype: dict
+        :raises exceptions.RuntimeError: if a variable cannot be accessed by reference
+        """
+        return {key: self.get_variable(key, per_reference, default=default) for key in keys}
 
-            if unlock:
-                self.unlock_variable(key, access_key)
-            return return_value
-        else:
-            # logger.warn("Global variable '{0}' not existing, returning default value".format(key))
+    def get_variable_fast(self, key, default=None):
+        """Fetches the value of a global variable without locking it
+
+        This is meant for polling global variables in tight loops. Variables stored per reference are returned per
+        reference, all others per value. In contrast to :meth:`get_variable`, this does not wait for variables
+        explicitly locked by other threads, thus the value might be the one before the lock holder modifies it.
+
+        :param key: the key of the global variable to be fetched
+        :param default: a value to be returned if the key does not exist
+        :return: The value stored at in the global variable key
+        """
+        try:
+            value = self.__global_variable_dictionary[key]
+        except KeyError:
             return default
+        if type(value) in IMMUTABLE_TYPES or self.__variable_references.get(key, False):
+            return value
+        return copy.deepcopy(value)
 
     def variable_can_be_referenced(self, key):
         """Checks whether the value of the variable can be returned by reference
@@ -151,7 +321,7 @@ class GlobalVariableManager(Observable):
         """
         return key in self.__variable_references and self.__variable_references[key]
 
-    @Observable.observed
+    @observed_if_observers
     def delete_variable(self, key):
         """Deletes a global variable
 
@@ -161,19 +331,21 @@ class GlobalVariableManager(Observable):
         if self.is_locked(key):
             raise RuntimeError("Global variable is locked")
 
-        with self.__global_lock:
-            if key in self.__global_variable_dictionary:
-                access_key = self.lock_variable(key, block=True)
+        lock = self.__acquire_variable(key, wait=False)
+        if lock is None:
+            raise AttributeError("Global variable %s does not exist!" % str(key))
+        try:
+            with self.__stripe_locks[hash(key) % LOCK_STRIPES]:
                 del self.__global_variable_dictionary[key]
-                self.unlock_variable(key, access_key)
                 del self.__variable_locks[key]
                 del self.__variable_references[key]
-            else:
-                raise AttributeError("Global variable %s does not exist!" % str(key))
+        finally:
+            lock.release()
+        self.__notify_change(key)
 
-        logger.debug("Global variable %s was deleted!" % str(key))
+        logger.debug("Global variable %s was deleted!", key)
 
-    @Observable.observed
+    @observed_if_observers
     def lock_variable(self, key, block=False):
         """Locks a global variable
 
@@ -183,13 +355,14 @@ class GlobalVariableManager(Observable):
         # watch out for releasing the __dictionary_lock properly
         try:
             if key in self.__variable_locks:
+                lock = self.__variable_locks[key]
                 # acquire without arguments is blocking
-                lock_successful = self.__variable_locks[key].acquire(False)
+                lock_successful = lock.acquire(False)
                 if lock_successful or block:
                     if (not lock_successful) and block:  # case: lock could not be acquired => wait for it as block=True
                         duration = 0.
                         loop_time = 0.1
-                        while not self.__variable_locks[key].acquire(False):
+                        while not lock.acquire(False):
                             time.sleep(loop_time)
                             duration += loop_time
                             if int(duration*10) % 20 == 0:
@@ -198,6 +371,7 @@ class GlobalVariableManager(Observable):
                                                "access it.".format(currentThread(), duration, key))
                     access_key = global_variable_id_generator()
                     self.__access_keys[key] = access_key
+                    self.__locked_keys.add(key)
                     return access_key
                 else:
                     logger.warning("Global variable {} already locked".format(str(key)))
@@ -209,7 +383,7 @@ class GlobalVariableManager(Observable):
             logger.error("Exception thrown: {}".format(str(e)))
             return False
 
-    @Observable.observed
+    @observed_if_observers
     def unlock_variable(self, key, access_key, force=False):
         """Unlocks a global variable
 
@@ -222,6 +396,7 @@ class GlobalVariableManager(Observable):
         if self.__access_keys[key] == access_key or force:
             if key in self.__variable_locks:
                 if self.is_locked(key):
+                    self.__locked_keys.discard(key)
                     self.__variable_locks[key].release()
                     return True
                 else:
@@ -232,7 +407,7 @@ class GlobalVariableManager(Observable):
         else:
             raise RuntimeError("Wrong access key for accessing global variable")
 
-    @Observable.observed
+    @observed_if_observers
     def set_locked_variable(self, key, access_key, value):
         """Set an already locked global variable
 
@@ -267,14 +442,12 @@ class GlobalVariableManager(Observable):
         return key in self.__global_variable_type_dictionary
 
     def is_locked(self, key):
-        """Returns the status of the lock of a global variable
+        """Returns whether a global variable is explicitly locked
 
         :param key: the unique key of the global variable
         :return:
         """
-        if key in self.__variable_locks:
-            return self.__variable_locks[key].locked()
-        return False
+        return key in self.__locked_keys
 
     def get_all_keys_starting_with(self, start_key):
         """ Returns all keys, which start with a certain pattern defined in :param start_key.
@@ -299,11 +472,11 @@ class GlobalVariableManager(Observable):
     def global_variable_dictionary(self):
         """Property for the _global_variable_dictionary field"""
         dict_copy = {}
-        for key, value in self.__global_variable_dictionary.iteritems():
+        for key, value in self.__global_variable_dictionary.items():
             if key in self.__variable_references and self.__variable_references[key]:
                 dict_copy[key] = value
             else:
-                dict_copy[key] = copy.deepcopy(value)
+                dict_copy[key] = copy_value(value)
 
         return dict_copy
 
@@ -20,10 +20,13 @@
 import os
 import shutil
 import copy
+from collections import namedtuple
 from gtkmvc import Observable
 
 from rafcon.core import interface
 from rafcon.core.storage import storage
+from rafcon.core.storage import library_cache
+from rafcon.core.storage import library_index
 from rafcon.core.custom_exceptions import LibraryNotFoundException
 import rafcon.core.config as config
 
@@ -35,6 +38,11 @@ try:
 except ImportError:
     OrderedDict = dict
 
+# The interface of a library, which is used by library states, whose state copy was not created yet. The outcomes and
+# data ports are the ones of the root state of the library and must therefore be copied before using them.
+LibraryInterface = namedtuple('LibraryInterface', ['version', 'name', 'outcomes', 'input_data_ports',
+                                                   'output_data_ports', 'root_state'])
+
 
 class LibraryManager(Observable):
     """This class manages all libraries
@@ -62,8 +70,13 @@ class LibraryManager(Observable):
         self._skipped_states = []
         self._skipped_library_roots = []
 
+        # the indices of the library root paths, with the library root path as key
+        self._library_indices = {}
+
         # loaded libraries
         self._loaded_libraries = {}
+        self._loaded_library_fingerprints = {}
+        self._library_interfaces = {}
         self._libraries_instances = {}
 
     def prepare_destruction(self):
@@ -71,6 +84,8 @@ class LibraryManager(Observable):
 
     def clean_loaded_libraries(self):
         self._loaded_libraries.clear()
+        self._loaded_library_fingerprints.clear()
+        self._library_interfaces.clear()
 
     def initialize(self):
         """Initializes the library manager
@@ -78,9 +93,16 @@ class LibraryManager(Observable):
         It searches through all library paths given in the config file for libraries, and loads the states.
 
         This cannot be done in the __init__ function as the library_manager can be compiled and executed by
-        singleton.py before the state*.pys are loaded
+        singleton.py before the state*.pys are loaded. The library root paths are indexed anew, unless the library
+        cache is enabled and holds an index for them.
         """
         logger.debug("Initializing LibraryManager: Loading libraries ... ")
+        self._library_indices = {}
+        self._update_libraries()
+        logger.debug("Initialization of LibraryManager done")
+
+    def _update_libraries(self):
+        """Updates the library tree from the library root paths and removes changed libraries from the loaded ones"""
         self._libraries = {}
         self._library_root_paths = {}
         self._replaced_libraries = {}
@@ -116,7 +138,10 @@ class LibraryManager(Observable):
             logger.debug("Adding library '{1}' from {0}".format(library_root_path, library_root_key))
 
         self._libraries = OrderedDict(sorted(self._libraries.items()))
-        logger.debug("Initialization of LibraryManager done")
+        library_root_paths = set(self._library_root_paths.itervalues())
+        self._library_indices = {library_root_path: index for library_root_path, index
+                                 in self._library_indices.iteritems() if library_root_path in library_root_paths}
+        self._remove_changed_loaded_libraries()
 
     @staticmethod
     def _clean_path(path):
@@ -137,10 +162,24 @@ class LibraryManager(Observable):
         return path
 
     def _load_libraries_from_root_path(self, library_root_key, library_root_path):
+        """Loads the libraries of a library root path
+
+        Only the directories changed since the last update of the index of the library root path are listed again.
+
+        :param str library_root_key: the key, the libraries are mounted at
+        :param str library_root_path: the path to load all libraries from
+        """
         self._library_root_paths[library_root_key] = library_root_path
-        self._libraries[library_root_key] = {}
-        self._load_nested_libraries(library_root_path, self._libraries[library_root_key])
-        self._libraries[library_root_key] = OrderedDict(sorted(self._libraries[library_root_key].items()))
+        library_cache_enabled = config.global_config.get_config_value("LIBRARY_CACHE_ENABLE", False)
+        if library_root_path not in self._library_indices:
+            if library_cache_enabled:
+                self._library_indices[library_root_path] = library_index.load_library_index(library_root_path)
+            else:
+                self._library_indices[library_root_path] = library_index.LibraryIndex(library_root_path)
+        index = self._library_indices[library_root_path]
+        if index.update(check_name=self.check_clean_path_of_library) and library_cache_enabled:
+            library_index.save_library_index(index)
+        self._libraries[library_root_key] = index.get_library_tree()
 
     def check_clean_path_of_library(self, folder_path, folder_name):
         library_root_path = self._library_root_paths[self._get_library_root_key_for_os_path(folder_path)]
@@ -153,32 +192,43 @@ class LibraryManager(Observable):
                            "".format(not_allowed_characters, full_path))
         return folder_path, folder_name
 
-    def _load_nested_libraries(self, library_path, target_dict):
-        """Recursively load libraries within path
-
-        Adds all libraries specified in a given path and stores them into the provided library dictionary. The library
-        entries in the dictionary consist only of the path to the library in the file system.
+    @Observable.observed
+    def refresh_libraries(self):
+        """Reloads the libraries from the file system
 
-        :param library_path: the path to add all libraries from
-        :param target_dict: the target dictionary to store all loaded libraries to
+        Only the directories changed since the last refresh are listed again, see
+        :class:`rafcon.core.storage.library_index.LibraryIndex`. Loaded libraries are only removed, if the index
+        reports a change of their directory (or of the directory of a packed library file) and, with enabled library
+        cache, if any of their files was changed, added or removed.
         """
-        for library_name in os.listdir(library_path):
-            library_folder_path, library_name = self.check_clean_path_of_library(library_path, library_name)
-            full_library_path = os.path.join(library_path, library_name)
-            if os.path.isdir(full_library_path) and library_name[0] != '.':
-                if os.path.exists(os.path.join(full_library_path, storage.STATEMACHINE_FILE)) \
-                        or os.path.exists(os.path.join(full_library_path, storage.STATEMACHINE_FILE_OLD)):
-                    target_dict[library_name] = full_library_path
-                else:
-                    target_dict[library_name] = {}
-                    self._load_nested_libraries(full_library_path, target_dict[library_name])
-                    target_dict[library_name] = OrderedDict(sorted(target_dict[library_name].items()))
+        self._update_libraries()
 
-    @Observable.observed
-    def refresh_libraries(self):
-        """Deletes all loaded libraries and reloads them from the file system
+    def _remove_changed_loaded_libraries(self):
+        """Removes all loaded libraries, whose files changed since they were loaded
+
+        Only the libraries within directories, which changed according to the library indices, are checked.
         """
-        self.initialize()
+        changed_paths = set()
+        for index in self._library_indices.itervalues():
+            changed_paths |= index.changed_paths
+        library_os_paths = set(self.library_os_paths.itervalues())
+        for lib_os_path, fingerprint in self._loaded_library_fingerprints.items():
+            if lib_os_path in library_os_paths and lib_os_path not in changed_paths and not \
+                    (lib_os_path.endswith(storage.PACKED_STATE_MACHINE_FILE_EXTENSION) and
+                     os.path.dirname(lib_os_path) in changed_paths):
+                continue
+            try:
+                # without library cache, no fingerprint is created when loading the library
+                changed = fingerprint is None or not os.path.exists(lib_os_path) or \
+                    library_cache.get_fingerprint(lib_os_path) != fingerprint
+            except OSError:
+                # a file was removed in the meantime
+                changed = True
+            if changed:
+                logger.debug("Library {0} changed and is loaded again on its next use".format(lib_os_path))
+                del self._loaded_library_fingerprints[lib_os_path]
+                self._loaded_libraries.pop(lib_os_path, None)
+                self._library_interfaces.pop(lib_os_path, None)
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc
@@ -198,6 +248,19 @@ class LibraryManager(Observable):
 
         self._libraries = libraries
 
+    @property
+    def library_os_paths(self):
+        """Flat map of all libraries
+
+        :return: the library paths (including the library names) as keys and the os paths of the libraries as values
+        :rtype: dict
+        """
+        library_os_paths = {}
+        for library_root_key, library_root_path in self._library_root_paths.iteritems():
+            for relative_library_path, library_os_path in self._library_indices[library_root_path].libraries.iteritems():
+                library_os_paths[os.path.join(library_root_key, relative_library_path)] = library_os_path
+        return library_os_paths
+
     @property
     def library_root_paths(self):
         """Getter for library paths
@@ -354,6 +417,8 @@ class LibraryManager(Observable):
             library_root_path = self._library_root_paths[library_root_key]
             path_elements_without_library_root = path[len(library_root_path)+1:].split(os.sep)
             library_name = path_elements_without_library_root[-1]
+            if library_name.endswith(storage.PACKED_STATE_MACHINE_FILE_EXTENSION):
+                library_name = library_name[:-len(storage.PACKED_STATE_MACHINE_FILE_EXTENSION)]
             sub_library_path = ''
             if len(path_elements_without_library_root[:-1]):
                 sub_library_path = os.sep + os.sep.join(path_elements_without_library_root[:-1])
@@ -379,7 +444,6 @@ class LibraryManager(Observable):
         # state_machine = storage.load_state_machine_from_path(lib_os_path)
         # return state_machine.version, state_machine.root_state
 
-        # TODO observe changes on file system and update data
         if lib_os_path in self._loaded_libraries:
             # this list can also be taken to open library state machines TODO -> implement it -> because faster
             state_machine = self._loaded_libraries[lib_os_path]
@@ -388,16 +452,52 @@ class LibraryManager(Observable):
             state_copy = copy.deepcopy(state_machine.root_state)
             return state_machine.version, state_copy
         else:
-            state_machine = storage.load_state_machine_from_path(lib_os_path)
-            self._loaded_libraries[lib_os_path] = state_machine
+            state_machine = self._load_library_state_machine(lib_os_path)
             if config.global_config.get_config_value("NO_PROGRAMMATIC_CHANGE_OF_LIBRARY_STATES_PERFORMED", False):
                 return state_machine.version, state_machine.root_state
             else:
                 state_copy = copy.deepcopy(state_machine.root_state)
                 return state_machine.version, state_copy
 
+    def get_library_interface(self, lib_os_path):
+        """Returns the interface of the library specified via the lib_os_path, without copying its root state
+
+        :param lib_os_path: the location of the library
+        :return: the version, name, outcomes and data ports of the library
+        :rtype: LibraryInterface
+        """
+        if lib_os_path not in self._library_interfaces:
+            if lib_os_path in self._loaded_libraries:
+                state_machine = self._loaded_libraries[lib_os_path]
+            else:
+                state_machine = self._load_library_state_machine(lib_os_path)
+            root_state = state_machine.root_state
+            self._library_interfaces[lib_os_path] = LibraryInterface(
+                state_machine.version, root_state.name, root_state.outcomes, root_state.input_data_ports,
+                root_state.output_data_ports, root_state)
+        return self._library_interfaces[lib_os_path]
+
+    def _load_library_state_machine(self, lib_os_path):
+        fingerprint = None
+        if config.global_config.get_config_value("LIBRARY_CACHE_ENABLE", False):
+            # the fingerprint validates the cache entry and is used to detect changes of the library on a refresh
+            fingerprint = library_cache.get_fingerprint(lib_os_path)
+            state_machine = library_cache.load_state_machine_from_path(lib_os_path, fingerprint)
+        else:
+            state_machine = storage.load_state_machine_from_path(lib_os_path)
+        # the loaded library is only copied, thus the copies can share its immutable parts
+        from rafcon.core.states.container_state import ContainerState
+        if isinstance(state_machine.root_state, ContainerState):
+            state_machine.root_state.mark_as_library_template()
+        self._loaded_libraries[lib_os_path] = state_machine
+        self._loaded_library_fingerprints[lib_os_path] = fingerprint
+        return state_machine
+
     def remove_library_from_file_system(self, library_path, library_name):
         """Remove library from hard disk."""
         library_file_system_path = self.get_os_path_to_library(library_path, library_name)[0]
-        shutil.rmtree(library_file_system_path)
+        if os.path.isfile(library_file_system_path):
+            os.remove(library_file_system_path)
+        else:
+            shutil.rmtree(library_file_system_path)
         self.refresh_libraries()
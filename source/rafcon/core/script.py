@@ -19,12 +19,16 @@
 import os
 import imp
 import yaml
+import marshal
+import hashlib
 from gtkmvc import Observable
 
 from rafcon.core.id_generator import generate_script_id
+from rafcon.core.config import global_config
 import rafcon.core.singleton
 
 from rafcon.utils import filesystem
+from rafcon.utils.constants import RAFCON_TEMP_PATH_USER
 from rafcon.core.storage.storage import SCRIPT_FILE
 from rafcon.utils import log
 logger = log.get_logger(__name__)
@@ -34,6 +38,116 @@ DEFAULT_SCRIPT_FILE = "default_script.py"
 
 DEFAULT_SCRIPT = filesystem.read_file(os.path.dirname(__file__), DEFAULT_SCRIPT_FILE)
 
+# the compiled code of all scripts by the hash of their file name and source text, shared by all identical scripts
+_code_cache = {}
+_refused_code_cache_paths = set()
+CODE_CACHE_FILE_EXTENSION = '.code'
+
+
+def get_code_cache_path():
+    """Returns the folder of the persistent script code cache, as configured by SCRIPT_CODE_CACHE_PATH
+
+    :return: the folder or None, if the persistent cache is disabled by SCRIPT_CODE_CACHE_ENABLE
+    :rtype: str
+    """
+    if not global_config.get_config_value("SCRIPT_CODE_CACHE_ENABLE", False):
+        return None
+    cache_path = global_config.get_config_value("SCRIPT_CODE_CACHE_PATH", "%RAFCON_TEMP_PATH_USER/script_code_cache")
+    if cache_path.startswith('%RAFCON_TEMP_PATH_USER'):
+        cache_path = cache_path.replace('%RAFCON_TEMP_PATH_USER', RAFCON_TEMP_PATH_USER)
+    return cache_path
+
+
+def _get_private_code_cache_path():
+    """Returns the folder of the persistent script code cache, if it can be used
+
+    The cached code is executed, thus the folder is created to be only accessible by the current user. Folders of other
+    users or writable by other users are refused.
+
+    :return: the folder or None, if the persistent cache is disabled or cannot be used
+    :rtype: str
+    """
+    cache_path = get_code_cache_path()
+    if cache_path is None:
+        return None
+    try:
+        filesystem.create_private_path(cache_path)
+    except OSError, e:
+        if cache_path not in _refused_code_cache_paths:
+            _refused_code_cache_paths.add(cache_path)
+            logger.warn("The script code cache {0} is not used: {1}".format(cache_path, e))
+        return None
+    return cache_path
+
+
+def _encode(text):
+    return text.encode('utf-8') if isinstance(text, unicode) else text
+
+
+def _load_cached_code(cache_file_path):
+    try:
+        with open(cache_file_path, 'rb') as file_pointer:
+            if file_pointer.read(len(imp.get_magic())) != imp.get_magic():
+                return None
+            return marshal.load(file_pointer)
+    except IOError:
+        # the script was not compiled before
+        return None
+    except (EOFError, ValueError, TypeError), e:
+        logger.warn("Invalid script code cache file {0}: {1}".format(cache_file_path, e))
+        return None
+
+
+def _store_cached_code(cache_file_path, code):
+    try:
+        # other processes must never read incomplete files
+        tmp_file_path = "{0}.{1}.tmp".format(cache_file_path, os.getpid())
+        with open(tmp_file_path, 'wb') as file_pointer:
+            file_pointer.write(imp.get_magic())
+            marshal.dump(code, file_pointer)
+        os.rename(tmp_file_path, cache_file_path)
+    except (OSError, IOError, ValueError), e:
+        logger.warn("Script code cache file {0} could not be written: {1}".format(cache_file_path, e))
+
+
+def get_compiled_code(script_text, filename=SCRIPT_FILE):
+    """Returns the compiled code of a script
+
+    The code is compiled only once for identical scripts and then kept in memory. If SCRIPT_CODE_CACHE_ENABLE is set,
+    the compiled code is also stored on the file system and thus shared with other RAFCON processes.
+
+    :param str script_text: the source text of the script
+    :param str filename: the file name of the script
+    :return: the compiled code
+    :raises exceptions.SyntaxError: if the script cannot be compiled
+    """
+    code_hash = hashlib.sha1(_encode(filename) + '\0' + _encode(script_text)).hexdigest()
+    code = _code_cache.get(code_hash)
+    if code is not None:
+        return code
+
+    cache_path = _get_private_code_cache_path()
+    if cache_path is not None:
+        cache_file_path = os.path.join(cache_path, code_hash + CODE_CACHE_FILE_EXTENSION)
+        code = _load_cached_code(cache_file_path)
+    if code is None:
+        code = compile(script_text, '%s (%s)' % (filename, code_hash[:10]), 'exec')
+        if cache_path is not None:
+            _store_cached_code(cache_file_path, code)
+    _code_cache[code_hash] = code
+    return code
+
+
+def clear_code_cache():
+    """Removes all compiled code from the memory and from the persistent cache"""
+    _code_cache.clear()
+    cache_path = get_code_cache_path()
+    if cache_path is None or not os.path.isdir(cache_path):
+        return
+    for file_name in os.listdir(cache_path):
+        if file_name.endswith(CODE_CACHE_FILE_EXTENSION):
+            os.remove(os.path.join(cache_path, file_name))
+
 
 class Script(Observable, yaml.YAMLObject):
     """A class for representing the script file for each state in a state machine
@@ -43,6 +157,8 @@ class Script(Observable, yaml.YAMLObject):
     :ivar path: the path where the script resides
     :ivar filename: the full name of the script file
     :ivar _compiled_module: the compiled module
+    :ivar _code: the script text and file name together with the code compiled from them
+    :ivar _code_template: the script of the copied state, which shares its compiled code with the copy
     :ivar _script_id: the id of the script
     :ivar check_path: a flag to indicate if the path should be checked for existence
 
@@ -56,6 +172,8 @@ class Script(Observable, yaml.YAMLObject):
         self._path = None
         self._filename = None
         self._compiled_module = None
+        self._code = None
+        self._code_template = None
         self._script_id = generate_script_id()
         self._parent = None
         self._check_path = check_path
@@ -102,6 +220,36 @@ class Script(Observable, yaml.YAMLObject):
             return self._compiled_module.execute(state, inputs, outputs,
                                                  rafcon.core.singleton.global_variable_manager)
 
+    def get_code(self):
+        """Returns the compiled code of the script
+
+        The code is compiled only once for all copies of a state, e.g. all instances of a library, as long as their
+        script text is the one of the copied state (see :meth:`share_code_of`). Other scripts with identical text
+        share the code via :func:`get_compiled_code`.
+
+        :return: the compiled code
+        :raises exceptions.SyntaxError: if the script cannot be compiled
+        """
+        code_template = self._code_template
+        if code_template is not None and code_template.script is self._script and \
+                code_template.filename == self.filename:
+            return code_template.get_code()
+        code = self._code
+        if code is None or code[0] is not self._script or code[1] != self.filename:
+            code = (self._script, self.filename, get_compiled_code(self._script, self.filename))
+            self._code = code
+        return code[2]
+
+    def share_code_of(self, script):
+        """Lets the script use the compiled code of the script of the copied state
+
+        :param Script script: the script of the copied state
+        """
+        # copies of copies refer to the first script, thus the code is compiled only once for all of them
+        while script._code_template is not None and script._code_template.script is script.script:
+            script = script._code_template
+        self._code_template = script
+
     def _load_script(self):
         """Loads the script from the filesystem
 
@@ -117,8 +265,13 @@ class Script(Observable, yaml.YAMLObject):
     def build_module(self):
         """Builds a temporary module from the script file
 
+        The compiled code is shared by all identical scripts (see :meth:`get_code`), only the module namespace
+        is created for each script.
+
         :raises exceptions.IOError: if the compilation of the script module failed
         """
+        # compiling does not need the import lock
+        code = self.get_code()
         try:
             imp.acquire_lock()
             module_name = os.path.splitext(self.filename)[0] + str(self._script_id)
@@ -126,8 +279,6 @@ class Script(Observable, yaml.YAMLObject):
             # load module
             tmp_module = imp.new_module(module_name)
 
-            code = compile(self.script, '%s (%s)' % (self.filename, self._script_id), 'exec')
-
             try:
                 exec code in tmp_module.__dict__
             except RuntimeError, e:
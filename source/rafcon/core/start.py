@@ -22,11 +22,11 @@
 """
 
 import os
+import json
 import argparse
 from os.path import realpath, dirname, join, exists
 import signal
 import time
-from Queue import Empty
 import threading
 import sys
 
@@ -37,7 +37,7 @@ import rafcon.utils.filesystem as filesystem
 from rafcon.core.config import global_config
 import rafcon.core.singleton as core_singletons
 from rafcon.core.storage import storage
-from rafcon.core.states.state import StateExecutionStatus
+from rafcon.core.execution import batch_execution
 
 from rafcon.utils import plugins
 from rafcon.utils import log
@@ -45,6 +45,8 @@ from rafcon.utils import log
 logger = log.get_logger("rafcon.start.core")
 
 _user_abort = False
+# set by the signal handler to abort a batch execution
+_batch_abort_event = threading.Event()
 
 
 def pre_setup_plugins():
@@ -129,6 +131,14 @@ def setup_argument_parser():
                         help="path within a state machine to the state that should be launched. The state path "
                              "consists of state ids (e.g. QPOXGD/YVWJKZ whereof QPOXGD is the root state and YVWJKZ "
                              "it's child state to start from).")
+    parser.add_argument('--batch', metavar='path', dest='batch_path', default=None,
+                        help="execute the (first) state machine once for each line of the given file, each line "
+                             "holding the input data of the root state as JSON object. The results are printed as "
+                             "JSON objects, one line per run. Use '-' to read the input data from stdin.")
+    parser.add_argument('--batch_parallel', type=int, metavar='number', dest='batch_parallel',
+                        default=batch_execution.DEFAULT_MAX_PARALLEL_RUNS,
+                        help="the maximum number of parallel runs in batch mode. Default: {0}".format(
+                            batch_execution.DEFAULT_MAX_PARALLEL_RUNS))
     return parser
 
 
@@ -168,6 +178,40 @@ def start_state_machine(sm, start_state_path=None):
         sm_thread.start()
 
 
+def read_batch_input_data(batch_path):
+    """Reads the input data sets of a batch execution, one JSON object per line
+
+    :param str batch_path: the path of the file or '-' for stdin
+    :return: the input data sets
+    :rtype: generator of dict
+    """
+    file_pointer = sys.stdin if batch_path == '-' else open(batch_path)
+    try:
+        for line in file_pointer:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if file_pointer is not sys.stdin:
+            file_pointer.close()
+
+
+def execute_batch(state_machine, batch_path, max_parallel_runs=batch_execution.DEFAULT_MAX_PARALLEL_RUNS):
+    """Executes a state machine for all input data sets of a batch file and prints the results as JSON objects
+
+    :param state_machine: the state machine to execute
+    :param str batch_path: the path of the file with the input data sets or '-' for stdin
+    :param int max_parallel_runs: the maximum number of parallel runs
+    """
+    for result in batch_execution.execute_batch(state_machine, read_batch_input_data(batch_path), max_parallel_runs,
+                                                _batch_abort_event):
+        final_outcome = result.final_outcome
+        sys.stdout.write(json.dumps({'index': result.index,
+                                     'outcome_id': final_outcome.outcome_id if final_outcome else None,
+                                     'outcome_name': final_outcome.name if final_outcome else None,
+                                     'output_data': result.output_data}, default=repr) + "\n")
+        sys.stdout.flush()
+
+
 def wait_for_state_machine_finished(state_machine):
     """ wait for a state machine to finish its execution
 
@@ -176,21 +220,16 @@ def wait_for_state_machine_finished(state_machine):
     """
     global _user_abort
 
-    from rafcon.core.states.execution_state import ExecutionState
-    if not isinstance(state_machine.root_state, ExecutionState):
-        while len(state_machine.execution_histories[0]) < 1:
-            time.sleep(0.1)
-    else:
-        time.sleep(0.5)
-
-    while state_machine.root_state.state_execution_status is not StateExecutionStatus.INACTIVE:
-        try:
-            state_machine.root_state.concurrency_queue.get(timeout=1)
-            # this check triggers if the state machine could not be stopped in the signal handler
-            if _user_abort:
-                return
-        except Empty:
-            pass
+    execution_future = state_machine.execution_future
+    if execution_future is None:
+        logger.warn("The state machine was not started")
+        return
+
+    # the wait is limited, so that signals can be handled by the main thread
+    while not execution_future.wait(1):
+        # this check triggers if the state machine could not be stopped in the signal handler
+        if _user_abort:
+            return
         # no logger output here to make it easier for the parser
         logger.verbose("RAFCON live signal")
 
@@ -221,10 +260,20 @@ def signal_handler(signal, frame):
 
     logger.info("Shutting down ...")
 
+    # no further batch runs are started
+    _batch_abort_event.set()
+
     try:
-        if not state_machine_execution_engine.finished_or_stopped():
-            state_machine_execution_engine.stop()
-            state_machine_execution_engine.join(3)  # Wait max 3 sec for the execution to stop
+        # the engines bound to state machines execute the runs of a batch execution
+        execution_engines = [state_machine_execution_engine] + state_machine_execution_engine.get_execution_engines()
+        running_execution_engines = [execution_engine for execution_engine in execution_engines
+                                     if not execution_engine.finished_or_stopped()]
+        for execution_engine in running_execution_engines:
+            execution_engine.stop()
+        # Wait max 3 sec for the executions to stop
+        stop_deadline = time.time() + 3
+        for execution_engine in running_execution_engines:
+            execution_engine.join(max(0, stop_deadline - time.time()))
     except Exception:
         logger.exception("Could not stop state machine")
 
@@ -271,6 +320,12 @@ def main():
         if first_sm is None:
             first_sm = sm
 
+    if user_input.batch_path:
+        execute_batch(first_sm, user_input.batch_path, user_input.batch_parallel)
+        logger.info("Batch execution finished!")
+        plugins.run_hook("post_destruction")
+        return
+
     if not user_input.remote:
         start_state_machine(first_sm, user_input.start_state_path)
 
@@ -118,6 +118,15 @@ class DataFlow(StateElement):
             'to_key': state_element.to_key
         }
 
+    def _update_routing_index_of_parent(self):
+        """Informs the parent state about a changed data flow origin or target
+
+        The parent keeps lookup tables from the connected ports to data flows, which have to be updated.
+        """
+        parent = self.parent
+        if parent is not None and hasattr(parent, '_rebuild_data_flow_routing_index'):
+            parent._rebuild_data_flow_routing_index()
+
 #########################################################################
 # Properties for all class field that must be observed by the gtkmvc
 #########################################################################
@@ -146,6 +155,7 @@ class DataFlow(StateElement):
             self._from_state = old_from_state
             self._from_key = old_from_key
             raise ValueError("The data flow origin could not be changed: {0}".format(message))
+        self._update_routing_index_of_parent()
 
     @property
     def from_state(self):
@@ -161,6 +171,7 @@ class DataFlow(StateElement):
             raise ValueError("from_state must be of type str")
 
         self._change_property_with_validity_check('_from_state', from_state)
+        self._update_routing_index_of_parent()
 
     @property
     def from_key(self):
@@ -176,6 +187,7 @@ class DataFlow(StateElement):
             raise ValueError("from_key must be of type int")
 
         self._change_property_with_validity_check('_from_key', from_key)
+        self._update_routing_index_of_parent()
 
     @lock_state_machine
     @Observable.observed
@@ -201,6 +213,7 @@ class DataFlow(StateElement):
             self._to_state = old_to_state
             self._to_key = old_to_key
             raise ValueError("The data flow target could not be changed: {0}".format(message))
+        self._update_routing_index_of_parent()
 
     @property
     def to_state(self):
@@ -216,6 +229,7 @@ class DataFlow(StateElement):
             raise ValueError("to_state must be of type str")
 
         self._change_property_with_validity_check('_to_state', to_state)
+        self._update_routing_index_of_parent()
 
     @property
     def to_key(self):
@@ -231,6 +245,7 @@ class DataFlow(StateElement):
             raise ValueError("to_key must be of type int")
 
         self._change_property_with_validity_check('_to_key', to_key)
+        self._update_routing_index_of_parent()
 
     @property
     def data_flow_id(self):
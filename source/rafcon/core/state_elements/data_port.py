@@ -41,6 +41,8 @@ class DataPort(StateElement):
     :ivar bool DataPort.init_without_default_value_type_exceptions: if true it is allowed to initiate with any default
                                                                     value type used to load not matching default value
                                                                     data types and correct them using the GUI.
+    :ivar bool DataPort.immutable: if true the values of the data port are never changed in-place and are therefore
+                                   passed by reference between states, independent of the data passing policy
     """
 
     # Define all parameters and set their default values
@@ -48,9 +50,10 @@ class DataPort(StateElement):
     _data_port_id = None
     _data_type = type(None)
     _default_value = None
+    _immutable = False
 
     def __init__(self, name=None, data_type=None, default_value=None, data_port_id=None, parent=None, force_type=False,
-                 init_without_default_value_type_exceptions=False):
+                 init_without_default_value_type_exceptions=False, immutable=False):
         if type(self) == DataPort and not force_type:
             raise NotImplementedError
         super(DataPort, self).__init__()
@@ -67,6 +70,7 @@ class DataPort(StateElement):
         if data_type is not None:
             self.data_type = data_type
         self.default_value = default_value
+        self.immutable = immutable
 
         # Checks for validity
         self.parent = parent
@@ -81,7 +85,7 @@ class DataPort(StateElement):
 
     def __copy__(self):
         return self.__class__(self._name, self._data_type, self._default_value, self._data_port_id, None,
-                              self._was_forced_type)
+                              self._was_forced_type, immutable=self._immutable)
 
     def __deepcopy__(self, memo=None, _nil=[]):
         return self.__copy__()
@@ -96,23 +100,28 @@ class DataPort(StateElement):
         name = dictionary['name']
         data_type = dictionary['data_type']
         default_value = dictionary['default_value']
+        immutable = dictionary.get('immutable', False)  # only stored for immutable data ports
         # Allow creation of DataPort class when loading from YAML file
         if cls == DataPort:
             return DataPort(name, data_type, default_value, data_port_id, force_type=True,
-                            init_without_default_value_type_exceptions=True)
+                            init_without_default_value_type_exceptions=True, immutable=immutable)
         # Call appropriate constructor, e.g. InputDataPort(...) for input data ports
         else:
             return cls(name, data_type, default_value, data_port_id, force_type=True,
-                       init_without_default_value_type_exceptions=True)
+                       init_without_default_value_type_exceptions=True, immutable=immutable)
 
     @staticmethod
     def state_element_to_dict(state_element):
-        return {
+        dict_representation = {
             'data_port_id': state_element.data_port_id,
             'name': state_element.name,
             'data_type': state_element.data_type,
             'default_value': state_element.default_value
         }
+        # the flag is omitted for mutable data ports to keep the format of existing state machines
+        if state_element.immutable:
+            dict_representation['immutable'] = True
+        return dict_representation
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc
@@ -183,6 +192,23 @@ class DataPort(StateElement):
         except (TypeError, AttributeError) as e:
             raise e
 
+    @property
+    def immutable(self):
+        """Property for the _immutable field
+
+        If set, the values of the data port are passed by reference between states. The user guarantees that the
+        values are not changed in-place.
+        """
+        return self._immutable
+
+    @immutable.setter
+    @lock_state_machine
+    @Observable.observed
+    def immutable(self, immutable):
+        if not isinstance(immutable, bool):
+            raise TypeError("immutable must be of type bool")
+        self._immutable = immutable
+
     @lock_state_machine
     @Observable.observed
     def change_data_type(self, data_type, default_value=None):
@@ -23,7 +23,7 @@ from gtkmvc import Observable
 
 from rafcon.core.state_elements.state_element import StateElement
 from rafcon.core.state_elements.data_port import DataPort
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, lock_state_machine_runtime
 from rafcon.utils import type_helpers
 
 
@@ -173,7 +173,7 @@ class ScopedData(StateElement):
         return self._name
 
     @name.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     @Observable.observed
     def name(self, name):
         if not isinstance(name, basestring):
@@ -190,7 +190,7 @@ class ScopedData(StateElement):
         return self._value
 
     @value.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     @Observable.observed
     def value(self, value):
         # check for primitive data types
@@ -215,7 +215,7 @@ class ScopedData(StateElement):
         return self._value_type
 
     @value_type.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     @Observable.observed
     def value_type(self, value_type):
         self._value_type = type_helpers.convert_string_to_type(value_type)
@@ -228,7 +228,7 @@ class ScopedData(StateElement):
         return self._from_state
 
     @from_state.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     @Observable.observed
     def from_state(self, from_state):
         if from_state is not None:
@@ -247,7 +247,7 @@ class ScopedData(StateElement):
         return self._data_port_type
 
     @data_port_type.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     @Observable.observed
     def data_port_type(self, data_port_type):
         if not issubclass(data_port_type, DataPort):
@@ -264,7 +264,7 @@ class ScopedData(StateElement):
     # WARNING: This setter function should never be used, as the timestamp is generated when the setter function of
     # the self._result variable is called
     @timestamp.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     @Observable.observed
     def timestamp(self, timestamp):
         if not isinstance(timestamp, float):
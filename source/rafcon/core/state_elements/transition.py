@@ -102,6 +102,15 @@ class Transition(StateElement):
             'to_outcome': state_element.to_outcome
         }
 
+    def _update_origin_index_of_parent(self):
+        """Informs the parent state about a changed transition origin
+
+        The parent keeps a lookup table from (from_state, from_outcome) to transitions, which has to be updated.
+        """
+        parent = self.parent
+        if parent is not None and hasattr(parent, '_rebuild_transition_origin_index'):
+            parent._rebuild_transition_origin_index()
+
 #########################################################################
 # Properties for all class field that must be observed by the gtkmvc
 #########################################################################
@@ -131,6 +140,7 @@ class Transition(StateElement):
             self._from_state = old_from_state
             self._from_outcome = old_from_outcome
             raise ValueError("The transition origin could not be changed: {0}".format(message))
+        self._update_origin_index_of_parent()
 
     @lock_state_machine
     @Observable.observed
@@ -174,6 +184,7 @@ class Transition(StateElement):
             raise ValueError("from_state must be of type str")
 
         self._change_property_with_validity_check('_from_state', from_state)
+        self._update_origin_index_of_parent()
 
     @property
     def from_outcome(self):
@@ -190,6 +201,7 @@ class Transition(StateElement):
             raise ValueError("from_outcome must be of type int")
 
         self._change_property_with_validity_check('_from_outcome', from_outcome)
+        self._update_origin_index_of_parent()
 
     @property
     def to_state(self):
@@ -22,8 +22,10 @@
 
 """
 
+import itertools
 from contextlib import contextmanager
 from copy import copy
+from functools import partial
 from threading import RLock
 from datetime import datetime
 
@@ -31,7 +33,11 @@ from gtkmvc import Observable
 from jsonconversion.jsonobject import JSONObject
 
 import rafcon
-from rafcon.core.execution.execution_history import ExecutionHistory, ExecutionHistoryStorage
+from rafcon.core.execution.execution_history import ExecutionHistory, ExecutionHistoryStorage, \
+    ExecutionHistoryRetentionPolicy
+from rafcon.core.execution.execution_log_storage import create_async_execution_history_storage, LOG_FILE_EXTENSION
+from rafcon.core.execution.execution_future import ExecutionFuture
+from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.core.id_generator import generate_state_machine_id, run_id_generator
 from rafcon.utils import log
 from rafcon.utils.hashable import Hashable
@@ -44,6 +50,9 @@ import os
 
 logger = log.get_logger(__name__)
 
+# the generation of the state path index of a state machine is increased, whenever the path of one of its states changes
+_state_path_index_generations = itertools.count(1)
+
 
 class StateMachine(Observable, JSONObject, Hashable):
     """A class for to organizing all main components of a state machine
@@ -61,8 +70,13 @@ class StateMachine(Observable, JSONObject, Hashable):
     old_marked_dirty = True
 
     _root_state = None
+    _state_path_index = None
+    _state_path_index_generation = 0
     _marked_dirty = True
     _file_system_path = None
+    # the execution engine which executes the state machine, see rafcon.core.states.state.State.execution_engine
+    execution_engine = None
+    _execution_future = None
 
     def __init__(self, root_state=None, version=None, creation_time=None, last_update=None, state_machine_id=None):
         Observable.__init__(self)
@@ -133,26 +147,89 @@ class StateMachine(Observable, JSONObject, Hashable):
         }
         return dict_representation
 
-    def start(self):
+    def check_input_data(self, input_data):
+        """Checks values for the input data ports of the root state, before they are used to start the state machine
+
+        Values of str data ports may also be unicode, as JSON strings are decoded to unicode. None is accepted for all
+        data ports.
+
+        :param dict input_data: values for the input data ports of the root state by port name
+        :raises exceptions.ValueError: if the root state has no input data port with one of the names
+        :raises exceptions.TypeError: if a value does not fit the data type of its data port
+        """
+        if not input_data:
+            return
+        data_ports_by_name = dict((data_port.name, data_port)
+                                  for data_port in self._root_state.input_data_ports.itervalues())
+        for name, value in input_data.iteritems():
+            if name not in data_ports_by_name:
+                raise ValueError("The root state of {0} has no input data port '{1}'".format(self, name))
+            data_type = data_ports_by_name[name].data_type
+            if value is not None and not isinstance(value, basestring if data_type is str else data_type):
+                raise TypeError("The value '{0}' of the input data port '{1}' is of type '{2}' but must be of type "
+                                "'{3}'".format(value, name, type(value).__name__, data_type.__name__))
+
+    def start(self, input_data=None):
         """Starts the execution of the root state.
+
+        If the state machine is started directly and not by its execution engine, the engine is set to STARTED for the
+        run and to FINISHED afterwards, as the states of the state machine handle their execution mode with it.
+
+        :param dict input_data: values for the input data ports of the root state by port name, which replace the
+            default values
+        :return: the completion of the started execution run
+        :rtype: rafcon.core.execution.execution_future.ExecutionFuture
+        :raises exceptions.ValueError: if the root state has no input data port with one of the names of the input data
+        :raises exceptions.TypeError: if a value of the input data does not fit the data type of its data port
         """
+        self.check_input_data(input_data)
+        execution_engine = self.execution_engine
+        if execution_engine is None:
+            from rafcon.core.singleton import state_machine_execution_engine as execution_engine
         # load default input data for the state
         self._root_state.input_data = self._root_state.get_default_input_values_for_state(self._root_state)
+        if input_data:
+            self._root_state.input_data.update(input_data)
         self._root_state.output_data = self._root_state.create_output_dictionary_for_state(self._root_state)
         new_execution_history = self._add_new_execution_history()
         new_execution_history.push_state_machine_start_history_item(self, run_id_generator())
-        self._root_state.start(new_execution_history)
+        execution_future = ExecutionFuture(self, new_execution_history)
+        self._execution_future = execution_future
+        if execution_engine.finished_or_stopped():
+            execution_engine.set_execution_mode(StateMachineExecutionStatus.STARTED)
+            execution_future.add_done_callback(
+                lambda _: execution_engine.set_execution_mode(StateMachineExecutionStatus.FINISHED))
+        self._root_state.start(new_execution_history,
+                               finished_callback=partial(self._finish_execution, execution_future))
+        return execution_future
+
+    def _finish_execution(self, execution_future):
+        """Called by the thread of the root state after its run, completes the execution run
+
+        :param rafcon.core.execution.execution_future.ExecutionFuture execution_future: the finished execution run
+        """
+        # execution finished, close execution history log file (if present)
+        if execution_future.execution_history.execution_history_storage is not None:
+            set_read_and_writable_for_all = global_config.get_config_value("EXECUTION_LOG_SET_READ_AND_WRITABLE_FOR_ALL", False)
+            execution_future.execution_history.execution_history_storage.close(set_read_and_writable_for_all)
+        from rafcon.core.states.state import StateExecutionStatus
+        self._root_state.state_execution_status = StateExecutionStatus.INACTIVE
+        execution_future.set_finished(self._root_state.final_outcome)
 
     def join(self):
         """Wait for root state to finish execution"""
         self._root_state.join()
-        # execution finished, close execution history log file (if present)
-        if len(self._execution_histories) > 0:
-            if self._execution_histories[-1].execution_history_storage is not None:
-                set_read_and_writable_for_all = global_config.get_config_value("EXECUTION_LOG_SET_READ_AND_WRITABLE_FOR_ALL", False)
-                self._execution_histories[-1].execution_history_storage.close(set_read_and_writable_for_all)
-        from rafcon.core.states.state import StateExecutionStatus
-        self._root_state.state_execution_status = StateExecutionStatus.INACTIVE
+        if self._execution_future is not None:
+            self._execution_future.wait()
+
+    @property
+    def execution_future(self):
+        """The completion of the last execution run of the state machine
+
+        :return: the last execution run or None, if the state machine was not started yet
+        :rtype: rafcon.core.execution.execution_future.ExecutionFuture
+        """
+        return self._execution_future
 
     @contextmanager
     def modification_lock(self, blocking=True):
@@ -204,6 +281,7 @@ class StateMachine(Observable, JSONObject, Hashable):
                 raise AttributeError("root_state has to be of type State")
             root_state.parent = self
         self._root_state = root_state
+        self._state_path_index = None
 
     @property
     def execution_histories(self):
@@ -220,7 +298,7 @@ class StateMachine(Observable, JSONObject, Hashable):
 
     @Observable.observed
     def _add_new_execution_history(self):
-        new_execution_history = ExecutionHistory()
+        new_execution_history = ExecutionHistory(retention_policy=ExecutionHistoryRetentionPolicy.from_config())
 
         if global_config.get_config_value("EXECUTION_LOG_ENABLE", False):
             base_dir = global_config.get_config_value("EXECUTION_LOG_PATH", "%RAFCON_TEMP_PATH_BASE/execution_logs")
@@ -228,10 +306,15 @@ class StateMachine(Observable, JSONObject, Hashable):
                 base_dir = base_dir.replace('%RAFCON_TEMP_PATH_BASE', RAFCON_TEMP_PATH_BASE)
             if not os.path.exists(base_dir):
                 os.makedirs(base_dir)
-            shelve_name = os.path.join(base_dir, '%s_rafcon_execution_log_%s.shelve' %
-                                       (time.strftime('%Y-%m-%d-%H:%M:%S', time.localtime()),
-                                        self.root_state.name.replace(' ', '-')))
-            execution_history_store = ExecutionHistoryStorage(shelve_name)
+            log_format = global_config.get_config_value("EXECUTION_LOG_FORMAT", "SHELVE")
+            extension = LOG_FILE_EXTENSION if log_format == "BINARY" else "shelve"
+            log_name = os.path.join(base_dir, '%s_rafcon_execution_log_%s.%s' %
+                                    (time.strftime('%Y-%m-%d-%H:%M:%S', time.localtime()),
+                                     self.root_state.name.replace(' ', '-'), extension))
+            if log_format == "BINARY":
+                execution_history_store = create_async_execution_history_storage(log_name)
+            else:
+                execution_history_store = ExecutionHistoryStorage(log_name)
             new_execution_history.set_execution_history_storage(execution_history_store)
         self._execution_histories.append(new_execution_history)
         return new_execution_history
@@ -265,10 +348,48 @@ class StateMachine(Observable, JSONObject, Hashable):
         self.old_marked_dirty = self._marked_dirty
         self._marked_dirty = marked_dirty
 
+    def _get_state_path_index(self):
+        """Returns the index mapping the paths of all states of the state machine to the states
+
+        The index is recreated lazily, if the path of any state of the state machine might have changed since it was
+        created.
+
+        :return: the states of the state machine by their path
+        :rtype: dict
+        """
+        from rafcon.core.states.container_state import ContainerState
+        from rafcon.core.states.library_state import LibraryState
+        generation = self._state_path_index_generation
+        state_path_index = self._state_path_index
+        if state_path_index is not None and state_path_index[0] == generation:
+            return state_path_index[1]
+
+        states_by_path = {}
+        states = [self.root_state] if self.root_state is not None else []
+        while states:
+            state = states.pop()
+            states_by_path[state.get_path()] = state
+            if isinstance(state, LibraryState):
+                # the state copies of lazy library states are not created for the index
+                if state.state_copy_initialized:
+                    states.append(state.state_copy)
+            elif isinstance(state, ContainerState):
+                states.extend(state.states.itervalues())
+        self._state_path_index = (generation, states_by_path)
+        return states_by_path
+
+    def invalidate_state_path_index(self):
+        """Invalidates the state path index, called whenever the path of a state of the state machine changed"""
+        self._state_path_index_generation = next(_state_path_index_generations)
+
     def get_state_by_path(self, path, as_check=False):
         if not path:
             logger.debug("No start state specified!")
             return None
+        state = self._get_state_path_index().get(path)
+        if state is not None:
+            return state
+        # the state was not found, determine the reason for the log messages
         from rafcon.core.states.library_state import LibraryState
         from rafcon.core.states.execution_state import ExecutionState
         path_item_list = path.split('/')
@@ -128,6 +128,7 @@ class StateMachineManager(Observable):
                 self.active_state_machine_id = self._state_machines[self._state_machines.keys()[0]].state_machine_id
             else:
                 self.active_state_machine_id = None
+        core_singletons.state_machine_execution_engine.remove_execution_engine(state_machine_id)
         # destroy execution history
         removed_state_machine.destroy_execution_histories()
         return removed_state_machine
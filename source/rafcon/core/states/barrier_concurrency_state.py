@@ -60,6 +60,8 @@ class BarrierConcurrencyState(ConcurrencyState):
 
     """
     yaml_tag = u'!BarrierConcurrencyState'
+    # the constructor creates the transitions to the decider state, thus copies cannot share the tables of a template
+    _copies_share_tables = False
 
     def __init__(self, name=None, state_id=None, input_data_ports=None, output_data_ports=None, outcomes=None,
                  states=None, transitions=None, data_flows=None, start_state_id=None, scoped_variables=None,
@@ -69,6 +71,7 @@ class BarrierConcurrencyState(ConcurrencyState):
         if decider_state is not None:
             if isinstance(decider_state, DeciderState):
                 decider_state._state_id = UNIQUE_DECIDER_STATE_ID
+                decider_state.invalidate_path_caches()
                 states[UNIQUE_DECIDER_STATE_ID] = decider_state
             else:
                 logger.warning("Argument decider_state has to be instance of DeciderState not {}".format(decider_state))
@@ -194,7 +197,7 @@ class BarrierConcurrencyState(ConcurrencyState):
         # standard state execution
         decider_state.input_data = self.get_inputs_for_state(decider_state)
         decider_state.output_data = self.create_output_dictionary_for_state(decider_state)
-        decider_state.start(self.execution_history, backward_execution=False)
+        decider_state.start(self.execution_history, backward_execution=False, sequential=True)
         decider_state.join()
         decider_state_error = None
         if decider_state.final_outcome.outcome_id == -1:
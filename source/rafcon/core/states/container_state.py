@@ -21,15 +21,16 @@
 """
 import traceback
 from copy import copy, deepcopy
-from threading import Condition
+from threading import Condition, Lock
+from weakref import ref
 
 from gtkmvc import Observable
 
 from rafcon.core.custom_exceptions import RecoveryModeException
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.data_passing import get_data_passing_policy, pass_value
+from rafcon.core.decorators import lock_state_machine, lock_state_machine_runtime
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.core.id_generator import *
-from rafcon.core.singleton import state_machine_execution_engine
 from rafcon.core.state_elements.data_flow import DataFlow
 from rafcon.core.state_elements.outcome import Outcome
 from rafcon.core.state_elements.scope import ScopedData, ScopedVariable
@@ -50,6 +51,11 @@ from rafcon.utils import log
 
 logger = log.get_logger(__name__)
 
+# prevents that the transitions condition variable of a container state is created twice by concurrent threads
+_transitions_condition_lock = Lock()
+# prevents that the tables shared with a library template are copied twice by concurrent threads
+_shared_tables_lock = Lock()
+
 
 class ContainerState(State):
     """A class for representing a state in the state machine
@@ -67,18 +73,30 @@ class ContainerState(State):
     _state_element_attrs = ['outcomes', 'input_data_ports', 'output_data_ports', 'scoped_variables', 'states',
                             'transitions', 'data_flows']
 
+    # the copies of a library template share its transition and data flow tables (see mark_as_library_template)
+    _copies_share_tables = True
+    _is_library_template = False
+    # the library template, whose tables and routing indexes are used as long as the own tables were not accessed
+    _tables_template = None
+
     def __init__(self, name=None, state_id=None, input_data_ports=None, output_data_ports=None, outcomes=None,
                  states=None, transitions=None, data_flows=None, start_state_id=None,
                  scoped_variables=None):
 
         self._states = OrderedDict()
         self._transitions = {}
+        # maps (from_state, from_outcome) to the transition starting there, to route the execution in O(1)
+        self._transitions_by_origin = {}
         self._data_flows = {}
+        # map (from_state, from_key) and (to_state, to_key) to the list of data flows starting/ending there, to resolve
+        # the data of a port during the execution without iterating all data flows
+        self._data_flows_by_origin = {}
+        self._data_flows_by_target = {}
         self._scoped_variables = {}
         self._scoped_data = {}
         self._current_state = None
-        # condition variable to wait for not connected states
-        self._transitions_cv = Condition()
+        # condition variable to wait for not connected states, created on first use
+        self._transitions_condition = None
         self._child_execution = False
 
         State.__init__(self, name, state_id, input_data_ports, output_data_ports, outcomes)
@@ -169,11 +187,19 @@ class ContainerState(State):
         outcomes = {elem_id: copy(elem) for elem_id, elem in self._outcomes.iteritems()}
         states = {elem_id: copy(elem) for elem_id, elem in self._states.iteritems()}
         scoped_variables = {elem_id: copy(elem) for elem_id, elem in self._scoped_variables.iteritems()}
-        data_flows = {elem_id: copy(elem) for elem_id, elem in self._data_flows.iteritems()}
-        transitions = {elem_id: copy(elem) for elem_id, elem in self._transitions.iteritems()}
 
-        state = self.__class__(self.name, self.state_id, input_data_ports, output_data_ports, outcomes, states,
-                               transitions, data_flows, None, scoped_variables)
+        tables_template = self._tables_template
+        if tables_template is None and self._is_library_template and self._copies_share_tables:
+            tables_template = self
+        if tables_template is not None:
+            state = self.__class__(self.name, self.state_id, input_data_ports, output_data_ports, outcomes, states,
+                                   None, None, None, scoped_variables)
+            state._share_tables(tables_template)
+        else:
+            data_flows = {elem_id: copy(elem) for elem_id, elem in self._data_flows.iteritems()}
+            transitions = {elem_id: copy(elem) for elem_id, elem in self._transitions.iteritems()}
+            state = self.__class__(self.name, self.state_id, input_data_ports, output_data_ports, outcomes, states,
+                                   transitions, data_flows, None, scoped_variables)
         state.description = deepcopy(self.description)
         state.semantic_data = deepcopy(self.semantic_data)
         state._file_system_path = self.file_system_path
@@ -182,6 +208,68 @@ class ContainerState(State):
     def __deepcopy__(self, memo=None, _nil=[]):
         return self.__copy__()
 
+    def mark_as_library_template(self):
+        """Marks the state and all its child container states as template of library state copies
+
+        The copies of a template share its transition and data flow tables, including the routing indexes used during
+        the execution. A copy creates its own tables only when they are accessed, e.g. to be modified. Thus, a template
+        must not be modified anymore.
+        """
+        self._is_library_template = True
+        for state in self._states.itervalues():
+            if isinstance(state, ContainerState):
+                state.mark_as_library_template()
+
+    def _share_tables(self, tables_template):
+        """Uses the transition and data flow tables of a library template instead of own tables
+
+        :param ContainerState tables_template: the library template of the state
+        """
+        self._tables_template = tables_template
+        self._transitions_by_origin = tables_template._transitions_by_origin
+        self._data_flows_by_origin = tables_template._data_flows_by_origin
+        self._data_flows_by_target = tables_template._data_flows_by_target
+
+    def _unshare_tables(self):
+        """Replaces the transition and data flow tables shared with the library template by own copies
+
+        The copied elements were already checked within the template, thus they are not checked again and the state is
+        not marked as modified.
+        """
+        with _shared_tables_lock:
+            tables_template = self._tables_template
+            if tables_template is None:
+                return
+            transitions = {elem_id: copy(elem) for elem_id, elem in tables_template._transitions.iteritems()}
+            data_flows = {elem_id: copy(elem) for elem_id, elem in tables_template._data_flows.iteritems()}
+            for state_element in transitions.values() + data_flows.values():
+                state_element._parent = ref(self)
+            self._transitions = transitions
+            self._data_flows = data_flows
+            self._rebuild_transition_origin_index()
+            self._rebuild_data_flow_routing_index()
+            self._tables_template = None
+
+    @property
+    def _transitions_cv(self):
+        """Condition variable to wait for not connected states
+
+        It is only created, when a state actually waits for a transition.
+        """
+        if self._transitions_condition is None:
+            with _transitions_condition_lock:
+                if self._transitions_condition is None:
+                    self._transitions_condition = Condition()
+        return self._transitions_condition
+
+    def _notify_transitions_changed(self):
+        """Notifies all states waiting for a transition to be connected"""
+        transitions_condition = self._transitions_condition
+        if transitions_condition is not None:
+            transitions_condition.acquire()
+            transitions_condition.notify_all()
+            transitions_condition.release()
+
     def __contains__(self, item):
         """Checks whether `item` is an element of the container state
 
@@ -215,9 +303,7 @@ class ContainerState(State):
         """
         super(ContainerState, self).recursively_preempt_states()
         # notify the transition condition variable to let the state instantaneously stop
-        self._transitions_cv.acquire()
-        self._transitions_cv.notify_all()
-        self._transitions_cv.release()
+        self._notify_transitions_changed()
         for state in self.states.itervalues():
             state.recursively_preempt_states()
 
@@ -235,6 +321,11 @@ class ContainerState(State):
         for state in self.states.itervalues():
             state.recursively_resume_states()
 
+    def _invalidate_path_caches_recursively(self):
+        super(ContainerState, self)._invalidate_path_caches_recursively()
+        for state in self._states.itervalues():
+            state._invalidate_path_caches_recursively()
+
     def setup_run(self):
         """ Executes a generic set of actions that has to be called in the run methods of each derived state class.
 
@@ -276,7 +367,7 @@ class ContainerState(State):
                 return None
 
             # depending on the execution mode pause execution
-            execution_signal = state_machine_execution_engine.handle_execution_mode(self)
+            execution_signal = self.execution_engine.handle_execution_mode(self)
             if execution_signal is StateMachineExecutionStatus.STOPPED:
                 # this will be caught at the end of the run method
                 self.last_child.state_execution_status = StateExecutionStatus.INACTIVE
@@ -304,7 +395,7 @@ class ContainerState(State):
         start_state = self.get_start_state(set_final_outcome=True)
         while not start_state:
             # depending on the execution mode pause execution
-            execution_signal = state_machine_execution_engine.handle_execution_mode(self)
+            execution_signal = self.execution_engine.handle_execution_mode(self)
             if execution_signal is StateMachineExecutionStatus.STOPPED:
                 # this will be caught at the end of the run method
                 return None
@@ -827,6 +918,12 @@ class ContainerState(State):
 
         :param recursive: Flag whether to destroy all state elements which are removed
         """
+        if self._tables_template is not None:
+            # the shared tables are not copied just to be removed
+            self._tables_template = None
+            self._transitions_by_origin = {}
+            self._data_flows_by_origin = {}
+            self._data_flows_by_target = {}
         for transition_id in self.transitions.keys():
             self.remove_transition(transition_id, destroy=recursive)
         for data_flow_id in self.data_flows.keys():
@@ -1084,10 +1181,11 @@ class ContainerState(State):
         """
 
         # overwrite the start state in the case that a specific start state is specific e.g. by start_from_state
-        if self.get_path() in state_machine_execution_engine.start_state_paths:
+        start_state_paths = self.execution_engine.start_state_paths
+        if self.get_path() in start_state_paths:
             for state_id, state in self.states.iteritems():
-                if state.get_path() in state_machine_execution_engine.start_state_paths:
-                    state_machine_execution_engine.start_state_paths.remove(self.get_path())
+                if state.get_path() in start_state_paths:
+                    start_state_paths.remove(self.get_path())
                     return state
 
         if self.start_state_id is None:
@@ -1096,12 +1194,8 @@ class ContainerState(State):
         # It is possible to connect the income directly with an outcome
         if self.start_state_id == self.state_id:
             if set_final_outcome:
-                for transition_id in self.transitions:
-                    # the transition of which the from state is None is the transition that directly connects the income
-                    if self.transitions[transition_id].from_state is None:
-                        to_outcome_id = self.transitions[transition_id].to_outcome
-                        self.final_outcome = self.outcomes[to_outcome_id]
-                        break
+                # the transition of which the from state is None is the transition that directly connects the income
+                self.final_outcome = self.outcomes[self._get_start_transition().to_outcome]
             return self
 
         return self.states[self.start_state_id]
@@ -1139,11 +1233,11 @@ class ContainerState(State):
         :raises exceptions.AttributeError: if transition.transition_id already exists
         """
         if transition_id is not None:
-            if transition_id in self._transitions.iterkeys():
+            if transition_id in self.transitions.iterkeys():
                 raise AttributeError("The transition id %s already exists. Cannot add transition!", transition_id)
         else:
             transition_id = generate_transition_id()
-            while transition_id in self._transitions.iterkeys():
+            while transition_id in self.transitions.iterkeys():
                 transition_id = generate_transition_id()
         return transition_id
 
@@ -1203,11 +1297,10 @@ class ContainerState(State):
         else:
             self.transitions[transition_id] = \
                 Transition(None, None, to_state_id, to_outcome, transition_id, self)
+        self._add_transition_to_origin_index(self.transitions[transition_id])
 
         # notify all states waiting for transition to be connected
-        self._transitions_cv.acquire()
-        self._transitions_cv.notify_all()
-        self._transitions_cv.release()
+        self._notify_transitions_changed()
 
         return transition_id
 
@@ -1234,11 +1327,10 @@ class ContainerState(State):
 
         new_transition = Transition(from_state_id, from_outcome, to_state_id, to_outcome, transition_id, self)
         self.transitions[transition_id] = new_transition
+        self._add_transition_to_origin_index(new_transition)
 
         # notify all states waiting for transition to be connected
-        self._transitions_cv.acquire()
-        self._transitions_cv.notify_all()
-        self._transitions_cv.release()
+        self._notify_transitions_changed()
         # self.create_transition(from_state_id, from_outcome, to_state_id, to_outcome, transition_id)
         return transition_id
 
@@ -1254,11 +1346,32 @@ class ContainerState(State):
             raise TypeError("state must be of type State")
         if not isinstance(outcome, Outcome):
             raise TypeError("outcome must be of type Outcome")
-        result_transition = None
-        for key, transition in self.transitions.iteritems():
-            if transition.from_state == state.state_id and transition.from_outcome == outcome.outcome_id:
-                result_transition = transition
-        return result_transition
+        return self._transitions_by_origin.get((state.state_id, outcome.outcome_id), None)
+
+    def _add_transition_to_origin_index(self, transition):
+        """Registers a transition in the (from_state, from_outcome) lookup table
+
+        :param rafcon.core.state_elements.transition.Transition transition: The transition to be indexed
+        """
+        self._transitions_by_origin[(transition.from_state, transition.from_outcome)] = transition
+
+    def _remove_transition_from_origin_index(self, transition):
+        """Removes a transition from the (from_state, from_outcome) lookup table
+
+        :param rafcon.core.state_elements.transition.Transition transition: The transition to be removed
+        """
+        origin = (transition.from_state, transition.from_outcome)
+        if self._transitions_by_origin.get(origin) is transition:
+            del self._transitions_by_origin[origin]
+
+    def _rebuild_transition_origin_index(self):
+        """Recreates the (from_state, from_outcome) lookup table from the transitions dictionary
+
+        Has to be called whenever the origin of transitions is changed without using add_transition or
+        remove_transition.
+        """
+        self._transitions_by_origin = {(transition.from_state, transition.from_outcome): transition
+                                       for transition in self._transitions.itervalues()}
 
     @lock_state_machine
     @Observable.observed
@@ -1270,10 +1383,11 @@ class ContainerState(State):
         """
         if transition_id == -1 or transition_id == -2:
             raise AttributeError("The transition_id must not be -1 (Aborted) or -2 (Preempted)")
-        if transition_id not in self._transitions:
+        if transition_id not in self.transitions:
             raise AttributeError("The transition_id %s does not exist" % str(transition_id))
 
         self.transitions[transition_id].parent = None
+        self._remove_transition_from_origin_index(self.transitions[transition_id])
         return self.transitions.pop(transition_id)
 
     @lock_state_machine
@@ -1301,11 +1415,11 @@ class ContainerState(State):
         :raises exceptions.AttributeError: if data_flow.data_flow_id already exists
         """
         if data_flow_id is not None:
-            if data_flow_id in self._data_flows.iterkeys():
+            if data_flow_id in self.data_flows.iterkeys():
                 raise AttributeError("The data_flow id %s already exists. Cannot add data_flow!", data_flow_id)
         else:
             data_flow_id = generate_data_flow_id()
-            while data_flow_id in self._data_flows.iterkeys():
+            while data_flow_id in self.data_flows.iterkeys():
                 data_flow_id = generate_data_flow_id()
         return data_flow_id
 
@@ -1325,6 +1439,7 @@ class ContainerState(State):
 
         self.data_flows[data_flow_id] = DataFlow(from_state_id, from_data_port_id, to_state_id, to_data_port_id,
                                                  data_flow_id, self)
+        self._add_data_flow_to_routing_index(self.data_flows[data_flow_id])
         return data_flow_id
 
     @lock_state_machine
@@ -1335,12 +1450,45 @@ class ContainerState(State):
         :param int data_flow_id: the id of the data_flow to remove
         :raises exceptions.AttributeError: if the data_flow_id does not exist
         """
-        if data_flow_id not in self._data_flows:
+        if data_flow_id not in self.data_flows:
             raise AttributeError("The data_flow_id %s does not exist" % str(data_flow_id))
 
+        self._remove_data_flow_from_routing_index(self._data_flows[data_flow_id])
         self._data_flows[data_flow_id].parent = None
         return self._data_flows.pop(data_flow_id)
 
+    def _add_data_flow_to_routing_index(self, data_flow):
+        """Registers a data flow in the (from_state, from_key) and (to_state, to_key) lookup tables
+
+        :param rafcon.core.state_elements.data_flow.DataFlow data_flow: The data flow to be indexed
+        """
+        self._data_flows_by_origin.setdefault((data_flow.from_state, data_flow.from_key), []).append(data_flow)
+        self._data_flows_by_target.setdefault((data_flow.to_state, data_flow.to_key), []).append(data_flow)
+
+    def _remove_data_flow_from_routing_index(self, data_flow):
+        """Removes a data flow from the (from_state, from_key) and (to_state, to_key) lookup tables
+
+        :param rafcon.core.state_elements.data_flow.DataFlow data_flow: The data flow to be removed
+        """
+        for index, port in ((self._data_flows_by_origin, (data_flow.from_state, data_flow.from_key)),
+                            (self._data_flows_by_target, (data_flow.to_state, data_flow.to_key))):
+            data_flows = [df for df in index.get(port, []) if df is not data_flow]
+            if data_flows:
+                index[port] = data_flows
+            else:
+                index.pop(port, None)
+
+    def _rebuild_data_flow_routing_index(self):
+        """Recreates the data flow lookup tables from the data flows dictionary
+
+        Has to be called whenever the origin or target of data flows is changed without using add_data_flow or
+        remove_data_flow.
+        """
+        self._data_flows_by_origin = {}
+        self._data_flows_by_target = {}
+        for data_flow in self._data_flows.itervalues():
+            self._add_data_flow_to_routing_index(data_flow)
+
     @lock_state_machine
     def remove_data_flows_with_data_port_id(self, data_port_id):
         """Remove an data ports whose from_key or to_key equals the passed data_port_id
@@ -1500,24 +1648,22 @@ class ContainerState(State):
 
         tmp_dict = self.get_default_input_values_for_state(state)
         result_dict.update(tmp_dict)
+        data_passing_policy = get_data_passing_policy()
 
         for input_port_key, value in state.input_data_ports.iteritems():
             # for all input keys fetch the correct data_flow connection and read data into the result_dict
             actual_value = None
             actual_value_time = 0
-            for data_flow_key, data_flow in self.data_flows.iteritems():
-
-                if data_flow.to_key == input_port_key:
-                    if data_flow.to_state == state.state_id:
-                        # fetch data from the scoped_data list: the key is the data_port_key + the state_id
-                        key = str(data_flow.from_key) + data_flow.from_state
-                        if key in self.scoped_data:
-                            if actual_value is None or actual_value_time < self.scoped_data[key].timestamp:
-                                actual_value = deepcopy(self.scoped_data[key].value)
-                                actual_value_time = self.scoped_data[key].timestamp
+            for data_flow in self._data_flows_by_target.get((state.state_id, input_port_key), ()):
+                # fetch data from the scoped_data list: the key is the data_port_key + the state_id
+                key = str(data_flow.from_key) + data_flow.from_state
+                if key in self.scoped_data:
+                    if actual_value is None or actual_value_time < self.scoped_data[key].timestamp:
+                        actual_value = self.scoped_data[key].value
+                        actual_value_time = self.scoped_data[key].timestamp
 
             if actual_value is not None:
-                result_dict[value.name] = actual_value
+                result_dict[value.name] = pass_value(actual_value, value.immutable, data_passing_policy)
 
         return result_dict
 
@@ -1525,7 +1671,7 @@ class ContainerState(State):
     # ---------------------------- functions to modify the scoped data ----------------------------
     # ---------------------------------------------------------------------------------------------
 
-    @lock_state_machine
+    @lock_state_machine_runtime
     def add_input_data_to_scoped_data(self, dictionary):
         """Add a dictionary to the scoped data
 
@@ -1541,15 +1687,14 @@ class ContainerState(State):
                     self.scoped_data[str(input_data_port_key) + self.state_id] = \
                         ScopedData(data_port.name, value, type(value), self.state_id, ScopedVariable, parent=self)
                     # forward the data to scoped variables
-                    for data_flow_key, data_flow in self.data_flows.iteritems():
-                        if data_flow.from_key == input_data_port_key and data_flow.from_state == self.state_id:
-                            if data_flow.to_state == self.state_id and data_flow.to_key in self.scoped_variables:
-                                current_scoped_variable = self.scoped_variables[data_flow.to_key]
-                                self.scoped_data[str(data_flow.to_key) + self.state_id] = \
-                                    ScopedData(current_scoped_variable.name, value, type(value), self.state_id,
-                                               ScopedVariable, parent=self)
+                    for data_flow in self._data_flows_by_origin.get((self.state_id, input_data_port_key), ()):
+                        if data_flow.to_state == self.state_id and data_flow.to_key in self.scoped_variables:
+                            current_scoped_variable = self.scoped_variables[data_flow.to_key]
+                            self.scoped_data[str(data_flow.to_key) + self.state_id] = \
+                                ScopedData(current_scoped_variable.name, value, type(value), self.state_id,
+                                           ScopedVariable, parent=self)
 
-    @lock_state_machine
+    @lock_state_machine_runtime
     def add_state_execution_output_to_scoped_data(self, dictionary, state):
         """Add a state execution output to the scoped data
 
@@ -1568,7 +1713,7 @@ class ContainerState(State):
                     self.scoped_data[str(output_data_port_key) + state.state_id] = \
                         ScopedData(data_port.name, value, type(value), state.state_id, OutputDataPort, parent=self)
 
-    @lock_state_machine
+    @lock_state_machine_runtime
     def add_default_values_of_scoped_variables_to_scoped_data(self):
         """Add the scoped variables default values to the scoped_data dictionary
 
@@ -1578,7 +1723,7 @@ class ContainerState(State):
                 ScopedData(scoped_var.name, scoped_var.default_value, scoped_var.data_type, self.state_id,
                            ScopedVariable, parent=self)
 
-    @lock_state_machine
+    @lock_state_machine_runtime
     def update_scoped_variables_with_output_dictionary(self, dictionary, state):
         """Update the values of the scoped variables with the output dictionary of a specific state.
 
@@ -1596,14 +1741,13 @@ class ContainerState(State):
                 if not key == "error":
                     logger.warning("Output variable %s was written during state execution, "
                                    "that has no data port connected to it.", str(key))
-            for data_flow_key, data_flow in self.data_flows.iteritems():
-                if data_flow.from_key == output_data_port_key and data_flow.from_state == state.state_id:
-                    if data_flow.to_state == self.state_id:  # is target of data flow own state id?
-                        if data_flow.to_key in self.scoped_variables.iterkeys():  # is target data port scoped?
-                            current_scoped_variable = self.scoped_variables[data_flow.to_key]
-                            self.scoped_data[str(data_flow.to_key) + self.state_id] = \
-                                ScopedData(current_scoped_variable.name, value, type(value), state.state_id,
-                                           ScopedVariable, parent=self)
+            for data_flow in self._data_flows_by_origin.get((state.state_id, output_data_port_key), ()):
+                if data_flow.to_state == self.state_id:  # is target of data flow own state id?
+                    if data_flow.to_key in self.scoped_variables:  # is target data port scoped?
+                        current_scoped_variable = self.scoped_variables[data_flow.to_key]
+                        self.scoped_data[str(data_flow.to_key) + self.state_id] = \
+                            ScopedData(current_scoped_variable.name, value, type(value), state.state_id,
+                                       ScopedVariable, parent=self)
 
     # ---------------------------------------------------------------------------------------------
     # ------------------------ functions to modify the scoped data end ----------------------------
@@ -1626,6 +1770,7 @@ class ContainerState(State):
                 transition._from_state = self.state_id
             if transition.to_state == old_state_id:
                 transition._to_state = self.state_id
+        self._rebuild_transition_origin_index()
 
         # change id in all data_flows
         for data_flow in self.data_flows.itervalues():
@@ -1633,6 +1778,7 @@ class ContainerState(State):
                 data_flow._from_state = self.state_id
             if data_flow.to_state == old_state_id:
                 data_flow._to_state = self.state_id
+        self._rebuild_data_flow_routing_index()
 
     def get_state_for_transition(self, transition):
         """Calculate the target state of a transition
@@ -1659,33 +1805,33 @@ class ContainerState(State):
             output_dict = specific_output_dictionary
         else:
             output_dict = self.output_data
+        data_passing_policy = get_data_passing_policy()
 
         for output_name, value in self.output_data.iteritems():
             output_port_id = self.get_io_data_port_id_from_name_and_type(output_name, OutputDataPort)
             actual_value = None
             actual_value_was_written = False
             actual_value_time = 0
-            for data_flow_id, data_flow in self.data_flows.iteritems():
-                if data_flow.to_state == self.state_id:
-                    if data_flow.to_key == output_port_id:
-                        scoped_data_key = str(data_flow.from_key) + data_flow.from_state
-                        if scoped_data_key in self.scoped_data:
-                            # if self.scoped_data[scoped_data_key].timestamp > actual_value_time is True
-                            # the data of a previous execution of the same state is overwritten
-                            if actual_value is None or self.scoped_data[scoped_data_key].timestamp > actual_value_time:
-                                actual_value = deepcopy(self.scoped_data[scoped_data_key].value)
-                                actual_value_time = self.scoped_data[scoped_data_key].timestamp
-                                actual_value_was_written = True
-                        else:
-                            if not self.backward_execution:
-                                logger.debug(
-                                    "Output data with name {0} of state {1} was not found in the scoped data "
-                                    "of state {2}. Thus the state did not write onto this output. "
-                                    "This can mean a state machine design error.".format(
-                                        str(output_name), str(self.states[data_flow.from_state].get_path()),
-                                        self.get_path()))
+            for data_flow in self._data_flows_by_target.get((self.state_id, output_port_id), ()):
+                scoped_data_key = str(data_flow.from_key) + data_flow.from_state
+                if scoped_data_key in self.scoped_data:
+                    # if self.scoped_data[scoped_data_key].timestamp > actual_value_time is True
+                    # the data of a previous execution of the same state is overwritten
+                    if actual_value is None or self.scoped_data[scoped_data_key].timestamp > actual_value_time:
+                        actual_value = self.scoped_data[scoped_data_key].value
+                        actual_value_time = self.scoped_data[scoped_data_key].timestamp
+                        actual_value_was_written = True
+                else:
+                    if not self.backward_execution:
+                        logger.debug(
+                            "Output data with name {0} of state {1} was not found in the scoped data "
+                            "of state {2}. Thus the state did not write onto this output. "
+                            "This can mean a state machine design error.".format(
+                                str(output_name), str(self.states[data_flow.from_state].get_path()),
+                                self.get_path()))
             if actual_value_was_written:
-                output_dict[output_name] = actual_value
+                output_dict[output_name] = pass_value(actual_value, self.output_data_ports[output_port_id].immutable,
+                                                      data_passing_policy)
 
     # ---------------------------------------------------------------------------------------------
     # -------------------------------------- check methods ---------------------------------------
@@ -2123,6 +2269,8 @@ class ContainerState(State):
         :return: Dictionary transitions[transition_id] of :class:`rafcon.core.transition.Transition`
         :rtype: dict
         """
+        if self._tables_template is not None:
+            self._unshare_tables()
         return self._transitions
 
     @transitions.setter
@@ -2145,6 +2293,7 @@ class ContainerState(State):
         if [t_id for t_id, transition in transitions.iteritems() if not t_id == transition.transition_id]:
             raise AttributeError("The key of the transition dictionary and the id of the transition do not match")
 
+        self._unshare_tables()
         old_transitions = self._transitions
         self._transitions = transitions
         transition_ids_to_delete = []
@@ -2162,6 +2311,7 @@ class ContainerState(State):
 
         self._transitions = dict((transition_id, t) for (transition_id, t) in self._transitions.iteritems()
                                  if transition_id not in transition_ids_to_delete)
+        self._rebuild_transition_origin_index()
 
         # check that all old_transitions are no more referencing self as there parent
         for old_transition in old_transitions.itervalues():
@@ -2180,6 +2330,8 @@ class ContainerState(State):
         :return: Dictionary data_flows[data_flow_id] of :class:`rafcon.core.data_flow.DataFlow`
         :rtype: dict
         """
+        if self._tables_template is not None:
+            self._unshare_tables()
         return self._data_flows
 
     @data_flows.setter
@@ -2202,6 +2354,7 @@ class ContainerState(State):
         if [df_id for df_id, data_flow in data_flows.iteritems() if not df_id == data_flow.data_flow_id]:
             raise AttributeError("The key of the data flow dictionary and the id of the data flow do not match")
 
+        self._unshare_tables()
         old_data_flows = self._data_flows
         self._data_flows = data_flows
         data_flow_ids_to_delete = []
@@ -2220,6 +2373,8 @@ class ContainerState(State):
         self._data_flows = dict((data_flow_id, d) for (data_flow_id, d) in self._data_flows.iteritems()
                                 if data_flow_id not in data_flow_ids_to_delete)
 
+        self._rebuild_data_flow_routing_index()
+
         # check that all old_data_flows are no more referencing self as there parent
         for old_data_flow in old_data_flows.itervalues():
             if old_data_flow not in self._data_flows.itervalues() and old_data_flow.parent is self:
@@ -2234,13 +2389,23 @@ class ContainerState(State):
 
         :return: The id of the start state
         """
-        for transition_id in self.transitions:
-            if self.transitions[transition_id].from_state is None:
-                to_state = self.transitions[transition_id].to_state
-                if to_state is not None:
-                    return to_state
-                else:
-                    return self.state_id
+        start_transition = self._get_start_transition()
+        if start_transition is None:
+            return None
+        if start_transition.to_state is not None:
+            return start_transition.to_state
+        return self.state_id
+
+    def _get_start_transition(self):
+        """Returns the transition from the income of the state, without copying the tables shared with a template
+
+        :return: the transition, of which the from state is None, or None if there is no start state
+        """
+        tables_template = self._tables_template
+        transitions = tables_template._transitions if tables_template is not None else self._transitions
+        for transition in transitions.itervalues():
+            if transition.from_state is None:
+                return transition
         return None
 
     @start_state_id.setter
@@ -2332,7 +2497,7 @@ class ContainerState(State):
         return self._scoped_data
 
     @scoped_data.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     # @Observable.observed
     def scoped_data(self, scoped_data):
         if not isinstance(scoped_data, dict):
@@ -31,6 +31,7 @@ from rafcon.core.state_elements.outcome import Outcome
 from rafcon.core.script import Script
 from rafcon.core.states.state import StateExecutionStatus
 from rafcon.core.execution.execution_history import CallType
+from rafcon.core.execution import script_process_pool
 
 from rafcon.utils import log
 logger = log.get_logger(__name__)
@@ -40,6 +41,9 @@ class ExecutionState(State):
     """A class to represent a state for executing arbitrary functions
 
     This kind of state does not have any child states.
+
+    :ivar execute_in_process: if True, the script is executed in a worker process, see
+        :mod:`rafcon.core.execution.script_process_pool`
     """
 
     yaml_tag = u'!ExecutionState'
@@ -50,6 +54,7 @@ class ExecutionState(State):
         State.__init__(self, name, state_id, input_data_ports, output_data_ports, outcomes)
         self._script = None
         self.script = Script(path, filename, check_path=check_path, parent=self)
+        self._execute_in_process = False
         self.logger = log.get_logger(self.name)
         # here all persistent variables that should be available for the next state run should be stored
         self.persistent_variables = {}
@@ -66,6 +71,9 @@ class ExecutionState(State):
         outcomes = {elem_id: copy(elem) for elem_id, elem in self._outcomes.iteritems()}
         state = self.__class__(self.name, self.state_id, input_data_ports, output_data_ports, outcomes, None)
         state.script_text = deepcopy(self.script_text)
+        # the script text is immutable and shared, thus the compiled code can be shared as well
+        state.script.share_code_of(self.script)
+        state.execute_in_process = self.execute_in_process
         state.description = deepcopy(self.description)
         state.semantic_data = deepcopy(self.semantic_data)
         state._file_system_path = self.file_system_path
@@ -79,6 +87,14 @@ class ExecutionState(State):
         super(ExecutionState, self).update_hash(obj_hash)
         obj_hash.update(self.script.script)
 
+    @staticmethod
+    def state_to_dict(state):
+        dict_representation = State.state_to_dict(state)
+        # only stored if set, to keep the representation of all other states unchanged
+        if state.execute_in_process:
+            dict_representation['execute_in_process'] = True
+        return dict_representation
+
     @classmethod
     def from_dict(cls, dictionary):
         name = dictionary['name']
@@ -87,6 +103,7 @@ class ExecutionState(State):
         output_data_ports = dictionary['output_data_ports']
         outcomes = dictionary['outcomes']
         state = cls(name, state_id, input_data_ports, output_data_ports, outcomes, check_path=False)
+        state.execute_in_process = dictionary.get('execute_in_process', False)
         try:
             state.description = dictionary['description']
         except (TypeError, KeyError):  # (Very) old state machines do not have a description field
@@ -99,9 +116,12 @@ class ExecutionState(State):
         """Calls the custom execute function of the script.py of the state
 
         """
-        self._script.build_module()
-
-        outcome_item = self._script.execute(self, execute_inputs, execute_outputs, backward_execution)
+        if self.execute_in_process:
+            outcome_item = script_process_pool.execute_script(self, execute_inputs, execute_outputs,
+                                                              backward_execution)
+        else:
+            self._script.build_module()
+            outcome_item = self._script.execute(self, execute_inputs, execute_outputs, backward_execution)
 
         # in the case of backward execution the outcome is not relevant
         if backward_execution:
@@ -155,6 +175,9 @@ class ExecutionState(State):
         except Exception as e:
             exc_type, exc_value, exc_traceback = sys.exc_info()
             formatted_exc = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            if hasattr(e, "script_process_traceback"):
+                # the error occurred within the script process
+                formatted_exc = [e.script_process_traceback]
             truncated_exc = []
             for line in formatted_exc:
                 if os.path.join("rafcon", "core") not in line:
@@ -203,3 +226,18 @@ class ExecutionState(State):
     @Observable.observed
     def script_text(self, text):
         self._script.script = text
+
+    @property
+    def execute_in_process(self):
+        """Property for the _execute_in_process field
+
+        """
+        return self._execute_in_process
+
+    @execute_in_process.setter
+    @lock_state_machine
+    @Observable.observed
+    def execute_in_process(self, execute_in_process):
+        if not isinstance(execute_in_process, bool):
+            raise TypeError("execute_in_process must be of type bool")
+        self._execute_in_process = execute_in_process
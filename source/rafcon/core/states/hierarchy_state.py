@@ -23,7 +23,6 @@ import copy
 from rafcon.utils import log
 from rafcon.core.states.container_state import ContainerState
 from rafcon.core.state_elements.outcome import Outcome
-import rafcon.core.singleton as singleton
 from rafcon.core.execution.execution_history import CallItem, ReturnItem
 from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 from rafcon.core.states.state import StateExecutionStatus
@@ -95,7 +94,7 @@ class HierarchyState(ContainerState):
             while self.child_state is not self:
                 # print "hs1", self.name
                 self.handling_execution_mode = True
-                execution_mode = singleton.state_machine_execution_engine.handle_execution_mode(self, self.child_state)
+                execution_mode = self.execution_engine.handle_execution_mode(self, self.child_state)
                 self.handling_execution_mode = False
                 if self.state_execution_status is not StateExecutionStatus.EXECUTE_CHILDREN:
                     self.state_execution_status = StateExecutionStatus.EXECUTE_CHILDREN
@@ -109,6 +108,11 @@ class HierarchyState(ContainerState):
                     else:
                         break
                 elif execution_mode == StateMachineExecutionStatus.BACKWARD:
+                    if not self._is_backward_step_possible():
+                        logger.warning("Cannot step backward in {0}: the execution history items required for the "
+                                       "backward step were discarded by the retention policy".format(self))
+                        self.execution_engine.set_execution_mode(StateMachineExecutionStatus.PAUSED)
+                        continue
                     break_loop = self._handle_backward_execution_before_child_execution()
                     if break_loop:
                         break
@@ -143,6 +147,29 @@ class HierarchyState(ContainerState):
             self.last_child = None
             return self.finalize(Outcome(-1, "aborted"))
 
+    def _is_backward_step_possible(self):
+        """Checks whether the execution history still contains all items required for the next backward step
+
+        Items can only be missing if the execution history discarded older items due to its retention policy. The
+        step is possible if the last item is the call of this state or if the call item of the last returned child
+        state is still available.
+
+        :return: True if the backward step can be executed
+        :rtype: bool
+        """
+        if not self.execution_history.truncated:
+            return True
+        last_history_item = self.execution_history.get_last_history_item()
+        if last_history_item is None:
+            return False
+        if last_history_item.state_reference is self:
+            return True
+        for history_item in reversed(self.execution_history):
+            if isinstance(history_item, CallItem) and history_item.run_id == last_history_item.run_id and \
+                    history_item.state_reference is last_history_item.state_reference:
+                return True
+        return False
+
     def _handle_backward_execution_before_child_execution(self):
         """ Sets up all data after receiving a backward execution step from the execution engine
         :return: a flag to indicate if normal child state execution should abort
@@ -181,7 +208,7 @@ class HierarchyState(ContainerState):
             self.execution_history.push_call_history_item(
                 self.child_state, CallType.EXECUTE, self, self.child_state.input_data)
         self.child_state.start(self.execution_history, backward_execution=self.backward_execution,
-                               generate_run_id=False)
+                               generate_run_id=False, sequential=True)
 
         self.child_state.join()
 
@@ -227,6 +254,8 @@ class HierarchyState(ContainerState):
         # was executed; this leads to the backward and forward execution of a hierarchy child_state
         # having the exact same number of steps
         last_history_item = self.execution_history.get_last_history_item()
+        if last_history_item is None:  # the call item of this state was discarded by the retention policy
+            return False
         if last_history_item.state_reference is self:
             last_history_item = self.execution_history.pop_last_item()
             assert isinstance(last_history_item, CallItem)
@@ -260,7 +289,7 @@ class HierarchyState(ContainerState):
             self.final_outcome = self.outcomes[transition.to_outcome]
 
         if self.child_state is self:
-            singleton.state_machine_execution_engine.modify_run_to_states(self)
+            self.execution_engine.modify_run_to_states(self)
         return False
 
     def _finalize_hierarchy(self):
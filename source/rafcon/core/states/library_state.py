@@ -17,19 +17,24 @@
    :synopsis: A module to represent a library state in the state machine
 
 """
+import threading
 from copy import copy, deepcopy
 
 from gtkmvc import Observable
+from rafcon.core.config import global_config
 from rafcon.core.states.state import StateExecutionStatus
 from rafcon.core.singleton import library_manager
 from rafcon.core.states.state import State, PATH_SEPARATOR
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, lock_state_machine_runtime
 from rafcon.utils import log
 from rafcon.utils import type_helpers
 from rafcon.utils.hashable import Hashable
 
 logger = log.get_logger(__name__)
 
+# prevents that the state copy of a lazy library state is created twice by concurrent threads
+_state_copy_lock = threading.RLock()
+
 
 class LibraryState(State):
     """A class to represent a library state for the state machine
@@ -39,6 +44,10 @@ class LibraryState(State):
     The constructor uses an exceptions.AttributeError if the passed version of the library and the version found in
     the library paths do not match.
 
+    If LAZY_LIBRARY_STATES is enabled, the state copy is only created on first access, e.g. when the library state is
+    executed. Until then, the outcomes and data ports are copied from the interface of the library, which is shared
+    by all library states of the same library.
+
     :ivar str library_path: the path of the library relative to a certain library path (e.g. lwr/gripper/)
     :ivar str library_name: the name of the library between all child states: (e.g. open, or close)
     :ivar str State.name: the name of the library state
@@ -57,6 +66,7 @@ class LibraryState(State):
     _library_name = None
     _version = None
     _state_copy = None
+    _state_copy_pending = False
 
     _input_data_port_runtime_values = {}
     _use_runtime_value_input_data_ports = {}
@@ -91,22 +101,39 @@ class LibraryState(State):
             logger.info("Old library name '{0}' was located at {1}".format(library_name, library_path))
             logger.info("New library name '{0}' is located at {1}".format(new_library_name, new_library_path))
 
-        # key = load_library_root_state_timer.start()
-        lib_version, state_copy = library_manager.get_library_state_copy_instance(self.lib_os_path)
-        self.state_copy = state_copy
-        # load_library_root_state_timer.stop(key)
-        self.state_copy.parent = self
-        if not str(lib_version) == version and not str(lib_version) == "None":
-            raise AttributeError("Library does not have the correct version!")
-
-        if name is None:
-            self.name = self.state_copy.name
-
-        # copy all ports and outcomes of self.state_copy to let the library state appear like the container state
-        # this will also set the parent of all outcomes and data ports to self
-        self.outcomes = self.state_copy.outcomes
-        self.input_data_ports = self.state_copy.input_data_ports
-        self.output_data_ports = self.state_copy.output_data_ports
+        if global_config.get_config_value("LAZY_LIBRARY_STATES", False):
+            library_interface = library_manager.get_library_interface(self.lib_os_path)
+            if not str(library_interface.version) == version and not str(library_interface.version) == "None":
+                raise AttributeError("Library does not have the correct version!")
+            self._state_copy_pending = True
+
+            if name is None:
+                self.name = library_interface.name
+
+            # the state copy is created later on and then uses the outcomes and data ports of the library state
+            self.outcomes = {outcome_id: copy(outcome)
+                             for outcome_id, outcome in library_interface.outcomes.iteritems()}
+            self.input_data_ports = {data_port_id: copy(data_port)
+                                     for data_port_id, data_port in library_interface.input_data_ports.iteritems()}
+            self.output_data_ports = {data_port_id: copy(data_port)
+                                      for data_port_id, data_port in library_interface.output_data_ports.iteritems()}
+        else:
+            # key = load_library_root_state_timer.start()
+            lib_version, state_copy = library_manager.get_library_state_copy_instance(self.lib_os_path)
+            self.state_copy = state_copy
+            # load_library_root_state_timer.stop(key)
+            self.state_copy.parent = self
+            if not str(lib_version) == version and not str(lib_version) == "None":
+                raise AttributeError("Library does not have the correct version!")
+
+            if name is None:
+                self.name = self.state_copy.name
+
+            # copy all ports and outcomes of self.state_copy to let the library state appear like the container state
+            # this will also set the parent of all outcomes and data ports to self
+            self.outcomes = self.state_copy.outcomes
+            self.input_data_ports = self.state_copy.input_data_ports
+            self.output_data_ports = self.state_copy.output_data_ports
 
         # handle input runtime values
         self.input_data_port_runtime_values = input_data_port_runtime_values
@@ -171,7 +198,7 @@ class LibraryState(State):
         # logger.info("compare method \n\t\t\t{0} \n\t\t\t{1}".format(self, other))
         if not isinstance(other, self.__class__):
             return False
-        return str(self) == str(other) and self._state_copy == other.state_copy
+        return str(self) == str(other) and self.state_copy == other.state_copy
 
     def __copy__(self):
         outcomes = {elem_id: copy(elem) for elem_id, elem in self.outcomes.iteritems()}
@@ -195,11 +222,12 @@ class LibraryState(State):
     def destroy(self, recursive=True):
         super(LibraryState, self).destroy(recursive)
         if recursive:
-            if self.state_copy:
-                self.state_copy.destroy(recursive)
-            else:
+            if self._state_copy:
+                self._state_copy.destroy(recursive)
+            elif not self._state_copy_pending:
                 logger.verbose("Multiple calls of destroy {0}".format(self))
             self._state_copy = None
+            self._state_copy_pending = False
 
     def run(self):
         """ This defines the sequence of actions that are taken when the library state is executed
@@ -215,6 +243,7 @@ class LibraryState(State):
         self.state_copy.output_data = self.output_data
         self.state_copy.execution_history = self.execution_history
         self.state_copy.backward_execution = self.backward_execution
+        self.state_copy._execution_engine = self._execution_engine
         self.state_copy.run()
         logger.debug("Exiting library state '{0}' with name '{1}'".format(self.library_name, self.name))
         self.state_execution_status = StateExecutionStatus.WAIT_FOR_NEXT_STATE
@@ -224,19 +253,29 @@ class LibraryState(State):
         """Preempt the state and all of it child states.
         """
         super(LibraryState, self).recursively_preempt_states()
-        self.state_copy.recursively_preempt_states()
+        # a state copy not created yet cannot be executed
+        if self._state_copy is not None:
+            self._state_copy.recursively_preempt_states()
 
     def recursively_pause_states(self):
         """Pause the state and all of it child states.
         """
         super(LibraryState, self).recursively_pause_states()
-        self.state_copy.recursively_pause_states()
+        if self._state_copy is not None:
+            self._state_copy.recursively_pause_states()
 
     def recursively_resume_states(self):
         """Resume the state and all of it child states.
         """
         super(LibraryState, self).recursively_resume_states()
-        self.state_copy.recursively_resume_states()
+        if self._state_copy is not None:
+            self._state_copy.recursively_resume_states()
+
+    def _invalidate_path_caches_recursively(self):
+        super(LibraryState, self)._invalidate_path_caches_recursively()
+        # the paths of a state copy not created yet are not cached
+        if self._state_copy is not None:
+            self._state_copy._invalidate_path_caches_recursively()
 
     @lock_state_machine
     def add_outcome(self, name, outcome_id=None):
@@ -264,7 +303,7 @@ class LibraryState(State):
             raise NotImplementedError("Remove outcome is not implemented for library state {}".format(self))
 
     @lock_state_machine
-    def add_input_data_port(self, name, data_type=None, default_value=None, data_port_id=None):
+    def add_input_data_port(self, name, data_type=None, default_value=None, data_port_id=None, immutable=False):
         """Overwrites the add_input_data_port method of the State class. Prevents user from adding a
         output data port to the library state.
 
@@ -290,7 +329,7 @@ class LibraryState(State):
             raise NotImplementedError("Remove input data port is not implemented for library state {}".format(self))
 
     @lock_state_machine
-    def add_output_data_port(self, name, data_type, default_value=None, data_port_id=None):
+    def add_output_data_port(self, name, data_type, default_value=None, data_port_id=None, immutable=False):
         """Overwrites the add_output_data_port method of the State class. Prevents user from adding a
         output data port to the library state.
 
@@ -392,14 +431,38 @@ class LibraryState(State):
         Returns the numer of child states. As per default states do not have child states return 1.
         :return:
         """
-        return self.state_copy.get_states_statistics(hierarchy_level)
+        return self._get_library_root_state().get_states_statistics(hierarchy_level)
 
     def get_number_of_transitions(self):
         """
         Return the number of transitions for a state. Per default states do not have transitions.
         :return:
         """
-        return self.state_copy.get_number_of_transitions()
+        return self._get_library_root_state().get_number_of_transitions()
+
+    def _get_library_root_state(self):
+        """Returns the state copy or, if it was not created yet, the root state of the library, which must not be
+        changed
+        """
+        if self._state_copy is None and self._state_copy_pending:
+            return library_manager.get_library_interface(self.lib_os_path).root_state
+        return self.state_copy
+
+    def _create_state_copy(self):
+        """Creates the state copy of a lazy library state
+
+        Like in the eager mode, the state copy shares the outcomes and data ports with the library state.
+        """
+        with _state_copy_lock:
+            if not self._state_copy_pending:
+                return
+            _, state_copy = library_manager.get_library_state_copy_instance(self.lib_os_path)
+            state_copy.parent = self
+            state_copy._outcomes = self._outcomes
+            state_copy._input_data_ports = self._input_data_ports
+            state_copy._output_data_ports = self._output_data_ports
+            self._state_copy = state_copy
+            self._state_copy_pending = False
 
     #########################################################################
     # Properties for all class fields that must be observed by gtkmvc
@@ -457,17 +520,29 @@ class LibraryState(State):
     def state_copy(self):
         """Property for the _state_copy field
 
+        The state copy of a lazy library state is created on first access.
         """
+        if self._state_copy_pending:
+            self._create_state_copy()
         return self._state_copy
 
+    @property
+    def state_copy_initialized(self):
+        """Whether the state copy was already created, which is always the case, if lazy library states are disabled
+
+        :rtype: bool
+        """
+        return self._state_copy is not None
+
     @state_copy.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     @Observable.observed
     def state_copy(self, state_copy):
         if not isinstance(state_copy, State):
             raise TypeError("state_copy must be of type State")
 
         self._state_copy = state_copy
+        self._state_copy_pending = False
 
     @property
     def input_data_port_runtime_values(self):
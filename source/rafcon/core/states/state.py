@@ -23,6 +23,7 @@
 
 import Queue
 import copy
+import itertools
 import os
 import threading
 from __builtin__ import staticmethod
@@ -35,6 +36,7 @@ from jsonconversion.jsonobject import JSONObject
 from yaml import YAMLObject
 
 from rafcon.core.id_generator import *
+from rafcon.core.execution.state_executor import get_state_executor
 from rafcon.core.state_elements.state_element import StateElement
 from rafcon.core.state_elements.data_port import DataPort, InputDataPort, OutputDataPort
 from rafcon.core.state_elements.outcome import Outcome
@@ -46,11 +48,22 @@ from rafcon.utils import multi_event
 from rafcon.utils.constants import RAFCON_TEMP_PATH_STORAGE
 from rafcon.utils.hashable import Hashable
 from rafcon.utils.vividict import Vividict
-from rafcon.core.decorators import lock_state_machine
+from rafcon.core.decorators import lock_state_machine, lock_state_machine_runtime
 
 logger = log.get_logger(__name__)
 PATH_SEPARATOR = '/'
 
+# The paths of the states are cached together with the path version of the state. Whenever the parent, the name or
+# the id of a state changes, the state and all its descendants get a new path version.
+_path_versions = itertools.count(1)
+
+
+# each modification of a state is stamped with a new number, allowing the storage to skip unmodified states
+_modification_stamps = itertools.count(1)
+
+# prevents that the execution events of a state are created twice by concurrent threads
+_execution_events_lock = threading.Lock()
+
 
 class State(Observable, YAMLObject, JSONObject, Hashable):
 
@@ -70,6 +83,14 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     """
 
     _parent = None
+    _path_cache = None
+    _name_path_cache = None
+    _path_version = 0
+    _modification_stamp = 0
+    # the execution engine of the current run, resolved once by start()
+    _execution_engine = None
+    # the events used during execution are only created on first use (see _get_execution_events)
+    _execution_events = None
     _state_element_attrs = ['outcomes', 'input_data_ports', 'output_data_ports']
 
     def __init__(self, name=None, state_id=None, input_data_ports=None, output_data_ports=None, outcomes=None,
@@ -85,16 +106,6 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         self._input_data = {}
         # the output data of the state during execution
         self._output_data = {}
-        # a flag which shows if the state was preempted from outside
-        self._preempted = threading.Event()
-        # a flag which shows if the state was started or resumed
-        self._started = threading.Event()
-        # a flag which shows if the state is paused
-        self._paused = threading.Event()
-        # a multi_event listening to both paused and preempted event
-        self._interrupted = multi_event.create(self._preempted, self._paused)
-        # a multi_event listening to both started and preempted event
-        self._unpaused = multi_event.create(self._preempted, self._started)
         # a queue to signal a preemptive concurrency state, that the execution of the state finished
         self._concurrency_queue = None
         # the final outcome of a state, when it finished execution
@@ -109,6 +120,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
         self.thread = None
         self._run_id = None
+        # set by start(), which resets the preemption already before the thread of the state is started
+        self._preemption_reset = False
 
         self._semantic_data = Vividict()
 
@@ -233,17 +246,27 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     # ---------------------------------------------------------------------------------------------
 
     # give the state the appearance of a thread that can be started several times
-    def start(self, execution_history, backward_execution=False, generate_run_id=True):
+    def start(self, execution_history, backward_execution=False, generate_run_id=True, sequential=False,
+              finished_callback=None):
         """ Starts the execution of the state in a new thread.
 
+        The thread is provided by the state executor selected in the config. If sequential is set, the executor may
+        run the state inline, i.e. this method only returns after the execution finished.
+
+        :param bool sequential: True if the caller joins the state right away
+        :param finished_callback: an optional function, which is called by the executing thread after the run of the
+            state, before joining threads return
         :return:
         """
         self.execution_history = execution_history
         if generate_run_id:
             self._run_id = run_id_generator()
         self.backward_execution = copy.copy(backward_execution)
-        self.thread = threading.Thread(target=self.run)
-        self.thread.start()
+        self._execution_engine = self._resolve_execution_engine()
+        # a preemption right after the start of the state must not be reset by the run of the state
+        self.preempted = False
+        self._preemption_reset = True
+        self.thread = get_state_executor().start(self, sequential, finished_callback)
 
     def generate_run_id(self):
         self._run_id = run_id_generator()
@@ -264,7 +287,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         :raises exceptions.TypeError: if the input or output data are not of type dict
         """
         self.state_execution_status = StateExecutionStatus.ACTIVE
-        self.preempted = False
+        self._reset_preemption()
         if not isinstance(self.input_data, dict):
             raise TypeError("input_data must be of type dict")
         if not isinstance(self.output_data, dict):
@@ -273,7 +296,13 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
     def setup_backward_run(self):
         self.state_execution_status = StateExecutionStatus.ACTIVE
-        self.preempted = False
+        self._reset_preemption()
+
+    def _reset_preemption(self):
+        if self._preemption_reset:
+            self._preemption_reset = False
+        else:
+            self.preempted = False
 
     def run(self, *args, **kwargs):
         """Implementation of the abstract run() method of the :class:`threading.Thread`
@@ -365,7 +394,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
     @lock_state_machine
     @Observable.observed
-    def add_input_data_port(self, name, data_type=None, default_value=None, data_port_id=None):
+    def add_input_data_port(self, name, data_type=None, default_value=None, data_port_id=None, immutable=False):
         """Add a new input data port to the state.
 
         :param str name: the name of the new input data port
@@ -373,6 +402,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                           :class:`str` which has to be convertible to :class:`type`
         :param default_value: the default value of the data port
         :param int data_port_id: the data_port_id of the new data port
+        :param bool immutable: whether the values of the data port may be passed by reference
         :return: data_port_id of new input data port
         :rtype: int
         :raises exceptions.ValueError: if name of the input port is not unique
@@ -380,7 +410,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         if data_port_id is None:
             # All data port ids have to passed to the id generation as the data port id has to be unique inside a state
             data_port_id = generate_data_port_id(self.get_data_port_ids())
-        self._input_data_ports[data_port_id] = InputDataPort(name, data_type, default_value, data_port_id, self)
+        self._input_data_ports[data_port_id] = InputDataPort(name, data_type, default_value, data_port_id, self,
+                                                             immutable=immutable)
 
         # Check for name uniqueness
         valid, message = self._check_data_port_name(self._input_data_ports[data_port_id])
@@ -429,7 +460,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
     @lock_state_machine
     @Observable.observed
-    def add_output_data_port(self, name, data_type, default_value=None, data_port_id=None):
+    def add_output_data_port(self, name, data_type, default_value=None, data_port_id=None, immutable=False):
         """Add a new output data port to the state
 
         :param str name: the name of the new output data port
@@ -437,6 +468,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                           :class:`str` which has to be convertible to :class:`type`
         :param default_value: the default value of the data port
         :param int data_port_id: the data_port_id of the new data port
+        :param bool immutable: whether the values of the data port may be passed by reference
         :return: data_port_id of new output data port
         :rtype: int
         :raises exceptions.ValueError: if name of the output port is not unique
@@ -444,7 +476,8 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         if data_port_id is None:
             # All data port ids have to passed to the id generation as the data port id has to be unique inside a state
             data_port_id = generate_data_port_id(self.get_data_port_ids())
-        self._output_data_ports[data_port_id] = OutputDataPort(name, data_type, default_value, data_port_id, self)
+        self._output_data_ports[data_port_id] = OutputDataPort(name, data_type, default_value, data_port_id, self,
+                                                               immutable=immutable)
 
         # Check for name uniqueness
         valid, message = self._check_data_port_name(self._output_data_ports[data_port_id])
@@ -520,26 +553,51 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         concatenates either State.state_id (always unique) or State.name (maybe not unique but human readable) as
         state identifier for the path.
 
+        The path is cached and only recreated, if the parent, the name or the id of a state changed in the meantime.
+
         :param str appendix: the part of the path that was already calculated by previous function calls
         :param bool by_name: The boolean enables name usage to generate the path
         :rtype: str
         :return: the full path to the root state
         """
-        if by_name:
-            state_identifier = self.name
+        # the version has to be read before the path is created, a concurrent change thus invalidates the result
+        version = self._path_version
+        path_cache = self._name_path_cache if by_name else self._path_cache
+        if path_cache is not None and path_cache[0] == version:
+            path = path_cache[1]
         else:
-            state_identifier = self.state_id
+            if by_name:
+                state_identifier = self.name
+            else:
+                state_identifier = self.state_id
 
-        if not self.is_root_state:
-            if appendix is None:
-                return self.parent.get_path(state_identifier, by_name)
+            if not self.is_root_state:
+                path = self.parent.get_path(by_name=by_name) + PATH_SEPARATOR + state_identifier
             else:
-                return self.parent.get_path(state_identifier + PATH_SEPARATOR + appendix, by_name)
-        else:
-            if appendix is None:
-                return state_identifier
+                path = state_identifier
+
+            if by_name:
+                self._name_path_cache = (version, path)
             else:
-                return state_identifier + PATH_SEPARATOR + appendix
+                self._path_cache = (version, path)
+
+        if appendix is None:
+            return path
+        return path + PATH_SEPARATOR + appendix
+
+    def invalidate_path_caches(self):
+        """Invalidates the cached paths of the state and of all its descendants
+
+        Called whenever the parent, the name or the id of the state changed. The path index of the state machine of the
+        state is invalidated as well, all other states keep their cached paths.
+        """
+        self._invalidate_path_caches_recursively()
+        state_machine = self.get_state_machine()
+        if state_machine is not None:
+            state_machine.invalidate_state_path_index()
+
+    def _invalidate_path_caches_recursively(self):
+        self._path_version = next(_path_versions)
 
     def get_storage_path(self, appendix=None):
         """ Recursively create the storage path of the state.
@@ -578,6 +636,35 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
 
         return None
 
+    @property
+    def execution_engine(self):
+        """The execution engine, which executes the state machine of the state
+
+        States not being part of an executed state machine use the execution engine of the singleton module.
+
+        The engine is resolved once when the state is started and then kept for the run.
+
+        :rtype: rafcon.core.execution.execution_engine.ExecutionEngine
+        """
+        if self._execution_engine is not None:
+            return self._execution_engine
+        return self._resolve_execution_engine()
+
+    def _resolve_execution_engine(self):
+        """Determines the execution engine of the state
+
+        The engine is taken from the parent state if it has one already, thus the state machine is only looked up for
+        the root state of a run.
+        """
+        parent = self.parent
+        if isinstance(parent, State) and parent._execution_engine is not None:
+            return parent._execution_engine
+        state_machine = self.get_state_machine()
+        if state_machine is not None and state_machine.execution_engine is not None:
+            return state_machine.execution_engine
+        from rafcon.core.singleton import state_machine_execution_engine
+        return state_machine_execution_engine
+
     @property
     def file_system_path(self):
         """Provides the path in the file system where the state is stored
@@ -856,6 +943,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 state_id = state_id_generator(used_state_ids=used_ids)
 
         self._state_id = state_id
+        self.invalidate_path_caches()
 
     def get_states_statistics(self, hierarchy_level):
         """Get states statistic tuple
@@ -901,6 +989,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         assert isinstance(key, basestring)
         target_dict = self.get_semantic_data(path_as_list)
         target_dict[key] = value
+        self.mark_modified()
         return path_as_list + [key]
 
     @Observable.observed
@@ -916,8 +1005,25 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         target_dict = self.get_semantic_data(path_as_list[0:-1])
         removed_element = target_dict[path_as_list[-1]]
         del target_dict[path_as_list[-1]]
+        self.mark_modified()
         return removed_element
 
+    def mark_modified(self):
+        """Marks the state as modified
+
+        This is done automatically by all methods decorated with lock_state_machine. Only states modified since they
+        were last saved to a path are written again by the storage.
+        """
+        self._modification_stamp = next(_modification_stamps)
+
+    @property
+    def modification_stamp(self):
+        """A number, which changes whenever the state is modified
+
+        :rtype: int
+        """
+        return self._modification_stamp
+
     @lock_state_machine
     def destroy(self, recursive):
         """ Removes all the state elements.
@@ -968,6 +1074,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 raise ValueError("Name must have at least one character")
 
         self._name = name
+        self.invalidate_path_caches()
 
     @property
     def parent(self):
@@ -985,6 +1092,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
     @lock_state_machine
     @Observable.observed
     def parent(self, parent):
+        old_state_machine = self.get_state_machine()
         if parent is None:
             self._parent = None
         else:
@@ -993,6 +1101,10 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
                 raise TypeError("parent must be of type State or StateMachine or None")
 
             self._parent = ref(parent)
+        self.invalidate_path_caches()
+        # the state is removed from its previous state machine
+        if old_state_machine is not None and old_state_machine is not self.get_state_machine():
+            old_state_machine.invalidate_state_path_index()
 
     @property
     def input_data_ports(self):
@@ -1172,7 +1284,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._input_data
 
     @input_data.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     #@Observable.observed
     def input_data(self, input_data):
         if not isinstance(input_data, dict):
@@ -1187,59 +1299,106 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._output_data
 
     @output_data.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     #@Observable.observed
     def output_data(self, output_data):
         if not isinstance(output_data, dict):
             raise TypeError("output_data must be of type dict")
         self._output_data = output_data
 
+    def _get_execution_events(self):
+        """Returns the events used during the execution of the state
+
+        The events are created on first use, as many states (e.g. the ones within library states) are never executed
+        or even never paused or preempted. A state without events is neither preempted, nor started, nor paused.
+
+        :return: the preempted, started and paused event as well as the multi events for interruption and unpause
+        :rtype: tuple
+        """
+        execution_events = self._execution_events
+        if execution_events is None:
+            with _execution_events_lock:
+                if self._execution_events is None:
+                    preempted = threading.Event()
+                    started = threading.Event()
+                    paused = threading.Event()
+                    self._execution_events = (preempted, started, paused,
+                                              multi_event.create(preempted, paused),
+                                              multi_event.create(preempted, started))
+                execution_events = self._execution_events
+        return execution_events
+
+    @property
+    def _preempted(self):
+        """A flag which shows if the state was preempted from outside"""
+        return self._get_execution_events()[0]
+
+    @property
+    def _started(self):
+        """A flag which shows if the state was started or resumed"""
+        return self._get_execution_events()[1]
+
+    @property
+    def _paused(self):
+        """A flag which shows if the state is paused"""
+        return self._get_execution_events()[2]
+
+    @property
+    def _interrupted(self):
+        """A multi_event listening to both paused and preempted event"""
+        return self._get_execution_events()[3]
+
+    @property
+    def _unpaused(self):
+        """A multi_event listening to both started and preempted event"""
+        return self._get_execution_events()[4]
+
     @property
     def preempted(self):
         """Checks, whether the preempted event is set
         """
-        return self._preempted.is_set()
+        return self._execution_events is not None and self._preempted.is_set()
 
     @preempted.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     def preempted(self, preempted):
         if not isinstance(preempted, bool):
             raise TypeError("preempted must be of type bool")
         if preempted:
             self._preempted.set()
-        else:
+        elif self._execution_events is not None:
             self._preempted.clear()
 
     @property
     def started(self):
         """Checks, whether the started event is set
         """
-        return self._started.is_set()
+        return self._execution_events is not None and self._started.is_set()
 
     @started.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     def started(self, started):
         if not isinstance(started, bool):
             raise TypeError("started must be of type bool")
         if started:
             self._started.set()
-        else:
+        elif self._execution_events is not None:
             self._started.clear()
 
     @property
     def paused(self):
         """Checks, whether the paused event is set
         """
-        return self._paused.is_set()
+        return self._execution_events is not None and self._paused.is_set()
 
     @paused.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     def paused(self, paused):
         if not isinstance(paused, bool):
             raise TypeError("paused must be of type bool")
         if paused:
             self._paused.set()
-        else:
+        elif self._execution_events is not None:
             self._paused.clear()
 
     def wait_for_interruption(self, timeout=None):
@@ -1268,7 +1427,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._concurrency_queue
 
     @concurrency_queue.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     #@Observable.observed
     def concurrency_queue(self, concurrency_queue):
         if not isinstance(concurrency_queue, Queue.Queue):
@@ -1287,7 +1446,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._final_outcome
 
     @final_outcome.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     #@Observable.observed
     def final_outcome(self, final_outcome):
         if not isinstance(final_outcome, Outcome):
@@ -1333,7 +1492,7 @@ class State(Observable, YAMLObject, JSONObject, Hashable):
         return self._state_execution_status
 
     @state_execution_status.setter
-    @lock_state_machine
+    @lock_state_machine_runtime
     @Observable.observed
     def state_execution_status(self, state_execution_status):
         if not isinstance(state_execution_status, StateExecutionStatus):
@@ -0,0 +1,251 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: library_cache
+   :synopsis: A persistent cache of parsed library state machines, shared by all RAFCON processes of a user
+
+For every library, the content of its state machine file and of the core data, script and semantic data files of all
+its states is stored in a single cache file. The json files are stored already parsed, in the marshal format, which
+is much faster to load than json. Thus, loading a library from the cache only needs a single file read and no json
+parsing.
+
+Each cache file holds a fingerprint of the library, which consists of the paths, sizes and modification times of all
+files of the library (except the meta data). The entry is only used, if the fingerprint still matches the files on
+the file system, otherwise the library is loaded from its files and the cache file is replaced. Cache files are
+written atomically, thus several processes can use the same cache folder at the same time.
+"""
+
+import os
+import sys
+import json
+import marshal
+import hashlib
+
+try:
+    from scandir import walk
+except ImportError:
+    from os import walk
+
+import rafcon
+from rafcon.core.config import global_config
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.utils.constants import RAFCON_TEMP_PATH_USER
+from rafcon.utils import storage_utils
+from rafcon.utils import filesystem
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+# is increased, whenever the content of the cache files changes
+CACHE_FORMAT_VERSION = 1
+CACHE_FILE_EXTENSION = '.cache'
+# the indices of the library root paths are stored in the cache folder as well, see library_index
+INDEX_FILE_EXTENSION = '.index'
+# files which are not read by the core and therefore do not invalidate a cache entry
+IGNORED_FILE_NAMES = frozenset([storage.FILE_NAME_META_DATA, storage.FILE_NAME_META_DATA_OLD])
+# cache folders, which were refused as they are accessible by other users
+_refused_cache_paths = set()
+
+
+def get_cache_path():
+    """Returns the folder of the library cache, as configured by LIBRARY_CACHE_PATH
+
+    :rtype: str
+    """
+    cache_path = global_config.get_config_value("LIBRARY_CACHE_PATH", "%RAFCON_TEMP_PATH_USER/library_cache")
+    if cache_path.startswith('%RAFCON_TEMP_PATH_USER'):
+        cache_path = cache_path.replace('%RAFCON_TEMP_PATH_USER', RAFCON_TEMP_PATH_USER)
+    return cache_path
+
+
+def prepare_cache_path():
+    """Creates the folder of the library cache, only accessible by the current user, or checks the existing one
+
+    The cache files are unmarshalled, thus folders of other users or writable by other users are refused.
+
+    :return: whether the library cache can be used
+    :rtype: bool
+    """
+    cache_path = get_cache_path()
+    try:
+        filesystem.create_private_path(cache_path)
+    except OSError, e:
+        if cache_path not in _refused_cache_paths:
+            _refused_cache_paths.add(cache_path)
+            logger.warn("The library cache {0} is not used: {1}".format(cache_path, e))
+        return False
+    return True
+
+
+def _get_cache_key():
+    # marshal data is only compatible within the same Python version
+    return CACHE_FORMAT_VERSION, rafcon.__version__, marshal.version, tuple(sys.version_info[:2])
+
+
+def get_cache_file_path(lib_os_path, cache_path=None):
+    """Returns the path of the cache file of a library
+
+    :param str lib_os_path: the path of the library
+    :param str cache_path: the folder of the library cache, defaults to :func:`get_cache_path`
+    :rtype: str
+    """
+    if cache_path is None:
+        cache_path = get_cache_path()
+    return os.path.join(cache_path, hashlib.md5(os.path.realpath(lib_os_path)).hexdigest() + CACHE_FILE_EXTENSION)
+
+
+def get_fingerprint(lib_os_path):
+    """Creates the fingerprint of a library from the paths, sizes and modification times of its files
+
+    The files are not read, only their status is requested. For packed state machine files, the status of the file
+    itself is used.
+
+    :param str lib_os_path: the path of the library
+    :return: the fingerprint, which changes whenever a file of the library is changed, added or removed
+    :rtype: str
+    """
+    if os.path.isfile(lib_os_path):
+        file_stat = os.stat(lib_os_path)
+        return hashlib.md5(repr((file_stat.st_size, file_stat.st_mtime))).hexdigest()
+    file_stats = []
+    for directory_path, directory_names, file_names in walk(lib_os_path, followlinks=True):
+        directory_names.sort()
+        relative_path = os.path.relpath(directory_path, lib_os_path)
+        for file_name in sorted(file_names):
+            if file_name in IGNORED_FILE_NAMES:
+                continue
+            file_stat = os.stat(os.path.join(directory_path, file_name))
+            file_stats.append((os.path.join(relative_path, file_name), file_stat.st_size, file_stat.st_mtime))
+    return hashlib.md5(repr(file_stats)).hexdigest()
+
+
+def _read_cache_entry(cache_file_path, lib_os_path, fingerprint):
+    """Reads the cache entry of a library, if it is still valid
+
+    :return: the cache entry or None if there is no valid one
+    """
+    try:
+        with open(cache_file_path, 'rb') as file_pointer:
+            if marshal.load(file_pointer) != (_get_cache_key(), os.path.realpath(lib_os_path), fingerprint):
+                return None
+            return marshal.load(file_pointer)
+    except IOError:
+        # there is no cache entry for the library
+        return None
+    except (EOFError, ValueError, TypeError), e:
+        logger.warn("Invalid library cache file {0}: {1}".format(cache_file_path, e))
+        return None
+
+
+def _write_cache_entry(cache_file_path, lib_os_path, fingerprint, cache_entry):
+    """Writes the cache entry of a library
+
+    The entry is written to a temporary file first, which replaces the cache file afterwards. Thus, other processes
+    never read incomplete entries.
+    """
+    try:
+        tmp_file_path = "{0}.{1}.tmp".format(cache_file_path, os.getpid())
+        with open(tmp_file_path, 'wb') as file_pointer:
+            marshal.dump((_get_cache_key(), os.path.realpath(lib_os_path), fingerprint), file_pointer)
+            marshal.dump(cache_entry, file_pointer)
+        os.rename(tmp_file_path, cache_file_path)
+    except (OSError, IOError, ValueError), e:
+        # the library is still loaded, only without cache
+        logger.warn("Library cache file {0} could not be written: {1}".format(cache_file_path, e))
+
+
+def _create_cache_entry(lib_os_path):
+    """Reads and parses the files of a library
+
+    :return: the cache entry of the library, which consists of the parsed state machine file, the storage id of the
+        root state and the parsed files of all states with their paths relative to the root state
+    :rtype: dict
+    :raises ValueError: if a file of the library is no valid json file
+    """
+    state_machine_dict = storage_utils.load_objects_from_json(os.path.join(lib_os_path, storage.STATEMACHINE_FILE),
+                                                              as_dict=True)
+    if "root_state_storage_id" in state_machine_dict:
+        root_state_storage_id = state_machine_dict['root_state_storage_id']
+    else:
+        root_state_storage_id = state_machine_dict['root_state_id']
+
+    def load_json(content):
+        return None if content is None else json.loads(content)
+
+    state_files = []
+    root_state_path = os.path.join(lib_os_path, root_state_storage_id)
+    for state_directory in storage._discover_state_directories(root_state_path):
+        state_path, core_data, script_text, semantic_data = storage._read_state_files(state_directory)
+        state_files.append((state_path[len(root_state_path):], load_json(core_data), script_text,
+                            load_json(semantic_data)))
+
+    return {'state_machine': state_machine_dict, 'root_state_storage_id': root_state_storage_id,
+            'states': state_files}
+
+
+def load_state_machine_from_path(lib_os_path, fingerprint=None):
+    """Loads a library state machine using the library cache
+
+    If the cache holds a valid entry for the library, the state machine is created from this entry. Otherwise, the
+    files of the library are read and the entry is created and stored. The resulting state machine is the same as of
+    :func:`rafcon.core.storage.storage.load_state_machine_from_path`. Libraries not stored as state machine directory
+    (e.g. packed state machine files) are loaded without cache.
+
+    :param str lib_os_path: the path of the library
+    :param str fingerprint: the fingerprint of the library, if already known, see :func:`get_fingerprint`
+    :return: the loaded state machine
+    :rtype: rafcon.core.state_machine.StateMachine
+    :raises ValueError: if the provided path does not contain a valid state machine
+    """
+    if not os.path.isfile(os.path.join(lib_os_path, storage.STATEMACHINE_FILE)) or not prepare_cache_path():
+        return storage.load_state_machine_from_path(lib_os_path)
+
+    if fingerprint is None:
+        fingerprint = get_fingerprint(lib_os_path)
+    cache_file_path = get_cache_file_path(lib_os_path)
+    cache_entry = _read_cache_entry(cache_file_path, lib_os_path, fingerprint)
+    if cache_entry is None:
+        logger.debug("Library {0} is not cached yet or changed".format(lib_os_path))
+        try:
+            cache_entry = _create_cache_entry(lib_os_path)
+        except ValueError:
+            # invalid files are reported by the storage
+            return storage.load_state_machine_from_path(lib_os_path)
+        _write_cache_entry(cache_file_path, lib_os_path, fingerprint, cache_entry)
+
+    state_machine_dict = storage_utils.load_objects_from_json_dict(cache_entry['state_machine'])
+    storage.check_used_rafcon_version(state_machine_dict)
+    state_machine = StateMachine.from_dict(state_machine_dict)
+    if "root_state_storage_id" not in state_machine_dict:
+        state_machine.supports_saving_state_names = False
+    state_machine.file_system_path = lib_os_path
+
+    dirty_states = []
+    root_state_path = os.path.join(lib_os_path, cache_entry['root_state_storage_id'])
+    state_files = ((root_state_path + relative_state_path, core_data, script_text, semantic_data)
+                   for relative_state_path, core_data, script_text, semantic_data in cache_entry['states'])
+    state_machine.root_state = storage.create_states_from_files(state_machine, root_state_path, state_files,
+                                                                dirty_states,
+                                                                load_objects=storage_utils.load_objects_from_json_dict)
+    state_machine.marked_dirty = len(dirty_states) > 0
+    return state_machine
+
+
+def clear_cache(cache_path=None):
+    """Removes all cache files, including the stored library indices
+
+    :param str cache_path: the folder of the library cache, defaults to :func:`get_cache_path`
+    """
+    if cache_path is None:
+        cache_path = get_cache_path()
+    if not os.path.isdir(cache_path):
+        return
+    for file_name in os.listdir(cache_path):
+        if file_name.endswith(CACHE_FILE_EXTENSION) or file_name.endswith(INDEX_FILE_EXTENSION):
+            os.remove(os.path.join(cache_path, file_name))
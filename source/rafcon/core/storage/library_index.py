@@ -0,0 +1,226 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: library_index
+   :synopsis: An index of the libraries within a library root path, which is updated incrementally
+
+The index holds a record for every directory within a library root path, consisting of the modification time of the
+directory, whether it is a library and its relevant entries (sub-directories and packed state machine files). The
+modification time of a directory changes whenever an entry is added, removed or renamed. Thus, when updating the
+index, only directories with a changed modification time have to be listed again, all other directories only need a
+single ``stat`` call. The result is the same as of a complete scan of the library root path.
+
+If the library cache is enabled, the index is in addition stored in the cache folder, so that new RAFCON processes do
+not need to scan the library root paths completely.
+"""
+
+import os
+import time
+import marshal
+import hashlib
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    OrderedDict = dict
+
+from rafcon.core.storage import storage
+from rafcon.core.storage import library_cache
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+# is increased, whenever the content of the index files changes
+INDEX_FORMAT_VERSION = 1
+# directories changed within this time span (in seconds) are listed again on the next update, as they could be changed
+# again without changing their modification time, due to the limited resolution of the file system timestamps
+MTIME_RESOLUTION = 2.
+
+
+class LibraryIndex(object):
+    """An index of the libraries within a library root path
+
+    :ivar str library_root_path: the indexed path
+    :ivar dict directories: the records of all indexed directories, with their path relative to the library root path
+        as key and a tuple of modification time, a flag whether the directory is a library and a list of the names of
+        all sub-directories and packed state machine files (each with a flag whether it is a directory) as value
+    :ivar set changed_paths: the os paths of the directories, which were listed again or removed by the last update
+    """
+
+    def __init__(self, library_root_path, directories=None):
+        self.library_root_path = library_root_path
+        self.directories = {} if directories is None else directories
+        self.changed_paths = set()
+
+    def update(self, check_name=None):
+        """Updates the index from the file system
+
+        :param check_name: an optional function, which is called with the path of a directory and the name of each of
+            its entries, whenever the directory is listed
+        :return: whether any directory changed since the last update
+        :rtype: bool
+        """
+        directories = {}
+        changed_directories = set()
+        self._update_directory('', directories, changed_directories, check_name)
+        changed_directories.update(set(self.directories) - set(directories))
+        self.directories = directories
+        self.changed_paths = set(self._get_os_path(relative_path) for relative_path in changed_directories)
+        return len(changed_directories) > 0
+
+    def _get_os_path(self, relative_path):
+        return os.path.join(self.library_root_path, relative_path) if relative_path else self.library_root_path
+
+    def _update_directory(self, relative_path, directories, changed_directories, check_name):
+        path = self._get_os_path(relative_path)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            # the directory was removed in the meantime
+            changed_directories.add(relative_path)
+            return
+        record = self.directories.get(relative_path)
+        if record is None or record[0] is None or record[0] != mtime:
+            record = self._list_directory(path, relative_path, mtime, check_name)
+            changed_directories.add(relative_path)
+        directories[relative_path] = record
+
+        _, is_library, entries = record
+        if not is_library:
+            for name, is_directory in entries:
+                if is_directory:
+                    self._update_directory(os.path.join(relative_path, name), directories, changed_directories,
+                                           check_name)
+
+    @staticmethod
+    def _list_directory(path, relative_path, mtime, check_name):
+        if time.time() - mtime < MTIME_RESOLUTION:
+            mtime = None
+        # the library root path itself is never a library
+        if relative_path and (os.path.exists(os.path.join(path, storage.STATEMACHINE_FILE)) or
+                              os.path.exists(os.path.join(path, storage.STATEMACHINE_FILE_OLD))):
+            return mtime, True, []
+
+        entries = []
+        for name in sorted(os.listdir(path)):
+            if check_name is not None:
+                check_name(path, name)
+            if name[0] == '.':
+                continue
+            full_path = os.path.join(path, name)
+            if os.path.isdir(full_path):
+                entries.append((name, True))
+            elif name.endswith(storage.PACKED_STATE_MACHINE_FILE_EXTENSION) and os.path.isfile(full_path):
+                entries.append((name, False))
+        return mtime, False, entries
+
+    @property
+    def libraries(self):
+        """The flat map of all libraries
+
+        :return: the library paths relative to the library root path (including the library names) as keys and the os
+            paths of the libraries as values
+        :rtype: OrderedDict
+        """
+        libraries = {}
+        for relative_path, (_, is_library, entries) in self.directories.iteritems():
+            if is_library:
+                libraries[relative_path] = self._get_os_path(relative_path)
+                continue
+            for name, is_directory in entries:
+                if not is_directory:
+                    libraries[os.path.join(relative_path, name[:-len(storage.PACKED_STATE_MACHINE_FILE_EXTENSION)])] = \
+                        os.path.join(self._get_os_path(relative_path), name)
+        return OrderedDict(sorted(libraries.items()))
+
+    def get_library_tree(self):
+        """Creates the nested library dictionaries as used by the library manager
+
+        :return: the folders and libraries within the library root path, with the folders as nested dictionaries and
+            the os paths of the libraries as values
+        :rtype: OrderedDict
+        """
+        return self._get_library_tree('')
+
+    def _get_library_tree(self, relative_path):
+        library_tree = {}
+        if relative_path in self.directories:
+            for name, is_directory in self.directories[relative_path][2]:
+                entry_path = os.path.join(relative_path, name)
+                if not is_directory:
+                    library_name = name[:-len(storage.PACKED_STATE_MACHINE_FILE_EXTENSION)]
+                    library_tree[library_name] = self._get_os_path(entry_path)
+                elif entry_path not in self.directories:
+                    # the directory was removed during the update
+                    continue
+                elif self.directories[entry_path][1]:
+                    library_tree[name] = self._get_os_path(entry_path)
+                else:
+                    library_tree[name] = self._get_library_tree(entry_path)
+        return OrderedDict(sorted(library_tree.items()))
+
+
+def get_index_file_path(library_root_path, cache_path=None):
+    """Returns the path of the index file of a library root path
+
+    :param str library_root_path: the library root path
+    :param str cache_path: the folder of the library cache, defaults to
+        :func:`rafcon.core.storage.library_cache.get_cache_path`
+    :rtype: str
+    """
+    if cache_path is None:
+        cache_path = library_cache.get_cache_path()
+    return os.path.join(cache_path, hashlib.md5(os.path.realpath(library_root_path)).hexdigest() +
+                        library_cache.INDEX_FILE_EXTENSION)
+
+
+def _get_index_key(library_root_path):
+    return INDEX_FORMAT_VERSION, marshal.version, os.path.realpath(library_root_path)
+
+
+def load_library_index(library_root_path):
+    """Loads the stored index of a library root path
+
+    :param str library_root_path: the library root path
+    :return: the stored index or an empty index, if there is no valid one
+    :rtype: LibraryIndex
+    """
+    if not library_cache.prepare_cache_path():
+        return LibraryIndex(library_root_path)
+    index_file_path = get_index_file_path(library_root_path)
+    try:
+        with open(index_file_path, 'rb') as file_pointer:
+            if marshal.load(file_pointer) == _get_index_key(library_root_path):
+                return LibraryIndex(library_root_path, marshal.load(file_pointer))
+    except IOError:
+        # the library root path was not indexed yet
+        pass
+    except (EOFError, ValueError, TypeError), e:
+        logger.warn("Invalid library index file {0}: {1}".format(index_file_path, e))
+    return LibraryIndex(library_root_path)
+
+
+def save_library_index(library_index):
+    """Stores the index of a library root path
+
+    The index is written to a temporary file first, which replaces the index file afterwards. Thus, other processes
+    never read incomplete indices.
+
+    :param LibraryIndex library_index: the index to store
+    """
+    if not library_cache.prepare_cache_path():
+        return
+    index_file_path = get_index_file_path(library_index.library_root_path)
+    try:
+        tmp_file_path = "{0}.{1}.tmp".format(index_file_path, os.getpid())
+        with open(tmp_file_path, 'wb') as file_pointer:
+            marshal.dump(_get_index_key(library_index.library_root_path), file_pointer)
+            marshal.dump(library_index.directories, file_pointer)
+        os.rename(tmp_file_path, index_file_path)
+    except (OSError, IOError, ValueError), e:
+        logger.warn("Library index file {0} could not be written: {1}".format(index_file_path, e))
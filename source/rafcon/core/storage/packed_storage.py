@@ -0,0 +1,293 @@
+# Copyright (C) 2018 DLR
+#
+# All rights reserved. This program and the accompanying materials are made
+# available under the terms of the Eclipse Public License v1.0 which
+# accompanies this distribution, and is available at
+# http://www.eclipse.org/legal/epl-v10.html
+
+"""
+.. module:: packed_storage
+   :synopsis: Helper functions to store a state machine in a single packed file and load it from there
+
+A packed state machine file holds the same files as the directory of a state machine (the directories of all states
+with their core data, script and semantic data files), but within a single zip archive. The central directory of the
+archive is used as index, thus single states or libraries can be loaded without reading the whole file.
+
+:func:`rafcon.core.storage.storage.save_state_machine_to_path` writes a packed file, if the path ends with
+PACKED_STATE_MACHINE_FILE_EXTENSION. :func:`rafcon.core.storage.storage.load_state_machine_from_path` reads state
+machines of both formats.
+"""
+
+import os
+import posixpath
+import zipfile
+from contextlib import closing
+
+try:
+    from scandir import walk
+except ImportError:
+    from os import walk
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    OrderedDict = dict
+
+from rafcon.core.storage import storage
+from rafcon.core.storage.storage import PACKED_STATE_MACHINE_FILE_EXTENSION, STATEMACHINE_FILE, FILE_NAME_CORE_DATA, \
+    FILE_NAME_CORE_DATA_OLD, SCRIPT_FILE, SEMANTIC_DATA_FILE
+from rafcon.utils import storage_utils
+from rafcon.utils import log
+
+logger = log.get_logger(__name__)
+
+
+def is_packed_state_machine_file(path):
+    """Checks whether the given path points to a packed state machine file
+
+    :param str path: the path to check
+    :rtype: bool
+    """
+    return os.path.isfile(path) and zipfile.is_zipfile(path)
+
+
+class PackedStateMachineFile(object):
+    """Read access to a packed state machine file
+
+    Only the index of the file is read when opening it, the files of the states are read on demand.
+
+    :ivar str filename: the path of the packed file
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._zip_file = zipfile.ZipFile(filename, 'r')
+        self._file_names_by_directory = {}
+        for member_name in self._zip_file.namelist():
+            directory, file_name = posixpath.split(member_name)
+            if file_name:
+                self._file_names_by_directory.setdefault(directory, set()).add(file_name)
+
+    def close(self):
+        self._zip_file.close()
+
+    @property
+    def state_directories(self):
+        """The directories of all states within the file, relative to the state machine
+
+        :rtype: list
+        """
+        return sorted(directory for directory in self._file_names_by_directory if directory)
+
+    @property
+    def member_names(self):
+        """The names of all files within the packed file
+
+        :rtype: list
+        """
+        return self._zip_file.namelist()
+
+    def read(self, member_name):
+        """Reads a single file of the packed state machine
+
+        :param str member_name: the path of the file, relative to the state machine
+        :return: the content of the file or None if the file does not exist
+        :rtype: str
+        """
+        try:
+            return self._zip_file.read(member_name)
+        except KeyError:
+            return None
+
+    def get_state_machine_dict(self):
+        """Reads the state machine file
+
+        :return: the content of the state machine file
+        :rtype: dict
+        :raises ValueError: if the packed file does not contain a state machine file
+        """
+        content = self.read(STATEMACHINE_FILE)
+        if content is None:
+            raise ValueError("Provided file doesn't contain a valid state machine: {0}".format(self.filename))
+        return storage_utils.load_objects_from_json_string(content)
+
+    def get_state_path(self, state_directory):
+        """Returns the path of a state within the packed file, which is used as file system path of the state
+
+        :param str state_directory: the directory of the state relative to the state machine
+        :rtype: str
+        """
+        return os.path.join(self.filename, *state_directory.split('/'))
+
+    def _get_state_directory(self, state_path):
+        return os.path.relpath(state_path, self.filename).replace(os.sep, '/')
+
+    def _read_state_file(self, state_path, file_name):
+        return self.read(posixpath.join(self._get_state_directory(state_path), file_name))
+
+    def _iter_state_files(self, state_directory):
+        directories = [directory for directory in self._file_names_by_directory
+                       if directory == state_directory or directory.startswith(state_directory + '/')]
+        # parent states have to be created before their children
+        directories.sort(key=lambda directory: directory.count('/'))
+        for directory in directories:
+            file_names = self._file_names_by_directory[directory]
+            # TODO: FILE_NAME_CORE_DATA_OLD should be removed with next minor release
+            core_data_file_name = FILE_NAME_CORE_DATA if FILE_NAME_CORE_DATA in file_names else FILE_NAME_CORE_DATA_OLD
+            yield (self.get_state_path(directory),
+                   self.read(posixpath.join(directory, core_data_file_name)),
+                   self.read(posixpath.join(directory, SCRIPT_FILE)),
+                   self.read(posixpath.join(directory, SEMANTIC_DATA_FILE)))
+
+    def load_state(self, state_directory, parent=None, dirty_states=None):
+        """Loads a state and all its child states from the packed file
+
+        Only the files of the requested states are read.
+
+        :param str state_directory: the directory of the state relative to the state machine, e.g. the storage id of
+            the root state
+        :param parent: the state machine or state to which the loaded state is added
+        :param list dirty_states: a list to which the states are added, which changed during loading
+        :return: the loaded state
+        :raises ValueError: if the packed file does not contain the state
+        """
+        if state_directory not in self._file_names_by_directory:
+            raise ValueError("State {0} not found in {1}".format(state_directory, self.filename))
+        dirty_states = [] if dirty_states is None else dirty_states
+        return storage.create_states_from_files(parent, self.get_state_path(state_directory),
+                                                self._iter_state_files(state_directory), dirty_states,
+                                                read_state_file=self._read_state_file)
+
+
+def _write_packed_file(filename, files):
+    """Writes the given files to a packed file
+
+    The files are first written to a temporary file, which replaces the target file afterwards. Thus, the target file
+    is never left in an incomplete state.
+
+    :param str filename: the path of the packed file
+    :param files: an iterable of tuples of the path of a file relative to the state machine and its content
+    """
+    directory = os.path.dirname(filename)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp_filename = filename + ".tmp"
+    with closing(zipfile.ZipFile(tmp_filename, 'w', zipfile.ZIP_DEFLATED)) as zip_file:
+        for member_name, content in files:
+            zip_file.writestr(member_name, content)
+    os.rename(tmp_filename, filename)
+
+
+def _collect_state_files(state, parent_directory, files, state_directories):
+    from rafcon.core.states.execution_state import ExecutionState
+    from rafcon.core.states.container_state import ContainerState
+
+    state_directory = posixpath.join(parent_directory, storage.get_storage_id_for_state(state))
+    state_directories[state_directory] = state
+    files[posixpath.join(state_directory, FILE_NAME_CORE_DATA)] = storage_utils.dump_objects_to_json_string(state)
+    if isinstance(state, ExecutionState):
+        files[posixpath.join(state_directory, SCRIPT_FILE)] = state.script_text
+    files[posixpath.join(state_directory, SEMANTIC_DATA_FILE)] = \
+        storage_utils.dump_objects_to_json_string(state.semantic_data)
+
+    if isinstance(state, ContainerState):
+        for child_state in state.states.itervalues():
+            _collect_state_files(child_state, state_directory, files, state_directories)
+
+
+def save_state_machine_to_packed_file(state_machine, filename, delete_old_state_machine=False, as_copy=False):
+    """Saves a state machine to a packed state machine file
+
+    The `as_copy` flag determines whether the state machine is saved as copy. If so (`as_copy=True`), some state
+    machine attributes will be left untouched, such as the `file_system_path` or the `dirty_flag`.
+
+    Files of an existing packed file, which are not written by the core (e.g. the meta data), are kept, as long as the
+    state they belong to still exists.
+
+    :param rafcon.core.state_machine.StateMachine state_machine: the state_machine to be saved
+    :param str filename: the path of the packed file
+    :param bool delete_old_state_machine: Whether to drop all files of an existing packed file
+    :param bool as_copy: Whether to use a copy storage for the state machine
+    """
+    from rafcon.core.states.execution_state import ExecutionState
+
+    state_machine.acquire_modification_lock()
+    try:
+        old_update_time = state_machine.last_update
+        state_machine.last_update = storage_utils.get_current_time_string()
+        files = OrderedDict()
+        files[STATEMACHINE_FILE] = storage_utils.dump_objects_to_json_string(state_machine.to_dict())
+        state_directories = {}
+        _collect_state_files(state_machine.root_state, "", files, state_directories)
+
+        if not delete_old_state_machine and is_packed_state_machine_file(filename):
+            with closing(PackedStateMachineFile(filename)) as old_packed_file:
+                for member_name in old_packed_file.member_names:
+                    directory = posixpath.dirname(member_name)
+                    if member_name not in files and (not directory or directory in state_directories):
+                        files[member_name] = old_packed_file.read(member_name)
+
+        _write_packed_file(filename, files.iteritems())
+
+        if not as_copy:
+            state_machine.file_system_path = filename
+            for state_directory, state in state_directories.iteritems():
+                state_path = os.path.join(filename, *state_directory.split('/'))
+                state.file_system_path = state_path
+                if isinstance(state, ExecutionState):
+                    state.script.filename = SCRIPT_FILE
+                    state.script.path = state_path
+            if state_machine.marked_dirty:
+                state_machine.marked_dirty = False
+        else:
+            state_machine.last_update = old_update_time
+        logger.debug("State machine with id {0} was saved at {1}".format(state_machine.state_machine_id, filename))
+    finally:
+        state_machine.release_modification_lock()
+
+
+def convert_directory_to_packed_file(state_machine_path, filename=None):
+    """Converts a state machine directory into a packed state machine file
+
+    All files of the directory are packed, also those not read by the core (e.g. the meta data), thus the conversion
+    is lossless.
+
+    :param str state_machine_path: the path of the state machine directory
+    :param str filename: the path of the packed file, defaults to the directory path with the packed file extension
+    :return: the path of the packed file
+    :rtype: str
+    :raises ValueError: if the directory does not contain a state machine
+    """
+    state_machine_path = state_machine_path.rstrip(os.sep)
+    if not os.path.isfile(os.path.join(state_machine_path, STATEMACHINE_FILE)):
+        raise ValueError("Provided path doesn't contain a valid state machine: {0}".format(state_machine_path))
+    if filename is None:
+        filename = state_machine_path + PACKED_STATE_MACHINE_FILE_EXTENSION
+
+    def iter_files():
+        for directory_path, directory_names, file_names in walk(state_machine_path, followlinks=True):
+            directory_names.sort()
+            relative_path = os.path.relpath(directory_path, state_machine_path)
+            directory = '' if relative_path == os.curdir else relative_path.replace(os.sep, '/')
+            for file_name in sorted(file_names):
+                with open(os.path.join(directory_path, file_name), 'rb') as file_pointer:
+                    yield posixpath.join(directory, file_name), file_pointer.read()
+
+    _write_packed_file(filename, iter_files())
+    return filename
+
+
+def convert_packed_file_to_directory(filename, state_machine_path=None):
+    """Converts a packed state machine file into a state machine directory
+
+    :param str filename: the path of the packed file
+    :param str state_machine_path: the path of the state machine directory, defaults to the path of the packed file
+        without extension
+    :return: the path of the state machine directory
+    :rtype: str
+    """
+    if state_machine_path is None:
+        state_machine_path = os.path.splitext(filename)[0]
+    with closing(zipfile.ZipFile(filename, 'r')) as zip_file:
+        zip_file.extractall(state_machine_path)
+    return state_machine_path
@@ -22,8 +22,17 @@ import math
 import shutil
 import glob
 import copy
+import hashlib
+import threading
+import weakref
 import yaml
 from distutils.version import StrictVersion
+from multiprocessing.pool import ThreadPool
+
+try:
+    from scandir import walk
+except ImportError:
+    from os import walk
 
 import rafcon
 
@@ -50,6 +59,7 @@ SCRIPT_FILE = 'script.py'
 SEMANTIC_DATA_FILE = 'semantic_data.json'
 STATEMACHINE_FILE = 'statemachine.json'
 STATEMACHINE_FILE_OLD = 'statemachine.yaml'
+PACKED_STATE_MACHINE_FILE_EXTENSION = '.rafcon'
 ID_NAME_DELIMITER = "_"
 
 REPLACED_CHARACTERS_FOR_NO_OS_LIMITATION = {'/': '', r'\0': '', '<': '', '>': '', ':': '_',
@@ -148,11 +158,19 @@ def save_state_machine_to_path(state_machine, base_path, delete_old_state_machin
     The `as_copy` flag determines whether the state machine is saved as copy. If so (`as_copy=True`), some state
     machine attributes will be left untouched, such as the `file_system_path` or the `dirty_flag`.
 
+    If the base path ends with PACKED_STATE_MACHINE_FILE_EXTENSION, the state machine is saved as packed state machine
+    file (see :mod:`rafcon.core.storage.packed_storage`).
+
     :param rafcon.core.state_machine.StateMachine state_machine: the state_machine to be saved
     :param str base_path: base_path to which all further relative paths refers to
     :param bool delete_old_state_machine: Whether to delete any state machine existing at the given path
     :param bool as_copy: Whether to use a copy storage for the state machine
     """
+    if base_path.endswith(PACKED_STATE_MACHINE_FILE_EXTENSION):
+        from rafcon.core.storage import packed_storage
+        packed_storage.save_state_machine_to_packed_file(state_machine, base_path, delete_old_state_machine, as_copy)
+        return
+
     # warns the user in the logger when using deprecated names
     clean_path_from_deprecated_naming(base_path)
 
@@ -236,10 +254,92 @@ def save_semantic_data_for_state(state, state_path_full):
         raise
 
 
+# The files written for each state are recorded per storage path, together with the modification stamp of the state
+# and the storage ids of its child states at that time. Thus, unmodified states do not have to be written again.
+_saved_states = weakref.WeakKeyDictionary()
+
+
+def _get_content_bytes(content):
+    return content.encode('utf-8') if isinstance(content, unicode) else content
+
+
+def _is_file_unchanged(file_path, file_record):
+    """Checks whether a file was neither modified nor removed since it was written by the storage
+
+    :param str file_path: the path of the file
+    :param tuple file_record: the content hash, size and modification time of the file, when it was written
+    :rtype: bool
+    """
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return False
+    return (file_stat.st_size, file_stat.st_mtime) == file_record[1:]
+
+
+def _write_file_if_changed(file_path, content, file_records):
+    """Writes a file, unless the same content was written (or loaded) before and the file was not changed since then
+
+    :param str file_path: the path of the file
+    :param str content: the content to be written
+    :param dict file_records: the records of the files written before for the state, updated by this function
+    :return: True if the file was written
+    :rtype: bool
+    """
+    content_bytes = _get_content_bytes(content)
+    content_hash = hashlib.md5(content_bytes).hexdigest()
+    file_record = file_records.get(file_path)
+    if file_record is not None and file_record[0] == content_hash:
+        if file_record[2] is not None:
+            if _is_file_unchanged(file_path, file_record):
+                return False
+        # the record was created when loading the file, thus only the size can be checked
+        elif os.path.isfile(file_path) and os.path.getsize(file_path) == len(content_bytes):
+            file_records[file_path] = (content_hash, len(content_bytes), os.path.getmtime(file_path))
+            return False
+    write_file(file_path, content)
+    file_stat = os.stat(file_path)
+    file_records[file_path] = (content_hash, file_stat.st_size, file_stat.st_mtime)
+    return True
+
+
+def _record_loaded_state_files(state, state_path, files):
+    """Records the content hashes of the files a state was loaded from
+
+    Thus, files whose content does not change are not written again, when the state is saved for the first time.
+
+    :param state: the loaded state
+    :param str state_path: the path of the state
+    :param dict files: the content of the loaded files by file name, files not existing or not loaded from their
+        content (e.g. from the library cache) are skipped
+    """
+    file_records = {}
+    for file_name, content in files.iteritems():
+        if isinstance(content, basestring):
+            file_records[os.path.join(state_path, file_name)] = \
+                (hashlib.md5(_get_content_bytes(content)).hexdigest(), None, None)
+    _saved_states.setdefault(state, {})[state_path] = (None, file_records, None)
+
+
+def _is_state_saved(state, state_path_full):
+    """Checks whether a state was not modified since it was saved to the given path
+
+    :param state: the state to check
+    :param str state_path_full: the path the state is saved to
+    :rtype: bool
+    """
+    saved_state = _saved_states.get(state, {}).get(state_path_full)
+    if saved_state is None or saved_state[0] != state.modification_stamp:
+        return False
+    return all(_is_file_unchanged(file_path, file_record) for file_path, file_record in saved_state[1].iteritems())
+
+
 def save_state_recursively(state, base_path, parent_path, as_copy=False):
     """Recursively saves a state to a json file
 
-    It calls this method on all its substates.
+    It calls this method on all its substates. The files of a state are only written, if the state was modified since
+    it was last saved to the same path (or if its files were changed on the file system in the meantime). Of modified
+    states, only the files with changed content are written.
 
     :param state: State to be stored
     :param base_path: Path to the state machine
@@ -252,40 +352,119 @@ def save_state_recursively(state, base_path, parent_path, as_copy=False):
 
     state_path = os.path.join(parent_path, get_storage_id_for_state(state))
     state_path_full = os.path.join(base_path, state_path)
-    if not os.path.exists(state_path_full):
-        os.makedirs(state_path_full)
-
-    storage_utils.write_dict_to_json(state, os.path.join(state_path_full, FILE_NAME_CORE_DATA))
     if not as_copy:
-        state.file_system_path = state_path_full
-
-    if isinstance(state, ExecutionState):
-        save_script_file_for_state_and_source_path(state, state_path_full, as_copy)
+        if state.file_system_path != state_path_full:
+            state.file_system_path = state_path_full
+        if isinstance(state, ExecutionState):
+            state.script.filename = SCRIPT_FILE
+            state.script.path = state_path_full
 
-    save_semantic_data_for_state(state, state_path_full)
+    saved_states = _saved_states.setdefault(state, {})
+    saved_state = saved_states.get(state_path_full)
+    if not _is_state_saved(state, state_path_full):
+        modification_stamp = state.modification_stamp
+        file_records = saved_state[1] if saved_state else {}
+        if not os.path.exists(state_path_full):
+            os.makedirs(state_path_full)
+
+        _write_file_if_changed(os.path.join(state_path_full, FILE_NAME_CORE_DATA),
+                               storage_utils.dump_objects_to_json_string(state), file_records)
+        if isinstance(state, ExecutionState):
+            try:
+                _write_file_if_changed(os.path.join(state_path_full, SCRIPT_FILE), state.script_text, file_records)
+            except Exception:
+                logger.exception("Storing of script file failed: {0} -> {1}".format(
+                    state.get_path(), os.path.join(state_path_full, SCRIPT_FILE)))
+                raise
+        try:
+            _write_file_if_changed(os.path.join(state_path_full, SEMANTIC_DATA_FILE),
+                                   storage_utils.dump_objects_to_json_string(state.semantic_data), file_records)
+        except IOError:
+            logger.exception("Storing of semantic data for state {0} failed! Destination path: {1}".format(
+                state.get_path(), os.path.join(state_path_full, SEMANTIC_DATA_FILE)))
+            raise
+        saved_state = (modification_stamp, file_records, saved_state[2] if saved_state else None)
 
     # create yaml files for all children
     if isinstance(state, ContainerState):
-        remove_obsolete_folders(state.states.values(), os.path.join(base_path, state_path))
-        for state in state.states.itervalues():
-            save_state_recursively(state, base_path, state_path, as_copy)
+        # folders only become obsolete, if the storage ids of the child states changed
+        child_storage_ids = frozenset(get_storage_id_for_state(child_state) for child_state in state.states.itervalues())
+        if child_storage_ids != saved_state[2]:
+            remove_obsolete_folders(state.states.values(), state_path_full)
+            saved_state = saved_state[:2] + (child_storage_ids, )
+        for child_state in state.states.itervalues():
+            save_state_recursively(child_state, base_path, state_path, as_copy)
+    saved_states[state_path_full] = saved_state
+
+
+def check_used_rafcon_version(state_machine_dict):
+    """Warns if a state machine was stored with a newer version of RAFCON than the one being used
+
+    :param dict state_machine_dict: the content of the state machine file
+    """
+    if 'used_rafcon_version' in state_machine_dict:
+        previously_used_rafcon_version = StrictVersion(state_machine_dict['used_rafcon_version']).version
+        active_rafcon_version = StrictVersion(rafcon.__version__).version
+
+        rafcon_newer_than_sm_version = "You are trying to load a state machine that was stored with an older " \
+                                       "version of RAFCON ({0}) than the one you are using ({1}).".format(
+                                        state_machine_dict['used_rafcon_version'], rafcon.__version__)
+        rafcon_older_than_sm_version = "You are trying to load a state machine that was stored with an newer " \
+                                       "version of RAFCON ({0}) than the one you are using ({1}).".format(
+                                        state_machine_dict['used_rafcon_version'], rafcon.__version__)
+        note_about_possible_incompatibility = "The state machine will be loaded with no guarantee of success."
+
+        if active_rafcon_version[0] > previously_used_rafcon_version[0]:
+            # this is the default case
+            # for a list of breaking changes please see: doc/breaking_changes.rst
+            # logger.warn(rafcon_newer_than_sm_version)
+            # logger.warn(note_about_possible_incompatibility)
+            pass
+        if active_rafcon_version[0] == previously_used_rafcon_version[0]:
+            if active_rafcon_version[1] > previously_used_rafcon_version[1]:
+                # this is the default case
+                # for a list of breaking changes please see: doc/breaking_changes.rst
+                # logger.info(rafcon_newer_than_sm_version)
+                # logger.info(note_about_possible_incompatibility)
+                pass
+            elif active_rafcon_version[1] == previously_used_rafcon_version[1]:
+                # Major and minor version of RAFCON and the state machine match
+                # It should be safe to load the state machine, as the patch level does not change the format
+                pass
+            else:
+                logger.warn(rafcon_older_than_sm_version)
+                logger.warn(note_about_possible_incompatibility)
+        else:
+            logger.warn(rafcon_older_than_sm_version)
+            logger.warn(note_about_possible_incompatibility)
 
 
 @measure_time
-def load_state_machine_from_path(base_path, state_machine_id=None):
+def load_state_machine_from_path(base_path, state_machine_id=None, number_of_threads=None):
     """Loads a state machine from the given path
 
+    If number_of_threads is greater than zero, the states are loaded by :func:`load_states_in_parallel`, otherwise by
+    :func:`load_state_recursively`. Both create the same state machine. The base path can also be a packed state
+    machine file (see :mod:`rafcon.core.storage.packed_storage`).
+
     :param base_path: An optional base path for the state machine.
+    :param int number_of_threads: the number of threads reading the state files, defaults to the
+        STORAGE_LOADER_THREADS value of the core config
     :return: a tuple of the loaded container state, the version of the state and the creation time
     :raises ValueError: if the provided path does not contain a valid state machine
     """
+    from rafcon.core.storage import packed_storage
     logger.debug("Loading state machine from path {0}...".format(base_path))
 
     state_machine_file_path = os.path.join(base_path, STATEMACHINE_FILE)
     state_machine_file_path_old = os.path.join(base_path, STATEMACHINE_FILE_OLD)
+    packed_file = None
+    if packed_storage.is_packed_state_machine_file(base_path):
+        packed_file = packed_storage.PackedStateMachineFile(base_path)
 
     # was the root state specified as state machine base_path to load from?
-    if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
+    if packed_file is None and not os.path.exists(state_machine_file_path) and \
+            not os.path.exists(state_machine_file_path_old):
 
         # catch the case that a state machine root file is handed
         if os.path.exists(base_path) and os.path.isfile(base_path):
@@ -296,43 +475,12 @@ def load_state_machine_from_path(base_path, state_machine_id=None):
         if not os.path.exists(state_machine_file_path) and not os.path.exists(state_machine_file_path_old):
             raise ValueError("Provided path doesn't contain a valid state machine: {0}".format(base_path))
 
-    if os.path.exists(state_machine_file_path):
-        state_machine_dict = storage_utils.load_objects_from_json(state_machine_file_path)
-        if 'used_rafcon_version' in state_machine_dict:
-            previously_used_rafcon_version = StrictVersion(state_machine_dict['used_rafcon_version']).version
-            active_rafcon_version = StrictVersion(rafcon.__version__).version
-
-            rafcon_newer_than_sm_version = "You are trying to load a state machine that was stored with an older " \
-                                           "version of RAFCON ({0}) than the one you are using ({1}).".format(
-                                            state_machine_dict['used_rafcon_version'], rafcon.__version__)
-            rafcon_older_than_sm_version = "You are trying to load a state machine that was stored with an newer " \
-                                           "version of RAFCON ({0}) than the one you are using ({1}).".format(
-                                            state_machine_dict['used_rafcon_version'], rafcon.__version__)
-            note_about_possible_incompatibility = "The state machine will be loaded with no guarantee of success."
-
-            if active_rafcon_version[0] > previously_used_rafcon_version[0]:
-                # this is the default case
-                # for a list of breaking changes please see: doc/breaking_changes.rst
-                # logger.warn(rafcon_newer_than_sm_version)
-                # logger.warn(note_about_possible_incompatibility)
-                pass
-            if active_rafcon_version[0] == previously_used_rafcon_version[0]:
-                if active_rafcon_version[1] > previously_used_rafcon_version[1]:
-                    # this is the default case
-                    # for a list of breaking changes please see: doc/breaking_changes.rst
-                    # logger.info(rafcon_newer_than_sm_version)
-                    # logger.info(note_about_possible_incompatibility)
-                    pass
-                elif active_rafcon_version[1] == previously_used_rafcon_version[1]:
-                    # Major and minor version of RAFCON and the state machine match
-                    # It should be safe to load the state machine, as the patch level does not change the format
-                    pass
-                else:
-                    logger.warn(rafcon_older_than_sm_version)
-                    logger.warn(note_about_possible_incompatibility)
-            else:
-                logger.warn(rafcon_older_than_sm_version)
-                logger.warn(note_about_possible_incompatibility)
+    if packed_file is not None or os.path.exists(state_machine_file_path):
+        if packed_file is not None:
+            state_machine_dict = packed_file.get_state_machine_dict()
+        else:
+            state_machine_dict = storage_utils.load_objects_from_json(state_machine_file_path)
+        check_used_rafcon_version(state_machine_dict)
 
         state_machine = StateMachine.from_dict(state_machine_dict, state_machine_id)
         if "root_state_storage_id" not in state_machine_dict:
@@ -363,8 +511,21 @@ def load_state_machine_from_path(base_path, state_machine_id=None):
     root_state_path = os.path.join(base_path, root_state_storage_id)
     state_machine.file_system_path = base_path
     dirty_states = []
-    state_machine.root_state = load_state_recursively(parent=state_machine, state_path=root_state_path,
-                                                      dirty_states=dirty_states)
+    if number_of_threads is None:
+        number_of_threads = global_config.get_config_value("STORAGE_LOADER_THREADS", 0)
+    if packed_file is not None:
+        try:
+            state_machine.root_state = packed_file.load_state(root_state_storage_id, parent=state_machine,
+                                                              dirty_states=dirty_states)
+        finally:
+            packed_file.close()
+    elif number_of_threads > 0:
+        state_machine.root_state = load_states_in_parallel(parent=state_machine, state_path=root_state_path,
+                                                           dirty_states=dirty_states,
+                                                           number_of_threads=number_of_threads)
+    else:
+        state_machine.root_state = load_state_recursively(parent=state_machine, state_path=root_state_path,
+                                                          dirty_states=dirty_states)
     if len(dirty_states) > 0:
         state_machine.marked_dirty = True
     else:
@@ -412,7 +573,10 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
         path_core_data = os.path.join(state_path, FILE_NAME_CORE_DATA_OLD)
 
     try:
-        state_info = load_data_file(path_core_data)
+        core_data = read_file(path_core_data)
+        if core_data is None:
+            raise ValueError("Data file not found: {0}".format(path_core_data))
+        state_info = storage_utils.load_objects_from_json_string(core_data)
     except ValueError, e:
         logger.exception("Error while loading state data: {0}".format(e))
         return
@@ -446,14 +610,17 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
         state.parent = parent
 
     # read script file if an execution state
+    script_text = None
     if isinstance(state, ExecutionState):
         script_text = read_file(state_path, state.script.filename)
         state.script_text = script_text
+        if state.script.filename != SCRIPT_FILE:
+            script_text = None
 
     # load semantic data
+    semantic_data = read_file(state_path, SEMANTIC_DATA_FILE)
     try:
-        semantic_data = load_data_file(os.path.join(state_path, SEMANTIC_DATA_FILE))
-        state.semantic_data = semantic_data
+        state.semantic_data = storage_utils.load_objects_from_json_string(semantic_data)
     except Exception, e:
         # semantic data file does not have to be there
         pass
@@ -478,6 +645,8 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
             state.data_flows = data_flows
 
     state.file_system_path = state_path
+    _record_loaded_state_files(state, state_path, {FILE_NAME_CORE_DATA: core_data, SCRIPT_FILE: script_text,
+                                                   SEMANTIC_DATA_FILE: semantic_data})
 
     if state.marked_dirty:
         dirty_states.append(state)
@@ -485,6 +654,188 @@ def load_state_recursively(parent, state_path=None, dirty_states=[]):
     return state
 
 
+_loader_pools = {}
+_loader_pools_lock = threading.Lock()
+
+
+def _get_loader_pool(number_of_threads):
+    """Returns the thread pool used by :func:`load_states_in_parallel`
+
+    The pools are kept, as libraries are loaded by nested calls of the loader. The workers of the pool only read
+    files and never wait for other tasks, thus nested calls cannot block each other.
+
+    :param int number_of_threads: the number of threads of the pool
+    :rtype: multiprocessing.pool.ThreadPool
+    """
+    with _loader_pools_lock:
+        if number_of_threads not in _loader_pools:
+            _loader_pools[number_of_threads] = ThreadPool(number_of_threads)
+        return _loader_pools[number_of_threads]
+
+
+def _discover_state_directories(state_path):
+    """Collects the directories of a state and all its child states with a single walk
+
+    Parent directories are listed before the directories of their children.
+
+    :param str state_path: the path of the (root) state
+    :return: tuples of the directory path and the names of the files in the directory
+    :rtype: list
+    """
+    return [(dir_path, frozenset(file_names)) for dir_path, _, file_names in walk(state_path, followlinks=True)]
+
+
+def _read_state_files(state_directory):
+    """Reads the core data, script and semantic data file of a state
+
+    The function is run by the worker threads of the loader and therefore only reads the files, the states are
+    created in the calling thread.
+
+    :param tuple state_directory: the path of the state directory and the names of the files within
+    :return: the path of the state and the content of the core data, script and semantic data file (or None if a file
+        does not exist)
+    :rtype: tuple
+    """
+    state_path, file_names = state_directory
+
+    def read(file_name):
+        if file_name not in file_names:
+            return None
+        with open(os.path.join(state_path, file_name), 'r') as file_pointer:
+            return file_pointer.read()
+
+    # TODO: FILE_NAME_CORE_DATA_OLD should be removed with next minor release
+    core_data_file_name = FILE_NAME_CORE_DATA if FILE_NAME_CORE_DATA in file_names else FILE_NAME_CORE_DATA_OLD
+    return state_path, read(core_data_file_name), read(SCRIPT_FILE), read(SEMANTIC_DATA_FILE)
+
+
+def load_states_in_parallel(parent, state_path, dirty_states, number_of_threads=8):
+    """Loads a state and all its child states using a pool of threads reading the state files
+
+    First, all state directories are discovered with a single walk through the file system. Afterwards, the files of
+    the states are read by the thread pool, while the states are created in the calling thread in the order of the
+    discovered directories. Finally, the transitions and data flows of all container states are added in one pass.
+    The result is the same as of :func:`load_state_recursively`.
+
+    :param parent: the state machine or state to which the loaded state is added
+    :param str state_path: the path of the (root) state on the file system
+    :param list dirty_states: a list to which the states are added, which changed during loading
+    :param int number_of_threads: the number of threads reading the state files
+    :return: the loaded state
+    """
+    logger.debug("Load states in parallel: {0}".format(str(state_path)))
+
+    state_directories = _discover_state_directories(state_path)
+    pool = _get_loader_pool(number_of_threads)
+    return create_states_from_files(parent, state_path, pool.imap(_read_state_files, state_directories),
+                                    dirty_states)
+
+
+def create_states_from_files(parent, state_path, state_files, dirty_states, read_state_file=read_file,
+                             load_objects=storage_utils.load_objects_from_json_string):
+    """Creates a state and all its child states from the content of their files
+
+    The transitions and data flows of all container states are added in one pass after all states were created.
+
+    :param parent: the state machine or state to which the created state is added
+    :param str state_path: the path of the (root) state
+    :param state_files: an iterable of tuples of the path of a state and the content of its core data, script and
+        semantic data file (or None if a file does not exist), parent states have to be listed before their children
+    :param list dirty_states: a list to which the states are added, which changed during loading
+    :param read_state_file: a function reading a file given the path of the state and the file name, used for script
+        files not named SCRIPT_FILE
+    :param load_objects: a function creating the objects of the core data and semantic data, by default the content
+        of the files is expected and parsed as json
+    :return: the created state
+    """
+    from rafcon.core.states.execution_state import ExecutionState
+    from rafcon.core.states.container_state import ContainerState
+    from rafcon.core.states.hierarchy_state import HierarchyState
+
+    loaded_states = {}
+    # the children of states, which could not be loaded, are skipped
+    skipped_state_paths = set()
+    # the transitions and data flows are not added to container states with a missing library child state
+    incomplete_state_paths = set()
+    linkages = []
+
+    for state_path_full, core_data, script_text, semantic_data in state_files:
+        parent_path = os.path.dirname(state_path_full)
+        if state_path_full == state_path:
+            state_parent = parent
+        elif parent_path in skipped_state_paths:
+            skipped_state_paths.add(state_path_full)
+            continue
+        else:
+            state_parent = loaded_states[parent_path]
+
+        try:
+            if core_data is None:
+                raise ValueError("Data file not found: {0}".format(os.path.join(state_path_full, FILE_NAME_CORE_DATA)))
+            state_info = load_objects(core_data)
+        except ValueError, e:
+            logger.exception("Error while loading state data: {0}".format(e))
+            skipped_state_paths.add(state_path_full)
+            continue
+        except LibraryNotFoundException, e:
+            logger.error("Library could not be loaded: {0}\n"
+                         "Skipping library and continuing loading the state machine".format(str(e.message)))
+            state_id = load_objects(core_data, as_dict=True)["state_id"]
+            dummy_state = HierarchyState(LIBRARY_NOT_FOUND_DUMMY_STATE_NAME, state_id=state_id)
+            if isinstance(state_parent, ContainerState):
+                state_parent.add_state(dummy_state, storage_load=True)
+            else:
+                dummy_state.parent = state_parent
+            loaded_states[state_path_full] = dummy_state
+            skipped_state_paths.add(state_path_full)
+            incomplete_state_paths.add(parent_path)
+            continue
+
+        if not isinstance(state_info, tuple):
+            state = state_info
+        else:
+            state = state_info[0]
+            linkages.append((state_path_full, state, state_info[1], state_info[2]))
+
+        if state_parent is not None and isinstance(state_parent, ContainerState):
+            state_parent.add_state(state, storage_load=True)
+        else:
+            state.parent = state_parent
+
+        if isinstance(state, ExecutionState):
+            if state.script.filename != SCRIPT_FILE:
+                state.script_text = read_state_file(state_path_full, state.script.filename)
+                script_text = None
+            else:
+                state.script_text = script_text
+
+        if semantic_data is not None:
+            try:
+                state.semantic_data = load_objects(semantic_data)
+            except Exception:
+                pass
+
+        loaded_states[state_path_full] = state
+        _record_loaded_state_files(state, state_path_full, {FILE_NAME_CORE_DATA: core_data, SCRIPT_FILE: script_text,
+                                                            SEMANTIC_DATA_FILE: semantic_data})
+
+    # Now the transitions and data flows can be added, as all child states were added. Like the recursive loader,
+    # the linkage of child states is added before the one of their parents.
+    for state_path_full, state, transitions, data_flows in reversed(linkages):
+        if state_path_full not in incomplete_state_paths:
+            state.transitions = transitions
+            state.data_flows = data_flows
+
+    for state_path_full, state in loaded_states.iteritems():
+        if state.name is LIBRARY_NOT_FOUND_DUMMY_STATE_NAME:
+            continue
+        state.file_system_path = state_path_full
+        if state.marked_dirty:
+            dirty_states.append(state)
+
+    return loaded_states.get(state_path)
+
+
 def load_data_file(path_of_file):
     """ Loads the content of a file by using json.load.
 
@@ -396,12 +396,17 @@ class ExecutionHistoryTreeController(ExtendedController):
                     else:
                         pass  # there was only the Start item in the history
                 else:
+                    description = first_history_item.state_reference.name + " - Run " + str(execution_number + 1)
+                    if execution_history.truncated:
+                        # older items were discarded due to the retention policy of the execution history
+                        description += " ({0} older items discarded)".format(
+                            execution_history.number_of_discarded_items)
                     tree_item = self.history_tree_store.insert_after(
                         None,
                         None,
-                        (first_history_item.state_reference.name + " - Run " + str(execution_number + 1),
-                         first_history_item, self.TOOL_TIP_TEXT))
-                    self.insert_execution_history(tree_item, execution_history, is_root=True)
+                        (description, first_history_item, self.TOOL_TIP_TEXT))
+                    self.insert_execution_history(tree_item, execution_history, is_root=True,
+                                                  truncated=execution_history.truncated)
 
         self._restore_expansion_state()
         self._update_lock.release()
@@ -435,7 +440,7 @@ class ExecutionHistoryTreeController(ExtendedController):
             parent, None, content)
         return tree_item
 
-    def insert_execution_history(self, parent, execution_history, is_root=False):
+    def insert_execution_history(self, parent, execution_history, is_root=False, truncated=False):
         """Insert a list of history items into a the tree store
 
         If there are concurrency history items, the method is called recursively.
@@ -443,6 +448,8 @@ class ExecutionHistoryTreeController(ExtendedController):
         :param gtk.TreeItem parent: the parent to add the next history item to
         :param ExecutionHistory execution_history: all history items of a certain state machine execution
         :param bool is_root: Whether this is the root execution history
+        :param bool truncated: Whether older items of the execution history were discarded, in this case the calls
+            matching the first returns are missing
         """
         current_parent = parent
         execution_history_iterator = iter(execution_history)
@@ -474,6 +481,8 @@ class ExecutionHistoryTreeController(ExtendedController):
                 else:  # CONTAINER
                     self.insert_history_item(current_parent, history_item, "Exit")
                     current_parent = self.history_tree_store.iter_parent(current_parent)
+                    if current_parent is None and truncated:
+                        current_parent = parent
 
             is_root = False
 
@@ -490,4 +499,4 @@ class ExecutionHistoryTreeController(ExtendedController):
                 # this is just a dummy item to have an extra parent for each branch
                 # gives better overview in case that one of the child state is a simple execution state
                 tree_item = self.insert_history_item(parent, first_history_item, "Concurrency Branch", dummy=True)
-                self.insert_execution_history(tree_item, execution_history)
+                self.insert_execution_history(tree_item, execution_history, truncated=execution_history.truncated)
@@ -11,9 +11,9 @@
 # example basictreeview.py
 
 import gtk
-import shelve
 
 import rafcon.utils.execution_log as log_helper
+from rafcon.core.execution.execution_log_storage import open_execution_log
 from rafcon.gui.controllers.utils.extended_controller import ExtendedController
 
 from rafcon.utils import log
@@ -31,7 +31,7 @@ class ExecutionLogTreeController(ExtendedController):
         super(ExecutionLogTreeController, self).__init__(model, view)
 
         self.run_id_to_select = run_id_to_select
-        self.hist_items = shelve.open(filename, 'r')
+        self.hist_items = open_execution_log(filename)
         self.start, self.next_, self.concurrent, self.hierarchy, self.items = \
             log_helper.log_to_collapsed_structure(self.hist_items,
                                                   throw_on_pickle_error=False,
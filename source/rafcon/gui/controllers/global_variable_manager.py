@@ -297,7 +297,7 @@ class GlobalVariableManagerController(ListViewController):
                 gv_row_path = self.list_store.get_path(self.list_store_iterators[key])
                 self.list_store[gv_row_path][self.IS_LOCKED_AS_STRING_STORAGE_ID] = \
                     self.model.global_variable_manager.is_locked(key)
-        elif info['method_name'] in ['set_variable', 'delete_variable']:
+        elif info['method_name'] in ['set_variable', 'set_variables', 'delete_variable']:
             if info['method_name'] == 'set_variable':
                 key = info.kwargs.get('key', info.args[1]) if len(info.args) > 1 else info.kwargs['key']
                 if key in self.list_store_iterators:
@@ -31,7 +31,7 @@ from rafcon.core.states.container_state import ContainerState
 from rafcon.core.states.hierarchy_state import HierarchyState
 from rafcon.core.states.library_state import LibraryState
 from rafcon.core.states.state import State, StateType
-from rafcon.core.storage import storage
+from rafcon.core.storage import storage, packed_storage
 import rafcon.core.config
 
 from rafcon.gui.helpers.text_formatting import format_default_folder_name
@@ -79,6 +79,18 @@ def new_state_machine():
     editor_controller.view.editor.grab_focus()
 
 
+def is_packed_state_machine_path(path):
+    """Checks whether the given path is (or would be) a packed state machine file
+
+    Packed state machine files cannot be edited with the GUI, yet, as the meta data of the GUI cannot be stored in them.
+
+    :param str path: file system path to the state machine
+    :rtype: bool
+    """
+    return path.endswith(storage.PACKED_STATE_MACHINE_FILE_EXTENSION) or \
+        packed_storage.is_packed_state_machine_file(path)
+
+
 def open_state_machine(path=None, recent_opened_notification=False):
     """ Open a state machine from respective file system path
 
@@ -99,6 +111,12 @@ def open_state_machine(path=None, recent_opened_notification=False):
     else:
         load_path = path
 
+    if is_packed_state_machine_path(load_path):
+        logger.error("The packed state machine file {0} cannot be opened in the GUI, as its meta data cannot be "
+                     "stored. Convert it to a state machine folder using "
+                     "rafcon.core.storage.packed_storage.convert_packed_file_to_directory.".format(load_path))
+        return
+
     if state_machine_manager.is_state_machine_open(load_path):
         logger.info("State machine already open. Select state machine instance from path {0}.".format(load_path))
         sm = state_machine_manager.get_open_state_machine_of_file_system_path(load_path)
@@ -211,6 +229,10 @@ def save_state_machine(delete_old_state_machine=False, recent_opened_notificatio
 
     state_machine_m = state_machine_manager_model.get_selected_state_machine_model()
     sm_path = state_machine_m.state_machine.file_system_path
+    if is_packed_state_machine_path(copy_path if as_copy else sm_path):
+        logger.error("The GUI cannot save state machines as packed state machine files, as their meta data cannot be "
+                     "stored in them. Please choose a folder.")
+        return False
 
     storage.save_state_machine_to_path(state_machine_m.state_machine, copy_path if as_copy else sm_path,
                                        delete_old_state_machine=delete_old_state_machine, as_copy=as_copy)
@@ -253,6 +275,11 @@ def save_state_machine_as(path=None, recent_opened_notification=False, as_copy=F
             logger.warning("No valid path specified")
             return False
 
+    if is_packed_state_machine_path(path):
+        logger.error("The GUI cannot save state machines as packed state machine files, as their meta data cannot be "
+                     "stored in them. Please choose a folder.")
+        return False
+
     previous_path = selected_state_machine_model.state_machine.file_system_path
     if not as_copy:
         marked_dirty = selected_state_machine_model.state_machine.marked_dirty
@@ -25,7 +25,9 @@ import os
 import stat
 
 TEMP_PATH = tempfile.gettempdir()
-RAFCON_TEMP_PATH_BASE = os.path.join(TEMP_PATH, 'rafcon-{0}'.format(getpass.getuser()), str(os.getpid()))
+# shared by all RAFCON processes of the user
+RAFCON_TEMP_PATH_USER = os.path.join(TEMP_PATH, 'rafcon-{0}'.format(getpass.getuser()))
+RAFCON_TEMP_PATH_BASE = os.path.join(RAFCON_TEMP_PATH_USER, str(os.getpid()))
 
 # check if the given temp-folder is read and writable
 if not (bool(os.stat(TEMP_PATH).st_mode & stat.S_IRUSR) and bool(os.stat(TEMP_PATH).st_mode & stat.S_IWUSR) or
@@ -13,15 +13,162 @@
 import shelve
 import json
 import pickle
+from contextlib import closing
+
+from rafcon.core.execution.execution_log_storage import ExecutionLogReader, open_execution_log, \
+    convert_shelve_to_execution_log
 
 from rafcon.utils import log
 logger = log.get_logger(__name__)
 
 
+_START_ITEM_KEYS = ['description', 'path_by_name', 'state_name', 'run_id', 'state_type', 'path', 'timestamp',
+                    'root_state_storage_id', 'state_machine_version', 'used_rafcon_version', 'creation_time',
+                    'last_update', 'os_environment']
+_EXECUTION_ITEM_KEYS = ['description', 'path_by_name', 'state_name', 'run_id', 'state_type', 'path']
+## extended properties (added in later rafcon versions) with the default values used if not existing
+_EXTENDED_KEYS = [('semantic_data', {}),
+                  ('is_library', None),
+                  ('library_state_name', None),
+                  ('library_name', None),
+                  ('library_path', None)]
+
+
+def _is_collapsed_state_type(state_type):
+    return state_type in ('ExecutionState', 'HierarchyState', 'LibraryState') or 'Concurrency' in state_type
+
+
+def _find_item(items, item_type, call_type):
+    """Returns the first item of the given item and call type or None"""
+    return next((item for item in items if item['item_type'] == item_type and item['call_type'] == call_type), None)
+
+
+def _create_dummy_call_item():
+    ## create dummy call item with the properties referenced when collapsing the items
+    return dict(description=None,
+                history_item_id=None,
+                path_by_name=None,
+                state_name=None,
+                run_id=None,
+                state_type=None,
+                path=None,
+                timestamp=None,
+                input_output_data={},
+                scoped_data={})
+
+
+def _create_dummy_return_item():
+    ## create dummy return item with the properties referenced when collapsing the items
+    return dict(history_item_id=None,
+                outcome_name=None,
+                outcome_id=None,
+                timestamp=None,
+                input_output_data={},
+                scoped_data={})
+
+
+def _restore_state_data(item, execution_history_items, state_data):
+    """Adds the semantic data and the description of the state to a history item
+
+    Newer logs only store the semantic data and the description in the first history item of each state. All
+    history items of the state refer to that item by the key 'state_data_item_id'.
+
+    :param dict item: the history item
+    :param dict execution_history_items: all history items, used to look up the referenced history item
+    :param dict state_data: a cache mapping the ids of the referenced history items to the semantic data and the
+           description; only contains one entry per state
+    :return: the history item including 'semantic_data' and 'description'
+    :rtype: dict
+    """
+    state_data_item_id = item.get('state_data_item_id')
+    if state_data_item_id is None:  # older logs contain the data in every history item
+        return item
+    if state_data_item_id == item['history_item_id']:
+        state_data[state_data_item_id] = (item.get('semantic_data', {}), item.get('description'))
+        return item
+    if state_data_item_id not in state_data:
+        try:
+            referenced_item = execution_history_items[state_data_item_id]
+            state_data[state_data_item_id] = (referenced_item.get('semantic_data', {}),
+                                              referenced_item.get('description'))
+        except KeyError:
+            logger.warn('HistoryItem is referring to a non-existing history item holding the state data, '
+                        'HistoryItem was %s' % str(item))
+            state_data[state_data_item_id] = ({}, None)
+    item = dict(item)
+    item['semantic_data'], item['description'] = state_data[state_data_item_id]
+    return item
+
+
+def _unpickle_data(data_dict, throw_on_pickle_error, include_erroneous_data_ports):
+    r = dict()
+    # support backward compatibility
+    if isinstance(data_dict, basestring):  # formerly data dict was a json string
+        r = json.loads(data_dict)
+    else:
+        for k, v in data_dict.iteritems():
+            if not k.startswith('!'):  # ! indicates storage error
+                try:
+                    r[k] = pickle.loads(v)
+                except Exception as e:
+                    if throw_on_pickle_error:
+                        raise
+                    elif include_erroneous_data_ports:
+                        r['!' + k] = (str(e), v)
+                    else:
+                        pass  # ignore
+            elif include_erroneous_data_ports:
+                r[k] = v
+
+    return r
+
+
+def _collapse_start_item(item):
+    """Creates the collapsed representation of the StateMachineStartItem"""
+    execution_item = {}
+    ## add base properties will throw if not existing
+    for l in _START_ITEM_KEYS:
+        try:
+            execution_item[l] = item[l]
+        except KeyError:
+            logger.warn("Key {} not in history start item".format(str(l)))
+    for l, default in _EXTENDED_KEYS:
+        execution_item[l] = item.get(l, default)
+    return execution_item
+
+
+def _collapse_execution(call_item, return_item, throw_on_pickle_error, include_erroneous_data_ports):
+    """Creates the collapsed representation of a state execution from its call and return item"""
+    execution_item = {}
+    ## add base properties will throw if not existing
+    for l in _EXECUTION_ITEM_KEYS:
+        execution_item[l] = call_item[l]
+    for l, default in _EXTENDED_KEYS:
+        execution_item[l] = call_item.get(l, default)
+
+    for l in ['outcome_name', 'outcome_id']:
+        execution_item[l] = return_item[l]
+    for l in ['timestamp']:
+        execution_item[l+'_call'] = call_item[l]
+        execution_item[l+'_return'] = return_item[l]
+
+    execution_item['data_ins'] = _unpickle_data(call_item['input_output_data'], throw_on_pickle_error,
+                                                include_erroneous_data_ports)
+    execution_item['data_outs'] = _unpickle_data(return_item['input_output_data'], throw_on_pickle_error,
+                                                 include_erroneous_data_ports)
+    execution_item['scoped_data_ins'] = _unpickle_data(call_item['scoped_data'], throw_on_pickle_error,
+                                                       include_erroneous_data_ports)
+    execution_item['scoped_data_outs'] = _unpickle_data(return_item['scoped_data'], throw_on_pickle_error,
+                                                        include_erroneous_data_ports)
+    return execution_item
+
+
 def log_to_raw_structure(execution_history_items):
     """
     :param dict execution_history_items: history items, in the simplest case
-           directly the opened shelve log file
+           directly the opened shelve log file or binary log file (see
+           :func:`rafcon.core.execution.execution_log_storage.open_execution_log`). Alternatively, the path of
+           a log file of either format.
     :return: start_item, the StateMachineStartItem of the log file
              previous, a dict mapping history_item_id --> history_item_id of previous history item
              next_, a dict mapping history_item_id --> history_item_id of the next history item (except if
@@ -31,13 +178,19 @@ def log_to_raw_structure(execution_history_items):
              grouped, a dict mapping run_id --> []list of history items with this run_id
     :rtype: tuple
     """
+    if isinstance(execution_history_items, basestring):
+        with closing(open_execution_log(execution_history_items)) as opened_execution_history_items:
+            return log_to_raw_structure(opened_execution_history_items)
+
     previous = {}
     next_ = {}
     concurrent = {}
     grouped_by_run_id = {}
     start_item = None
+    state_data = {}
 
     for k,v in execution_history_items.items():
+        v = _restore_state_data(v, execution_history_items, state_data)
         if v['item_type'] == 'StateMachineStartItem':
             start_item = v
         else:
@@ -81,7 +234,8 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
     The collapsed items hold input as well as output data (direct and scoped), and the outcome
     the state execution.
     :param dict execution_history_items: history items, in the simplest case
-           directly the opened shelve log file
+           directly the opened shelve log file or binary log file. Alternatively, the path of a log file of
+           either format.
     :param bool throw_on_pickle_error: flag if an error is thrown if an object cannot be un-pickled
     :param bool include_erroneous_data_ports: flag if to include erroneous data ports
     :param bool full_next: flag to indicate if the next relationship has also to be created at the end
@@ -98,6 +252,11 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
     :rtype: tuple
     """
 
+    if isinstance(execution_history_items, basestring):
+        with closing(open_execution_log(execution_history_items)) as opened_execution_history_items:
+            return log_to_collapsed_structure(opened_execution_history_items, throw_on_pickle_error,
+                                              include_erroneous_data_ports, full_next)
+
     # for debugging purposes
     # execution_history_items_dict = dict()
     # for k, v in execution_history_items.items():
@@ -115,60 +274,18 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
     if len(next_) == 0 or len(next_) == 1:
         for rid, gitems in grouped.items():
             if gitems[0]['item_type'] == 'StateMachineStartItem':
-                item = gitems[0]
-                execution_item = {}
-                ## add base properties will throw if not existing
-                for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type',
-                          'path', 'timestamp', 'root_state_storage_id', 'state_machine_version',
-                          'used_rafcon_version', 'creation_time', 'last_update', 'os_environment']:
-                    try:
-                        execution_item[l] = item[l]
-                    except KeyError:
-                        logger.warn("Key {} not in history start item".format(str(l)))
-
-                ## add extended properties (added in later rafcon versions),
-                ## will add default value if not existing instead
-                for l, default in [('semantic_data', {}),
-                                     ('is_library', None),
-                                     ('library_state_name', None),
-                                     ('library_name', None),
-                                     ('library_path', None)]:
-                    execution_item[l] = item.get(l, default)
-
-                start_item = execution_item
+                start_item = _collapse_start_item(gitems[0])
         return start_item, collapsed_next, collapsed_concurrent, collapsed_hierarchy, collapsed_items
 
     # build collapsed items
     for rid, gitems in grouped.items():
         if gitems[0]['item_type'] == 'StateMachineStartItem':
-            item = gitems[0]
-            execution_item = {}
-            ## add base properties will throw if not existing
-            for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type',
-                      'path', 'timestamp', 'root_state_storage_id', 'state_machine_version',
-                      'used_rafcon_version', 'creation_time', 'last_update', 'os_environment']:
-                try:
-                    execution_item[l] = item[l]
-                except KeyError:
-                    logger.warn("Key {} not in history start item".format(str(l)))
-
-            ## add extended properties (added in later rafcon versions),
-            ## will add default value if not existing instead
-            for l, default in [('semantic_data', {}),
-                                 ('is_library', None),
-                                 ('library_state_name', None),
-                                 ('library_name', None),
-                                 ('library_path', None)]:
-                execution_item[l] = item.get(l, default)
-
+            execution_item = _collapse_start_item(gitems[0])
             start_item = execution_item
 
             collapsed_next[rid] = execution_history_items[next_[gitems[0]['history_item_id']]]['run_id']
             collapsed_items[rid] = execution_item
-        elif gitems[0]['state_type'] == 'ExecutionState' or \
-             gitems[0]['state_type'] == 'HierarchyState' or \
-             gitems[0]['state_type'] == 'LibraryState' or \
-             'Concurrency' in gitems[0]['state_type']:
+        elif _is_collapsed_state_type(gitems[0]['state_type']):
 
             # for item in gitems:
             #     if item["description"] is not None:
@@ -176,49 +293,17 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
             #     print item["description"]
 
             # select call and return items for this state
-            try:
-                call_item = gitems[[gitems[i]['item_type'] == 'CallItem' and \
-                                    gitems[i]['call_type'] == 'EXECUTE' \
-                                    for i in range(len(gitems))].index(True)]
-            except ValueError:
-                # fall back to container call, should only happen for root state
-                try:
-                    call_item = gitems[[gitems[i]['item_type'] == 'CallItem' and \
-                                        gitems[i]['call_type'] == 'CONTAINER' \
-                                        for i in range(len(gitems))].index(True)]
-                except ValueError:
-                    logger.warn('Could not find a CallItem in run_id group %s\nThere will probably be log information missing on this execution branch!' % str(rid))
-                    ## create dummy returnitem with the properties referenced later in this code
-                    call_item = dict(description=None,
-                                     history_item_id=None,
-                                     path_by_name=None,
-                                     state_name=None,
-                                     run_id=None,
-                                     state_type=None,
-                                     path=None,
-                                     timestamp=None,
-                                     input_output_data={},
-                                     scoped_data={})
-
-            try:
-                return_item = gitems[[gitems[i]['item_type'] == 'ReturnItem' and \
-                                      gitems[i]['call_type'] == 'EXECUTE' \
-                                      for i in range(len(gitems))].index(True)]
-            except ValueError:
-                # fall back to container call, should only happen for root state
-                try:
-                    return_item = gitems[[gitems[i]['item_type'] == 'ReturnItem' and \
-                                          gitems[i]['call_type'] == 'CONTAINER' \
-                                          for i in range(len(gitems))].index(True)]
-                except ValueError:
-                    logger.warn('Could not find a ReturnItem in run_id group %s\nThere will probably be log information missing on this execution branch!' % str(rid))
-                    ## create dummy returnitem with the properties referenced later in this code
-                    return_item = dict(history_item_id=None,
-                                       outcome_name=None,
-                                       outcome_id=None,
-                                       timestamp=None,
-                                       input_output_data={},
-                                       scoped_data={})
+            # fall back to container call, should only happen for root state
+            call_item = _find_item(gitems, 'CallItem', 'EXECUTE') or _find_item(gitems, 'CallItem', 'CONTAINER')
+            if call_item is None:
+                logger.warn('Could not find a CallItem in run_id group %s\nThere will probably be log information missing on this execution branch!' % str(rid))
+                call_item = _create_dummy_call_item()
+
+            return_item = _find_item(gitems, 'ReturnItem', 'EXECUTE') or \
+                _find_item(gitems, 'ReturnItem', 'CONTAINER')
+            if return_item is None:
+                logger.warn('Could not find a ReturnItem in run_id group %s\nThere will probably be log information missing on this execution branch!' % str(rid))
+                return_item = _create_dummy_return_item()
 
             # next item (on same hierarchy level) is always after return item
             if return_item['history_item_id'] in next_:
@@ -245,59 +330,144 @@ def log_to_collapsed_structure(execution_history_items, throw_on_pickle_error=Tr
                     else:
                         collapsed_concurrent[prev_rid] = [rid]
 
-            # assemble grouped item
-            execution_item = {}
-            ## add base properties will throw if not existing
-            for l in ['description', 'path_by_name', 'state_name', 'run_id', 'state_type', 'path']:
-                execution_item[l] = call_item[l]
-
-            ## add extended properties (added in later rafcon versions),
-            ## will add default value if not existing instead
-            for l, default in [('semantic_data', {}),
-                                 ('is_library', None),
-                                 ('library_state_name', None),
-                                 ('library_name', None),
-                                 ('library_path', None)]:
-                execution_item[l] = call_item.get(l, default)
-
-            for l in ['outcome_name', 'outcome_id']:
-                execution_item[l] = return_item[l]
-            for l in ['timestamp']:
-                execution_item[l+'_call'] = call_item[l]
-                execution_item[l+'_return'] = return_item[l]
-
-            def unpickle_data(data_dict):
-                r = dict()
-                # support backward compatibility
-                if isinstance(data_dict, basestring):  # formerly data dict was a json string
-                    r = json.loads(data_dict)
-                else:
-                    for k, v in data_dict.iteritems():
-                        if not k.startswith('!'): # ! indicates storage error
-                            try:
-                                r[k] = pickle.loads(v)
-                            except Exception as e:
-                                if throw_on_pickle_error:
-                                    raise
-                                elif include_erroneous_data_ports:
-                                    r['!' + k] = (str(e), v)
-                                else:
-                                    pass # ignore
-                        elif include_erroneous_data_ports:
-                            r[k] = v
-
-                return r
-
-            execution_item['data_ins'] = unpickle_data(call_item['input_output_data'])
-            execution_item['data_outs'] = unpickle_data(return_item['input_output_data'])
-            execution_item['scoped_data_ins'] = unpickle_data(call_item['scoped_data'])
-            execution_item['scoped_data_outs'] = unpickle_data(return_item['scoped_data'])
-
-            collapsed_items[rid] = execution_item
+            collapsed_items[rid] = _collapse_execution(call_item, return_item, throw_on_pickle_error,
+                                                       include_erroneous_data_ports)
 
     return start_item, collapsed_next, collapsed_concurrent, collapsed_hierarchy, collapsed_items
 
 
+def _iter_in_execution_order(execution_history_items):
+    """Iterates over the history items in the order they were written
+
+    Binary log files are read sequentially. For all other dict-like objects (e.g. shelve log files), the keys are
+    sorted, as the history item ids contain a zero-padded counter.
+    """
+    if isinstance(execution_history_items, ExecutionLogReader):
+        for _, item in execution_history_items.iteritems():
+            yield item
+    else:
+        for key in sorted(execution_history_items.keys()):
+            yield execution_history_items[key]
+
+
+def iter_collapsed_items(execution_history_items, throw_on_pickle_error=True, include_erroneous_data_ports=False):
+    """
+    Yields the collapsed representation of each state execution (see :func:`log_to_collapsed_structure`) in a
+    single pass over the log. Only the call items of the currently running states are kept in memory, so that also
+    logs not fitting into memory can be analyzed. A state execution is yielded as soon as its return item is read,
+    i.e. child states are yielded before their parents. The collapsed StateMachineStartItem is yielded first and
+    can be recognized by its state_type 'StateMachine'.
+
+    The relations between the state executions (next, concurrent, hierarchy) are not determined, use
+    :func:`log_to_collapsed_structure` if you need them.
+    :param dict execution_history_items: history items, in the simplest case directly the opened shelve log
+           file or binary log file. Alternatively, the path of a log file of either format. Binary log files
+           are streamed, for all other formats the keys are sorted first.
+    :param bool throw_on_pickle_error: flag if an error is thrown if an object cannot be un-pickled
+    :param bool include_erroneous_data_ports: flag if to include erroneous data ports
+    :return: a generator of collapsed state executions
+    """
+    if isinstance(execution_history_items, basestring):
+        with closing(open_execution_log(execution_history_items)) as opened_execution_history_items:
+            for execution_item in iter_collapsed_items(opened_execution_history_items, throw_on_pickle_error,
+                                                       include_erroneous_data_ports):
+                yield execution_item
+        return
+
+    # maps the run_id of each running state to its call item
+    call_items = {}
+    state_data = {}
+    for item in _iter_in_execution_order(execution_history_items):
+        item = _restore_state_data(item, execution_history_items, state_data)
+        if item['item_type'] == 'StateMachineStartItem':
+            yield _collapse_start_item(item)
+        elif item['item_type'] == 'CallItem':
+            # a hierarchy state has an EXECUTE call item from its parent, followed by its own CONTAINER call item,
+            # only the root state has a CONTAINER call item only
+            if item['run_id'] not in call_items:
+                call_items[item['run_id']] = item
+        elif item['item_type'] == 'ReturnItem':
+            call_item = call_items.get(item['run_id'])
+            if call_item is None:
+                logger.warn('Could not find a CallItem for run_id %s\nThere will probably be log information missing '
+                            'on this execution branch!' % str(item['run_id']))
+                continue
+            # the return item matching the first call item finishes the state execution
+            if call_item['call_type'] != item['call_type']:
+                continue
+            del call_items[item['run_id']]
+            if _is_collapsed_state_type(call_item['state_type']):
+                yield _collapse_execution(call_item, item, throw_on_pickle_error, include_erroneous_data_ports)
+
+    for run_id, call_item in call_items.iteritems():
+        logger.warn('Could not find a ReturnItem for run_id %s\nThere will probably be log information missing '
+                    'on this execution branch!' % str(run_id))
+        if _is_collapsed_state_type(call_item['state_type']):
+            yield _collapse_execution(call_item, _create_dummy_return_item(), throw_on_pickle_error,
+                                      include_erroneous_data_ports)
+
+
+def _iter_chunks(iterable, chunk_size):
+    chunk = []
+    for element in iterable:
+        chunk.append(element)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_log_to_DataFrames(execution_history_items, chunk_size=10000, data_in_columns=[], data_out_columns=[],
+                           scoped_in_columns=[], scoped_out_columns=[], semantic_data_columns=[],
+                           throw_on_pickle_error=True):
+    """
+    Yields the rows of :func:`log_to_DataFrame` in chunks of at most chunk_size rows, each as pandas.DataFrame
+    sorted by the call timestamp. The log is read in a single pass (see :func:`iter_collapsed_items`), thus
+    never more than one chunk of state executions is kept in memory.
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("The Python package 'pandas' is required for iter_log_to_DataFrames.")
+
+    selected_columns = [('data_ins', data_in_columns),
+                        ('data_outs', data_out_columns),
+                        ('scoped_data_ins', scoped_in_columns),
+                        ('scoped_data_outs', scoped_out_columns),
+                        ('semantic_data', semantic_data_columns)]
+
+    execution_items = (execution_item for execution_item in iter_collapsed_items(
+                       execution_history_items, throw_on_pickle_error=throw_on_pickle_error)
+                       if execution_item['state_type'] != 'StateMachine')
+    df_keys = None
+    for chunk in _iter_chunks(execution_items, chunk_size):
+        if df_keys is None:
+            # remove columns which are not generic over all states (basically the
+            # data flow stuff)
+            df_keys = [key for key in chunk[0].keys() if key not in dict(selected_columns)]
+            df_keys.sort()
+            columns = df_keys + [key + '__' + s for key, selected in selected_columns for s in selected]
+
+        df_items = []
+        for item in chunk:
+            row_data = [item[k] for k in df_keys]
+            for key, selected in selected_columns:
+                for column_key in selected:
+                    row_data.append(item[key].get(column_key, None))
+            df_items.append(row_data)
+
+        df = pd.DataFrame(df_items, columns=columns)
+        # convert epoch to datetime
+        df.timestamp_call = pd.to_datetime(df.timestamp_call, unit='s')
+        df.timestamp_return = pd.to_datetime(df.timestamp_return, unit='s')
+
+        # use call timestamp as index
+        df_timed = df.set_index(df.timestamp_call)
+        df_timed.sort_index(inplace=True)
+        yield df_timed
+
+
 def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_columns=[], scoped_in_columns=[],
                      scoped_out_columns=[], semantic_data_columns=[], throw_on_pickle_error=True):
     """
@@ -312,84 +482,65 @@ def log_to_DataFrame(execution_history_items, data_in_columns=[], data_out_colum
     indicating missing data.
 
     The available data per execution item (row in the table) can be printed using pandas.DataFrame.columns.
+
+    The table is assembled from the chunks of :func:`iter_log_to_DataFrames`, use this function directly
+    for logs, which table does not fit into memory.
     """
     try:
         import pandas as pd
     except ImportError:
         raise ImportError("The Python package 'pandas' is required for log_to_DataFrame.")
 
-    start, next_, concurrency, hierarchy, gitems = log_to_collapsed_structure(
-        execution_history_items, throw_on_pickle_error=throw_on_pickle_error)
-    gitems.pop(start['run_id'])
-    if len(gitems) == 0:
+    chunks = list(iter_log_to_DataFrames(execution_history_items, data_in_columns=data_in_columns,
+                                         data_out_columns=data_out_columns, scoped_in_columns=scoped_in_columns,
+                                         scoped_out_columns=scoped_out_columns,
+                                         semantic_data_columns=semantic_data_columns,
+                                         throw_on_pickle_error=throw_on_pickle_error))
+    if len(chunks) == 0:
         return pd.DataFrame()
-
-    # remove columns which are not generic over all states (basically the
-    # data flow stuff)
-    df_keys = gitems.values()[0].keys()
-    df_keys.remove('data_ins')
-    df_keys.remove('data_outs')
-    df_keys.remove('scoped_data_ins')
-    df_keys.remove('scoped_data_outs')
-    df_keys.remove('semantic_data')
-    df_keys.sort()
-
-    df_items = []
-
-    for rid, item in gitems.items():
-        row_data = [item[k] for k in df_keys]
-
-        for key, selected_columns in [('data_ins', data_in_columns),
-                                      ('data_outs', data_out_columns),
-                                      ('scoped_data_ins', scoped_in_columns),
-                                      ('scoped_data_outs', scoped_out_columns),
-                                      ('semantic_data', semantic_data_columns)]:
-            for column_key in selected_columns:
-                row_data.append(item[key].get(column_key, None))
-        df_items.append(row_data)
-
-    for key, selected_columns in [('data_ins', data_in_columns),
-                                  ('data_outs', data_out_columns),
-                                  ('scoped_data_ins', scoped_in_columns),
-                                  ('scoped_data_outs', scoped_out_columns),
-                                  ('semantic_data', semantic_data_columns)]:
-        df_keys.extend([key + '__' + s for s in selected_columns])
-    df = pd.DataFrame(df_items, columns=df_keys)
-    # convert epoch to datetime
-    df.timestamp_call = pd.to_datetime(df.timestamp_call, unit='s')
-    df.timestamp_return = pd.to_datetime(df.timestamp_return, unit='s')
-
-    # use call timestamp as index
-    df_timed = df.set_index(df.timestamp_call)
+    if len(chunks) == 1:
+        return chunks[0]
+    df_timed = pd.concat(chunks)
     df_timed.sort_index(inplace=True)
-
     return df_timed
 
 
-def log_to_ganttplot(execution_history_items):
+def log_to_ganttplot(execution_history_items, chunk_size=10000):
     """
     Example how to use the DataFrame representation
+
+    The log is processed in chunks (see :func:`iter_log_to_DataFrames`) and only the columns required for the
+    plot are kept.
     """
     import matplotlib.pyplot as plt
     import matplotlib.dates as dates
     import numpy as np
 
-    d = log_to_DataFrame(execution_history_items)
+    path_by_name = []
+    state_types = []
+    calldate = []
+    returndate = []
+    for d in iter_log_to_DataFrames(execution_history_items, chunk_size=chunk_size):
+        path_by_name.extend(d.path_by_name)
+        state_types.extend(d.state_type)
+        calldate.append(dates.date2num(d.timestamp_call.dt.to_pydatetime()))
+        returndate.append(dates.date2num(d.timestamp_return.dt.to_pydatetime()))
+    if len(path_by_name) == 0:
+        return
+    calldate = np.concatenate(calldate)
+    returndate = np.concatenate(returndate)
 
     # de-duplicate states and make mapping from state to idx
-    unique_states, idx = np.unique(d.path_by_name, return_index=True)
-    ordered_unique_states = np.array(d.path_by_name)[np.sort(idx)]
+    unique_states, idx = np.unique(path_by_name, return_index=True)
+    ordered_unique_states = np.array(path_by_name)[np.sort(idx)]
     name2idx = {k: i for i, k in enumerate(ordered_unique_states)}
 
-    calldate = dates.date2num(d.timestamp_call.dt.to_pydatetime())
-    returndate = dates.date2num(d.timestamp_return.dt.to_pydatetime())
-
     state2color = {'HierarchyState': 'k',
                    'ExecutionState': 'g',
                    'BarrierConcurrencyState': 'y',
                    'PreemptiveConcurrencyState': 'y'}
 
     fig, ax = plt.subplots(1, 1)
-    ax.barh(bottom=[name2idx[k] for k in d.path_by_name], width=returndate-calldate,
-            left=calldate, align='center', color=[state2color[s] for s in d.state_type], lw=0.0)
+    ax.barh(bottom=[name2idx[k] for k in path_by_name], width=returndate-calldate,
+            left=calldate, align='center', color=[state2color[s] for s in state_types], lw=0.0)
     plt.yticks(range(len(ordered_unique_states)), ordered_unique_states)
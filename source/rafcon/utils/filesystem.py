@@ -34,6 +34,29 @@ def create_path(path):
         os.makedirs(path)
 
 
+def create_private_path(path):
+    """Creates a folder, which only the current user can access, or checks an existing one
+
+    Folders holding files that are executed or unmarshalled (e.g. caches) must not be writable by other users.
+
+    :param str path: The path of the folder
+    :raises exceptions.OSError: if the folder cannot be created, is not owned by the current user or is writable by
+        other users
+    """
+    try:
+        os.makedirs(path, 0o700)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    path_stat = os.stat(path)
+    if not stat.S_ISDIR(path_stat.st_mode):
+        raise OSError(errno.ENOTDIR, "Not a directory", path)
+    if path_stat.st_uid != os.getuid():
+        raise OSError(errno.EPERM, "Folder is not owned by the current user", path)
+    if path_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise OSError(errno.EPERM, "Folder is writable by other users", path)
+
+
 def get_md5_file_hash(filename):
     """Calculates the MD5 hash of a file
 
@@ -27,7 +27,8 @@ def or_set(self):
     :param self: Reference to the event
     """
     self._set()
-    for callback in self.callbacks:
+    # callbacks can be removed concurrently
+    for callback in list(self.callbacks):
         callback()
 
 
@@ -37,7 +38,7 @@ def or_clear(self):
     :param self: Reference to the event
     """
     self._clear()
-    for callback in self.callbacks:
+    for callback in list(self.callbacks):
         callback()
 
 
@@ -58,6 +59,15 @@ def orify(e, changed_callback):
     e.callbacks.append(changed_callback)
 
 
+def remove_callback(e, changed_callback):
+    """Remove a callback added to an event with :func:`orify`
+
+    :param e: the event the callback was added to
+    :param changed_callback: the callback to be removed
+    """
+    e.callbacks.remove(changed_callback)
+
+
 def create(*events):
     """Creates a new multi_event
 
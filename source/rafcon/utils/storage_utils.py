@@ -104,13 +104,22 @@ def write_dict_to_json(dictionary, path, **kwargs):
     :param dictionary: The dictionary to get saved
     :param kwargs: optional additional parameters for dumper
     """
-    result_string = json.dumps(dictionary, cls=JSONObjectEncoder,
-                               indent=4, check_circular=False, sort_keys=True, **kwargs)
+    result_string = dump_objects_to_json_string(dictionary, **kwargs)
     with open(path, 'w') as f:
         # We cannot write directly to the file, as otherwise the 'encode' method wouldn't be called
         f.write(result_string)
 
 
+def dump_objects_to_json_string(dictionary, **kwargs):
+    """
+    Converts a dictionary to a json string, formatted as written by write_dict_to_json.
+    :param dictionary: The dictionary to be converted
+    :param kwargs: optional additional parameters for dumper
+    :return: the json string
+    """
+    return json.dumps(dictionary, cls=JSONObjectEncoder, indent=4, check_circular=False, sort_keys=True, **kwargs)
+
+
 def load_objects_from_json(path, as_dict=False):
     """Loads a dictionary from a json file.
 
@@ -124,3 +133,36 @@ def load_objects_from_json(path, as_dict=False):
         result = json.load(f, cls=JSONObjectDecoder, substitute_modules=substitute_modules)
     f.close()
     return result
+
+
+def load_objects_from_json_string(json_string, as_dict=False):
+    """Loads a dictionary from a json string, e.g. the content of a json file read before.
+
+    :param str json_string: The json string
+    :return: The dictionary specified in the json string
+    """
+    if as_dict:
+        return json.loads(json_string)
+    return json.loads(json_string, cls=JSONObjectDecoder, substitute_modules=substitute_modules)
+
+
+def load_objects_from_json_dict(json_dict, as_dict=False):
+    """Creates the objects of a dictionary, which was loaded from json with `as_dict=True` before
+
+    The result is the same as if the json string was loaded with `as_dict=False`. The given dictionary is not changed.
+
+    :param json_dict: The dictionary loaded from json (or a list or any other json value)
+    :return: The dictionary with all encoded objects created
+    """
+    if as_dict:
+        return json_dict
+    object_hook = JSONObjectDecoder(substitute_modules=substitute_modules).object_hook
+
+    def load_objects(value):
+        if isinstance(value, dict):
+            return object_hook(dict((key, load_objects(item)) for key, item in value.iteritems()))
+        if isinstance(value, list):
+            return [load_objects(item) for item in value]
+        return value
+
+    return load_objects(json_dict)
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import signal
+import threading
+import pytest
+
+# core elements
+from rafcon.core.execution import batch_execution
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core import start
+
+# test environment elements
+import testing_utils
+
+SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    self.preemptive_wait(inputs["duration"])
+    if self.preempted:
+        return "preempted"
+    outputs["result"] = inputs["value"] * inputs["factor"]
+    return 0
+"""
+
+
+def create_state_machine():
+    state = ExecutionState("multiply")
+    state.script_text = SCRIPT_TEXT
+    state.add_input_data_port("value", "int", 0)
+    state.add_input_data_port("factor", "int", 2)
+    state.add_input_data_port("duration", "float", 0.01)
+    state.add_output_data_port("result", "int")
+    return StateMachine(state)
+
+
+def test_batch_execution(caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import state_machine_manager
+    try:
+        state_machine = create_state_machine()
+        input_data_sets = [{"value": value} for value in range(20)]
+        input_data_sets[3]["factor"] = 3
+
+        results = []
+        for result in batch_execution.execute_batch(state_machine, input_data_sets, max_parallel_runs=3):
+            # the instances are reused
+            assert len(state_machine_manager.state_machines) <= 3
+            results.append(result)
+        assert not state_machine_manager.state_machines
+
+        assert sorted(result.index for result in results) == range(20)
+        for result in results:
+            assert result.input_data is input_data_sets[result.index]
+            assert result.final_outcome.outcome_id == 0
+            factor = 3 if result.index == 3 else 2
+            assert result.output_data["result"] == result.index * factor
+        # the state machine itself is not executed
+        assert state_machine.execution_future is None
+
+        with pytest.raises(ValueError):
+            list(batch_execution.execute_batch(state_machine, input_data_sets, max_parallel_runs=0))
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_closed_batch_execution(caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import state_machine_manager
+    try:
+        state_machine = create_state_machine()
+        input_data_sets = [{"value": 1, "duration": 0.}] + [{"value": 2, "duration": 10.}] * 10
+        batch_results = batch_execution.execute_batch(state_machine, input_data_sets, max_parallel_runs=2)
+        result = next(batch_results)
+        assert result.index == 0 and result.output_data["result"] == 2
+
+        # the remaining runs are stopped
+        batch_results.close()
+        assert not state_machine_manager.state_machines
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_aborted_batch_execution(caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import state_machine_manager
+    try:
+        abort_event = threading.Event()
+        input_data_sets = [{"value": 2, "duration": 10.}] * 4
+        threading.Timer(0.5, abort_event.set).start()
+        start_time = time.time()
+        # no results are yielded for the stopped runs
+        assert list(batch_execution.execute_batch(create_state_machine(), input_data_sets, max_parallel_runs=2,
+                                                  abort_event=abort_event)) == []
+        assert time.time() - start_time < 5
+        assert not state_machine_manager.state_machines
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_signal_handler_stops_batch_runs(monkeypatch, caplog):
+    testing_utils.initialize_environment_core()
+    import rafcon.core.singleton as core_singletons
+    monkeypatch.setattr(start, "_user_abort", False)
+    monkeypatch.setattr(start, "_batch_abort_event", threading.Event())
+    monkeypatch.setattr(core_singletons, "shut_down_signal", None)
+    try:
+        input_data_sets = [{"value": 2, "duration": 10.}] * 2
+        threading.Timer(0.5, start.signal_handler, [signal.SIGINT, None]).start()
+        start_time = time.time()
+        # the runs are stopped by the signal handler, not by the batch execution
+        results = list(batch_execution.execute_batch(create_state_machine(), input_data_sets, max_parallel_runs=2))
+        assert time.time() - start_time < 5
+        assert len(results) == 2
+        assert all(result.final_outcome.outcome_id != 0 for result in results)
+        assert start._batch_abort_event.is_set()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_invalid_input_data(caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine
+    try:
+        state_machine = create_state_machine()
+        with pytest.raises(ValueError):
+            state_machine.start({"values": 1})
+        with pytest.raises(TypeError):
+            state_machine.start({"value": "1"})
+        assert state_machine.execution_future is None
+
+        with pytest.raises(ValueError):
+            list(batch_execution.execute_batch(state_machine, [{"value": 1}, {"values": 1}]))
+        with pytest.raises(TypeError):
+            list(batch_execution.execute_batch(state_machine, [{"value": 1.5}]))
+        assert not state_machine_manager.state_machines
+
+        # the execution engine does not start with invalid input data
+        state_machine_manager.add_state_machine(state_machine)
+        state_machine_execution_engine.start(state_machine.state_machine_id, input_data={"values": 1})
+        assert state_machine_execution_engine.finished_or_stopped()
+        assert state_machine.execution_future is None
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_errors=1)
+
+
+def test_batch_command_line(capsys, caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        batch_path = os.path.join(testing_utils.get_unique_temp_path(), "inputs.json")
+        with open(batch_path, 'w') as file_pointer:
+            for value in range(5):
+                file_pointer.write(json.dumps({"value": value}) + "\n")
+            file_pointer.write("\n")
+
+        start.execute_batch(create_state_machine(), batch_path, 2)
+        lines = capsys.readouterr()[0].splitlines()
+        results = sorted((json.loads(line) for line in lines), key=lambda result: result["index"])
+        assert [result["output_data"]["result"] for result in results] == [0, 2, 4, 6, 8]
+        assert all(result["outcome_name"] == "success" for result in results)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,146 @@
+import os
+import copy
+import time
+import pytest
+
+# core elements
+from rafcon.core.execution.execution_status import StateMachineExecutionStatus
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.storage import storage
+
+# test environment elements
+import testing_utils
+
+STATE_MACHINE_PATH = testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                                 "library_runtime_value_test"))
+
+SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    gvm.set_variable("{0}", gvm.get_variable("{0}", default=0) + 1)
+    return 0
+"""
+
+
+def create_counting_state_machine(variable_name):
+    root_state = HierarchyState("root")
+    for state_name in ("first", "second"):
+        state = ExecutionState(state_name)
+        state.script_text = SCRIPT_TEXT.format(variable_name)
+        root_state.add_state(state)
+        if state_name == "first":
+            root_state.set_start_state(state.state_id)
+            first_state = state
+        else:
+            root_state.add_transition(first_state.state_id, 0, state.state_id, None)
+            root_state.add_transition(state.state_id, 0, root_state.state_id, 0)
+    return StateMachine(root_state)
+
+
+def wait_for_variable(gvm, variable_name, value, timeout=5.):
+    end_time = time.time() + timeout
+    while gvm.get_variable(variable_name, default=0) != value:
+        assert time.time() < end_time
+        time.sleep(0.01)
+
+
+def test_concurrent_state_machines(caplog):
+    testing_utils.initialize_environment_core(
+        libraries={"unit_test_state_machines": testing_utils.get_test_sm_path("unit_test_state_machines")})
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine
+    try:
+        # copies are not bound to the file system path and can be opened several times
+        state_machine = storage.load_state_machine_from_path(STATE_MACHINE_PATH)
+        state_machines = [copy.copy(state_machine) for _ in range(3)]
+        execution_engines = []
+        for state_machine in state_machines:
+            state_machine_manager.add_state_machine(state_machine)
+            execution_engines.append(state_machine_execution_engine.get_execution_engine(
+                state_machine.state_machine_id))
+        assert len(set(execution_engines)) == len(state_machines)
+        assert state_machine_execution_engine.get_execution_engine(state_machines[0].state_machine_id) is \
+            execution_engines[0]
+
+        for execution_engine in execution_engines:
+            execution_engine.start()
+        for state_machine, execution_engine in zip(state_machines, execution_engines):
+            assert execution_engine.join(10)
+            assert state_machine.execution_engine is execution_engine
+            assert state_machine.root_state.output_data["data_output_port1"] == 114
+        assert state_machine_execution_engine.finished_or_stopped()
+
+        state_machine_manager.remove_state_machine(state_machines[0].state_machine_id)
+        assert state_machine_execution_engine.get_execution_engine(state_machines[1].state_machine_id) is \
+            execution_engines[1]
+        with pytest.raises(AttributeError):
+            state_machine_execution_engine.get_execution_engine(state_machines[0].state_machine_id)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_independent_execution_modes(caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine, \
+        global_variable_manager as gvm
+    try:
+        stepped_state_machine = create_counting_state_machine("stepped")
+        running_state_machine = create_counting_state_machine("running")
+        state_machine_manager.add_state_machine(stepped_state_machine)
+        state_machine_manager.add_state_machine(running_state_machine)
+        stepped_engine = state_machine_execution_engine.get_execution_engine(stepped_state_machine.state_machine_id)
+        running_engine = state_machine_execution_engine.get_execution_engine(running_state_machine.state_machine_id)
+
+        # the step mode of one state machine does not hold back the other one
+        stepped_engine.step_mode()
+        running_engine.start()
+        assert running_engine.join(5)
+        assert gvm.get_variable("running") == 2
+        assert stepped_engine.status.execution_mode is StateMachineExecutionStatus.FORWARD_INTO
+        assert not gvm.variable_exist("stepped")
+        stepped_engine.step_into()
+        wait_for_variable(gvm, "stepped", 1)
+
+        # a state machine is executed by a single execution engine only
+        state_machine_execution_engine.start(stepped_state_machine.state_machine_id)
+        assert state_machine_execution_engine.finished_or_stopped()
+
+        stepped_engine.stop()
+        assert stepped_engine.join(5)
+        assert gvm.get_variable("stepped") == 1
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_errors=1)
+
+
+def test_execution_engine_of_nested_states(caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine, \
+        global_variable_manager as gvm
+    try:
+        state = ExecutionState("nested")
+        state.script_text = """
+def execute(self, inputs, outputs, gvm):
+    gvm.set_variable("engine_id", id(self.execution_engine))
+    return 0
+"""
+        for level in range(5):
+            hierarchy_state = HierarchyState("level_{0}".format(level))
+            hierarchy_state.add_state(state)
+            hierarchy_state.set_start_state(state.state_id)
+            hierarchy_state.add_transition(state.state_id, 0, hierarchy_state.state_id, 0)
+            state = hierarchy_state
+        state_machine = StateMachine(state)
+        state_machine_manager.add_state_machine(state_machine)
+        execution_engine = state_machine_execution_engine.get_execution_engine(state_machine.state_machine_id)
+        assert execution_engine is not state_machine_execution_engine
+
+        # the engine is resolved once per run and handed down to all child states
+        execution_engine.start()
+        assert execution_engine.join(5)
+        assert gvm.get_variable("engine_id") == id(execution_engine)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,88 @@
+import pytest
+
+# core elements
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_elements.data_port import InputDataPort
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+from rafcon.core.data_passing import DataPassingPolicy, pass_value
+
+# test environment elements
+import testing_utils
+
+
+def create_hierarchy_state():
+    """Creates a hierarchy state with a producer state, which output is connected to two inputs of a consumer state,
+    one of which is immutable"""
+    producer = ExecutionState("producer")
+    output_id = producer.add_output_data_port("points", "list")
+    consumer = ExecutionState("consumer")
+    input_id = consumer.add_input_data_port("points", "list")
+    immutable_input_id = consumer.add_input_data_port("points_by_reference", "list", immutable=True)
+
+    hierarchy = HierarchyState("hierarchy")
+    hierarchy.add_state(producer)
+    hierarchy.add_state(consumer)
+    hierarchy.add_data_flow(producer.state_id, output_id, consumer.state_id, input_id)
+    hierarchy.add_data_flow(producer.state_id, output_id, consumer.state_id, immutable_input_id)
+    return hierarchy, producer, consumer
+
+
+@pytest.mark.parametrize("policy", ["DEEPCOPY", "SHALLOW", "FROZEN"])
+def test_input_data_passing(policy, caplog):
+    testing_utils.initialize_environment_core(core_config={'DATA_PASSING_POLICY': policy})
+    try:
+        hierarchy, producer, consumer = create_hierarchy_state()
+        points = [[1., 2.], [3., 4.]]
+        hierarchy.add_state_execution_output_to_scoped_data({"points": points}, producer)
+        inputs = hierarchy.get_inputs_for_state(consumer)
+
+        assert inputs["points"] == points
+        assert inputs["points_by_reference"] is points
+        if policy == "SHALLOW":
+            assert inputs["points"] is not points and inputs["points"][0] is points[0]
+        else:
+            # lists can be changed in-place and are thus also deep copied by the FROZEN policy
+            assert inputs["points"] is not points and inputs["points"][0] is not points[0]
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_frozen_values():
+    value = (1, "two", 3.)
+    assert pass_value(value, policy=DataPassingPolicy.FROZEN) is value
+
+    numpy = pytest.importorskip("numpy")
+    array = numpy.zeros(10)
+    frozen_array = pass_value(array, policy=DataPassingPolicy.FROZEN)
+    assert frozen_array.base is array
+    with pytest.raises(ValueError):
+        frozen_array[0] = 1.
+    # the original array can still be changed
+    array[0] = 1.
+    assert frozen_array[0] == 1.
+
+    assert pass_value(array, policy=DataPassingPolicy.DEEPCOPY).base is None
+
+
+def test_immutable_data_port_storage(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        hierarchy, _, consumer = create_hierarchy_state()
+        storage_path = testing_utils.get_unique_temp_path()
+        storage.save_state_machine_to_path(StateMachine(hierarchy), storage_path)
+        loaded_hierarchy = storage.load_state_machine_from_path(storage_path).root_state
+
+        loaded_consumer = loaded_hierarchy.states[consumer.state_id]
+        input_port_id = loaded_consumer.get_io_data_port_id_from_name_and_type("points", InputDataPort)
+        immutable_input_port_id = loaded_consumer.get_io_data_port_id_from_name_and_type("points_by_reference",
+                                                                                         InputDataPort)
+        assert not loaded_consumer.input_data_ports[input_port_id].immutable
+        assert loaded_consumer.input_data_ports[immutable_input_port_id].immutable
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
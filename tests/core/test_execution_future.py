@@ -0,0 +1,99 @@
+import time
+import pytest
+
+# core elements
+from rafcon.core.execution.execution_status import StateMachineExecutionStatus
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.state import StateExecutionStatus
+from rafcon.core import start
+
+# test environment elements
+import testing_utils
+
+SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    self.preemptive_wait(inputs["duration"])
+    return 0
+"""
+
+
+def create_state_machine(duration=0.):
+    root_state = HierarchyState("root")
+    state = ExecutionState("wait")
+    state.script_text = SCRIPT_TEXT
+    state.add_input_data_port("duration", "float", duration)
+    root_state.add_state(state)
+    root_state.set_start_state(state.state_id)
+    root_state.add_transition(state.state_id, 0, root_state.state_id, 0)
+    return StateMachine(root_state)
+
+
+@pytest.mark.parametrize("state_executor", ["THREAD", "POOL"])
+def test_execution_future(state_executor, caplog):
+    testing_utils.initialize_environment_core(core_config={"STATE_EXECUTOR": state_executor})
+    from rafcon.core.singleton import state_machine_execution_engine
+    try:
+        state_machine = create_state_machine(0.2)
+        assert state_machine.execution_future is None
+        # the engine is left in this mode by runs started by the engine
+        state_machine_execution_engine.set_execution_mode(StateMachineExecutionStatus.FINISHED)
+
+        finished_callbacks = []
+
+        def on_finished(execution_future):
+            # callbacks are run before waiting threads are woken up
+            assert not execution_future.done()
+            finished_callbacks.append(execution_future)
+
+        execution_future = state_machine.start()
+        assert state_machine.execution_future is execution_future
+        assert state_machine_execution_engine.status.execution_mode is StateMachineExecutionStatus.STARTED
+        execution_future.add_done_callback(on_finished)
+        assert not execution_future.wait(0.01)
+        assert execution_future.wait(5)
+        assert finished_callbacks == [execution_future]
+        assert execution_future.final_outcome.outcome_id == 0
+        assert execution_future.execution_history is state_machine.execution_histories[-1]
+        assert state_machine.root_state.state_execution_status is StateExecutionStatus.INACTIVE
+        assert state_machine_execution_engine.status.execution_mode is StateMachineExecutionStatus.FINISHED
+
+        # callbacks of finished runs are called right away
+        execution_future.add_done_callback(finished_callbacks.append)
+        assert finished_callbacks == [execution_future] * 2
+
+        # every run has its own future
+        second_execution_future = state_machine.start()
+        assert second_execution_future is not execution_future
+        state_machine.join()
+        assert second_execution_future.done()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_engine_and_start_wait_for_future(caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine
+    try:
+        state_machine = create_state_machine()
+        state_machine_manager.add_state_machine(state_machine)
+        for _ in range(10):
+            state_machine_execution_engine.start(state_machine.state_machine_id)
+            assert state_machine_execution_engine.join(5)
+            assert state_machine_execution_engine.status.execution_mode is StateMachineExecutionStatus.FINISHED
+            assert not state_machine_execution_engine.state_machine_running
+
+        start_time = time.time()
+        start.start_state_machine(state_machine)
+        start.wait_for_state_machine_finished(state_machine)
+        # no polling delay
+        assert time.time() - start_time < 0.5
+        assert state_machine.execution_future.done()
+        state_machine_execution_engine.stop()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
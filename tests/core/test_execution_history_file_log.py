@@ -60,5 +60,49 @@ def test_execution_log(caplog):
     finally:
         testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
 
+@pytest.mark.parametrize("log_format", ["SHELVE", "BINARY"])
+def test_streaming_log_analysis(log_format, caplog):
+    try:
+        testing_utils.initialize_environment_core(
+            core_config={'EXECUTION_LOG_ENABLE': True,
+                         'EXECUTION_LOG_FORMAT': log_format,
+                         'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path()+'/test_execution_log'})
+
+        state_machine = global_storage.load_state_machine_from_path(
+            testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                        "execution_file_log_test")))
+
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_manager.active_state_machine_id = state_machine.state_machine_id
+        rafcon.core.singleton.state_machine_execution_engine.start()
+        rafcon.core.singleton.state_machine_execution_engine.join()
+        filename = state_machine.get_last_execution_log_filename()
+
+        start, next, concurrent, hierarchy, collapsed_items = log_helper.log_to_collapsed_structure(filename)
+        streamed_items = list(log_helper.iter_collapsed_items(filename))
+        assert streamed_items[0] == start
+        streamed_items_by_run_id = {item['run_id']: item for item in streamed_items}
+        assert sorted(streamed_items_by_run_id.keys()) == sorted(collapsed_items.keys())
+        for run_id, item in collapsed_items.iteritems():
+            if run_id == start['run_id']:
+                continue
+            for key in ['state_name', 'path', 'outcome_name', 'timestamp_call', 'timestamp_return', 'data_ins']:
+                assert streamed_items_by_run_id[run_id][key] == item[key]
+        # child states are finished before their parents
+        assert streamed_items[-1]['run_id'] == state_machine.root_state.run_id
+
+        df = log_helper.log_to_DataFrame(filename, data_out_columns=['output_1'])
+        chunks = list(log_helper.iter_log_to_DataFrames(filename, chunk_size=5, data_out_columns=['output_1']))
+        assert len(chunks) == 3
+        assert sum(len(chunk) for chunk in chunks) == len(df) == len(collapsed_items) - 1  # without the start item
+        assert list(df.columns) == list(chunks[0].columns)
+        assert sorted(df['run_id']) == sorted(run_id for chunk in chunks for run_id in chunk['run_id'])
+        assert list(df[df.state_name == 'MakeProd2']['data_outs__output_1']) == [3]
+
+        rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
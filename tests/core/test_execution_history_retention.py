@@ -0,0 +1,88 @@
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.execution.execution_history import ExecutionHistory, ExecutionHistoryRetentionPolicy, CallItem, \
+    ReturnItem, CallType
+
+# test environment elements
+import testing_utils
+
+
+def create_loop_state_machine(number_of_iterations):
+    counter_state = ExecutionState("counter")
+    counter_input = counter_state.add_input_data_port("counter", "int", 0)
+    counter_output = counter_state.add_output_data_port("counter", "int")
+    counter_state.add_outcome("loop", 1)
+    counter_state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                                "    outputs['counter'] = inputs['counter'] + 1\n" \
+                                "    return 'loop' if outputs['counter'] < {0} else 0\n".format(number_of_iterations)
+
+    root_state = HierarchyState("root")
+    root_output = root_state.add_output_data_port("counter", "int")
+    root_state.add_state(counter_state)
+    root_state.set_start_state(counter_state.state_id)
+    counter_variable = root_state.add_scoped_variable("counter", "int", 0)
+    root_state.add_data_flow(root_state.state_id, counter_variable, counter_state.state_id, counter_input)
+    root_state.add_data_flow(counter_state.state_id, counter_output, root_state.state_id, counter_variable)
+    root_state.add_data_flow(counter_state.state_id, counter_output, root_state.state_id, root_output)
+    root_state.add_transition(counter_state.state_id, 1, counter_state.state_id, None)
+    root_state.add_transition(counter_state.state_id, 0, root_state.state_id, 0)
+    return StateMachine(root_state)
+
+
+def test_retention_policy():
+    state = ExecutionState("state")
+    parent = HierarchyState("parent")
+    parent.add_state(state)
+    execution_history = ExecutionHistory(retention_policy=ExecutionHistoryRetentionPolicy(max_steps=2))
+    for _ in range(5):
+        execution_history.push_call_history_item(state, CallType.EXECUTE, parent)
+        execution_history.push_return_history_item(state, CallType.EXECUTE, parent)
+
+    # only the calls and returns of the last two executions are kept
+    assert len(execution_history) == 4
+    assert execution_history.number_of_discarded_items == 6
+    assert execution_history.truncated
+    assert isinstance(execution_history[0], CallItem) and execution_history[0].prev is None
+    assert sum(isinstance(history_item, ReturnItem) for history_item in execution_history) == 2
+
+    execution_history.pop_last_item()
+    execution_history.push_return_history_item(state, CallType.EXECUTE, parent)
+    assert len(execution_history) == 4
+
+    unlimited_execution_history = ExecutionHistory()
+    for _ in range(5):
+        unlimited_execution_history.push_call_history_item(state, CallType.EXECUTE, parent)
+    assert len(unlimited_execution_history) == 5
+    assert not unlimited_execution_history.truncated
+
+
+@pytest.mark.parametrize("limit", [{'EXECUTION_HISTORY_MAX_ITEMS': 20},
+                                   {'EXECUTION_HISTORY_MAX_BYTES': 20000},
+                                   {'EXECUTION_HISTORY_MAX_STEPS': 10}])
+def test_bounded_execution_history(limit, caplog):
+    testing_utils.initialize_environment_core(core_config=limit)
+    try:
+        state_machine = create_loop_state_machine(100)
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_manager.active_state_machine_id = state_machine.state_machine_id
+        rafcon.core.singleton.state_machine_execution_engine.start()
+        rafcon.core.singleton.state_machine_execution_engine.join()
+
+        assert state_machine.root_state.output_data["counter"] == 100
+        execution_history = state_machine.execution_histories[-1]
+        assert execution_history.truncated
+        assert len(execution_history) < 100
+        assert execution_history[0].prev is None
+        assert isinstance(execution_history[-1], ReturnItem)
+        assert execution_history[-1].state_reference is state_machine.root_state
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,227 @@
+import os
+import shutil
+import pickle
+import threading
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.storage import storage as global_storage
+from rafcon.core.execution.execution_log_storage import AsyncExecutionHistoryStorage, BackpressurePolicy, \
+    ExecutionLogReader, iter_execution_log_records, is_execution_log_file, get_index_filename, \
+    get_sorted_index_filename, serialize_record
+from rafcon.core.execution.execution_history import CallItem, CallType
+from rafcon.core.states.execution_state import ExecutionState
+import rafcon.utils.execution_log as log_helper
+
+# test environment elements
+import testing_utils
+
+writer_blocked = threading.Event()
+writer_released = threading.Event()
+
+
+def unblock_writer():
+    return "blocking"
+
+
+class BlockingValue(object):
+    """Blocks the writer thread while being pickled"""
+
+    def __reduce__(self):
+        writer_blocked.set()
+        writer_released.wait(5)
+        return unblock_writer, ()
+
+
+@pytest.mark.parametrize("backpressure_policy, expected_keys", [(BackpressurePolicy.DROP, ["0", "1"]),
+                                                                 (BackpressurePolicy.SAMPLE, ["0", "1", "3"])])
+def test_backpressure_policy(backpressure_policy, expected_keys):
+    writer_blocked.clear()
+    writer_released.clear()
+    filename = os.path.join(testing_utils.get_unique_temp_path(), "test.log")
+    storage = AsyncExecutionHistoryStorage(filename, queue_size=2, batch_size=1,
+                                           backpressure_policy=backpressure_policy, sample_interval=2)
+    storage.store_item("blocking", BlockingValue())
+    assert writer_blocked.wait(5)
+
+    # the first two records fill the queue, the third one is dropped in any case
+    for key in ["0", "1", "2"]:
+        storage.store_item(key, int(key))
+    assert storage.queue_depth == 2
+    assert storage.number_of_dropped_records == 1
+
+    # the fourth record is dropped or, with the SAMPLE policy, waits for free space in the queue
+    threading.Timer(0.1, writer_released.set).start()
+    storage.store_item("3", 3)
+    writer_released.wait(5)
+    storage.close()
+
+    expected_dropped_records = 1 if backpressure_policy is BackpressurePolicy.SAMPLE else 2
+    assert storage.number_of_dropped_records == expected_dropped_records
+    assert is_execution_log_file(filename)
+    records = list(iter_execution_log_records(filename))
+    assert records[0] == ("blocking", "blocking")
+    assert [key for key, _ in records[1:]] == expected_keys
+    assert storage.number_of_written_records == len(expected_keys) + 1
+
+
+def test_flush():
+    filename = os.path.join(testing_utils.get_unique_temp_path(), "test.log")
+    storage = AsyncExecutionHistoryStorage(filename, batch_size=10)
+    for i in range(25):
+        storage.store_item(str(i), {"value": i})
+    assert storage.flush(timeout=5)
+    assert storage.queue_depth == 0
+    assert [key for key, _ in iter_execution_log_records(filename)] == [str(i) for i in range(25)]
+    storage.close()
+    storage.close()
+    assert storage.number_of_written_records == 25
+
+
+def test_store_while_closing():
+    filename = os.path.join(testing_utils.get_unique_temp_path(), "test.log")
+    storage = AsyncExecutionHistoryStorage(filename, queue_size=5, batch_size=2)
+
+    def store_items(thread_index):
+        for i in range(200):
+            storage.store_item("{0}_{1}".format(thread_index, i), {"value": i})
+            storage.flush()
+
+    threads = [threading.Thread(target=store_items, args=(thread_index,)) for thread_index in range(4)]
+    for thread in threads:
+        thread.start()
+    storage.close()
+    for thread in threads:
+        # neither stores nor flushes after the close block
+        thread.join(10)
+        assert not thread.is_alive()
+
+    # each record is either written or counted as dropped
+    assert storage.number_of_written_records + storage.number_of_dropped_records == 800
+    assert len(list(iter_execution_log_records(filename))) == storage.number_of_written_records
+    assert storage.flush(timeout=1)
+
+
+@pytest.mark.parametrize("data_passing_policy", ["DEEPCOPY", "SHALLOW", "FROZEN"])
+def test_deferred_serialization_of_shared_data(data_passing_policy, caplog):
+    testing_utils.initialize_environment_core(core_config={'DATA_PASSING_POLICY': data_passing_policy})
+    try:
+        writer_blocked.clear()
+        writer_released.clear()
+        filename = os.path.join(testing_utils.get_unique_temp_path(), "test.log")
+        storage = AsyncExecutionHistoryStorage(filename)
+        storage.store_item("blocking", BlockingValue())
+        assert writer_blocked.wait(5)
+
+        # the values and the state are modified by the execution before the writer thread serializes the item
+        values = [1]
+        state = ExecutionState("state")
+        history_item = CallItem(state, None, CallType.EXECUTE, None, {"values": [values]}, "run_id")
+        storage.store_item(history_item.history_item_id, history_item)
+        values.append(2)
+        state.name = "renamed_state"
+        writer_released.set()
+        storage.close()
+
+        record = dict(iter_execution_log_records(filename))[history_item.history_item_id]
+        assert pickle.loads(record['input_output_data']['values']) == [[1]]
+        assert record['state_name'] == "state"
+        assert record['path_by_name'] == "state"
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def run_execution_file_log_test_state_machine(log_format):
+    testing_utils.initialize_environment_core(
+        core_config={'EXECUTION_LOG_ENABLE': True,
+                     'EXECUTION_LOG_FORMAT': log_format,
+                     'EXECUTION_LOG_PATH': testing_utils.get_unique_temp_path() + '/test_execution_log'})
+
+    state_machine = global_storage.load_state_machine_from_path(
+        testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines", "execution_file_log_test")))
+    rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+    rafcon.core.singleton.state_machine_manager.active_state_machine_id = state_machine.state_machine_id
+    rafcon.core.singleton.state_machine_execution_engine.start()
+    rafcon.core.singleton.state_machine_execution_engine.join()
+    filename = state_machine.get_last_execution_log_filename()
+    rafcon.core.singleton.state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+    return filename
+
+
+def assert_collapsed_structure(filename):
+    start, next_, concurrent, hierarchy, collapsed_items = log_helper.log_to_collapsed_structure(filename)
+    assert len(collapsed_items) == 14
+    start_states = [v for v in collapsed_items.values()
+                    if v['state_name'] == 'Start' and v['state_type'] == 'ExecutionState']
+    assert len(start_states) == 3
+    prod2 = [v for v in collapsed_items.values() if v['state_name'] == 'MakeProd2'][0]
+    assert prod2['data_ins']['input_1'] == 0
+    assert prod2['data_outs']['output_1'] == 3
+
+
+def test_binary_execution_log(caplog):
+    try:
+        filename = run_execution_file_log_test_state_machine('BINARY')
+        assert filename.endswith(".log")
+        records = [record for _, record in iter_execution_log_records(filename)]
+        assert len(records) == 36
+        # the semantic data and the description are only stored once per state
+        records_with_state_data = [record for record in records if 'description' in record]
+        assert len(records_with_state_data) == len(set((record['path'], record['state_type']) for record in records))
+        assert len(records_with_state_data) < len(records)
+        assert_collapsed_structure(filename)
+
+        reader = ExecutionLogReader(filename)
+        assert len(reader) == 36
+        for key, value in reader.iteritems():
+            assert key in reader
+            assert reader[key] == value
+            run_items = reader.get_run_items(value['run_id'])
+            assert value in run_items
+            assert all(run_item['run_id'] == value['run_id'] for run_item in run_items)
+        assert "unknown" not in reader
+        reader.close()
+
+        # the records are found by the sorted index created when closing the log file
+        sorted_index_filename = get_sorted_index_filename(filename)
+        assert os.path.isfile(sorted_index_filename)
+        os.remove(sorted_index_filename)
+        reader = ExecutionLogReader(filename)
+        assert os.path.isfile(sorted_index_filename)
+        assert len(reader) == 36 and not reader._unindexed_offsets_by_key_hash
+        reader.close()
+
+
+        # records not contained in the index file, e.g. of a killed process, are found as well
+        copied_filename = os.path.join(testing_utils.get_unique_temp_path(), os.path.basename(filename))
+        shutil.copy(filename, copied_filename)
+        shutil.copy(get_index_filename(filename), get_index_filename(copied_filename))
+        with open(copied_filename, 'ab') as log_file:
+            log_file.write(serialize_record("unindexed", {'run_id': value['run_id']}))
+        reader = ExecutionLogReader(copied_filename)
+        assert len(reader) == 37 and len(reader._unindexed_offsets_by_key_hash) == 1
+        assert reader["unindexed"] == {'run_id': value['run_id']}
+        assert reader.get_run_items(value['run_id'])[-1] == {'run_id': value['run_id']}
+        reader.close()
+
+        # without index file, the index is created when opening the log file
+        os.remove(get_index_filename(filename))
+        assert_collapsed_structure(filename)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
+
+
+def test_shelve_conversion(caplog):
+    try:
+        shelve_filename = run_execution_file_log_test_state_machine('SHELVE')
+        filename = log_helper.convert_shelve_to_execution_log(shelve_filename)
+        assert is_execution_log_file(filename)
+        assert_collapsed_structure(shelve_filename)
+        assert_collapsed_structure(filename)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -1,4 +1,6 @@
 from rafcon.core.global_variable_manager import GlobalVariableManager
+import time
+import threading
 import pytest
 import testing_utils
 from pytest import raises
@@ -124,6 +126,130 @@ def test_type_check(caplog):
     assert a == 123
 
 
+def test_fast_path_and_batches(caplog):
+    gvm = GlobalVariableManager()
+    d = {'a': 1}
+    gvm.set_variables({'i': 1, 's': "test", 'd': d})
+    gvm.set_variables({'r': d}, per_reference=True)
+    assert gvm.get_variables(['i', 's', 'd', 'x'], default=0) == {'i': 1, 's': "test", 'd': d, 'x': 0}
+
+    # immutable values and values stored per reference are not copied
+    assert gvm.get_variable_fast('s') is gvm.get_variable('s')
+    assert gvm.get_variable_fast('r') is d
+    assert gvm.get_variable_fast('d') == d and gvm.get_variable_fast('d') is not gvm.get_variable_fast('d')
+    assert gvm.get_variable_fast('x', default=0) == 0
+
+    # the fast path does not wait for locked variables
+    access_key = gvm.lock_variable('i')
+    assert gvm.is_locked('i')
+    assert gvm.get_variable_fast('i') == 1
+    with raises(RuntimeError):
+        gvm.set_variables({'i': 2})
+    gvm.set_variable('i', 3, access_key=access_key)
+    gvm.unlock_variable('i', access_key)
+    assert not gvm.is_locked('i')
+    assert gvm.get_variable_fast('i') == gvm.get_variable('i') == 3
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
+def test_notifications(caplog):
+    gvm = GlobalVariableManager()
+
+    def notification_not_allowed(*args):
+        raise AssertionError("No notification must be emitted without observers")
+    gvm._notify_method_before = gvm._notify_method_after = notification_not_allowed
+    gvm.set_variable('a', 1)
+    gvm.set_variables({'b': 2})
+    gvm.unlock_variable('a', gvm.lock_variable('a'))
+    gvm.delete_variable('b')
+    del gvm._notify_method_before, gvm._notify_method_after
+
+    notifications = []
+    gvm.add_observer(None, 'set_variables',
+                     notify_after_function=lambda instance, result, args: notifications.append(args[1]))
+    gvm.set_variables({'a': 2, 'b': 3})
+    assert notifications == [{'a': 2, 'b': 3}]
+    assert gvm.get_variable('a') == 2
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
+def test_concurrent_access(caplog):
+    gvm = GlobalVariableManager()
+    gvm.set_variable('counter', 0)
+    errors = []
+
+    def increment(thread_id):
+        try:
+            for i in range(200):
+                access_key = gvm.lock_variable('counter', block=True)
+                gvm.set_variable('counter', gvm.get_variable('counter', access_key=access_key) + 1,
+                                 access_key=access_key)
+                gvm.unlock_variable('counter', access_key)
+                gvm.set_variable(thread_id, i)
+                assert gvm.get_variable(thread_id) == i
+                gvm.get_variable('counter')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=increment, args=("thread_{0}".format(i), )) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert gvm.get_variable('counter') == 8 * 200
+    assert not gvm.is_locked('counter')
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
+def run_in_thread(function, *args, **kwargs):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(function(*args, **kwargs)))
+    thread.start()
+    return thread, results
+
+
+def test_wait_for_change(caplog):
+    from rafcon.core.states.execution_state import ExecutionState
+    gvm = GlobalVariableManager()
+    assert not gvm.wait_for_change('a', timeout=0.01)
+
+    thread, results = run_in_thread(gvm.wait_for_change, 'a')
+    time.sleep(0.05)
+    assert thread.is_alive()
+    gvm.set_variable('a', 1)
+    thread.join(1.)
+    assert results == [True]
+
+    thread, results = run_in_thread(gvm.wait_until, 'a', lambda value: value > 2)
+    for value in range(2, 5):
+        gvm.set_variable('a', value)
+    thread.join(1.)
+    assert results == [True]
+    assert gvm.wait_until('a', lambda value: value == 4, timeout=0.)
+    assert not gvm.wait_until('a', lambda value: value == 5, timeout=0.01)
+
+    # deleted variables are changed as well
+    thread, results = run_in_thread(gvm.wait_until, 'a', lambda value: value is None)
+    gvm.delete_variable('a')
+    thread.join(1.)
+    assert results == [True]
+
+    # the waits are preempted together with the state
+    state = ExecutionState("waiting state")
+    number_of_callbacks = len(state._preempted.callbacks)
+    threads = [run_in_thread(gvm.wait_for_change, 'a', state=state),
+               run_in_thread(gvm.wait_until, 'a', lambda value: False, state=state)]
+    time.sleep(0.05)
+    state.preempted = True
+    for thread, results in threads:
+        thread.join(1.)
+        assert results == [False]
+    assert len(state._preempted.callbacks) == number_of_callbacks
+    assert not gvm.wait_for_change('a', state=state)
+    testing_utils.assert_logger_warnings_and_errors(caplog)
+
+
 if __name__ == '__main__':
     test_locks(None)
     # test_references(None)
@@ -0,0 +1,131 @@
+import os
+import pytest
+
+# core elements
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+
+# test environment elements
+import testing_utils
+
+
+def create_state_machine(number_of_states=5):
+    root_state = HierarchyState("root")
+    for i in range(number_of_states):
+        root_state.add_state(ExecutionState("state_{0}".format(i), state_id="STATE{0}".format(i)))
+    return StateMachine(root_state)
+
+
+@pytest.fixture
+def written_files(monkeypatch):
+    written_files = []
+    write_file = storage.write_file
+
+    def record_write_file(file_path, content, *args, **kwargs):
+        written_files.append(file_path)
+        return write_file(file_path, content, *args, **kwargs)
+
+    monkeypatch.setattr(storage, "write_file", record_write_file)
+    return written_files
+
+
+def save_and_get_written_files(state_machine, path, written_files, **kwargs):
+    del written_files[:]
+    storage.save_state_machine_to_path(state_machine, path, **kwargs)
+    return sorted(os.path.relpath(file_path, path) for file_path in written_files)
+
+
+def test_incremental_saving(written_files, caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine()
+        root_state = state_machine.root_state
+        path = testing_utils.get_unique_temp_path()
+        root_storage_id = storage.get_storage_id_for_state(root_state)
+
+        assert len(save_and_get_written_files(state_machine, path, written_files)) == 2 + 5 * 3
+        assert save_and_get_written_files(state_machine, path, written_files) == []
+
+        # only the changed file of the modified state is written
+        state = root_state.states["STATE1"]
+        state_path = os.path.join(root_storage_id, storage.get_storage_id_for_state(state))
+        state.script_text += "\n"
+        assert save_and_get_written_files(state_machine, path, written_files) == [
+            os.path.join(state_path, storage.SCRIPT_FILE)]
+        state.add_semantic_data([], "value", "key")
+        assert save_and_get_written_files(state_machine, path, written_files) == [
+            os.path.join(state_path, storage.SEMANTIC_DATA_FILE)]
+
+        # files changed on the file system are written again
+        with open(os.path.join(path, state_path, storage.SCRIPT_FILE), 'w') as file_pointer:
+            file_pointer.write("changed")
+        assert save_and_get_written_files(state_machine, path, written_files) == [
+            os.path.join(state_path, storage.SCRIPT_FILE)]
+
+        # obsolete folders of renamed or removed states are removed
+        state.name = "renamed"
+        new_state_path = os.path.join(root_storage_id, storage.get_storage_id_for_state(state))
+        assert len(save_and_get_written_files(state_machine, path, written_files)) == 3
+        assert not os.path.exists(os.path.join(path, state_path))
+        assert os.path.exists(os.path.join(path, new_state_path))
+        root_state.remove_state("STATE1")
+        assert save_and_get_written_files(state_machine, path, written_files) == []
+        assert not os.path.exists(os.path.join(path, new_state_path))
+
+        # a loaded state machine is not written again, if it was not changed
+        loaded_state_machine = storage.load_state_machine_from_path(path)
+        assert loaded_state_machine.root_state == root_state
+        assert save_and_get_written_files(loaded_state_machine, path, written_files) == []
+
+        # state machines saved as copy, e.g. as backup, are also saved incrementally
+        copy_path = testing_utils.get_unique_temp_path()
+        assert len(save_and_get_written_files(state_machine, copy_path, written_files, as_copy=True)) == 2 + 4 * 3
+        assert save_and_get_written_files(state_machine, copy_path, written_files, as_copy=True) == []
+        assert state_machine.file_system_path == path
+        assert len(save_and_get_written_files(state_machine, copy_path, written_files, as_copy=True,
+                                              delete_old_state_machine=True)) == 2 + 4 * 3
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_saving_after_execution(written_files, caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine
+    try:
+        state_machine = create_state_machine()
+        root_state = state_machine.root_state
+        root_state.add_input_data_port("input", "int", 1)
+        scoped_variable_id = root_state.add_scoped_variable("scoped", "int", 0)
+        root_state.add_data_flow(root_state.state_id, 0, root_state.state_id, scoped_variable_id)
+        previous_state = None
+        for i in range(5):
+            state = root_state.states["STATE{0}".format(i)]
+            input_port_id = state.add_input_data_port("value", "int")
+            root_state.add_data_flow(root_state.state_id, scoped_variable_id, state.state_id, input_port_id)
+            if previous_state is None:
+                root_state.set_start_state(state)
+            else:
+                root_state.add_transition(previous_state.state_id, 0, state.state_id, None)
+            previous_state = state
+        root_state.add_transition(previous_state.state_id, 0, root_state.state_id, 0)
+        path = testing_utils.get_unique_temp_path()
+        save_and_get_written_files(state_machine, path, written_files)
+        states = [root_state] + root_state.states.values()
+        modification_stamps = [state.modification_stamp for state in states]
+
+        # the runtime data changed by the execution is not stored, thus the states are not modified
+        state_machine_manager.add_state_machine(state_machine)
+        state_machine_execution_engine.start(state_machine.state_machine_id)
+        assert state_machine_execution_engine.join(5)
+        state_machine_execution_engine.stop()
+        assert root_state.final_outcome.outcome_id == 0
+        assert [state.modification_stamp for state in states] == modification_stamps
+        assert save_and_get_written_files(state_machine, path, written_files) == []
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
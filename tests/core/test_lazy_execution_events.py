@@ -0,0 +1,62 @@
+import os
+import copy
+import pytest
+
+# core elements
+from rafcon.core.states.container_state import ContainerState
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.storage import storage
+
+# test environment elements
+import testing_utils
+
+STATE_MACHINE_PATH = testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                                 "library_runtime_value_test"))
+
+
+def get_all_states(state):
+    states = [state]
+    if isinstance(state, LibraryState):
+        states.extend(get_all_states(state.state_copy))
+    elif isinstance(state, ContainerState):
+        for child_state in state.states.itervalues():
+            states.extend(get_all_states(child_state))
+    return states
+
+
+def test_lazy_execution_events(caplog):
+    testing_utils.initialize_environment_core(
+        libraries={"unit_test_state_machines": testing_utils.get_test_sm_path("unit_test_state_machines")})
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine
+    try:
+        state_machine = storage.load_state_machine_from_path(STATE_MACHINE_PATH)
+        states = get_all_states(state_machine.root_state)
+        copied_states = get_all_states(copy.deepcopy(state_machine.root_state))
+        assert len(copied_states) == len(states)
+
+        for state, copied_state in zip(states, copied_states):
+            # the execution events of copied states are only created when used
+            assert copied_state._execution_events is None
+            if isinstance(state, ContainerState):
+                assert copied_state._transitions_condition is None
+
+        state = copied_states[-1]
+        assert not state.preempted and not state.started and not state.paused
+        state.preempted = False
+        assert state._execution_events is None
+        assert not state.wait_for_interruption(0.)
+        state.preempted = True
+        assert state.preempted and state.wait_for_interruption(0.) and state.wait_for_unpause(0.)
+
+        state_machine_manager.add_state_machine(state_machine)
+        state_machine_execution_engine.start(state_machine.state_machine_id)
+        state_machine_execution_engine.join()
+        state_machine_execution_engine.stop()
+        assert state_machine.root_state.output_data["data_output_port1"] == 114
+        assert state_machine.root_state._execution_events is not None
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
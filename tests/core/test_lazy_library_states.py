@@ -0,0 +1,92 @@
+import os
+import copy
+import pytest
+
+# core elements
+from rafcon.core.states.container_state import ContainerState
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.storage import storage
+
+# test environment elements
+import testing_utils
+
+STATE_MACHINE_PATH = testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                                 "library_runtime_value_test"))
+
+
+def initialize_environment(lazy_library_states):
+    testing_utils.initialize_environment_core(
+        core_config={"LAZY_LIBRARY_STATES": lazy_library_states},
+        libraries={"unit_test_state_machines": testing_utils.get_test_sm_path("unit_test_state_machines")})
+
+
+def get_library_states(state):
+    if isinstance(state, LibraryState):
+        return [state]
+    library_states = []
+    if isinstance(state, ContainerState):
+        for child_state in state.states.itervalues():
+            library_states.extend(get_library_states(child_state))
+    return library_states
+
+
+def load_library_state_interfaces(lazy_library_states):
+    initialize_environment(lazy_library_states)
+    try:
+        state_machine = storage.load_state_machine_from_path(STATE_MACHINE_PATH)
+        return [(library_state.get_path(), str(library_state), library_state.outcomes,
+                 library_state.input_data_ports, library_state.output_data_ports,
+                 library_state.input_data_port_runtime_values, library_state.output_data_port_runtime_values)
+                for library_state in get_library_states(state_machine.root_state)]
+    finally:
+        testing_utils.shutdown_environment_only_core()
+
+
+def test_lazy_library_state_interface():
+    assert load_library_state_interfaces(True) == load_library_state_interfaces(False)
+
+
+def test_lazy_library_states(caplog):
+    initialize_environment(False)
+    try:
+        eager_state_machine = storage.load_state_machine_from_path(STATE_MACHINE_PATH)
+        assert all(library_state.state_copy_initialized
+                   for library_state in get_library_states(eager_state_machine.root_state))
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+    initialize_environment(True)
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine
+    try:
+        state_machine = storage.load_state_machine_from_path(STATE_MACHINE_PATH)
+        library_states = get_library_states(state_machine.root_state)
+        assert library_states
+        assert not any(library_state.state_copy_initialized for library_state in library_states)
+
+        # copies of lazy library states are lazy as well
+        state_copy = copy.deepcopy(state_machine.root_state)
+        assert not any(library_state.state_copy_initialized for library_state in get_library_states(state_copy))
+
+        # the state copy is created on first access and shares the outcomes and data ports of the library state
+        library_state = library_states[0]
+        assert library_state.state_copy.outcomes is library_state.outcomes
+        assert library_state.state_copy.input_data_ports is library_state.input_data_ports
+        assert library_state.state_copy.output_data_ports is library_state.output_data_ports
+        assert library_state.state_copy.parent is library_state
+        assert library_state.state_copy_initialized
+        assert state_machine.get_state_by_path(library_state.state_copy.get_path()) is library_state.state_copy
+
+        # the state copies are created on execution
+        state_machine_manager.add_state_machine(state_machine)
+        state_machine_execution_engine.start(state_machine.state_machine_id)
+        state_machine_execution_engine.join()
+        state_machine_execution_engine.stop()
+        assert state_machine.root_state.output_data["data_output_port1"] == 114
+        assert all(library_state.state_copy_initialized for library_state in library_states)
+        assert state_machine.root_state == eager_state_machine.root_state
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
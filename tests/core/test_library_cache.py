@@ -0,0 +1,125 @@
+import os
+import shutil
+import pytest
+
+# core elements
+from rafcon.core.states.container_state import ContainerState
+from rafcon.core.storage import storage
+from rafcon.core.storage import library_cache
+
+# test environment elements
+import testing_utils
+
+
+def get_states_by_path(state, states_by_path=None):
+    states_by_path = {} if states_by_path is None else states_by_path
+    states_by_path[state.get_path()] = state
+    if isinstance(state, ContainerState):
+        for child_state in state.states.itervalues():
+            get_states_by_path(child_state, states_by_path)
+    return states_by_path
+
+
+@pytest.fixture
+def created_cache_entries(monkeypatch):
+    created_cache_entries = []
+    create_cache_entry = library_cache._create_cache_entry
+
+    def record_create_cache_entry(lib_os_path):
+        created_cache_entries.append(lib_os_path)
+        return create_cache_entry(lib_os_path)
+
+    monkeypatch.setattr(library_cache, "_create_cache_entry", record_create_cache_entry)
+    return created_cache_entries
+
+
+def test_library_cache(created_cache_entries, caplog):
+    library_path = os.path.join(testing_utils.get_unique_temp_path(), "generic")
+    shutil.copytree(os.path.join(testing_utils.RAFCON_SHARED_LIBRARY_PATH, "generic"), library_path)
+    cache_path = testing_utils.get_unique_temp_path()
+    testing_utils.initialize_environment_core(core_config={"LIBRARY_CACHE_ENABLE": True,
+                                                           "LIBRARY_CACHE_PATH": cache_path},
+                                              libraries={"generic": library_path})
+    from rafcon.core.singleton import library_manager
+    try:
+        # the nested library folders are skipped
+        lib_os_paths = sorted(lib_os_path for lib_os_path in library_manager.libraries["generic"].itervalues()
+                              if isinstance(lib_os_path, basestring))
+        assert lib_os_paths
+
+        # the first load creates the cache entries, which are used afterwards
+        for lib_os_path in lib_os_paths:
+            state_machine = storage.load_state_machine_from_path(lib_os_path)
+            cached_state_machine = library_cache.load_state_machine_from_path(lib_os_path)
+            assert cached_state_machine.root_state == state_machine.root_state
+            assert cached_state_machine.version == state_machine.version
+            assert cached_state_machine.file_system_path == lib_os_path
+            assert not cached_state_machine.marked_dirty
+            states_by_path = get_states_by_path(state_machine.root_state)
+            cached_states_by_path = get_states_by_path(cached_state_machine.root_state)
+            assert sorted(cached_states_by_path.keys()) == sorted(states_by_path.keys())
+            for path, state in states_by_path.iteritems():
+                assert cached_states_by_path[path].file_system_path == state.file_system_path
+                assert cached_states_by_path[path].semantic_data == state.semantic_data
+        assert created_cache_entries == lib_os_paths
+        assert len([file_name for file_name in os.listdir(cache_path)
+                    if file_name.endswith(library_cache.CACHE_FILE_EXTENSION)]) == len(lib_os_paths)
+
+        del created_cache_entries[:]
+        for lib_os_path in lib_os_paths:
+            assert library_cache.load_state_machine_from_path(lib_os_path).root_state == \
+                storage.load_state_machine_from_path(lib_os_path).root_state
+        assert created_cache_entries == []
+
+        # the library manager uses the cache
+        library_manager.clean_loaded_libraries()
+        version, state_copy = library_manager.get_library_state_copy_instance(lib_os_paths[0])
+        assert state_copy == storage.load_state_machine_from_path(lib_os_paths[0]).root_state
+        assert created_cache_entries == []
+
+        # changed libraries are loaded again
+        state_machine = storage.load_state_machine_from_path(lib_os_paths[0])
+        state_machine.root_state.description = "changed"
+        storage.save_state_machine_to_path(state_machine, lib_os_paths[0])
+        cached_state_machine = library_cache.load_state_machine_from_path(lib_os_paths[0])
+        assert cached_state_machine.root_state.description == "changed"
+        assert created_cache_entries == [lib_os_paths[0]]
+        assert library_cache.load_state_machine_from_path(lib_os_paths[0]).root_state == cached_state_machine.root_state
+        assert created_cache_entries == [lib_os_paths[0]]
+
+        # invalid cache files are replaced
+        for file_name in os.listdir(cache_path):
+            with open(os.path.join(cache_path, file_name), 'wb') as file_pointer:
+                file_pointer.write("")
+        assert library_cache.load_state_machine_from_path(lib_os_paths[0]).root_state == cached_state_machine.root_state
+        assert created_cache_entries == [lib_os_paths[0]] * 2
+
+        library_cache.clear_cache()
+        assert os.listdir(cache_path) == []
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=1)
+
+
+def test_refused_library_cache(created_cache_entries, caplog):
+    library_path = os.path.join(testing_utils.get_unique_temp_path(), "generic")
+    shutil.copytree(os.path.join(testing_utils.RAFCON_SHARED_LIBRARY_PATH, "generic"), library_path)
+    cache_path = testing_utils.get_unique_temp_path()
+    os.chmod(cache_path, 0o777)
+    testing_utils.initialize_environment_core(core_config={"LIBRARY_CACHE_ENABLE": True,
+                                                           "LIBRARY_CACHE_PATH": cache_path},
+                                              libraries={"generic": library_path})
+    from rafcon.core.singleton import library_manager
+    try:
+        # the libraries are loaded without cache, if other users could write the cache folder
+        lib_os_path = [lib_os_path for lib_os_path in library_manager.libraries["generic"].itervalues()
+                       if isinstance(lib_os_path, basestring)][0]
+        assert library_cache.load_state_machine_from_path(lib_os_path).root_state == \
+            storage.load_state_machine_from_path(lib_os_path).root_state
+        assert created_cache_entries == []
+        assert os.listdir(cache_path) == []
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=1)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,166 @@
+import os
+import time
+import shutil
+import pytest
+
+# core elements
+from rafcon.core.storage import storage
+from rafcon.core.storage import library_index
+
+# test environment elements
+import testing_utils
+
+
+def create_library_root_path():
+    library_root_path = os.path.join(testing_utils.get_unique_temp_path(), "generic")
+    shutil.copytree(os.path.join(testing_utils.RAFCON_SHARED_LIBRARY_PATH, "generic"), library_root_path)
+    set_mtimes_to_past(library_root_path)
+    return library_root_path
+
+
+def set_mtimes_to_past(path):
+    # recently changed directories are always listed again, see library_index.MTIME_RESOLUTION
+    mtime = time.time() - 60
+    for directory_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            os.utime(os.path.join(directory_path, file_name), (mtime, mtime))
+        os.utime(directory_path, (mtime, mtime))
+
+
+@pytest.fixture
+def listed_directories(monkeypatch):
+    listed_directories = []
+    listdir = os.listdir
+
+    def record_listdir(path):
+        listed_directories.append(path)
+        return listdir(path)
+
+    monkeypatch.setattr(os, "listdir", record_listdir)
+    return listed_directories
+
+
+def test_library_index(listed_directories, caplog):
+    library_root_path = create_library_root_path()
+    testing_utils.initialize_environment_core(libraries={"generic": library_root_path})
+    from rafcon.core.singleton import library_manager
+    try:
+        libraries = library_manager.libraries["generic"]
+        assert "wait" in libraries and isinstance(libraries["wait"], basestring)
+        assert library_manager.library_os_paths["generic/wait"] == libraries["wait"]
+        nested_folders = [name for name, value in libraries.iteritems() if isinstance(value, dict)]
+        assert nested_folders
+
+        # unchanged directories are not listed again
+        del listed_directories[:]
+        library_manager.refresh_libraries()
+        assert listed_directories == []
+        assert library_manager.libraries["generic"] == libraries
+
+        # added and removed libraries are found by listing only the changed directory
+        shutil.copytree(libraries["wait"], os.path.join(library_root_path, nested_folders[0], "wait_copy"))
+        library_manager.refresh_libraries()
+        assert library_manager.libraries["generic"][nested_folders[0]]["wait_copy"] == \
+            os.path.join(library_root_path, nested_folders[0], "wait_copy")
+        assert os.path.join(library_root_path, nested_folders[0]) in listed_directories
+        assert library_root_path not in listed_directories
+        shutil.rmtree(os.path.join(library_root_path, nested_folders[0], "wait_copy"))
+        library_manager.refresh_libraries()
+        assert library_manager.libraries["generic"] == libraries
+        assert "generic/{0}/wait_copy".format(nested_folders[0]) not in library_manager.library_os_paths
+
+        # a library becoming a folder
+        os.remove(os.path.join(libraries["wait"], storage.STATEMACHINE_FILE))
+        library_manager.refresh_libraries()
+        assert isinstance(library_manager.libraries["generic"]["wait"], dict)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+@pytest.mark.parametrize("library_cache_enabled", [False, True])
+def test_changed_loaded_libraries(library_cache_enabled, monkeypatch, caplog):
+    library_root_path = create_library_root_path()
+    testing_utils.initialize_environment_core(core_config={"LIBRARY_CACHE_ENABLE": library_cache_enabled,
+                                                           "LIBRARY_CACHE_PATH": testing_utils.get_unique_temp_path()},
+                                              libraries={"generic": library_root_path})
+    from rafcon.core.singleton import library_manager
+    from rafcon.core.storage import library_cache
+    fingerprinted_libraries = []
+    get_fingerprint = library_cache.get_fingerprint
+
+    def record_get_fingerprint(lib_os_path):
+        fingerprinted_libraries.append(lib_os_path)
+        return get_fingerprint(lib_os_path)
+
+    monkeypatch.setattr(library_cache, "get_fingerprint", record_get_fingerprint)
+    try:
+        lib_os_paths = sorted(lib_os_path for lib_os_path in library_manager.libraries["generic"].itervalues()
+                              if isinstance(lib_os_path, basestring))[:2]
+        for lib_os_path in lib_os_paths:
+            library_manager.get_library_state_copy_instance(lib_os_path)
+        loaded_state_machine = library_manager._loaded_libraries[lib_os_paths[1]]
+        # the fingerprints are only needed by the library cache
+        assert fingerprinted_libraries == (lib_os_paths if library_cache_enabled else [])
+
+        # unchanged libraries are not fingerprinted again
+        del fingerprinted_libraries[:]
+        library_manager.refresh_libraries()
+        assert fingerprinted_libraries == []
+        assert library_manager._loaded_libraries[lib_os_paths[1]] is loaded_state_machine
+
+        # only the changed library is removed from the loaded libraries
+        state_machine = storage.load_state_machine_from_path(lib_os_paths[0])
+        state_machine.root_state.description = "changed"
+        storage.save_state_machine_to_path(state_machine, lib_os_paths[0], delete_old_state_machine=True)
+        library_manager.refresh_libraries()
+        assert lib_os_paths[0] not in library_manager._loaded_libraries
+        assert library_manager._loaded_libraries[lib_os_paths[1]] is loaded_state_machine
+        _, state_copy = library_manager.get_library_state_copy_instance(lib_os_paths[0])
+        assert state_copy.description == "changed"
+
+        # recently changed directories count as changed on each refresh, so they are moved to the past first
+        set_mtimes_to_past(library_root_path)
+        library_manager.refresh_libraries()
+        library_manager.get_library_state_copy_instance(lib_os_paths[0])
+        shutil.rmtree(lib_os_paths[1])
+        library_manager.refresh_libraries()
+        assert lib_os_paths[1] not in library_manager._loaded_libraries
+        assert lib_os_paths[0] in library_manager._loaded_libraries
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_persistent_library_index(listed_directories, caplog):
+    library_root_path = create_library_root_path()
+    cache_path = testing_utils.get_unique_temp_path()
+    testing_utils.initialize_environment_core(core_config={"LIBRARY_CACHE_ENABLE": True,
+                                                           "LIBRARY_CACHE_PATH": cache_path},
+                                              libraries={"generic": library_root_path})
+    from rafcon.core.singleton import library_manager
+    try:
+        libraries = library_manager.libraries["generic"]
+        assert os.path.isfile(library_index.get_index_file_path(library_root_path))
+
+        # a new process uses the stored index
+        del listed_directories[:]
+        library_manager.initialize()
+        assert listed_directories == []
+        assert library_manager.libraries["generic"] == libraries
+
+        # invalid index files are replaced
+        with open(library_index.get_index_file_path(library_root_path), 'wb') as file_pointer:
+            file_pointer.write("")
+        library_manager.initialize()
+        assert library_root_path in listed_directories
+        assert library_manager.libraries["generic"] == libraries
+        assert library_index.load_library_index(library_root_path).directories
+
+        from rafcon.core.storage import library_cache
+        library_cache.clear_cache()
+        assert os.listdir(cache_path) == []
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=1)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
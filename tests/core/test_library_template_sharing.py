@@ -0,0 +1,111 @@
+import os
+import gc
+import pytest
+
+# core elements
+from rafcon.core.state_elements.data_flow import DataFlow
+from rafcon.core.state_elements.transition import Transition
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.storage import storage
+
+# test environment elements
+import testing_utils
+
+SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    outputs["value"] = inputs["value"] + 1
+    return 0
+"""
+
+
+def save_library(library_path):
+    library_root_state = HierarchyState("increment_twice", state_id="LIBROOT")
+    input_port_id = library_root_state.add_input_data_port("value", "int", 0)
+    output_port_id = library_root_state.add_output_data_port("value", "int")
+    previous_state, previous_port_id = library_root_state, input_port_id
+    for state_id in ("INC1", "INC2"):
+        state = ExecutionState(state_id.lower(), state_id=state_id)
+        state.script_text = SCRIPT_TEXT
+        state_input_port_id = state.add_input_data_port("value", "int")
+        state_output_port_id = state.add_output_data_port("value", "int")
+        library_root_state.add_state(state)
+        library_root_state.add_data_flow(previous_state.state_id, previous_port_id, state_id, state_input_port_id)
+        if previous_state is library_root_state:
+            library_root_state.set_start_state(state_id)
+        else:
+            library_root_state.add_transition(previous_state.state_id, 0, state_id, None)
+        previous_state, previous_port_id = state, state_output_port_id
+    library_root_state.add_transition("INC2", 0, library_root_state.state_id, 0)
+    library_root_state.add_data_flow("INC2", previous_port_id, library_root_state.state_id, output_port_id)
+    storage.save_state_machine_to_path(StateMachine(library_root_state), os.path.join(library_path, "increment_twice"))
+
+
+def count_elements(states):
+    """Counts the transitions and data flows, which belong to one of the given states"""
+    gc.collect()
+    return sum(1 for obj in gc.get_objects() if type(obj) in (Transition, DataFlow) and
+               any(obj.parent is state for state in states))
+
+
+def test_library_template_sharing(caplog):
+    library_path = testing_utils.get_unique_temp_path()
+    save_library(library_path)
+    testing_utils.initialize_environment_core(libraries={"sharing_libraries": library_path})
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine
+    try:
+        library_state = LibraryState("sharing_libraries", "increment_twice", "0.1")
+        state_copy = library_state.state_copy
+
+        # the copies of the library share the tables of the template, no transitions and data flows are created
+        library_states = [LibraryState("sharing_libraries", "increment_twice", "0.1") for _ in range(20)]
+        state_copies = [state.state_copy for state in library_states]
+        assert count_elements(state_copies + [state_copy]) == 0
+        for other_state_copy in state_copies:
+            assert other_state_copy._transitions_by_origin is state_copy._transitions_by_origin
+            assert other_state_copy._data_flows_by_target is state_copy._data_flows_by_target
+            assert other_state_copy.start_state_id == "INC1"
+        # the script text and the code compiled from it are shared as well
+        code = state_copy.states["INC1"].script.get_code()
+        for other_state_copy in state_copies:
+            assert other_state_copy.states["INC1"].script_text is state_copy.states["INC1"].script_text
+            assert other_state_copy.states["INC1"].script.get_code() is code
+            assert other_state_copy.states["INC1"].script._code is None
+
+        # the execution uses the shared tables
+        root_state = HierarchyState("root")
+        root_state.add_state(library_states[0])
+        root_state.set_start_state(library_states[0].state_id)
+        root_state.add_transition(library_states[0].state_id, 0, root_state.state_id, 0)
+        state_machine = StateMachine(root_state)
+        state_machine_manager.add_state_machine(state_machine)
+        state_machine_execution_engine.start(state_machine.state_machine_id)
+        assert state_machine_execution_engine.join(5)
+        state_machine_execution_engine.stop()
+        assert library_states[0].final_outcome.outcome_id == 0
+        assert library_states[0].output_data["value"] == 2
+        assert state_copies[0]._tables_template is not None
+        assert count_elements(state_copies + [state_copy]) == 0
+
+        # a copy gets its own tables as soon as they are accessed
+        transitions = state_copies[1].transitions
+        assert all(transition.parent is state_copies[1] for transition in transitions.itervalues())
+        assert all(data_flow.parent is state_copies[1] for data_flow in state_copies[1].data_flows.itervalues())
+        assert count_elements(state_copies + [state_copy]) == len(transitions) + len(state_copies[1].data_flows)
+        transition_id = [transition.transition_id for transition in transitions.itervalues()
+                         if transition.from_state == "INC2"][0]
+        state_copies[1].remove_transition(transition_id)
+        assert state_copies[1].get_transition_for_outcome(state_copies[1].states["INC2"],
+                                                          state_copies[1].states["INC2"].outcomes[0]) is None
+        for other_state_copy in (state_copy, state_copies[2]):
+            assert other_state_copy.get_transition_for_outcome(other_state_copy.states["INC2"],
+                                                               other_state_copy.states["INC2"].outcomes[0])
+            assert transition_id in other_state_copy.transitions
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,108 @@
+import os
+import pytest
+
+# core elements
+from rafcon.core.states.container_state import ContainerState
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.storage import storage
+from rafcon.core.storage.packed_storage import PackedStateMachineFile, is_packed_state_machine_file, \
+    convert_directory_to_packed_file, convert_packed_file_to_directory
+
+# test environment elements
+import testing_utils
+
+STATE_MACHINE_PATH = testing_utils.get_test_sm_path(os.path.join("unit_test_state_machines",
+                                                                 "stepping_test_with_library"))
+
+
+def initialize_environment(packed_library_path=None):
+    libraries = {"unit_test_state_machines": os.path.join(testing_utils.TEST_ASSETS_PATH, "unit_test_state_machines")}
+    if packed_library_path:
+        libraries["packed_libraries"] = packed_library_path
+    testing_utils.initialize_environment_core(libraries=libraries)
+
+
+def read_files(path):
+    files = {}
+    for directory_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            with open(os.path.join(directory_path, file_name)) as file_pointer:
+                files[os.path.relpath(os.path.join(directory_path, file_name), path)] = file_pointer.read()
+    return files
+
+
+def test_save_and_load_packed_state_machine(caplog):
+    initialize_environment()
+    try:
+        state_machine = storage.load_state_machine_from_path(STATE_MACHINE_PATH)
+        filename = os.path.join(testing_utils.get_unique_temp_path(), "stepping_test" +
+                                storage.PACKED_STATE_MACHINE_FILE_EXTENSION)
+        storage.save_state_machine_to_path(state_machine, filename, as_copy=True)
+        assert is_packed_state_machine_file(filename)
+        assert state_machine.file_system_path == STATE_MACHINE_PATH
+
+        packed_state_machine = storage.load_state_machine_from_path(filename)
+        assert packed_state_machine.root_state == state_machine.root_state
+        assert packed_state_machine.file_system_path == filename
+        assert not packed_state_machine.marked_dirty
+
+        # saving the loaded state machine again keeps the file valid
+        packed_state_machine.root_state.name = "renamed"
+        storage.save_state_machine_to_path(packed_state_machine, filename)
+        assert not packed_state_machine.marked_dirty
+        assert storage.load_state_machine_from_path(filename).root_state == packed_state_machine.root_state
+
+        # single states are loaded lazily from the packed file
+        states_by_storage_path = {}
+        states = [packed_state_machine.root_state]
+        while states:
+            state = states.pop()
+            states_by_storage_path[state.get_storage_path()] = state
+            if isinstance(state, ContainerState):
+                states.extend(state.states.itervalues())
+        packed_file = PackedStateMachineFile(filename)
+        assert sorted(packed_file.state_directories) == sorted(states_by_storage_path.keys())
+        for state_directory in packed_file.state_directories:
+            state = packed_file.load_state(state_directory)
+            assert state.file_system_path == packed_file.get_state_path(state_directory)
+            assert state == states_by_storage_path[state_directory]
+        with pytest.raises(ValueError):
+            packed_file.load_state("unknown")
+        packed_file.close()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_conversion(caplog):
+    initialize_environment()
+    try:
+        filename = os.path.join(testing_utils.get_unique_temp_path(), "stepping_test" +
+                                storage.PACKED_STATE_MACHINE_FILE_EXTENSION)
+        assert convert_directory_to_packed_file(STATE_MACHINE_PATH, filename) == filename
+        state_machine_path = convert_packed_file_to_directory(filename)
+        assert state_machine_path == os.path.splitext(filename)[0]
+        assert read_files(state_machine_path) == read_files(STATE_MACHINE_PATH)
+
+        state_machine = storage.load_state_machine_from_path(STATE_MACHINE_PATH)
+        assert storage.load_state_machine_from_path(filename).root_state == state_machine.root_state
+        assert storage.load_state_machine_from_path(state_machine_path).root_state == state_machine.root_state
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_packed_library(caplog):
+    packed_library_path = testing_utils.get_unique_temp_path()
+    convert_directory_to_packed_file(os.path.join(testing_utils.RAFCON_SHARED_LIBRARY_PATH, "generic", "wait"),
+                                     os.path.join(packed_library_path, "wait" +
+                                                  storage.PACKED_STATE_MACHINE_FILE_EXTENSION))
+    initialize_environment(packed_library_path)
+    try:
+        library_state = LibraryState("packed_libraries", "wait", "0.1")
+        assert library_state.state_copy.name == "wait"
+        assert library_state.lib_os_path.endswith(storage.PACKED_STATE_MACHINE_FILE_EXTENSION)
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,61 @@
+import os
+import pytest
+
+# core elements
+from rafcon.core.states.container_state import ContainerState
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.library_state import LibraryState
+from rafcon.core.storage import storage
+
+# test environment elements
+import testing_utils
+
+
+def get_states_by_path(state, states_by_path=None):
+    states_by_path = {} if states_by_path is None else states_by_path
+    states_by_path[state.get_path()] = state
+    if isinstance(state, ContainerState):
+        for child_state in state.states.itervalues():
+            get_states_by_path(child_state, states_by_path)
+    return states_by_path
+
+
+@pytest.mark.parametrize("state_machine_path", [
+    os.path.join("unit_test_state_machines", "stepping_test_with_library"),
+    os.path.join("unit_test_state_machines", "execution_file_log_test"),
+    os.path.join("unit_test_state_machines", "backward_compatibility", "0.9.0"),
+    os.path.join(testing_utils.TUTORIAL_PATH, "99_bottles_of_beer_in_library"),
+])
+def test_parallel_loading(state_machine_path, caplog):
+    testing_utils.initialize_environment_core(libraries={
+        "unit_test_state_machines": os.path.join(testing_utils.TEST_ASSETS_PATH, "unit_test_state_machines"),
+        "generic": os.path.join(testing_utils.RAFCON_SHARED_LIBRARY_PATH, "generic"),
+        "tutorials": testing_utils.TUTORIAL_PATH})
+    try:
+        path = testing_utils.get_test_sm_path(state_machine_path)
+        state_machine = storage.load_state_machine_from_path(path, number_of_threads=0)
+        parallel_state_machine = storage.load_state_machine_from_path(path, number_of_threads=4)
+
+        assert parallel_state_machine.root_state == state_machine.root_state
+        assert parallel_state_machine.marked_dirty == state_machine.marked_dirty
+        assert parallel_state_machine.supports_saving_state_names == state_machine.supports_saving_state_names
+        states_by_path = get_states_by_path(state_machine.root_state)
+        parallel_states_by_path = get_states_by_path(parallel_state_machine.root_state)
+        assert sorted(parallel_states_by_path.keys()) == sorted(states_by_path.keys())
+        for path, state in states_by_path.iteritems():
+            parallel_state = parallel_states_by_path[path]
+            assert parallel_state.file_system_path == state.file_system_path
+            assert parallel_state.semantic_data == state.semantic_data
+            if isinstance(state, ContainerState):
+                assert parallel_state.transitions == state.transitions
+                assert parallel_state.data_flows == state.data_flows
+            if isinstance(state, ExecutionState):
+                assert parallel_state.script_text == state.script_text
+            if isinstance(state, LibraryState):
+                assert parallel_state.state_copy == state.state_copy
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import os
+import stat
+import pytest
+
+# core elements
+from rafcon.core import script
+from rafcon.core.states.execution_state import ExecutionState
+
+# test environment elements
+import testing_utils
+
+SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    outputs["counter"] = inputs["counter"] + 1
+    return 0
+"""
+
+
+def create_state(script_text=SCRIPT_TEXT):
+    state = ExecutionState("counter")
+    state.add_input_data_port("counter", "int", 0)
+    state.add_output_data_port("counter", "int")
+    state.script_text = script_text
+    return state
+
+
+def test_shared_code(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state1 = create_state()
+        state2 = create_state()
+        state3 = create_state(SCRIPT_TEXT.replace("+ 1", "+ 2"))
+        for state in (state1, state2, state3):
+            state.script.build_module()
+
+        # identical scripts share their code, but not their module
+        assert state1.script.compiled_module is not state2.script.compiled_module
+        assert state1.script.compiled_module.execute.func_code is state2.script.compiled_module.execute.func_code
+        assert state1.script.compiled_module.execute.func_code is not state3.script.compiled_module.execute.func_code
+
+        outputs = {"counter": None}
+        state1.script.execute(state1, {"counter": 1}, outputs)
+        assert outputs["counter"] == 2
+        state3.script.execute(state3, {"counter": 1}, outputs)
+        assert outputs["counter"] == 3
+
+        with pytest.raises(SyntaxError):
+            create_state("def execute(self").script.build_module()
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_persistent_code_cache(monkeypatch, caplog):
+    cache_path = os.path.join(testing_utils.get_unique_temp_path(), "script_code_cache")
+    testing_utils.initialize_environment_core(core_config={"SCRIPT_CODE_CACHE_ENABLE": True,
+                                                           "SCRIPT_CODE_CACHE_PATH": cache_path})
+    try:
+        script.clear_code_cache()
+        code = script.get_compiled_code(SCRIPT_TEXT)
+        assert script.get_compiled_code(SCRIPT_TEXT) is code
+        assert len(os.listdir(cache_path)) == 1
+
+        # the code is loaded from the file system, e.g. by another process
+        def compile_not_allowed(*args):
+            raise AssertionError("The script must not be compiled again")
+        monkeypatch.setattr(script, "compile", compile_not_allowed, raising=False)
+        script._code_cache.clear()
+        assert script.get_compiled_code(SCRIPT_TEXT) == code
+        state = create_state()
+        state.script.build_module()
+        outputs = {"counter": None}
+        state.script.execute(state, {"counter": 1}, outputs)
+        assert outputs["counter"] == 2
+        monkeypatch.undo()
+
+        # invalid cache files are replaced
+        for file_name in os.listdir(cache_path):
+            with open(os.path.join(cache_path, file_name), 'wb') as file_pointer:
+                file_pointer.write("")
+        script._code_cache.clear()
+        assert script.get_compiled_code(SCRIPT_TEXT) == code
+
+        script.clear_code_cache()
+        assert os.listdir(cache_path) == []
+
+        # the cache folder is only accessible by the current user
+        assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o700
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_unicode_script(caplog):
+    cache_path = testing_utils.get_unique_temp_path()
+    testing_utils.initialize_environment_core(core_config={"SCRIPT_CODE_CACHE_ENABLE": True,
+                                                           "SCRIPT_CODE_CACHE_PATH": cache_path})
+    try:
+        script_text = SCRIPT_TEXT.replace("return 0", u"return 0  # zählt hoch")
+        code = script.get_compiled_code(script_text)
+        assert script.get_compiled_code(script_text) is code
+        assert len(os.listdir(cache_path)) == 1
+        namespace = {}
+        exec code in namespace
+        outputs = {"counter": None}
+        namespace["execute"](None, {"counter": 1}, outputs, None)
+        assert outputs["counter"] == 2
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_refused_code_cache(caplog):
+    cache_path = testing_utils.get_unique_temp_path()
+    os.chmod(cache_path, 0o777)
+    testing_utils.initialize_environment_core(core_config={"SCRIPT_CODE_CACHE_ENABLE": True,
+                                                           "SCRIPT_CODE_CACHE_PATH": cache_path})
+    try:
+        script.clear_code_cache()
+        # the compiled code is only kept in memory, if other users could write the cache folder
+        code = script.get_compiled_code(SCRIPT_TEXT)
+        assert script.get_compiled_code(SCRIPT_TEXT) is code
+        assert os.listdir(cache_path) == []
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=1)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,169 @@
+import os
+import time
+import pytest
+
+# core elements
+from rafcon.core.execution import script_process_pool
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.barrier_concurrency_state import BarrierConcurrencyState, UNIQUE_DECIDER_STATE_ID
+from rafcon.core.states.hierarchy_state import HierarchyState
+
+# test environment elements
+import testing_utils
+
+SCRIPT_TEXT = """
+import os
+
+def execute(self, inputs, outputs, gvm):
+    self.logger.info("Running in process %d", os.getpid())
+    self.persistent_variables["runs"] = self.persistent_variables.get("runs", 0) + 1
+    gvm.set_variable("pid_" + self.name, os.getpid())
+    outputs["result"] = sum(range(inputs["value"]))
+    outputs["runs"] = self.persistent_variables["runs"]
+    return "success"
+"""
+
+RENDEZVOUS_SCRIPT_TEXT = """
+import os
+import time
+
+def execute(self, inputs, outputs, gvm):
+    gvm.set_variable("pid_" + self.name, os.getpid())
+    # the scripts wait for each other, thus all of them are executed at the same time by different workers
+    end_time = time.time() + 10
+    while not all(gvm.variable_exist("pid_sum_%d" % index) for index in range(3)):
+        if time.time() > end_time:
+            raise RuntimeError("The scripts are not executed in parallel")
+        self.preemptive_wait(0.01)
+    return 0
+"""
+
+WAITING_SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    gvm.set_variable("waiting", True)
+    if self.preemptive_wait(inputs["duration"]):
+        return "preempted"
+    return 0
+"""
+
+ERROR_SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    raise ValueError("failure in process")
+"""
+
+WRONG_TYPE_SCRIPT_TEXT = """
+def execute(self, inputs, outputs, gvm):
+    outputs["result"] = "no int"
+    return 0
+"""
+
+
+def create_state(name, script_text):
+    state = ExecutionState(name)
+    state.script_text = script_text
+    state.execute_in_process = True
+    state.add_input_data_port("value", "int", 10)
+    state.add_output_data_port("result", "int")
+    state.add_output_data_port("runs", "int")
+    return state
+
+
+def start(state_machine):
+    """Starts the state machine by the execution engine, which thus is in the right mode independent of earlier tests
+
+    :return: the completion of the started run
+    """
+    from rafcon.core.singleton import state_machine_manager, state_machine_execution_engine
+    if state_machine.state_machine_id not in state_machine_manager.state_machines:
+        state_machine_manager.add_state_machine(state_machine)
+    state_machine_execution_engine.start(state_machine.state_machine_id)
+    return state_machine.execution_future
+
+
+def test_execute_in_process(caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import global_variable_manager as gvm
+    try:
+        state = create_state("sum", SCRIPT_TEXT)
+        state_machine = StateMachine(state)
+        for runs in (1, 2):
+            start(state_machine).wait()
+            assert state.final_outcome.name == "success"
+            assert state.output_data["result"] == 45
+            assert state.output_data["runs"] == runs
+        assert gvm.get_variable("pid_sum") != os.getpid()
+
+        # the representation is only changed for states executed in processes
+        state_copy = ExecutionState.from_dict(state.to_dict())
+        assert state_copy.execute_in_process
+        assert state.__copy__().execute_in_process
+        assert 'execute_in_process' not in ExecutionState("thread").to_dict()
+        with pytest.raises(TypeError):
+            state.execute_in_process = 1
+    finally:
+        script_process_pool.shutdown()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_concurrent_processes(caplog):
+    testing_utils.initialize_environment_core(core_config={"SCRIPT_PROCESS_POOL_SIZE": 2})
+    from rafcon.core.singleton import global_variable_manager as gvm
+    try:
+        root_state = BarrierConcurrencyState("root")
+        for index in range(3):
+            # the transitions to the decider are added automatically
+            root_state.add_state(create_state("sum_{0}".format(index), RENDEZVOUS_SCRIPT_TEXT))
+        root_state.add_transition(UNIQUE_DECIDER_STATE_ID, 0, root_state.state_id, 0)
+        state_machine = StateMachine(root_state)
+        assert start(state_machine).wait()
+        assert state_machine.execution_future.final_outcome.outcome_id == 0
+        pids = set(gvm.get_variable("pid_sum_{0}".format(index)) for index in range(3))
+        assert len(pids) == 3 and os.getpid() not in pids
+        # the third worker was not kept
+        assert len(script_process_pool._idle_workers) == 2
+    finally:
+        script_process_pool.shutdown()
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+def test_preemption_and_errors(caplog):
+    testing_utils.initialize_environment_core()
+    from rafcon.core.singleton import global_variable_manager as gvm
+    try:
+        root_state = HierarchyState("root")
+        state = ExecutionState("wait")
+        state.script_text = WAITING_SCRIPT_TEXT
+        state.execute_in_process = True
+        state.add_input_data_port("duration", "float", 30.)
+        root_state.add_state(state)
+        root_state.set_start_state(state.state_id)
+        root_state.add_transition(state.state_id, 0, root_state.state_id, 0)
+        state_machine = StateMachine(root_state)
+
+        gvm.set_variable("waiting", False)
+        start_time = time.time()
+        execution_future = start(state_machine)
+        gvm.wait_until("waiting", lambda waiting: waiting, timeout=10)
+        root_state.recursively_preempt_states()
+        assert execution_future.wait(10)
+        assert time.time() - start_time < 10
+        assert state.final_outcome.outcome_id == -2
+
+        # exceptions and wrong output data types are handled as for other execution states
+        for script_text in (ERROR_SCRIPT_TEXT, WRONG_TYPE_SCRIPT_TEXT):
+            state = create_state("error", script_text)
+            start(StateMachine(state)).wait()
+            if script_text is ERROR_SCRIPT_TEXT:
+                assert state.final_outcome.outcome_id == -1
+                assert isinstance(state.output_data["error"], ValueError)
+            else:
+                assert state.final_outcome.outcome_id == 0
+        assert "failure in process" in caplog.text
+    finally:
+        script_process_pool.shutdown()
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_errors=2)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
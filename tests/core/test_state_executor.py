@@ -0,0 +1,110 @@
+import threading
+import pytest
+
+# core elements
+import rafcon.core.singleton
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.states.preemptive_concurrency_state import PreemptiveConcurrencyState
+from rafcon.core.state_machine import StateMachine
+from rafcon.core.execution.state_executor import PoolStateExecutor, get_state_executor
+
+# test environment elements
+import testing_utils
+
+
+class DummyState(object):
+    """Records the thread it was run in and optionally waits for an event"""
+
+    def __init__(self, event=None):
+        self.event = event
+        self.thread = None
+
+    def run(self):
+        self.thread = threading.current_thread()
+        if self.event:
+            self.event.wait()
+
+
+def test_pool_state_executor():
+    executor = PoolStateExecutor(pool_size=2)
+    try:
+        # sequential executions are run inline
+        state = DummyState()
+        executor.start(state, sequential=True).join()
+        assert state.thread is threading.current_thread()
+
+        # executions exceeding the pool size do not wait for a free worker
+        event = threading.Event()
+        states = [DummyState(event) for _ in range(4)]
+        executions = [executor.start(state) for state in states]
+        event.set()
+        for execution in executions:
+            execution.join(timeout=5)
+            assert not execution.is_alive()
+        assert len(set(state.thread for state in states)) == 4
+
+        # the worker threads are reused
+        state = DummyState()
+        executor.start(state).join(timeout=5)
+        assert state.thread in [s.thread for s in states[:2]]
+    finally:
+        executor.shutdown()
+
+
+def create_state_machine():
+    sleep_state = ExecutionState("sleep")
+    sleep_state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                              "    self.preemptive_wait(10.)\n" \
+                              "    return 0\n"
+
+    counter_state = ExecutionState("counter")
+    counter_input = counter_state.add_input_data_port("counter", "int", 0)
+    counter_output = counter_state.add_output_data_port("counter", "int")
+    counter_state.add_outcome("loop", 1)
+    counter_state.script_text = "def execute(self, inputs, outputs, gvm):\n" \
+                                "    outputs['counter'] = inputs['counter'] + 1\n" \
+                                "    return 'loop' if outputs['counter'] < 10 else 0\n"
+
+    loop_state = HierarchyState("loop")
+    loop_output = loop_state.add_output_data_port("counter", "int")
+    loop_state.add_state(counter_state)
+    loop_state.set_start_state(counter_state.state_id)
+    counter_variable = loop_state.add_scoped_variable("counter", "int", 0)
+    loop_state.add_data_flow(loop_state.state_id, counter_variable, counter_state.state_id, counter_input)
+    loop_state.add_data_flow(counter_state.state_id, counter_output, loop_state.state_id, counter_variable)
+    loop_state.add_data_flow(counter_state.state_id, counter_output, loop_state.state_id, loop_output)
+    loop_state.add_transition(counter_state.state_id, 1, counter_state.state_id, None)
+    loop_state.add_transition(counter_state.state_id, 0, loop_state.state_id, 0)
+
+    root_state = PreemptiveConcurrencyState("root")
+    root_state.add_state(sleep_state)
+    root_state.add_state(loop_state)
+    root_output = root_state.add_output_data_port("counter", "int")
+    root_state.add_data_flow(loop_state.state_id, loop_output, root_state.state_id, root_output)
+    root_state.add_transition(loop_state.state_id, 0, root_state.state_id, 0)
+    return StateMachine(root_state)
+
+
+@pytest.mark.parametrize("state_executor", ["THREAD", "POOL"])
+def test_state_machine_execution(state_executor, caplog):
+    testing_utils.initialize_environment_core(core_config={'STATE_EXECUTOR': state_executor})
+    try:
+        expected_type = PoolStateExecutor if state_executor == "POOL" else object
+        assert isinstance(get_state_executor(), expected_type)
+
+        state_machine = create_state_machine()
+        rafcon.core.singleton.state_machine_manager.add_state_machine(state_machine)
+        rafcon.core.singleton.state_machine_manager.active_state_machine_id = state_machine.state_machine_id
+        rafcon.core.singleton.state_machine_execution_engine.start()
+        rafcon.core.singleton.state_machine_execution_engine.join()
+
+        # the loop finishes first and preempts the sleeping state
+        assert state_machine.root_state.output_data["counter"] == 10
+        assert state_machine.root_state.final_outcome.outcome_id == 0
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,111 @@
+import pytest
+
+# core elements
+from rafcon.core.states.execution_state import ExecutionState
+from rafcon.core.states.hierarchy_state import HierarchyState
+from rafcon.core.state_machine import StateMachine
+
+# test environment elements
+import testing_utils
+
+
+def create_state_machine():
+    state1 = ExecutionState("state1", state_id="STATE1")
+    state2 = ExecutionState("state2", state_id="STATE2")
+    state3 = ExecutionState("state3", state_id="STATE3")
+    hierarchy_state = HierarchyState("hierarchy", state_id="HIERARCHY")
+    hierarchy_state.add_state(state1)
+    hierarchy_state.add_state(state2)
+    root_state = HierarchyState("root", state_id="ROOT")
+    root_state.add_state(hierarchy_state)
+    root_state.add_state(state3)
+    return StateMachine(root_state)
+
+
+def test_state_path_invalidation(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine()
+        root_state = state_machine.root_state
+        hierarchy_state = root_state.states["HIERARCHY"]
+        state1 = hierarchy_state.states["STATE1"]
+        assert state1.get_path() == "ROOT/HIERARCHY/STATE1"
+        assert state1.get_path() is state1.get_path()
+        assert state1.get_path(by_name=True) == "root/hierarchy/state1"
+        assert state1.get_path("CHILD") == "ROOT/HIERARCHY/STATE1/CHILD"
+        assert state_machine.get_state_by_path("ROOT/HIERARCHY/STATE1") is state1
+
+        hierarchy_state.name = "renamed"
+        assert state1.get_path(by_name=True) == "root/renamed/state1"
+
+        root_state.change_state_id("NEW_ROOT")
+        assert state1.get_path() == "NEW_ROOT/HIERARCHY/STATE1"
+        assert state_machine.get_state_by_path("NEW_ROOT/HIERARCHY/STATE1") is state1
+        root_state.change_state_id("ROOT")
+
+        # grouping and ungrouping reparents the states
+        root_state.group_states(["STATE3"])
+        state3 = state_machine.get_state_by_path(
+            [state.get_path() for state in root_state.states.itervalues() if state.state_id != "HIERARCHY"][0] +
+            "/STATE3")
+        assert state3.name == "state3"
+        root_state.ungroup_state(state3.parent.state_id)
+        assert state3.get_path() == "ROOT/STATE3"
+        assert state_machine.get_state_by_path("ROOT/STATE3") is state3
+
+        # the substituted state is not part of the state machine anymore
+        new_state3 = root_state.substitute_state("STATE3", ExecutionState("new_state3", state_id="STATE3"))
+        assert state3.get_path() == "STATE3"
+        assert new_state3.get_path() == "ROOT/" + new_state3.state_id
+        assert state_machine.get_state_by_path(new_state3.get_path()) is new_state3
+        assert state_machine.get_state_by_path("ROOT/STATE3", as_check=True) is None
+
+        hierarchy_state.remove_state("STATE1")
+        assert state1.get_path() == "STATE1"
+        assert state_machine.get_state_by_path("ROOT/HIERARCHY/STATE1", as_check=True) is None
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
+
+
+def test_scoped_state_path_invalidation(caplog):
+    testing_utils.initialize_environment_core()
+    try:
+        state_machine = create_state_machine()
+        other_state_machine = create_state_machine()
+        hierarchy_state = state_machine.root_state.states["HIERARCHY"]
+        state1 = hierarchy_state.states["STATE1"]
+        state3 = state_machine.root_state.states["STATE3"]
+        other_state1 = other_state_machine.root_state.states["HIERARCHY"].states["STATE1"]
+        state3_path = state3.get_path(by_name=True)
+        other_state1_path = other_state1.get_path(by_name=True)
+        assert state_machine.get_state_by_path("ROOT/HIERARCHY/STATE1") is state1
+        other_state_path_index = other_state_machine._get_state_path_index()
+
+        # only the paths of the renamed subtree and the index of its state machine are recreated
+        hierarchy_state.name = "renamed"
+        assert state1.get_path(by_name=True) == "root/renamed/state1"
+        assert state3.get_path(by_name=True) is state3_path
+        assert other_state1.get_path(by_name=True) is other_state1_path
+        assert other_state_machine._get_state_path_index() is other_state_path_index
+
+        # adding and removing states keeps the index of other state machines as well
+        hierarchy_state.add_state(ExecutionState("state4", state_id="STATE4"))
+        assert state_machine.get_state_by_path("ROOT/HIERARCHY/STATE4").name == "state4"
+        hierarchy_state.remove_state("STATE4")
+        assert state_machine.get_state_by_path("ROOT/HIERARCHY/STATE4", as_check=True) is None
+        assert other_state_machine._get_state_path_index() is other_state_path_index
+
+        # moving a state between state machines invalidates both indexes
+        state4 = ExecutionState("state4", state_id="STATE4")
+        hierarchy_state.add_state(state4)
+        assert state_machine.get_state_by_path("ROOT/HIERARCHY/STATE4") is state4
+        hierarchy_state.remove_state("STATE4", recursive=False, destroy=False)
+        other_state_machine.root_state.add_state(state4)
+        assert state_machine.get_state_by_path("ROOT/HIERARCHY/STATE4", as_check=True) is None
+        assert other_state_machine.get_state_by_path("ROOT/STATE4") is state4
+    finally:
+        testing_utils.shutdown_environment_only_core(caplog=caplog, expected_warnings=0, expected_errors=0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
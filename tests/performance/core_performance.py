@@ -7,11 +7,20 @@ from rafcon.core.states.preemptive_concurrency_state import PreemptiveConcurrenc
 from rafcon.core.constants import UNIQUE_DECIDER_STATE_ID
 from rafcon.core.state_elements.data_port import InputDataPort, OutputDataPort
 from rafcon.core.state_machine import StateMachine
+from rafcon.core.execution.execution_engine import ExecutionEngine
+from rafcon.core.execution.execution_history import ExecutionHistory
+from rafcon.core.execution.execution_status import StateMachineExecutionStatus
 
 from rafcon.utils.timer import measure_time
+from rafcon.utils import log
 
 import testing_utils
 
+from timeit import default_timer as timer
+import Queue
+
+logger = log.get_logger(__name__)
+
 
 @measure_time
 def create_hierarchy_state(number_child_states=10, sleep=False):
@@ -111,9 +120,187 @@ def test_preemption_concurrency_state_execution(number_child_states=10, number_c
     execute_state(preemption_state)
 
 
+@measure_time
+def create_hierarchy_state_with_transitions(number_of_transitions=100):
+    """Creates a hierarchy with a single child state, each outcome of which is connected to the parent outcome"""
+    hierarchy = HierarchyState("hierarchy_with_transitions")
+    state = ExecutionState("state_with_many_outcomes")
+    hierarchy.add_state(state)
+    hierarchy.set_start_state(state.state_id)
+
+    for outcome_id in range(1, number_of_transitions):
+        state.add_outcome("outcome" + str(outcome_id), outcome_id)
+        hierarchy.add_transition(state.state_id, outcome_id, hierarchy.state_id, 0)
+    hierarchy.add_transition(state.state_id, 0, hierarchy.state_id, 0)
+
+    return hierarchy
+
+
+def measure_transition_lookup_per_step(number_of_transitions=100, number_of_steps=10000):
+    """Measures the time the routing after a child execution needs per step
+
+    The routing is done by get_transition_for_outcome, which is called by the container states after each child
+    state finished.
+    """
+    hierarchy_state = create_hierarchy_state_with_transitions(number_of_transitions)
+    child_state = hierarchy_state.states.values()[0]
+    final_outcome = child_state.outcomes[0]
+
+    start = timer()
+    for _ in xrange(number_of_steps):
+        transition = hierarchy_state.get_transition_for_outcome(child_state, final_outcome)
+    duration_per_step = (timer() - start) / number_of_steps
+
+    assert transition.from_state == child_state.state_id and transition.from_outcome == 0
+    logger.info("Transition lookup with {0} transitions: {1:.3f} us per step".format(number_of_transitions,
+                                                                                      duration_per_step * 1e6))
+    return duration_per_step
+
+
+def test_transition_lookup_scaling(transition_counts=(10, 100, 1000), number_of_steps=10000):
+    durations = [measure_transition_lookup_per_step(number_of_transitions, number_of_steps)
+                 for number_of_transitions in transition_counts]
+    # with a linear search the per-step cost grows with the number of transitions (factor 100 in the default case),
+    # with the indexed lookup it stays constant
+    assert durations[-1] < durations[0] * 10
+
+
+@measure_time
+def create_hierarchy_state_with_data_flows(number_of_data_flows=100):
+    """Creates a hierarchy with a producing child, whose outputs are each stored in a scoped variable, and a consuming
+    child, whose single input is connected to the first scoped variable"""
+    hierarchy = HierarchyState("hierarchy_with_data_flows")
+    producer = ExecutionState("producer")
+    consumer = ExecutionState("consumer")
+    hierarchy.add_state(producer)
+    hierarchy.add_state(consumer)
+    input_port_id = consumer.add_input_data_port("input", "int")
+
+    for port_number in range(number_of_data_flows):
+        output_port_id = producer.add_output_data_port("output" + str(port_number), "int")
+        scoped_variable_id = hierarchy.add_scoped_variable("scoped" + str(port_number), "int", 0)
+        hierarchy.add_data_flow(producer.state_id, output_port_id, hierarchy.state_id, scoped_variable_id)
+        if port_number == 0:
+            hierarchy.add_data_flow(hierarchy.state_id, scoped_variable_id, consumer.state_id, input_port_id)
+
+    hierarchy.add_default_values_of_scoped_variables_to_scoped_data()
+    return hierarchy
+
+
+def measure_data_flow_resolution_per_step(number_of_data_flows=100, number_of_steps=10000):
+    """Measures the time the data handling between two child executions needs per step
+
+    After a child state finished, its output is forwarded to the scoped variables and before the next child is
+    started, its inputs are collected from the scoped data.
+    """
+    hierarchy_state = create_hierarchy_state_with_data_flows(number_of_data_flows)
+    producer = [state for state in hierarchy_state.states.itervalues() if state.name == "producer"][0]
+    consumer = [state for state in hierarchy_state.states.itervalues() if state.name == "consumer"][0]
+    output_dictionary = {"output0": 42}
+
+    start = timer()
+    for _ in xrange(number_of_steps):
+        hierarchy_state.update_scoped_variables_with_output_dictionary(output_dictionary, producer)
+        inputs = hierarchy_state.get_inputs_for_state(consumer)
+    duration_per_step = (timer() - start) / number_of_steps
+
+    assert inputs == {"input": 42}
+    logger.info("Data flow resolution with {0} data flows: {1:.3f} us per step".format(number_of_data_flows,
+                                                                                        duration_per_step * 1e6))
+    return duration_per_step
+
+
+def test_data_flow_resolution_scaling(data_flow_counts=(10, 100, 500), number_of_steps=10000):
+    durations = [measure_data_flow_resolution_per_step(number_of_data_flows, number_of_steps)
+                 for number_of_data_flows in data_flow_counts]
+    # the data flows are resolved per port using the routing index of the container state, thus the per-step cost
+    # must not grow with the number of data flows
+    assert durations[-1] < durations[0] * 10
+
+
+LOOP_SCRIPT = """
+def execute(self, inputs, outputs, gvm):
+    outputs["counter"] = inputs["counter"] + 1
+    return 0 if outputs["counter"] >= inputs["steps"] else 1
+"""
+
+
+@measure_time
+def create_looping_hierarchy_state(number_of_steps=10000):
+    """Creates a hierarchy with a single child state, which is executed again and again until it ran the given number
+    of steps"""
+    hierarchy = HierarchyState("looping_hierarchy")
+    steps_port_id = hierarchy.add_input_data_port("steps", "int", number_of_steps)
+    counter_id = hierarchy.add_scoped_variable("counter", "int", 0)
+    state = ExecutionState("loop")
+    state.script_text = LOOP_SCRIPT
+    state.add_outcome("loop", 1)
+    hierarchy.add_state(state)
+    hierarchy.set_start_state(state.state_id)
+
+    counter_input_id = state.add_input_data_port("counter", "int")
+    steps_input_id = state.add_input_data_port("steps", "int")
+    counter_output_id = state.add_output_data_port("counter", "int")
+    hierarchy.add_data_flow(hierarchy.state_id, counter_id, state.state_id, counter_input_id)
+    hierarchy.add_data_flow(hierarchy.state_id, steps_port_id, state.state_id, steps_input_id)
+    hierarchy.add_data_flow(state.state_id, counter_output_id, hierarchy.state_id, counter_id)
+    hierarchy.add_transition(state.state_id, 1, state.state_id, None)
+    hierarchy.add_transition(state.state_id, 0, hierarchy.state_id, 0)
+    return hierarchy
+
+
+def measure_execution_mode_handling_per_step(execution_mode, number_of_steps=10000):
+    """Measures the time a hierarchy state needs per step of its child in the given execution mode
+
+    The hierarchy state loops over its child number_of_steps times and calls handle_execution_mode before each child
+    execution. In step modes, a run-to state of another branch is set, so that the execution does not wait for the
+    next step command.
+    """
+    state_machine_manager = rafcon.core.singleton.state_machine_manager
+    state_machine = StateMachine(create_looping_hierarchy_state(number_of_steps))
+    state_machine_manager.add_state_machine(state_machine)
+    execution_engine = rafcon.core.singleton.state_machine_execution_engine.get_execution_engine(
+        state_machine.state_machine_id)
+    try:
+        # the engine is prepared as by its start method, but the run begins in the measured execution mode
+        state_machine.execution_engine = execution_engine
+        state_machine.root_state.concurrency_queue = Queue.Queue(maxsize=0)
+        execution_engine.set_execution_mode(execution_mode)
+        if execution_mode is not StateMachineExecutionStatus.STARTED:
+            execution_engine.run_to_states = ["other_branch"]
+        execution_engine.synchronization_counter = 0
+
+        start = timer()
+        assert state_machine.start().wait(600)
+        duration_per_step = (timer() - start) / number_of_steps
+        synchronization_counter = execution_engine.synchronization_counter
+    finally:
+        execution_engine.stop()
+        state_machine_manager.remove_state_machine(state_machine.state_machine_id)
+
+    assert state_machine.root_state.final_outcome.outcome_id == 0
+    assert synchronization_counter >= number_of_steps
+    logger.info("Hierarchy state execution in {0}: {1:.3f} us per step".format(execution_mode,
+                                                                                duration_per_step * 1e6))
+    return duration_per_step
+
+
+def test_execution_mode_handling(number_of_steps=10000):
+    execution_modes = [StateMachineExecutionStatus.STARTED, StateMachineExecutionStatus.FORWARD_INTO,
+                       StateMachineExecutionStatus.FORWARD_OVER, StateMachineExecutionStatus.RUN_TO_SELECTED_STATE]
+    durations = dict((execution_mode, measure_execution_mode_handling_per_step(execution_mode, number_of_steps))
+                     for execution_mode in execution_modes)
+    # the STARTED mode neither locks nor computes state paths, but as the execution of the child state dominates the
+    # duration of a step, it is only required not to be slower than the step modes (apart from measurement noise)
+    assert durations[StateMachineExecutionStatus.STARTED] < 1.2 * min(durations.itervalues())
+
+
 if __name__ == '__main__':
     # test_hierarchy_state_execution(10)
     test_hierarchy_state_execution(100)
+    test_transition_lookup_scaling()
+    test_data_flow_resolution_scaling()
+    test_execution_mode_handling()
     # TODO: state creation takes too long (> 100 seconds) => investigate
     # test_hierarchy_state_execution(1000)
     # test_barrier_concurrency_state_execution(10, 10)